@@ -6,20 +6,110 @@ ADDA 시뮬레이션을 위한 유틸리티 모듈들
 - config 파일 로딩 및 파싱
 - 굴절률 데이터 선형 보간
 - 시뮬레이션 파라미터 처리
+- 파장 스윕 진행 모니터링 및 정체 감시
+- 비구형 입자의 배향 평균 (구적점 분산 실행 및 가중 평균)
+- 실패 원인 분류 및 solver 설정 단계별 재시도
+- 형상별 반복 solver/polarizability autotune
+- MPI 작업의 rank당 메모리 예측 및 rank 구성 선택
+- 이산화 해상도 수렴 검사 및 쌍극자 크기 외삽
+- 노드 로컬 scratch 결과의 공유 저장소 원자적 이동
+- 여러 사용자의 작업을 중복 제거하여 core 예산 안에서 실행하는 로컬 작업 서버
+- 파장별 시도 기록 (SQLite 실행 ledger)
+- 스윕 dry run (작업 목록, 굴절률 범위 검사, core-hour/메모리 예측)
+- 굴절률 데이터의 Drude-Lorentz/critical-point 분산 모델 fitting
+- 구/동심 core-shell의 정확한 Mie 해 (빠른 경로 및 ADDA 결과 검증)
+- ellipsoid/cylinder/box 준정적(Gans/MLWA) 미리보기와 공명 구간 우선 스윕 순서
+- 형상 대칭 검사 (완전 대칭 read 형상의 단일 편광 계산)
+- 끝난 모델의 파장 디렉토리 archive 묶기 (압축 해제 없이 member 단위 읽기)
+- 작업별 MPI rank CPU/메모리/쓰기량 sample 및 활용도 보고
+- ADDA 빌드/MPI rank 수 조합의 속도 및 결과 일치 A/B 벤치마크
+- read 형상 파일의 다해상도 coarsening (미리보기 스윕용 거친 형상 pyramid)
 """
 
 __version__ = "1.0.0"
 __author__ = "ADDA Simulation Team"
 
 # 주요 모듈들 import
-from .config_loader import load_config_values, generate_mat_type_from_shape, process_extra_adda_params
+from .config_loader import (
+    load_config_values, load_config_module, resolve_mat_type, resolve_model_dir,
+    generate_mat_type_from_shape, process_extra_adda_params, apply_autotune,
+    sweep_wavelengths, build_shape_args, build_adda_args
+)
 from .refrac_interpolator import get_refractive_indices, linear_interpolate, read_and_interpolate_file
+from .sweep_monitor import SweepMonitor, get_monitor_config
+from .orientation_avg import get_orientation_config, orientation_quadrature, reduce_orientations
+from .retry_policy import get_retry_config, classify_failure, load_attempts
+from .autotune import SolverAutotuner
+from .memory_planner import MemoryPlanner, get_memory_config
+from .convergence_study import ConvergenceStudy, extrapolate
+from .scratch_stage import publish_lambda_dir
+from .job_server import JobQueue, build_manifest, get_job_server_config
+from .run_ledger import RunLedger
+from .sweep_plan import SweepPlan
+from .dispersion_fit import DispersionModel, DispersionLibrary, get_dispersion_config
+from .mie_solver import MieSolver, mie_cross_sections, get_mie_config
+from .quasistatic_preview import QuasiStaticPreview, depolarization_factors, get_preview_config
+from .shape_symmetry import symmetry_plan, analyze_dipoles, get_symmetry_config
+from .model_archive import ModelArchive, pack_model, unpack_model, get_archive_config
+from .resource_sampler import ResourceSampler, get_resource_config
+from .binary_benchmark import BinaryBenchmark, get_binary_benchmark_config
+from .shape_coarsen import coarsen_dipoles, coarse_variant, apply_coarse_variant, get_coarsen_config
 
 __all__ = [
     'load_config_values',
+    'load_config_module',
+    'resolve_mat_type',
+    'resolve_model_dir',
     'generate_mat_type_from_shape', 
     'process_extra_adda_params',
+    'apply_autotune',
+    'sweep_wavelengths',
+    'build_shape_args',
+    'build_adda_args',
     'get_refractive_indices',
     'linear_interpolate',
-    'read_and_interpolate_file'
+    'read_and_interpolate_file',
+    'SweepMonitor',
+    'get_monitor_config',
+    'get_orientation_config',
+    'orientation_quadrature',
+    'reduce_orientations',
+    'get_retry_config',
+    'classify_failure',
+    'load_attempts',
+    'SolverAutotuner',
+    'MemoryPlanner',
+    'get_memory_config',
+    'ConvergenceStudy',
+    'extrapolate',
+    'publish_lambda_dir',
+    'JobQueue',
+    'build_manifest',
+    'get_job_server_config',
+    'RunLedger',
+    'SweepPlan',
+    'DispersionModel',
+    'DispersionLibrary',
+    'get_dispersion_config',
+    'MieSolver',
+    'mie_cross_sections',
+    'get_mie_config',
+    'QuasiStaticPreview',
+    'depolarization_factors',
+    'get_preview_config',
+    'symmetry_plan',
+    'analyze_dipoles',
+    'get_symmetry_config',
+    'ModelArchive',
+    'pack_model',
+    'unpack_model',
+    'get_archive_config',
+    'ResourceSampler',
+    'get_resource_config',
+    'BinaryBenchmark',
+    'get_binary_benchmark_config',
+    'coarsen_dipoles',
+    'coarse_variant',
+    'apply_coarse_variant',
+    'get_coarsen_config'
 ]
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+ADDA Solver Autotune
+형상별로 가장 빨리 수렴하는 반복 solver(-iter)와 polarizability(-pol) 조합 탐색
+
+대표 파장 몇 개에서 (pol, iter) 조합마다 짧은 시험 계산을 실행하여 반복 수와 wall time을 측정하고,
+모든 파장에서 수렴한 조합 중 총 시간이 가장 짧은 조합과 pol별로 가장 빠른 iter를 <모델 디렉토리>/autotune.json에 기록한다.
+config_loader와 retry_policy는 AUTOTUNE_CONFIG['apply']가 True이면 config의 pol에서 가장 빠른 iter를 ADDA_PARAMS보다 우선 사용한다.
+pol은 계산되는 물리(편극률 모델)를 바꾸므로 AUTOTUNE_CONFIG['apply_pol']이 True일 때만 최적 조합의 pol과 iter를 함께 적용한다.
+
+사용법:
+    python autotune.py <config_file> [--wavelengths 400 700 1000] [--iters qmr bicgstab] [--pols ldr fcd]
+                       [--maxiter N] [--procs N] [--timeout S] [--keep] [--dry-run]
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import re
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+try:
+    from .config_loader import (
+        load_config_module, resolve_model_dir, build_adda_args, AUTOTUNE_FILE_NAME
+    )
+    from .refrac_interpolator import get_refractive_indices
+    from .stage_tracer import trace_span, TRACE_FILE_NAME
+except ImportError:
+    from config_loader import (
+        load_config_module, resolve_model_dir, build_adda_args, AUTOTUNE_FILE_NAME
+    )
+    from refrac_interpolator import get_refractive_indices
+    from stage_tracer import trace_span, TRACE_FILE_NAME
+
+AUTOTUNE_WORK_DIR = '.autotune'
+
+ITERATIONS_PATTERN = re.compile(r'Total number of iterations:\s*(\d+)')
+RESIDUAL_INDEX_PATTERN = re.compile(r'RE_(\d+)\s*=')
+WALL_TIME_PATTERN = re.compile(r'Total wall time:\s*([0-9.]+)')
+
+DEFAULT_AUTOTUNE_CONFIG = {
+    'iters': ['qmr', 'qmr2', 'bicgstab', 'bicg'],
+    'pols': ['ldr', 'fcd', 'igt_so'],
+    'wavelengths': None,         # None이면 스윕 범위의 양 끝과 중앙
+    'maxiter': 3000,             # 시험 계산의 반복 수 상한 (넘으면 미수렴으로 간주)
+    'procs': None,               # None이면 MPI_PROCS
+    'timeout': None,             # 시험 계산 하나의 시간 상한 (초)
+    'apply': True,               # config의 pol에서 가장 빠른 autotune.json iter를 스윕에 적용
+    'apply_pol': False,          # 최적 조합의 pol과 iter 적용 (결과가 달라지므로 명시적으로 켤 때만)
+}
+
+def get_autotune_config(config):
+    """config의 AUTOTUNE_CONFIG를 기본값과 병합"""
+    autotune_config = dict(DEFAULT_AUTOTUNE_CONFIG)
+    autotune_config.update(getattr(config, 'AUTOTUNE_CONFIG', {}) or {})
+    return autotune_config
+
+def representative_wavelengths(config, count=3):
+    """스윕 범위에서 균등하게 고른 대표 파장 (LAMBDA_STEP 격자에 맞춤)"""
+    start = getattr(config, 'LAMBDA_START', 400)
+    end = getattr(config, 'LAMBDA_END', 1200)
+    step = getattr(config, 'LAMBDA_STEP', 10)
+    n_steps = max((end - start) // step, 0)
+    picks = sorted({start + round(i * n_steps / max(count - 1, 1)) * step for i in range(count)})
+    return picks
+
+def refractive_values(config_file, wavelength):
+    """refrac_interpolator의 출력에서 -m 인수 목록 추출 (실패 시 None)"""
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(io.StringIO()):
+        get_refractive_indices(config_file, wavelength)
+    match = re.search(r'REFRAC_VALUES="([^"]*)"', buffer.getvalue())
+    return match.group(1).split() if match else None
+
+def parse_trial_log(log_path):
+    """시험 계산 log에서 (반복 수, wall time) 추출"""
+    try:
+        text = Path(log_path).read_text(errors='replace')
+    except OSError:
+        return None, None
+    match = ITERATIONS_PATTERN.search(text)
+    if match:
+        iterations = int(match.group(1))
+    else:
+        indices = [int(value) for value in RESIDUAL_INDEX_PATTERN.findall(text)]
+        iterations = max(indices) if indices else None
+    wall = WALL_TIME_PATTERN.search(text)
+    return iterations, float(wall.group(1)) if wall else None
+
+class SolverAutotuner:
+    """(pol, iter) 조합별 시험 계산 실행 및 결과 비교 클래스"""
+
+    def __init__(self, config_file, wavelengths=None, iters=None, pols=None, maxiter=None,
+                 procs=None, timeout=None):
+        self.config_file = str(Path(config_file).resolve())
+        self.config = load_config_module(self.config_file)
+        tune_config = get_autotune_config(self.config)
+
+        self.model_dir = resolve_model_dir(self.config)
+        self.work_dir = self.model_dir / AUTOTUNE_WORK_DIR
+        self.trace_file = self.model_dir / TRACE_FILE_NAME
+        self.wavelengths = wavelengths or tune_config['wavelengths'] or representative_wavelengths(self.config)
+        self.iters = iters or tune_config['iters']
+        self.pols = pols or tune_config['pols']
+        self.maxiter = maxiter or tune_config['maxiter']
+        self.procs = procs or tune_config['procs'] or getattr(self.config, 'MPI_PROCS', 40)
+        self.timeout = timeout or tune_config['timeout']
+
+        adda_bin = getattr(self.config, 'ADDA_BIN', Path.home() / "adda" / "src")
+        self.adda_exe = Path(adda_bin) / "mpi" / "adda_mpi"
+        self.mpi_exec = shutil.which('mpiexec') or shutil.which('mpirun')
+        self.trials = []
+        self.best_by_pol = {}
+
+    def build_command(self, wavelength, m_values, pol, iter_method, out_dir):
+        """시험 계산용 adda_mpi 명령 (필드 저장 플래그 제외)"""
+        adda_params = dict(getattr(self.config, 'ADDA_PARAMS', {}))
+        adda_params.update({'pol': pol, 'iter': iter_method, 'maxiter': self.maxiter})
+        return ([self.mpi_exec, '-n', str(self.procs), str(self.adda_exe)]
+                + build_adda_args(self.config, adda_params, wavelength, m_values, out_dir))
+
+    def run_trial(self, wavelength, m_values, pol, iter_method):
+        """시험 계산 하나 실행 후 결과 dict 반환"""
+        out_dir = self.work_dir / f"{pol}_{iter_method}" / f"lambda_{wavelength}nm"
+        shutil.rmtree(out_dir, ignore_errors=True)
+        out_dir.parent.mkdir(parents=True, exist_ok=True)
+        command = self.build_command(wavelength, m_values, pol, iter_method, out_dir)
+
+        start = time.time()
+        with trace_span('autotune_trial', wavelength, self.trace_file, profile=False,
+                        pol=pol, iter=iter_method) as span:
+            try:
+                result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                        timeout=self.timeout)
+                exit_code = result.returncode
+            except subprocess.TimeoutExpired:
+                exit_code = None
+            span['exit_code'] = exit_code
+        elapsed = time.time() - start
+
+        iterations, wall_time = parse_trial_log(out_dir / "log")
+        converged = exit_code == 0 and any(
+            (out_dir / name).exists() for name in ('CrossSec-X', 'CrossSec-Y', 'CrossSec'))
+        trial = {
+            'wavelength': wavelength,
+            'pol': pol,
+            'iter': iter_method,
+            'converged': converged,
+            'exit_code': exit_code,
+            'iterations': iterations,
+            'wall_time': wall_time if wall_time is not None else elapsed,
+        }
+        self.trials.append(trial)
+        return trial
+
+    def run(self, verbose=True):
+        """모든 (파장, pol, iter) 조합 실행"""
+        if self.mpi_exec is None:
+            raise RuntimeError("No MPI implementation found (mpiexec/mpirun)")
+        if not self.adda_exe.exists():
+            raise RuntimeError(f"ADDA binary not found: {self.adda_exe}")
+
+        for wavelength in self.wavelengths:
+            m_values = refractive_values(self.config_file, wavelength)
+            if m_values is None:
+                print(f"[WARNING] No refractive index for {wavelength} nm, skipping")
+                continue
+            for pol in self.pols:
+                for iter_method in self.iters:
+                    trial = self.run_trial(wavelength, m_values, pol, iter_method)
+                    if verbose:
+                        status = 'ok' if trial['converged'] else 'FAILED'
+                        print(f"  lambda={wavelength}nm pol={pol:<7} iter={iter_method:<9} "
+                              f"iters={trial['iterations']} time={trial['wall_time']:.2f}s {status}")
+        return self.trials
+
+    def rank(self):
+        """조합별 총 시간 순위 (한 파장이라도 미수렴하면 inf)"""
+        combos = {}
+        for trial in self.trials:
+            key = (trial['pol'], trial['iter'])
+            entry = combos.setdefault(key, {'pol': key[0], 'iter': key[1], 'total_time': 0.0,
+                                            'total_iterations': 0, 'converged': 0, 'trials': 0})
+            entry['trials'] += 1
+            if trial['converged']:
+                entry['converged'] += 1
+                entry['total_time'] += trial['wall_time']
+                entry['total_iterations'] += trial['iterations'] or 0
+        for entry in combos.values():
+            if entry['converged'] < entry['trials']:
+                entry['total_time'] = math.inf
+        return sorted(combos.values(), key=lambda entry: (entry['total_time'], entry['total_iterations']))
+
+    def save(self):
+        """autotune.json 기록 후 (최적 조합, 파일 경로) 반환"""
+        ranking = self.rank()
+        best = ranking[0] if ranking and math.isfinite(ranking[0]['total_time']) else None
+        # pol별 최적 iter (apply_pol이 꺼져 있으면 config의 pol에서 수렴한 조합만 적용)
+        self.best_by_pol = {}
+        for entry in ranking:
+            if math.isfinite(entry['total_time']):
+                self.best_by_pol.setdefault(entry['pol'], entry['iter'])
+        result = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'wavelengths': self.wavelengths,
+            'procs': self.procs,
+            'maxiter': self.maxiter,
+            'best': {'pol': best['pol'], 'iter': best['iter']} if best else None,
+            'best_by_pol': self.best_by_pol,
+            'ranking': [dict(entry, total_time=entry['total_time'] if math.isfinite(entry['total_time']) else None)
+                        for entry in ranking],
+            'trials': self.trials,
+        }
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        output_file = self.model_dir / AUTOTUNE_FILE_NAME
+        with open(output_file, 'w') as f:
+            json.dump(result, f, indent=2)
+        return best, output_file
+
+def print_ranking(ranking, baseline=None):
+    """조합별 순위 표 출력"""
+    print(f"\n{'Pol':<9}{'Iter':<11}{'Converged':>10}{'Iterations':>12}{'Time(s)':>10}{'Speedup':>9}")
+    base_time = None
+    if baseline:
+        for entry in ranking:
+            if (entry['pol'], entry['iter']) == baseline and math.isfinite(entry['total_time']):
+                base_time = entry['total_time']
+    for entry in ranking:
+        finite = math.isfinite(entry['total_time'])
+        time_str = f"{entry['total_time']:.2f}" if finite else '-'
+        speedup = f"x{base_time / entry['total_time']:.2f}" if base_time and finite and entry['total_time'] > 0 else ''
+        print(f"{entry['pol']:<9}{entry['iter']:<11}{entry['converged']:>5}/{entry['trials']:<4}"
+              f"{entry['total_iterations']:>12}{time_str:>10}{speedup:>9}")
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='ADDA 반복 solver/polarizability autotune')
+    parser.add_argument('config_file', help='config 파일 경로')
+    parser.add_argument('--wavelengths', type=int, nargs='+', help='시험 파장 (nm, 기본값: 스윕 양 끝과 중앙)')
+    parser.add_argument('--iters', nargs='+', help='비교할 -iter 방법')
+    parser.add_argument('--pols', nargs='+', help='비교할 -pol 방법')
+    parser.add_argument('--maxiter', type=int, help='시험 계산 반복 수 상한')
+    parser.add_argument('--procs', type=int, help='시험 계산 MPI 프로세스 수')
+    parser.add_argument('--timeout', type=float, help='시험 계산 하나의 시간 상한 (초)')
+    parser.add_argument('--keep', action='store_true', help='시험 계산 결과 디렉토리 유지')
+    parser.add_argument('--dry-run', action='store_true', help='실행할 명령만 출력')
+    args = parser.parse_args()
+
+    tuner = SolverAutotuner(args.config_file, args.wavelengths, args.iters, args.pols,
+                            args.maxiter, args.procs, args.timeout)
+    print(f"[AUTOTUNE] {len(tuner.pols)} pol x {len(tuner.iters)} iter combinations "
+          f"at {tuner.wavelengths} nm ({tuner.procs} processes, maxiter {tuner.maxiter})")
+
+    if args.dry_run:
+        for wavelength in tuner.wavelengths:
+            for pol in tuner.pols:
+                for iter_method in tuner.iters:
+                    out_dir = tuner.work_dir / f"{pol}_{iter_method}" / f"lambda_{wavelength}nm"
+                    command = tuner.build_command(wavelength, ['<m>'], pol, iter_method, out_dir)
+                    print(' '.join(str(part) for part in command))
+        return
+
+    try:
+        tuner.run()
+    except RuntimeError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    finally:
+        if not args.keep:
+            shutil.rmtree(tuner.work_dir, ignore_errors=True)
+
+    baseline_pol = getattr(tuner.config, 'ADDA_PARAMS', {}).get('pol', 'ldr')
+    baseline_iter = getattr(tuner.config, 'ADDA_PARAMS', {}).get('iter', 'qmr')
+    print_ranking(tuner.rank(), (baseline_pol, baseline_iter))
+
+    best, output_file = tuner.save()
+    if best is None:
+        print("\n[ERROR] No combination converged at every test wavelength; nothing applied")
+        sys.exit(1)
+    print(f"\n[BEST] pol={best['pol']} iter={best['iter']}")
+    baseline_best = tuner.best_by_pol.get(baseline_pol)
+    if baseline_best:
+        print(f"[BEST] for the configured pol={baseline_pol}: iter={baseline_best}")
+    else:
+        print(f"[WARNING] No combination with the configured pol={baseline_pol} converged at every test wavelength")
+    print(f"[SAVED] {output_file}")
+    print("While AUTOTUNE_CONFIG['apply'] is True the sweep uses the fastest iter for the configured pol; "
+          f"the overall best pair is applied only with AUTOTUNE_CONFIG['apply_pol'] "
+          f"(or set ADDA_PARAMS 'pol': '{best['pol']}', 'iter': '{best['iter']}')")
+
+if __name__ == "__main__":
+    main()
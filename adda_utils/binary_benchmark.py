@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+ADDA Binary A/B Benchmark
+여러 ADDA 빌드(ADDA_BIN 경로, 예: FFT_TEMPERTON/FFTW, 다른 컴파일러)와 MPI rank 수/설정 조합의 속도와 결과 일치 비교
+
+고정된 작은 작업 행렬 (대표 파장 × 빌드 × rank 수)을 같은 config의 형상/굴절률로 실행하여
+조합별 총 시간과 반복당 시간을 측정하고, 기준 조합 (첫 번째 빌드의 첫 번째 rank 수)과 Cext/Cabs가
+rtol 안에서 일치하는지 확인한 결과를 <모델 디렉토리>/binary_benchmark.json에 기록한다.
+반복 측정 시 조합별 최소 시간을 사용한다.
+
+사용법:
+    python binary_benchmark.py <config_file> [--bin LABEL=ADDA_BIN ...] [--procs 8 16] [--wavelengths 400 700]
+                               [--repeat N] [--rtol 1e-3] [--timeout S] [--keep] [--dry-run]
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+try:
+    from .config_loader import load_config_module, resolve_model_dir, build_adda_args, apply_autotune
+    from .autotune import representative_wavelengths, refractive_values, parse_trial_log
+    from .orientation_avg import polarization_average
+    from .stage_tracer import trace_span, TRACE_FILE_NAME
+except ImportError:
+    from config_loader import load_config_module, resolve_model_dir, build_adda_args, apply_autotune
+    from autotune import representative_wavelengths, refractive_values, parse_trial_log
+    from orientation_avg import polarization_average
+    from stage_tracer import trace_span, TRACE_FILE_NAME
+
+BENCHMARK_FILE_NAME = 'binary_benchmark.json'
+BENCHMARK_WORK_DIR = '.binary_benchmark'
+QUANTITIES = ('Cext', 'Cabs')
+
+DEFAULT_BINARY_BENCHMARK_CONFIG = {
+    'binaries': None,            # [{'label', 'adda_bin', 'mpi_args', 'env'}] (None: config의 ADDA_BIN 하나)
+    'procs': None,               # 비교할 rank 수 목록 (None: [MPI_PROCS])
+    'wavelengths': None,         # None이면 스윕 범위의 양 끝과 중앙
+    'repeat': 1,                 # 조합별 반복 측정 수 (최소 시간 사용)
+    'rtol': 1e-3,                # 기준 조합과 Cext/Cabs 허용 상대 차이
+    'timeout': None,             # 계산 하나의 시간 상한 (초)
+}
+
+def get_binary_benchmark_config(config):
+    """config의 BINARY_BENCHMARK_CONFIG를 기본값과 병합"""
+    benchmark_config = dict(DEFAULT_BINARY_BENCHMARK_CONFIG)
+    benchmark_config.update(getattr(config, 'BINARY_BENCHMARK_CONFIG', {}) or {})
+    return benchmark_config
+
+def parse_binary_spec(spec):
+    """명령행 'LABEL=ADDA_BIN' (또는 경로만)을 빌드 dict로 변환"""
+    label, sep, path = spec.partition('=')
+    if not sep:
+        label, path = Path(spec).expanduser().resolve().parent.name or spec, spec
+    return {'label': label, 'adda_bin': path}
+
+class BinaryBenchmark:
+    """빌드 × rank 수 조합별 시험 계산 실행 및 속도/일치 비교 클래스"""
+
+    def __init__(self, config_file, binaries=None, procs=None, wavelengths=None, repeat=None,
+                 rtol=None, timeout=None):
+        self.config_file = str(Path(config_file).resolve())
+        self.config = load_config_module(self.config_file)
+        bench_config = get_binary_benchmark_config(self.config)
+
+        self.model_dir = resolve_model_dir(self.config)
+        self.work_dir = self.model_dir / BENCHMARK_WORK_DIR
+        self.trace_file = self.model_dir / TRACE_FILE_NAME
+        self.adda_params = dict(apply_autotune(self.config, getattr(self.config, 'ADDA_PARAMS', {})))
+        default_bin = getattr(self.config, 'ADDA_BIN', Path.home() / "adda" / "src")
+        self.binaries = []
+        for entry in binaries or bench_config['binaries'] or [{'label': 'current', 'adda_bin': default_bin}]:
+            self.binaries.append({
+                'label': str(entry.get('label') or Path(str(entry['adda_bin'])).name),
+                'adda_bin': str(Path(str(entry['adda_bin'])).expanduser()),
+                'mpi_args': [str(arg) for arg in entry.get('mpi_args', []) or []],
+                'env': {str(key): str(value) for key, value in (entry.get('env') or {}).items()},
+            })
+        labels = [binary['label'] for binary in self.binaries]
+        if len(set(labels)) != len(labels):
+            raise ValueError(f"Duplicate binary labels: {labels}")
+        self.procs = procs or bench_config['procs'] or [getattr(self.config, 'MPI_PROCS', 40)]
+        self.wavelengths = wavelengths or bench_config['wavelengths'] or representative_wavelengths(self.config)
+        self.repeat = max(int(repeat or bench_config['repeat']), 1)
+        self.rtol = rtol or bench_config['rtol']
+        self.timeout = timeout or bench_config['timeout']
+        self.mpi_exec = shutil.which('mpiexec') or shutil.which('mpirun')
+        self.runs = []
+
+    def combinations(self):
+        """(빌드, rank 수) 조합 목록 (첫 번째가 기준)"""
+        return [(binary, procs) for binary in self.binaries for procs in self.procs]
+
+    def build_command(self, binary, procs, wavelength, m_values, out_dir):
+        """빌드/rank 수만 바꾼 adda_mpi 명령 (필드 저장 플래그 제외)"""
+        adda_exe = Path(binary['adda_bin']) / "mpi" / "adda_mpi"
+        return ([self.mpi_exec, '-n', str(procs)] + binary['mpi_args'] + [str(adda_exe)]
+                + build_adda_args(self.config, self.adda_params, wavelength, m_values, out_dir))
+
+    def run_one(self, binary, procs, wavelength, m_values, repetition):
+        """계산 하나 실행 후 결과 dict 반환"""
+        out_dir = (self.work_dir / f"{binary['label']}_np{procs}" / f"r{repetition}"
+                   / f"lambda_{wavelength}nm")
+        shutil.rmtree(out_dir, ignore_errors=True)
+        out_dir.parent.mkdir(parents=True, exist_ok=True)
+        command = self.build_command(binary, procs, wavelength, m_values, out_dir)
+        env = dict(os.environ, **binary['env'])
+
+        start = time.time()
+        with trace_span('binary_benchmark_run', wavelength, self.trace_file, profile=False,
+                        binary=binary['label'], procs=procs) as span:
+            try:
+                result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                        timeout=self.timeout, env=env)
+                exit_code = result.returncode
+            except subprocess.TimeoutExpired:
+                exit_code = None
+            span['exit_code'] = exit_code
+        elapsed = time.time() - start
+
+        values = polarization_average(out_dir) if exit_code == 0 else None
+        iterations, wall_time = parse_trial_log(out_dir / "log")
+        run = {
+            'binary': binary['label'],
+            'procs': procs,
+            'wavelength': wavelength,
+            'repetition': repetition,
+            'ok': values is not None,
+            'exit_code': exit_code,
+            'iterations': iterations,
+            'wall_time': wall_time,
+            'elapsed': elapsed,
+        }
+        if values is not None:
+            run.update({key: values[key] for key in QUANTITIES})
+        self.runs.append(run)
+        return run
+
+    def run(self, verbose=True):
+        """모든 (파장, 빌드, rank 수, 반복) 조합 실행 (반복은 조합 순서를 돌아가며 측정)"""
+        if self.mpi_exec is None:
+            raise RuntimeError("No MPI implementation found (mpiexec/mpirun)")
+        combinations = []
+        for binary, procs in self.combinations():
+            adda_exe = Path(binary['adda_bin']) / "mpi" / "adda_mpi"
+            if adda_exe.exists():
+                combinations.append((binary, procs))
+            else:
+                print(f"[WARNING] ADDA binary not found for '{binary['label']}': {adda_exe}, skipping")
+        if not combinations:
+            raise RuntimeError("None of the benchmarked ADDA binaries exist")
+
+        for wavelength in self.wavelengths:
+            m_values = refractive_values(self.config_file, wavelength)
+            if m_values is None:
+                print(f"[WARNING] No refractive index for {wavelength} nm, skipping")
+                continue
+            for repetition in range(self.repeat):
+                for binary, procs in combinations:
+                    run = self.run_one(binary, procs, wavelength, m_values, repetition)
+                    if verbose:
+                        status = f"Cext={run['Cext']:.6g}" if run['ok'] else 'FAILED'
+                        print(f"  lambda={wavelength}nm {binary['label']:<12} np={procs:<4} "
+                              f"iters={run['iterations']} time={run['elapsed']:.2f}s {status}")
+        return self.runs
+
+    def best_runs(self):
+        """(빌드, rank 수, 파장)별 가장 빠른 성공 실행 (반복 중 최소 시간)"""
+        best = {}
+        for run in self.runs:
+            if not run['ok']:
+                continue
+            key = (run['binary'], run['procs'], run['wavelength'])
+            if key not in best or run['elapsed'] < best[key]['elapsed']:
+                best[key] = run
+        return best
+
+    def summarize(self):
+        """조합별 총 시간, 반복당 시간, 기준 대비 최대 상대 차이와 일치 여부 (빠른 순서)"""
+        best = self.best_runs()
+        tested = {(run['binary'], run['procs']) for run in self.runs}
+        combinations = [(binary['label'], procs) for binary, procs in self.combinations()
+                        if (binary['label'], procs) in tested]
+        if not combinations:
+            return []
+        reference = combinations[0]
+        rows = []
+        for label, procs in combinations:
+            runs = [best.get((label, procs, wavelength)) for wavelength in self.wavelengths]
+            ok = [run for run in runs if run is not None]
+            deviations = []
+            for run in ok:
+                base = best.get(reference + (run['wavelength'],))
+                if base is None:
+                    continue
+                for key in QUANTITIES:
+                    scale = max(abs(base[key]), 1e-300)
+                    deviations.append(abs(run[key] - base[key]) / scale)
+            per_iteration = [run['wall_time'] / run['iterations'] for run in ok
+                             if run['wall_time'] is not None and run['iterations']]
+            complete = len(ok) == len(runs) and len(ok) > 0
+            max_dev = max(deviations) if deviations else None
+            rows.append({
+                'binary': label,
+                'procs': procs,
+                'reference': (label, procs) == reference,
+                'completed': len(ok),
+                'jobs': len(runs),
+                'total_time': sum(run['elapsed'] for run in ok) if complete else math.inf,
+                'time_per_iteration': sum(per_iteration) / len(per_iteration) if per_iteration else None,
+                'total_iterations': sum(run['iterations'] or 0 for run in ok),
+                'max_rel_dev': max_dev,
+                'agrees': complete and max_dev is not None and max_dev <= self.rtol,
+            })
+        base_time = rows[0]['total_time']
+        for row in rows:
+            finite = math.isfinite(row['total_time']) and row['total_time'] > 0
+            row['speedup'] = base_time / row['total_time'] if finite and math.isfinite(base_time) else None
+        return sorted(rows, key=lambda row: (not row['agrees'], row['total_time']))
+
+    def save(self, summary):
+        """binary_benchmark.json 기록 후 파일 경로 반환"""
+        result = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'wavelengths': self.wavelengths,
+            'repeat': self.repeat,
+            'rtol': self.rtol,
+            'binaries': self.binaries,
+            'procs': self.procs,
+            'summary': [dict(row, total_time=row['total_time'] if math.isfinite(row['total_time']) else None)
+                        for row in summary],
+            'runs': self.runs,
+        }
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        output_file = self.model_dir / BENCHMARK_FILE_NAME
+        with open(output_file, 'w') as f:
+            json.dump(result, f, indent=2)
+        return output_file
+
+def print_summary(summary, rtol):
+    """조합별 비교 표 출력"""
+    print(f"\n{'Binary':<14}{'Procs':>6}{'Jobs':>7}{'Time(s)':>10}{'s/iter':>10}{'Speedup':>9}"
+          f"{'Max dev':>10}  Result")
+    for row in summary:
+        finite = math.isfinite(row['total_time'])
+        time_str = f"{row['total_time']:.2f}" if finite else '-'
+        per_iter = f"{row['time_per_iteration']:.3g}" if row['time_per_iteration'] is not None else '-'
+        speedup = f"x{row['speedup']:.2f}" if row['speedup'] is not None else ''
+        deviation = f"{row['max_rel_dev']:.1e}" if row['max_rel_dev'] is not None else '-'
+        if row['reference']:
+            result = 'reference'
+        elif row['agrees']:
+            result = 'ok'
+        elif row['completed'] < row['jobs']:
+            result = 'FAILED'
+        else:
+            result = f"MISMATCH (> {rtol:g})"
+        print(f"{row['binary']:<14}{row['procs']:>6}{row['completed']:>4}/{row['jobs']:<2}{time_str:>10}"
+              f"{per_iter:>10}{speedup:>9}{deviation:>10}  {result}")
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='ADDA 빌드/MPI rank 수 A/B 벤치마크')
+    parser.add_argument('config_file', help='config 파일 경로')
+    parser.add_argument('--bin', action='append', metavar='LABEL=ADDA_BIN',
+                        help='비교할 ADDA_BIN (mpi/adda_mpi가 있는 src 디렉토리), 여러 번 지정')
+    parser.add_argument('--procs', type=int, nargs='+', help='비교할 MPI rank 수')
+    parser.add_argument('--wavelengths', type=int, nargs='+', help='시험 파장 (nm, 기본값: 스윕 양 끝과 중앙)')
+    parser.add_argument('--repeat', type=int, help='조합별 반복 측정 수')
+    parser.add_argument('--rtol', type=float, help='기준 조합과 Cext/Cabs 허용 상대 차이')
+    parser.add_argument('--timeout', type=float, help='계산 하나의 시간 상한 (초)')
+    parser.add_argument('--keep', action='store_true', help='조합별 계산 결과 디렉토리 유지')
+    parser.add_argument('--dry-run', action='store_true', help='실행할 명령만 출력')
+    args = parser.parse_args()
+
+    binaries = [parse_binary_spec(spec) for spec in args.bin] if args.bin else None
+    try:
+        bench = BinaryBenchmark(args.config_file, binaries, args.procs, args.wavelengths, args.repeat,
+                                args.rtol, args.timeout)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    print(f"[BENCHMARK] {len(bench.binaries)} binaries x procs {bench.procs} at {bench.wavelengths} nm "
+          f"({bench.repeat} repetition(s), rtol {bench.rtol:g})")
+    for binary in bench.binaries:
+        extras = ' '.join(binary['mpi_args'] + [f"{key}={value}" for key, value in binary['env'].items()])
+        print(f"  {binary['label']}: {binary['adda_bin']}" + (f" ({extras})" if extras else ''))
+
+    if args.dry_run:
+        for wavelength in bench.wavelengths:
+            m_values = refractive_values(bench.config_file, wavelength) or ['<m>']
+            for binary, procs in bench.combinations():
+                out_dir = bench.work_dir / f"{binary['label']}_np{procs}" / "r0" / f"lambda_{wavelength}nm"
+                print(' '.join(str(part) for part in bench.build_command(binary, procs, wavelength,
+                                                                          m_values, out_dir)))
+        return
+
+    try:
+        bench.run()
+    except RuntimeError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    finally:
+        if not args.keep:
+            shutil.rmtree(bench.work_dir, ignore_errors=True)
+
+    summary = bench.summarize()
+    if not summary:
+        print("\n[ERROR] No benchmark run finished")
+        sys.exit(1)
+    print_summary(summary, bench.rtol)
+    output_file = bench.save(summary)
+
+    fastest = summary[0]
+    if fastest['agrees']:
+        print(f"\n[FASTEST] {fastest['binary']} with {fastest['procs']} ranks "
+              f"({fastest['total_time']:.2f}s" + (f", x{fastest['speedup']:.2f} vs reference)" if
+                                                  fastest['speedup'] is not None else ")"))
+    mismatched = [row for row in summary if not row['agrees'] and not row['reference']]
+    if mismatched:
+        print(f"[WARNING] {len(mismatched)} combination(s) failed or disagree with the reference beyond "
+              f"rtol {bench.rtol:g}; do not switch ADDA_BIN to them")
+    print(f"[SAVED] {output_file}")
+
+if __name__ == "__main__":
+    main()
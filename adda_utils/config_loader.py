@@ -5,76 +5,157 @@ ADDA Config Loader
 """
 import sys
 import os
+import json
+import time
 from pathlib import Path
 
+try:
+    from .stage_tracer import emit_span, TRACE_FILE_NAME
+    from .orientation_avg import orientation_shell_values
+except ImportError:
+    from stage_tracer import emit_span, TRACE_FILE_NAME
+    from orientation_avg import orientation_shell_values
+
+def load_config_module(config_file_path):
+    """Config 파일을 Python 모듈로 동적 로드"""
+    config_path = Path(config_file_path).resolve()
+    config_dir = config_path.parent
+    config_module = config_path.stem
+    
+    # Python 모듈명에서 유효하지 않은 문자들을 처리
+    # 하이픈을 언더스코어로 변경하고 숫자로 시작하는 경우 prefix 추가
+    safe_module_name = config_module.replace('-', '_')
+    if safe_module_name[0].isdigit():
+        safe_module_name = 'config_' + safe_module_name
+    
+    sys.path.insert(0, str(config_dir))
+    
+    # 임시로 모듈명을 변경해서 import
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(safe_module_name, config_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load config from {config_path}")
+    
+    config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config)
+    # ADDA_COARSE_FACTOR가 있으면 read 형상을 거친 형상 (미리보기 스윕)으로 교체
+    # (shape_coarsen이 shape_symmetry를 통해 이 모듈을 import하므로 여기서 로드)
+    try:
+        from .shape_coarsen import apply_coarse_variant
+    except ImportError:
+        from shape_coarsen import apply_coarse_variant
+    return apply_coarse_variant(config)
+
+def resolve_mat_type(config):
+    """config와 refractive test 모드 여부로 최종 MAT_TYPE(결과 폴더명) 결정"""
+    # refractive test 모드 확인
+    refractive_test_mode = os.environ.get('ADDA_REFRACTIVE_TEST_MODE') == 'true'
+    
+    # ADDA_PARAMS 및 기본 설정
+    adda_params = getattr(config, 'ADDA_PARAMS', {})
+    refrac_sets = adda_params.get('refractive_index_sets', [['n_100', 'k_100']])
+    
+    # MAT_TYPE 결정 (명시적으로 정의된 것 우선)
+    mat_type = getattr(config, 'MAT_TYPE', None)
+    
+    if refractive_test_mode:
+        # refractive test 모드: 굴절률 이름 추출
+        if len(refrac_sets) > 0 and len(refrac_sets[0]) >= 2:
+            n_key, k_key = refrac_sets[0][0], refrac_sets[0][1]
+            
+            # n_johnson, k_johnson -> johnson 추출
+            if n_key.startswith('n_') and k_key.startswith('k_'):
+                name_n = n_key[2:]  # "n_" 제거
+                name_k = k_key[2:]  # "k_" 제거
+                if name_n == name_k:
+                    refrac_name = name_n
+                else:
+                    refrac_name = f"{n_key}_{k_key}"
+            else:
+                refrac_name = f"{n_key}_{k_key}"
+            
+            # MAT_TYPE이 명시되어 있지 않으면 자동 생성
+            if mat_type is None:
+                mat_type = generate_mat_type_from_shape(config, adda_params)
+            
+            # 최종 경로: 굴절률이름/MAT_TYPE
+            final_mat_type = f"{refrac_name}/{mat_type}"
+        else:
+            final_mat_type = "default_particle"
+    else:
+        # 일반 모드: MAT_TYPE 또는 자동 생성
+        if mat_type is None:
+            mat_type = generate_mat_type_from_shape(config, adda_params)
+        
+        final_mat_type = mat_type
+    
+    return final_mat_type
+
+def resolve_model_dir(config):
+    """config에서 결과 모델 디렉토리 (RESEARCH_BASE_DIR/MAT_TYPE) 경로 계산"""
+    research_base = getattr(config, 'RESEARCH_BASE_DIR', Path.home() / "research" / "adda")
+    return Path(research_base).expanduser() / resolve_mat_type(config)
+
+def sweep_wavelengths(config):
+    """run_simulation.sh의 seq LAMBDA_START LAMBDA_STEP LAMBDA_END와 같은 스윕 파장 목록 (LAMBDA_END를 넘지 않음)"""
+    start = getattr(config, 'LAMBDA_START', 400)
+    end = getattr(config, 'LAMBDA_END', 1200)
+    step = getattr(config, 'LAMBDA_STEP', 10)
+    return list(range(start, end + 1, step))
+
+# autotune.py가 모델 디렉토리에 기록하는 solver 설정 파일
+AUTOTUNE_FILE_NAME = 'autotune.json'
+
+def apply_autotune(config, adda_params):
+    """autotune 결과가 있으면 config의 pol에서 가장 빠른 iter (AUTOTUNE_CONFIG['apply_pol']이면 최적 pol/iter)를 덮어쓴 ADDA_PARAMS 사본 반환"""
+    autotune_config = getattr(config, 'AUTOTUNE_CONFIG', {}) or {}
+    if not autotune_config.get('apply', True):
+        return adda_params
+    try:
+        with open(resolve_model_dir(config) / AUTOTUNE_FILE_NAME, 'r') as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return adda_params
+    best = result.get('best')
+    if not best:
+        return adda_params
+    adda_params = dict(adda_params)
+    pol = adda_params.get('pol', 'ldr')
+    # pol은 편극률 모델(결과 자체)을 바꾸므로 명시적으로 켠 경우에만 바꾸고 알림 (stdout은 shell eval용)
+    if autotune_config.get('apply_pol', False):
+        if best['pol'] != pol:
+            print(f"[AUTOTUNE] -pol {pol} replaced by {best['pol']} from {AUTOTUNE_FILE_NAME} "
+                  f"(AUTOTUNE_CONFIG['apply_pol'])", file=sys.stderr)
+        adda_params['pol'] = best['pol']
+        adda_params['iter'] = best['iter']
+        return adda_params
+    best_by_pol = result.get('best_by_pol')
+    if best_by_pol is None:
+        # best_by_pol이 없는 이전 형식: 순위 표에서 수렴한 조합 (시간 순 정렬)
+        best_by_pol = {}
+        for entry in result.get('ranking', []):
+            if entry.get('total_time') is not None:
+                best_by_pol.setdefault(entry['pol'], entry['iter'])
+    if pol in best_by_pol:
+        adda_params['iter'] = best_by_pol[pol]
+    else:
+        print(f"[AUTOTUNE] No trial with -pol {pol} converged in {AUTOTUNE_FILE_NAME}; "
+              f"keeping -iter {adda_params.get('iter', 'qmr')}", file=sys.stderr)
+    return adda_params
+
 def load_config_values(config_file_path):
     """Config 파일에서 모든 필요한 설정값들을 추출"""
     try:
-        # config 파일 동적 로드
-        config_path = Path(config_file_path).resolve()
-        config_dir = config_path.parent
-        config_module = config_path.stem
-        
-        # Python 모듈명에서 유효하지 않은 문자들을 처리
-        # 하이픈을 언더스코어로 변경하고 숫자로 시작하는 경우 prefix 추가
-        safe_module_name = config_module.replace('-', '_')
-        if safe_module_name[0].isdigit():
-            safe_module_name = 'config_' + safe_module_name
-        
-        sys.path.insert(0, str(config_dir))
-        
-        # 임시로 모듈명을 변경해서 import
-        import importlib.util
-        spec = importlib.util.spec_from_file_location(safe_module_name, config_path)
-        if spec is None or spec.loader is None:
-            raise ImportError(f"Cannot load config from {config_path}")
-        
-        config = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(config)
+        config_start = time.time()
+        config = load_config_module(config_file_path)
         
         # 기본값 설정
         default_home = Path.home()
         
-        # refractive test 모드 확인
-        refractive_test_mode = os.environ.get('ADDA_REFRACTIVE_TEST_MODE') == 'true'
-        
-        # ADDA_PARAMS 및 기본 설정
-        adda_params = getattr(config, 'ADDA_PARAMS', {})
+        # autotune 결과(autotune.json)가 있으면 pol/iter 적용
+        adda_params = apply_autotune(config, getattr(config, 'ADDA_PARAMS', {}))
         refrac_sets = adda_params.get('refractive_index_sets', [['n_100', 'k_100']])
-        
-        # MAT_TYPE 결정 (명시적으로 정의된 것 우선)
-        mat_type = getattr(config, 'MAT_TYPE', None)
-        
-        if refractive_test_mode:
-            # refractive test 모드: 굴절률 이름 추출
-            if len(refrac_sets) > 0 and len(refrac_sets[0]) >= 2:
-                n_key, k_key = refrac_sets[0][0], refrac_sets[0][1]
-                
-                # n_johnson, k_johnson -> johnson 추출
-                if n_key.startswith('n_') and k_key.startswith('k_'):
-                    name_n = n_key[2:]  # "n_" 제거
-                    name_k = k_key[2:]  # "k_" 제거
-                    if name_n == name_k:
-                        refrac_name = name_n
-                    else:
-                        refrac_name = f"{n_key}_{k_key}"
-                else:
-                    refrac_name = f"{n_key}_{k_key}"
-                
-                # MAT_TYPE이 명시되어 있지 않으면 자동 생성
-                if mat_type is None:
-                    mat_type = generate_mat_type_from_shape(config, adda_params)
-                
-                # 최종 경로: 굴절률이름/MAT_TYPE
-                final_mat_type = f"{refrac_name}/{mat_type}"
-            else:
-                final_mat_type = "default_particle"
-        else:
-            # 일반 모드: MAT_TYPE 또는 자동 생성
-            if mat_type is None:
-                mat_type = generate_mat_type_from_shape(config, adda_params)
-            
-            final_mat_type = mat_type
+        final_mat_type = resolve_mat_type(config)
         
         # 나머지 설정값들
         home_dir = getattr(config, 'HOME', default_home)
@@ -110,6 +191,51 @@ def load_config_values(config_file_path):
         # pol 옵션 처리
         pol = adda_params.get('pol', 'ldr')
         
+        # 단계별 timing trace 설정 (모델 디렉토리의 trace.jsonl)
+        trace_config = getattr(config, 'TRACE_CONFIG', {})
+        trace_enabled = trace_config.get('enabled', True) and os.environ.get('ADDA_TRACE', '1') != '0'
+        trace_file = Path(research_base).expanduser() / final_mat_type / TRACE_FILE_NAME if trace_enabled else ''
+        profile_enabled = 1 if trace_config.get('profile', False) else 0
+        if trace_enabled:
+            emit_span('config_exec', config_start, time.time(), trace_file=trace_file,
+                      config_file=str(Path(config_file_path).resolve()))
+        
+        # 스윕 모니터 자동 실행 여부
+        monitor_config = getattr(config, 'MONITOR_CONFIG', {})
+        monitor_auto_start = 1 if monitor_config.get('auto_start', False) else 0
+        
+        # 메모리 예측 설정 (MEMORY_CONFIG, memory_planner.py 기본값과 동일)
+        memory_config = getattr(config, 'MEMORY_CONFIG', {})
+        memory_plan_enabled = 1 if memory_config.get('enabled', True) else 0
+        memory_plan_apply = 1 if memory_config.get('apply', True) else 0
+        memory_plan_abort = 1 if memory_config.get('abort_if_unsafe', True) else 0
+        
+        # 노드 로컬 scratch 실행 설정 (SCRATCH_CONFIG)
+        scratch_config = getattr(config, 'SCRATCH_CONFIG', {})
+        scratch_enabled = 1 if scratch_config.get('enabled', False) else 0
+        scratch_base = scratch_config.get('dir') or os.environ.get('ADDA_SCRATCH_DIR') or \
+            os.path.join(os.environ.get('TMPDIR', '/tmp'), f"adda_{os.environ.get('USER', 'user')}")
+        
+        # 구/동심 coated의 정확한 Mie 해 설정 (MIE_CONFIG, mie_solver.py 기본값과 동일)
+        mie_config = getattr(config, 'MIE_CONFIG', {})
+        mie_fast_path = 1 if mie_config.get('fast_path', False) else 0
+        mie_validate = 1 if mie_config.get('validate', False) else 0
+
+        # 준정적 미리보기로 공명 구간 파장을 먼저 계산 (PREVIEW_CONFIG, quasistatic_preview.py 기본값과 동일)
+        preview_config = getattr(config, 'PREVIEW_CONFIG', {})
+        preview_focus = 1 if preview_config.get('focus_sweep', False) else 0
+
+        # 대칭 입자의 단일 편광 계산 (SYMMETRY_CONFIG, shape_symmetry.py 기본값과 동일)
+        symmetry_config = getattr(config, 'SYMMETRY_CONFIG', {})
+        symmetry_enabled = 1 if symmetry_config.get('enabled', True) else 0
+
+        # 작업별 rank 자원 sample (RESOURCE_CONFIG, resource_sampler.py 기본값과 동일)
+        resource_config = getattr(config, 'RESOURCE_CONFIG', {})
+        resource_sampling = 1 if resource_config.get('enabled', True) else 0
+        
+        # 배향 평균 설정 (ORIENTATION_CONFIG)
+        orient_values = orientation_shell_values(config, mpi_procs)
+        
         # bash에서 사용할 수 있는 형태로 출력
         print(f'MAT_TYPE="{final_mat_type}"')
         print(f'ADDA_BIN_PATH="{adda_bin}"')
@@ -130,6 +256,24 @@ def load_config_values(config_file_path):
         print(f'SHAPE_EQ_RAD="{shape_eq_rad}"')
         print(f'EXTRA_ADDA_PARAMS="{extra_params_str}"')
         print(f'BOOL_FLAGS="{bool_flags_str}"')
+        print(f'MONITOR_AUTO_START={monitor_auto_start}')
+        print(f'TRACE_FILE="{trace_file}"')
+        print(f'PROFILE_ENABLED={profile_enabled}')
+        print(f'ORIENT_MODE="{orient_values["ORIENT_MODE"]}"')
+        print(f'ORIENT_ARGS="{orient_values["ORIENT_ARGS"]}"')
+        print(f'ORIENT_COUNT={orient_values["ORIENT_COUNT"]}')
+        print(f'ORIENT_JOBS={orient_values["ORIENT_JOBS"]}')
+        print(f'ORIENT_PROCS={orient_values["ORIENT_PROCS"]}')
+        print(f'MEMORY_PLAN_ENABLED={memory_plan_enabled}')
+        print(f'MEMORY_PLAN_APPLY={memory_plan_apply}')
+        print(f'MEMORY_PLAN_ABORT={memory_plan_abort}')
+        print(f'SCRATCH_ENABLED={scratch_enabled}')
+        print(f'SCRATCH_BASE="{Path(scratch_base).expanduser()}"')
+        print(f'MIE_FAST_PATH={mie_fast_path}')
+        print(f'MIE_VALIDATE={mie_validate}')
+        print(f'PREVIEW_FOCUS={preview_focus}')
+        print(f'SYMMETRY_ENABLED={symmetry_enabled}')
+        print(f'RESOURCE_SAMPLING={resource_sampling}')
         
     except Exception as e:
         print(f'echo "[ERROR] Failed to load config: {e}"; exit 1')
@@ -200,6 +344,40 @@ def process_extra_adda_params(adda_params):
     
     return extra_params_str, bool_flags_str
 
+def build_shape_args(config):
+    """run_simulation.sh의 build_shape_command와 같은 ADDA 형상 인수 목록"""
+    shape_config = getattr(config, 'SHAPE_CONFIG', {'type': 'sphere', 'args': []})
+    adda_params = getattr(config, 'ADDA_PARAMS', {})
+    shape_type = shape_config.get('type', 'sphere')
+    shape_args = [str(arg) for arg in shape_config.get('args', []) or []]
+    size = str(adda_params.get('size', 0.097))
+
+    if shape_type == 'sphere':
+        if shape_config.get('eq_rad') is not None:
+            return ['-shape', 'sphere', '-eq_rad', str(shape_config['eq_rad'])]
+        return ['-shape', 'sphere', '-size', size]
+    if shape_type == 'read':
+        return ['-shape', 'read', str(shape_config.get('filename'))]
+    return ['-shape', shape_type] + shape_args + ['-size', size]
+
+def build_adda_args(config, adda_params, wavelength, m_values, out_dir=None, store_fields=False,
+                    orient_args='', sym_args=''):
+    """run_simulation.sh와 같은 순서의 adda_mpi 인수 목록 (pol/iter/maxiter/dpl 등은 adda_params 사본을 바꿔 전달)
+
+    store_fields: store_dip_pol/store_int_field 플래그 포함 (시험 계산은 제외), out_dir이 None이면 -dir 생략
+    """
+    extra_params_str, bool_flags_str = process_extra_adda_params(adda_params)
+    args = (build_shape_args(config)
+            + ['-pol', str(adda_params.get('pol', 'ldr')), '-lambda', f"{wavelength / 1000.0:.3f}", '-m']
+            + [str(value) for value in m_values]
+            + ['-maxiter', str(adda_params.get('maxiter', 10000000)), '-eps', str(adda_params.get('eps', 5))])
+    if store_fields:
+        args += bool_flags_str.split()
+    args += sym_args.split() + extra_params_str.split()
+    if out_dir is not None:
+        args += ['-dir', str(out_dir)]
+    return args + orient_args.split()
+
 def main():
     """메인 함수"""
     if len(sys.argv) != 2:
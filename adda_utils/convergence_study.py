@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+ADDA Discretization Convergence Study
+선택한 파장에서 여러 해상도(-dpl 또는 -grid)로 계산하여 Cext/Cabs를 쌍극자 크기 0으로 외삽
+
+ADDA는 격자를 정수(nx = ceil(size*dpl/lambda))로 맞추고 dpl을 다시 계산하므로, 각 계산 log의 실제
+Dipoles/lambda로 쌍극자 크기 h = 1/dpl을 구하고 같은 격자로 양자화된 계산은 하나만 사용한다.
+Q(h) = Q0 + a*h + b*h^2를 최소제곱으로 맞추어 (점이 2개면 1차) 외삽값 Q0를 구하고, production 해상도(ADDA_PARAMS의 dpl/grid, 없으면 ADDA 기본값 dpl=10|m|)의 상대 오차와
+목표 정확도를 모든 시험 파장에서 만족하는 가장 낮은 해상도를 <모델 디렉토리>/convergence.json에 기록한다.
+
+사용법:
+    python convergence_study.py <config_file> [--wavelengths 400 700 1000] [--factors 0.5 0.7 1.0]
+                                [--target 0.01] [--procs N] [--keep] [--dry-run]
+"""
+import argparse
+import json
+import math
+import re
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+try:
+    from .config_loader import load_config_module, resolve_model_dir, build_adda_args, apply_autotune
+    from .autotune import representative_wavelengths, refractive_values
+    from .orientation_avg import polarization_average
+    from .mie_solver import DPL_PATTERN
+    from .stage_tracer import trace_span, TRACE_FILE_NAME
+except ImportError:
+    from config_loader import load_config_module, resolve_model_dir, build_adda_args, apply_autotune
+    from autotune import representative_wavelengths, refractive_values
+    from orientation_avg import polarization_average
+    from mie_solver import DPL_PATTERN
+    from stage_tracer import trace_span, TRACE_FILE_NAME
+
+CONVERGENCE_FILE_NAME = 'convergence.json'
+CONVERGENCE_WORK_DIR = '.convergence'
+QUANTITIES = ('Cext', 'Cabs')
+BOX_PATTERN = re.compile(r'box dimensions:\s*(\d+)x')
+
+DEFAULT_CONVERGENCE_CONFIG = {
+    'wavelengths': None,         # None이면 스윕 범위의 양 끝과 중앙
+    'factors': [0.5, 0.7, 1.0],  # production 해상도 대비 배율 (1.0 = production)
+    'target': 0.01,              # 목표 상대 오차 (Cext, Cabs 모두)
+    'procs': None,               # None이면 MPI_PROCS
+}
+
+def get_convergence_config(config):
+    """config의 CONVERGENCE_CONFIG를 기본값과 병합"""
+    convergence_config = dict(DEFAULT_CONVERGENCE_CONFIG)
+    convergence_config.update(getattr(config, 'CONVERGENCE_CONFIG', {}) or {})
+    return convergence_config
+
+def solve_linear(matrix, vector):
+    """작은 선형 방정식 (부분 피벗 Gauss 소거)"""
+    n = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(n)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(rows[r][col]))
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        if rows[col][col] == 0:
+            raise ValueError("Singular extrapolation system")
+        for r in range(col + 1, n):
+            factor = rows[r][col] / rows[col][col]
+            for c in range(col, n + 1):
+                rows[r][c] -= factor * rows[col][c]
+    solution = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        solution[r] = (rows[r][n] - sum(rows[r][c] * solution[c] for c in range(r + 1, n))) / rows[r][r]
+    return solution
+
+def extrapolate(points):
+    """(h, Q) 점들에 Q0 + a*h (+ b*h^2) 최소제곱 적합, 계수 목록 [Q0, a, b...] 반환"""
+    degree = min(2, len(points) - 1)
+    if degree < 1:
+        raise ValueError("At least two resolutions are needed for extrapolation")
+    size = degree + 1
+    normal = [[sum(h ** (i + j) for h, _ in points) for j in range(size)] for i in range(size)]
+    rhs = [sum(q * h ** i for h, q in points) for i in range(size)]
+    return solve_linear(normal, rhs)
+
+def read_discretization(log_path):
+    """ADDA log에서 (실제 Dipoles/lambda, x 방향 격자 수), 읽을 수 없는 값은 None"""
+    try:
+        text = Path(log_path).read_text(errors='replace')
+    except OSError:
+        return None, None
+    dpl = DPL_PATTERN.search(text)
+    box = BOX_PATTERN.search(text)
+    return (float(dpl.group(1)) if dpl else None), (int(box.group(1)) if box else None)
+
+def dipole_size(resolution, resolution_key, size_ratio):
+    """요청 해상도를 ADDA처럼 정수 격자로 맞춘 쌍극자 크기 h (파장 단위, size_ratio = 입자 x 크기/파장)"""
+    if not size_ratio:
+        return 1.0 / resolution
+    if resolution_key == 'grid':
+        nx = int(resolution)
+    else:
+        nx = max(1, math.ceil(size_ratio * resolution - 1e-9))
+    return size_ratio / nx
+
+def predicted_error(coefficients, h):
+    """외삽 모델로 쌍극자 크기 h에서의 상대 오차 예측"""
+    q0 = coefficients[0]
+    deviation = sum(c * h ** (i + 1) for i, c in enumerate(coefficients[1:]))
+    return abs(deviation / q0) if q0 else math.inf
+
+class ConvergenceStudy:
+    """해상도별 계산 실행 및 외삽 분석 클래스"""
+
+    def __init__(self, config_file, wavelengths=None, factors=None, target=None, procs=None):
+        self.config_file = str(Path(config_file).resolve())
+        self.config = load_config_module(self.config_file)
+        study_config = get_convergence_config(self.config)
+
+        shape_type = getattr(self.config, 'SHAPE_CONFIG', {}).get('type', 'sphere')
+        if shape_type == 'read':
+            raise ValueError("read shapes are discretized by the shape file; "
+                             "compare shape files of different resolution instead")
+
+        self.model_dir = resolve_model_dir(self.config)
+        self.work_dir = self.model_dir / CONVERGENCE_WORK_DIR
+        self.trace_file = self.model_dir / TRACE_FILE_NAME
+        self.adda_params = dict(apply_autotune(self.config, getattr(self.config, 'ADDA_PARAMS', {})))
+        # grid가 지정된 설정은 -grid, 그 외에는 -dpl을 바꿔가며 계산
+        self.resolution_key = 'grid' if self.adda_params.get('grid') is not None else 'dpl'
+        self.wavelengths = wavelengths or study_config['wavelengths'] or representative_wavelengths(self.config)
+        self.factors = sorted(factors or study_config['factors'])
+        self.target = target or study_config['target']
+        self.procs = procs or study_config['procs'] or getattr(self.config, 'MPI_PROCS', 40)
+
+        adda_bin = getattr(self.config, 'ADDA_BIN', Path.home() / "adda" / "src")
+        self.adda_exe = Path(adda_bin) / "mpi" / "adda_mpi"
+        self.mpi_exec = shutil.which('mpiexec') or shutil.which('mpirun')
+        self.runs = []
+
+    def production_resolution(self, m_values):
+        """해당 파장의 production dpl (또는 grid)"""
+        if self.resolution_key == 'grid':
+            grid = self.adda_params['grid']
+            return float(grid[0] if isinstance(grid, (list, tuple)) else grid)
+        if self.adda_params.get('dpl') is not None:
+            return float(self.adda_params['dpl'])
+        pairs = [float(v) for v in m_values]
+        return 10.0 * max(math.hypot(pairs[i], pairs[i + 1]) for i in range(0, len(pairs) - 1, 2))
+
+    def resolutions(self, production):
+        """배율별 시험 해상도 (grid는 짝수 정수)"""
+        if self.resolution_key == 'grid':
+            return [max(2, int(round(production * factor / 2.0)) * 2) for factor in self.factors]
+        return [round(production * factor, 3) for factor in self.factors]
+
+    def build_command(self, wavelength, m_values, resolution, out_dir):
+        """해상도만 바꾼 adda_mpi 명령 (필드 저장 플래그 제외)"""
+        adda_params = dict(self.adda_params)
+        adda_params.pop('dpl', None)
+        adda_params.pop('grid', None)
+        adda_params[self.resolution_key] = resolution
+        return ([self.mpi_exec, '-n', str(self.procs), str(self.adda_exe)]
+                + build_adda_args(self.config, adda_params, wavelength, m_values, out_dir))
+
+    def run_resolution(self, wavelength, m_values, resolution):
+        """해상도 하나 계산 후 결과 dict 반환"""
+        out_dir = self.work_dir / f"{self.resolution_key}_{resolution}" / f"lambda_{wavelength}nm"
+        shutil.rmtree(out_dir, ignore_errors=True)
+        out_dir.parent.mkdir(parents=True, exist_ok=True)
+        command = self.build_command(wavelength, m_values, resolution, out_dir)
+
+        start = time.time()
+        with trace_span('convergence_run', wavelength, self.trace_file, profile=False,
+                        **{self.resolution_key: resolution}) as span:
+            result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            span['exit_code'] = result.returncode
+        values = polarization_average(out_dir) if result.returncode == 0 else None
+        actual_dpl, nx = read_discretization(out_dir / "log")
+        run = {
+            'wavelength': wavelength,
+            self.resolution_key: resolution,
+            'actual_dpl': actual_dpl,
+            'nx': nx,
+            'ok': values is not None,
+            'wall_time': time.time() - start,
+        }
+        if values is not None:
+            run.update({key: values[key] for key in QUANTITIES})
+        self.runs.append(run)
+        return run
+
+    def run(self, verbose=True):
+        """모든 (파장, 해상도) 조합 실행, 파장별 production 해상도 dict 반환"""
+        if self.mpi_exec is None:
+            raise RuntimeError("No MPI implementation found (mpiexec/mpirun)")
+        if not self.adda_exe.exists():
+            raise RuntimeError(f"ADDA binary not found: {self.adda_exe}")
+
+        self.production = {}
+        for wavelength in self.wavelengths:
+            m_values = refractive_values(self.config_file, wavelength)
+            if m_values is None:
+                print(f"[WARNING] No refractive index for {wavelength} nm, skipping")
+                continue
+            self.production[wavelength] = self.production_resolution(m_values)
+            for resolution in self.resolutions(self.production[wavelength]):
+                run = self.run_resolution(wavelength, m_values, resolution)
+                if verbose:
+                    status = (f"Cext={run['Cext']:.6g} Cabs={run['Cabs']:.6g}" if run['ok'] else 'FAILED')
+                    print(f"  lambda={wavelength}nm {self.resolution_key}={resolution:<8} "
+                          f"time={run['wall_time']:.2f}s {status}")
+        return self.production
+
+    def analyze(self):
+        """파장/물리량별 외삽값과 production 오차, 권장 해상도 계산"""
+        fits = []
+        for wavelength, production in self.production.items():
+            runs = sorted((run for run in self.runs if run['wavelength'] == wavelength and run['ok']),
+                          key=lambda run: run[self.resolution_key])
+            # 같은 격자로 양자화된 계산은 같은 점이므로 가장 낮은 요청 해상도 하나만 사용
+            distinct = {}
+            for run in runs:
+                distinct.setdefault(run['nx'] or run['actual_dpl'] or run[self.resolution_key], run)
+            duplicates = len(runs) - len(distinct)
+            runs = list(distinct.values())
+            # 입자 x 크기/파장 = nx/dpl (log에 격자 정보가 없으면 요청 해상도 그대로 사용)
+            size_ratio = next((run['nx'] / run['actual_dpl'] for run in runs if run['nx'] and run['actual_dpl']),
+                              None)
+            for quantity in QUANTITIES:
+                points = [(1.0 / run['actual_dpl'] if run['actual_dpl'] else
+                           dipole_size(run[self.resolution_key], self.resolution_key, size_ratio), run[quantity])
+                          for run in runs]
+                if len(points) < 2:
+                    continue
+                coefficients = extrapolate(points)
+                finest = min(zip(points, runs), key=lambda item: item[0][0])[1]
+                q0 = coefficients[0]
+                fits.append({
+                    'wavelength': wavelength,
+                    'quantity': quantity,
+                    'production': production,
+                    'size_ratio': size_ratio,
+                    'extrapolated': q0,
+                    'coefficients': coefficients,
+                    'production_error': predicted_error(
+                        coefficients, dipole_size(production, self.resolution_key, size_ratio)),
+                    'finest_error': abs(finest[quantity] - q0) / abs(q0) if q0 else math.inf,
+                    'min_tested': min(r[self.resolution_key] for r in runs),
+                    'duplicate_grids': duplicates,
+                })
+        return fits, self.recommend(fits)
+
+    def recommend(self, fits):
+        """목표 오차를 모든 파장/물리량에서 만족하는 가장 낮은 단일 해상도 (시험 범위 이상에서 탐색)"""
+        if not fits:
+            return None
+        lowest = max(fit['min_tested'] for fit in fits)
+        highest = 4.0 * max(fit['production'] for fit in fits)
+        step = 2 if self.resolution_key == 'grid' else 0.5
+        value = math.ceil(lowest / step) * step
+        while value <= highest:
+            sizes = [dipole_size(value, self.resolution_key, fit['size_ratio']) for fit in fits]
+            if all(predicted_error(fit['coefficients'], h) <= self.target for fit, h in zip(fits, sizes)):
+                # 격자 셀 수 ~ (1/h)^3 기준 production 대비 비용
+                cost = sum((dipole_size(fit['production'], self.resolution_key, fit['size_ratio']) / h) ** 3
+                           for fit, h in zip(fits, sizes)) / len(fits)
+                return {self.resolution_key: value, 'relative_cost': cost}
+            value += step
+        return None
+
+    def save(self, fits, recommendation):
+        """convergence.json 기록 후 파일 경로 반환"""
+        result = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'resolution_key': self.resolution_key,
+            'wavelengths': self.wavelengths,
+            'factors': self.factors,
+            'target': self.target,
+            'recommendation': recommendation,
+            'fits': fits,
+            'runs': self.runs,
+        }
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        output_file = self.model_dir / CONVERGENCE_FILE_NAME
+        with open(output_file, 'w') as f:
+            json.dump(result, f, indent=2)
+        return output_file
+
+def print_fits(fits, resolution_key):
+    """파장/물리량별 외삽 결과 표 출력"""
+    print(f"\n{'Lambda':>7} {'Qty':<5}{'Prod ' + resolution_key:>11}{'Extrapolated':>15}"
+          f"{'Prod err':>10}{'Finest err':>12}")
+    for fit in fits:
+        print(f"{fit['wavelength']:>7} {fit['quantity']:<5}{fit['production']:>11.2f}{fit['extrapolated']:>15.6g}"
+              f"{fit['production_error'] * 100:>9.2f}%{fit['finest_error'] * 100:>11.2f}%")
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='ADDA 이산화 해상도 수렴 검사 및 외삽')
+    parser.add_argument('config_file', help='config 파일 경로')
+    parser.add_argument('--wavelengths', type=int, nargs='+', help='시험 파장 (nm, 기본값: 스윕 양 끝과 중앙)')
+    parser.add_argument('--factors', type=float, nargs='+', help='production 해상도 대비 배율 (예: 0.5 0.7 1.0)')
+    parser.add_argument('--target', type=float, help='목표 상대 오차 (기본값: 0.01)')
+    parser.add_argument('--procs', type=int, help='MPI 프로세스 수')
+    parser.add_argument('--keep', action='store_true', help='해상도별 계산 결과 디렉토리 유지')
+    parser.add_argument('--dry-run', action='store_true', help='실행할 명령만 출력')
+    args = parser.parse_args()
+
+    try:
+        study = ConvergenceStudy(args.config_file, args.wavelengths, args.factors, args.target, args.procs)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    print(f"[CONVERGENCE] {study.resolution_key} x {study.factors} at {study.wavelengths} nm "
+          f"({study.procs} processes, target {study.target * 100:g}%)")
+
+    if args.dry_run:
+        for wavelength in study.wavelengths:
+            m_values = refractive_values(study.config_file, wavelength) or ['<m>']
+            production = study.production_resolution(m_values) if m_values != ['<m>'] else 10.0
+            for resolution in study.resolutions(production):
+                out_dir = study.work_dir / f"{study.resolution_key}_{resolution}" / f"lambda_{wavelength}nm"
+                print(' '.join(str(part) for part in study.build_command(wavelength, m_values, resolution, out_dir)))
+        return
+
+    try:
+        study.run()
+    except RuntimeError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    finally:
+        if not args.keep:
+            shutil.rmtree(study.work_dir, ignore_errors=True)
+
+    fits, recommendation = study.analyze()
+    if not fits:
+        print("\n[ERROR] Fewer than two distinct grids succeeded at every wavelength; nothing to extrapolate "
+              "(use larger factors or a finer production resolution)")
+        sys.exit(1)
+    for fit in fits:
+        if fit['duplicate_grids'] and fit['quantity'] == QUANTITIES[0]:
+            print(f"[WARNING] lambda={fit['wavelength']}nm: {fit['duplicate_grids']} resolution(s) gave the same "
+                  f"ADDA grid as a lower one and were not used in the fit")
+    print_fits(fits, study.resolution_key)
+    output_file = study.save(fits, recommendation)
+
+    worst = max(fit['production_error'] for fit in fits)
+    status = 'OK' if worst <= study.target else 'NOT CONVERGED'
+    print(f"\n[PRODUCTION] worst relative error {worst * 100:.2f}% ({status}, target {study.target * 100:g}%)")
+    if recommendation:
+        key = study.resolution_key
+        print(f"[RECOMMEND] ADDA_PARAMS['{key}'] = {recommendation[key]:g} "
+              f"(~x{recommendation['relative_cost']:.2f} grid cells vs production)")
+    else:
+        print("[RECOMMEND] No tested-range resolution meets the target; add finer factors")
+    print(f"[SAVED] {output_file}")
+
+if __name__ == "__main__":
+    main()
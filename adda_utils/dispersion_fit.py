@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+ADDA Dispersion Fitting
+REFRACTIVE_INDEX_FILES의 n/k 표를 해석적 유전 함수 모델로 fitting하여 임의 파장(소수 파장 포함)에서
+ε(λ), n(λ), k(λ)와 그 미분을 매끄럽게 계산
+
+모델 (광자 에너지 E = 1239.84193/λ[nm] eV 기준):
+    drude_lorentz   ε = ε∞ - ωp²/(E² + iγp E) + Σ fj ωj²/(ωj² - E² - iγj E)
+    critical_point  ε = ε∞ - ωp²/(E² + iγp E) + Σ Aj Ωj [e^{iφj}/(Ωj - E - iΓj) + e^{-iφj}/(Ωj + E + iΓj)]
+                    (Etchegoin 형 임계점 항, 귀금속의 interband 흡수)
+
+- fitting은 상대 오차로 가중한 ε 잔차에 대한 Levenberg-Marquardt (numpy 필요, 여러 초기값 중 최선)
+- 결과(파라미터, n/k RMS와 최대 오차, 데이터 범위)는 캐시 디렉토리의 JSON으로 저장되며
+  두 파일의 내용 해시가 바뀌면 다시 fitting한다. 캐시된 모델의 계산은 numpy 없이도 동작한다.
+- 선택적 표면 산란 보정: γp → γp + A ħvF / R (작은 금속 입자, R은 config의 입자 크기에서 계산)
+- DISPERSION_CONFIG['enabled']이면 refrac_interpolator.py가 선형 보간 대신 fitting 결과를 사용하고,
+  표 범위 밖 extrapolate_nm까지 허용한다. 품질 기준(max_rel_rms)을 넘는 fitting은 사용하지 않는다.
+
+사용법:
+    python dispersion_fit.py fit <config_file> [--refit]           # 모든 n/k 세트 fitting 및 품질 보고
+    python dispersion_fit.py eval <config_file> <n_key> <k_key> <lambda_nm> [...]
+"""
+import argparse
+import cmath
+import hashlib
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from .config_loader import load_config_module
+    from .refrac_interpolator import read_data_points
+except ImportError:
+    from config_loader import load_config_module
+    from refrac_interpolator import read_data_points
+
+HC_EV_NM = 1239.84193          # hc (eV·nm), E = HC_EV_NM / λ
+HBAR_EV_S = 6.582119569e-16    # ħ (eV·s)
+MODELS = ('drude_lorentz', 'critical_point')
+LOG_PARAM_MIN, LOG_PARAM_MAX = -12.0, 6.0
+
+DEFAULT_DISPERSION_CONFIG = {
+    'enabled': False,
+    'model': 'drude_lorentz',    # 'drude_lorentz' 또는 'critical_point'
+    'oscillators': 2,            # Lorentz 진동자 / 임계점 항 개수
+    'max_rel_rms': 0.05,         # n+ik 상대 RMS 오차 상한, 넘으면 선형 보간 사용
+    'extrapolate_nm': 0,         # 표 범위 밖으로 허용하는 거리 (nm)
+    'cache_dir': None,           # None이면 n 파일 옆의 .dispersion_fits
+    'surface_damping': None,     # {'A': 1.0, 'fermi_velocity': 1.40e6, 'radius_nm': None}
+}
+
+def get_dispersion_config(config):
+    """config의 DISPERSION_CONFIG를 기본값과 병합"""
+    dispersion_config = dict(DEFAULT_DISPERSION_CONFIG)
+    dispersion_config.update(getattr(config, 'DISPERSION_CONFIG', {}) or {})
+    if dispersion_config['model'] not in MODELS:
+        raise ValueError(f"Unknown DISPERSION_CONFIG model: {dispersion_config['model']}")
+    return dispersion_config
+
+def particle_radius_nm(config):
+    """표면 산란 보정에 쓰는 입자 반지름 (eq_rad 또는 size/2, nm)"""
+    shape_config = getattr(config, 'SHAPE_CONFIG', {})
+    if shape_config.get('eq_rad') is not None:
+        return float(shape_config['eq_rad']) * 1000.0
+    return float(getattr(config, 'ADDA_PARAMS', {}).get('size', 0.097)) * 1000.0 / 2.0
+
+def surface_damping_ev(config, damping):
+    """표면 산란에 의한 추가 Drude 감쇠 A ħvF / R (eV)"""
+    if not damping:
+        return 0.0
+    radius = damping.get('radius_nm') or particle_radius_nm(config)
+    return float(damping.get('A', 1.0)) * HBAR_EV_S * float(damping.get('fermi_velocity', 1.40e6)) * 1e9 / radius
+
+def _sqrt(value):
+    return np.sqrt(value) if np is not None and isinstance(value, np.ndarray) else cmath.sqrt(value)
+
+class DispersionModel:
+    """fitting된 유전 함수 (스칼라 또는 numpy 배열 파장에 대해 계산)"""
+
+    def __init__(self, model, params, extra_damping=0.0):
+        self.model = model
+        self.params = params
+        self.extra_damping = extra_damping
+
+    def with_damping(self, extra_damping):
+        """Drude 감쇠를 더한 사본"""
+        return DispersionModel(self.model, self.params, extra_damping)
+
+    def _terms(self, energy):
+        """(ε, dε/dE)"""
+        p = self.params
+        gamma = p['gamma_p'] + self.extra_damping
+        drude_den = energy * energy + 1j * gamma * energy
+        eps = p['eps_inf'] - p['omega_p'] ** 2 / drude_den
+        deps = p['omega_p'] ** 2 * (2 * energy + 1j * gamma) / drude_den ** 2
+        for term in p['terms']:
+            if self.model == 'drude_lorentz':
+                den = term['omega'] ** 2 - energy * energy - 1j * term['gamma'] * energy
+                eps = eps + term['f'] * term['omega'] ** 2 / den
+                deps = deps + term['f'] * term['omega'] ** 2 * (2 * energy + 1j * term['gamma']) / den ** 2
+            else:
+                phase = cmath.exp(1j * term['phi'])
+                minus = term['omega'] - energy - 1j * term['gamma']
+                plus = term['omega'] + energy + 1j * term['gamma']
+                scale = term['A'] * term['omega']
+                eps = eps + scale * (phase / minus + phase.conjugate() / plus)
+                deps = deps + scale * (phase / minus ** 2 - phase.conjugate() / plus ** 2)
+        return eps, deps
+
+    def epsilon(self, wavelength_nm):
+        """복소 유전 함수 ε(λ)"""
+        return self._terms(HC_EV_NM / wavelength_nm)[0]
+
+    def nk(self, wavelength_nm):
+        """복소 굴절률 n + ik"""
+        return _sqrt(self.epsilon(wavelength_nm))
+
+    def derivative(self, wavelength_nm):
+        """d(n + ik)/dλ (nm⁻¹)"""
+        energy = HC_EV_NM / wavelength_nm
+        eps, deps = self._terms(energy)
+        return deps / (2 * _sqrt(eps)) * (-energy / wavelength_nm)
+
+    def to_dict(self):
+        return {'model': self.model, 'params': self.params}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['model'], data['params'])
+
+def _unpack(model, x, n_terms):
+    """최적화 변수 -> 파라미터 dict (양수 파라미터는 log 변환, 발산하지 않도록 범위 제한)"""
+    def positive(value):
+        return math.exp(min(max(float(value), LOG_PARAM_MIN), LOG_PARAM_MAX))
+
+    params = {'eps_inf': positive(x[0]), 'omega_p': positive(x[1]), 'gamma_p': positive(x[2]), 'terms': []}
+    width = 3 if model == 'drude_lorentz' else 4
+    for j in range(n_terms):
+        values = x[3 + width * j: 3 + width * (j + 1)]
+        term = {'omega': positive(values[1]), 'gamma': positive(values[2])}
+        if model == 'drude_lorentz':
+            term['f'] = positive(values[0])
+        else:
+            term.update({'A': positive(values[0]), 'phi': float(values[3])})
+        params['terms'].append(term)
+    return params
+
+def _initial_guesses(model, energies, eps_data, n_terms):
+    """여러 초기값 (Drude 세기, 진동자 위치를 데이터 에너지 범위에 분산)"""
+    e_min, e_max = float(energies.min()), float(energies.max())
+    metallic = float(eps_data.real[np.argmin(energies)]) < 0
+    eps_inf = max(1.0, float(np.median(eps_data.real[eps_data.real > 0]))) if np.any(eps_data.real > 0) else 1.0
+    guesses = []
+    for omega_p in ((6.0, 9.0, 13.0) if metallic else (0.05,)):
+        for width in (0.3, 1.0):
+            for shift in (0.0, 0.5):
+                x = [math.log(eps_inf if not metallic else 2.0), math.log(omega_p), math.log(0.07)]
+                for j in range(n_terms):
+                    # 금속은 interband 흡수가 데이터 범위의 고에너지 쪽에 있으므로 위치를 엇갈려 시도
+                    center = e_min + (e_max - e_min) * (j + 1 + shift) / (n_terms + 1)
+                    if model == 'drude_lorentz':
+                        x += [math.log(1.0), math.log(max(center, 0.1)), math.log(width)]
+                    else:
+                        x += [math.log(1.0), math.log(max(center, 0.1)), math.log(width), -math.pi / 4]
+                guesses.append(np.array(x))
+    return guesses
+
+def _levenberg_marquardt(residual, x0, max_iter=300):
+    """유한 차분 Jacobian을 쓰는 Levenberg-Marquardt, (x, 잔차 제곱합) 반환"""
+    x = np.array(x0, dtype=float)
+    r = residual(x)
+    cost = float(r @ r)
+    damping = 1e-3
+    for _ in range(max_iter):
+        jacobian = np.empty((r.size, x.size))
+        for i in range(x.size):
+            h = 1e-6 * max(1.0, abs(x[i]))
+            shifted = x.copy()
+            shifted[i] += h
+            jacobian[:, i] = (residual(shifted) - r) / h
+        normal = jacobian.T @ jacobian
+        gradient = jacobian.T @ r
+        improved = False
+        while damping < 1e10:
+            try:
+                step = np.linalg.solve(normal + damping * np.diag(np.diag(normal) + 1e-12), -gradient)
+            except np.linalg.LinAlgError:
+                damping *= 4
+                continue
+            candidate = x + step
+            r_new = residual(candidate)
+            new_cost = float(r_new @ r_new)
+            if np.isfinite(new_cost) and new_cost < cost:
+                improved = cost - new_cost > 1e-12 * cost
+                x, r, cost = candidate, r_new, new_cost
+                damping = max(damping / 3, 1e-12)
+                break
+            damping *= 4
+        if not improved:
+            break
+    return x, cost
+
+def load_nk_table(n_file, k_file):
+    """n/k 파일을 공통 파장 격자로 정렬 (n 파일 파장 중 k 범위 안의 점, k는 선형 보간)"""
+    n_points = read_data_points(n_file)
+    k_points = read_data_points(k_file)
+    if len(n_points) < 3 or len(k_points) < 2:
+        raise ValueError(f"Not enough data points in {n_file} / {k_file}")
+    k_wl = np.array([p[0] for p in k_points])
+    k_val = np.array([p[1] for p in k_points])
+    wavelengths = np.array([p[0] for p in n_points if k_wl[0] <= p[0] <= k_wl[-1]])
+    n_values = np.array([p[1] for p in n_points if k_wl[0] <= p[0] <= k_wl[-1]])
+    wavelengths, unique = np.unique(wavelengths, return_index=True)
+    return wavelengths, n_values[unique] + 1j * np.interp(wavelengths, k_wl, k_val)
+
+def fit_dispersion(wavelengths, nk_data, model='drude_lorentz', n_terms=2):
+    """n/k 표 fitting, (DispersionModel, 품질 dict) 반환"""
+    if np is None:
+        raise RuntimeError("numpy is required to fit dispersion models")
+    energies = HC_EV_NM / wavelengths
+    eps_data = nk_data ** 2
+    # 품질 기준과 같은 n+ik 상대 오차를 최소화 (금속의 큰 |ε| 구간이 fitting을 지배하지 않음)
+    weight = 1.0 / np.abs(nk_data)
+
+    def residual(x):
+        try:
+            nk_model = DispersionModel(model, _unpack(model, x, n_terms)).nk(wavelengths)
+        except (OverflowError, ZeroDivisionError):
+            return np.full(2 * wavelengths.size, 1e6)
+        diff = (nk_model - nk_data) * weight
+        return np.nan_to_num(np.concatenate([diff.real, diff.imag]), nan=1e6, posinf=1e6, neginf=-1e6)
+
+    best = None
+    with np.errstate(all='ignore'):
+        for guess in _initial_guesses(model, energies, eps_data, n_terms):
+            x, cost = _levenberg_marquardt(residual, guess)
+            if best is None or cost < best[1]:
+                best = (x, cost)
+    fitted = DispersionModel(model, _unpack(model, best[0], n_terms))
+
+    nk_fit = fitted.nk(wavelengths)
+    error = nk_fit - nk_data
+    quality = {
+        'points': int(wavelengths.size),
+        'range_nm': [float(wavelengths[0]), float(wavelengths[-1])],
+        'rms_n': float(np.sqrt(np.mean(error.real ** 2))),
+        'rms_k': float(np.sqrt(np.mean(error.imag ** 2))),
+        'max_abs_n': float(np.max(np.abs(error.real))),
+        'max_abs_k': float(np.max(np.abs(error.imag))),
+        'rel_rms': float(np.sqrt(np.mean(np.abs(error) ** 2 / np.abs(nk_data) ** 2))),
+    }
+    return fitted, quality
+
+def _file_hash(*paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()[:16]
+
+class DispersionLibrary:
+    """config의 n/k 세트별 fitting 결과 캐시"""
+
+    def __init__(self, config):
+        self.config = config
+        self.dispersion_config = get_dispersion_config(config)
+        self.refrac_files = getattr(config, 'REFRACTIVE_INDEX_FILES', {})
+        self.extra_damping = surface_damping_ev(config, self.dispersion_config['surface_damping'])
+        self.entries = {}
+
+    def cache_file(self, n_key, k_key):
+        cache_dir = self.dispersion_config['cache_dir']
+        cache_dir = Path(cache_dir).expanduser() if cache_dir else Path(self.refrac_files[n_key]).parent / '.dispersion_fits'
+        name = f"{n_key}__{k_key}__{self.dispersion_config['model']}{self.dispersion_config['oscillators']}.json"
+        return cache_dir / name
+
+    def entry(self, n_key, k_key, refit=False):
+        """캐시된 fitting (없거나 파일이 바뀌었으면 fitting 후 저장)"""
+        if (n_key, k_key) in self.entries and not refit:
+            return self.entries[(n_key, k_key)]
+        n_file, k_file = self.refrac_files[n_key], self.refrac_files[k_key]
+        source_hash = _file_hash(n_file, k_file)
+        cache_file = self.cache_file(n_key, k_key)
+        entry = None
+        if not refit:
+            try:
+                with open(cache_file, 'r') as f:
+                    entry = json.load(f)
+                if entry.get('source_hash') != source_hash:
+                    entry = None
+            except (OSError, ValueError):
+                entry = None
+        if entry is None:
+            wavelengths, nk_data = load_nk_table(n_file, k_file)
+            fitted, quality = fit_dispersion(wavelengths, nk_data, self.dispersion_config['model'],
+                                             int(self.dispersion_config['oscillators']))
+            entry = dict(fitted.to_dict(), quality=quality, source_hash=source_hash,
+                         files=[str(n_file), str(k_file)], fitted=time.strftime('%Y-%m-%dT%H:%M:%S'))
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(cache_file, 'w') as f:
+                    json.dump(entry, f, indent=2)
+            except OSError as e:
+                print(f"# WARNING: Cannot write dispersion fit cache {cache_file}: {e}", file=sys.stderr)
+        entry['usable'] = entry['quality']['rel_rms'] <= self.dispersion_config['max_rel_rms']
+        self.entries[(n_key, k_key)] = entry
+        return entry
+
+    def model(self, n_key, k_key):
+        """표면 산란 보정을 적용한 DispersionModel"""
+        return DispersionModel.from_dict(self.entry(n_key, k_key)).with_damping(self.extra_damping)
+
+    def nk(self, n_key, k_key, wavelength):
+        """(n, k) 또는 사용할 수 없으면 None (품질 미달, 허용 범위 밖)"""
+        entry = self.entry(n_key, k_key)
+        low, high = entry['quality']['range_nm']
+        margin = float(self.dispersion_config['extrapolate_nm'])
+        if not entry['usable'] or wavelength < low - margin or wavelength > high + margin:
+            return None
+        value = self.model(n_key, k_key).nk(float(wavelength))
+        return value.real, value.imag
+
+_LIBRARIES = {}
+
+def fitted_nk(config, n_key, k_key, wavelength):
+    """DISPERSION_CONFIG가 켜져 있으면 fitting 모델의 (n, k), 꺼져 있거나 사용할 수 없으면 None"""
+    if not get_dispersion_config(config)['enabled']:
+        return None
+    library = _LIBRARIES.setdefault(id(config), DispersionLibrary(config))
+    try:
+        return library.nk(n_key, k_key, wavelength)
+    except (KeyError, OSError, ValueError, RuntimeError) as e:
+        print(f"# WARNING: Dispersion fit unavailable for {n_key}/{k_key}: {e}", file=sys.stderr)
+        return None
+
+def print_report(library, n_key, k_key, entry):
+    """fitting 품질 보고"""
+    quality = entry['quality']
+    status = 'OK' if entry['usable'] else 'POOR (linear interpolation will be used)'
+    print(f"[FIT] {n_key}/{k_key}: {entry['model']} with {len(entry['params']['terms'])} term(s), "
+          f"{quality['points']} points {quality['range_nm'][0]:g}-{quality['range_nm'][1]:g} nm  [{status}]")
+    print(f"      RMS n={quality['rms_n']:.4f} k={quality['rms_k']:.4f}  "
+          f"max |dn|={quality['max_abs_n']:.4f} |dk|={quality['max_abs_k']:.4f}  rel RMS={quality['rel_rms']:.3%}")
+    params = entry['params']
+    print(f"      eps_inf={params['eps_inf']:.3f} omega_p={params['omega_p']:.3f} eV gamma_p={params['gamma_p']:.4f} eV"
+          + (f" (+{library.extra_damping:.4f} eV surface damping)" if library.extra_damping else ''))
+    print(f"      cache: {library.cache_file(n_key, k_key)}")
+
+def file_key_pairs(config):
+    """refractive_index_sets 중 파일 키로 된 (n_key, k_key) 목록"""
+    pairs = []
+    for item in getattr(config, 'ADDA_PARAMS', {}).get('refractive_index_sets', []):
+        if isinstance(item, (list, tuple)) and len(item) == 2 and all(isinstance(v, str) for v in item):
+            if tuple(item) not in pairs:
+                pairs.append(tuple(item))
+    return pairs
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='굴절률 표의 Drude-Lorentz/임계점 모델 fitting')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    fit_parser = subparsers.add_parser('fit', help='config의 모든 n/k 세트 fitting 및 품질 보고')
+    fit_parser.add_argument('config_file')
+    fit_parser.add_argument('--refit', action='store_true', help='캐시를 무시하고 다시 fitting')
+    eval_parser = subparsers.add_parser('eval', help='fitting 모델로 n, k, dn/dλ, dk/dλ 계산')
+    eval_parser.add_argument('config_file')
+    eval_parser.add_argument('n_key')
+    eval_parser.add_argument('k_key')
+    eval_parser.add_argument('wavelengths', nargs='+', type=float)
+    args = parser.parse_args()
+
+    config = load_config_module(args.config_file)
+    try:
+        library = DispersionLibrary(config)
+        if args.command == 'fit':
+            pairs = file_key_pairs(config)
+            if not pairs:
+                print("[INFO] No file-based refractive index sets in ADDA_PARAMS['refractive_index_sets']")
+            for n_key, k_key in pairs:
+                print_report(library, n_key, k_key, library.entry(n_key, k_key, refit=args.refit))
+        else:
+            model = library.model(args.n_key, args.k_key)
+            print(f"{'lambda_nm':>10} {'n':>10} {'k':>10} {'dn/dlambda':>12} {'dk/dlambda':>12}")
+            for wavelength in args.wavelengths:
+                value, slope = model.nk(wavelength), model.derivative(wavelength)
+                print(f"{wavelength:>10g} {value.real:>10.5f} {value.imag:>10.5f} {slope.real:>12.3e} {slope.imag:>12.3e}")
+    except (KeyError, OSError, ValueError, RuntimeError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,674 @@
+#!/usr/bin/env python3
+"""
+ADDA Local Job Server
+한 워크스테이션을 여러 사람이 함께 쓸 때 adda_mpi 작업을 하나의 큐에서 실행하는 로컬 스케줄러
+
+- Unix socket으로 제출/조회 (줄 단위 JSON 요청/응답, 외부 서비스 불필요)
+- 같은 (ADDA 실행 파일, 형상, m, λ, solver 인수) 작업은 제출이 달라도 한 번만 계산하고 결과를 각 모델 디렉토리에 복사
+- 전체 core 예산(JOB_SERVER_CONFIG['cores']) 안에서 사용 중인 core와 누적 core-초가 적은 사용자 먼저 실행 (fair share)
+- 완료/실패한 파장은 각 모델의 실행 기록(run_ledger.sqlite)에 기록
+- 대기열은 <state_dir>/state.json에 저장되어 서버 재시작 시 이어서 실행 (아직 살아 있는 작업은 끝날 때까지 추적)
+- 작업 키와 ADDA 실행 파일은 서버가 정하고, 결과는 제출한 사용자(SO_PEERCRED) 소유의 모델 디렉토리에만 씀
+
+사용법:
+    python job_server.py start|serve [config_file]        # 백그라운드 시작 | 포그라운드 실행
+    python job_server.py submit <config_file>            # config의 스윕을 제출 (이미 끝난 파장 제외)
+    python job_server.py submit --manifest manifest.json # 직접 만든 작업 목록 제출
+    python job_server.py manifest <config_file>          # 제출할 작업 목록(JSON) 출력
+    python job_server.py queue|shutdown [config_file]    # 대기열 조회 | 서버 종료
+    python job_server.py status|cancel <submission_id>   # 제출 진행률 조회 | 취소
+"""
+import argparse
+import hashlib
+import json
+import os
+import pwd
+import grp
+import shutil
+import signal
+import socket
+import socketserver
+import sqlite3
+import struct
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+try:
+    from .config_loader import (
+        load_config_module, resolve_model_dir, build_adda_args, apply_autotune, sweep_wavelengths
+    )
+    from .autotune import refractive_values
+    from .orientation_avg import orientation_shell_values
+    from .shape_symmetry import symmetry_plan
+    from .scratch_stage import publish_lambda_dir
+    from .model_archive import archived_crosssec
+    from .stage_tracer import emit_span, TRACE_FILE_NAME
+    from .run_ledger import RunLedger
+except ImportError:
+    from config_loader import (
+        load_config_module, resolve_model_dir, build_adda_args, apply_autotune, sweep_wavelengths
+    )
+    from autotune import refractive_values
+    from orientation_avg import orientation_shell_values
+    from shape_symmetry import symmetry_plan
+    from scratch_stage import publish_lambda_dir
+    from model_archive import archived_crosssec
+    from stage_tracer import emit_span, TRACE_FILE_NAME
+    from run_ledger import RunLedger
+
+DEFAULT_JOB_SERVER_CONFIG = {
+    'socket': '/tmp/adda_jobserver.sock',
+    'state_dir': '~/.adda_jobserver',
+    'cores': None,               # None이면 os.cpu_count()
+    'poll_interval': 1.0,        # 작업 종료 확인 주기 (초)
+    'group': None,               # 지정하면 이 그룹에 socket 접근 허용 (0o660), None이면 서버 사용자만 (0o600)
+}
+CROSSSEC_FILE_NAMES = ('CrossSec-X', 'CrossSec-Y', 'CrossSec')
+# 결과 위치를 바꾸는 인수는 제출할 수 없음 (-dir은 서버가 지정)
+FORBIDDEN_ARGS = ('-dir', '-chp_dir')
+
+def get_job_server_config(config=None):
+    """config의 JOB_SERVER_CONFIG를 기본값과 병합"""
+    server_config = dict(DEFAULT_JOB_SERVER_CONFIG)
+    if config is not None:
+        server_config.update(getattr(config, 'JOB_SERVER_CONFIG', {}) or {})
+    server_config['state_dir'] = Path(server_config['state_dir']).expanduser()
+    server_config['cores'] = int(server_config['cores'] or os.cpu_count() or 1)
+    # 서버가 실행하는 유일한 ADDA 실행 파일 (제출된 manifest의 adda_exe는 이것과 같아야 함)
+    adda_bin = getattr(config, 'ADDA_BIN', Path.home() / "adda" / "src") if config is not None \
+        else Path.home() / "adda" / "src"
+    server_config['adda_exe'] = str(Path(adda_bin).expanduser() / "mpi" / "adda_mpi")
+    return server_config
+
+def has_crosssec(lambda_dir):
+    """편광별 또는 배향 평균 CrossSec 파일 존재 여부 (디렉토리가 없으면 모델 archive에서 확인)"""
+    if not Path(lambda_dir).is_dir():
+        return archived_crosssec(lambda_dir)
+    return any((Path(lambda_dir) / name).exists() for name in CROSSSEC_FILE_NAMES)
+
+def job_key(adda_exe, args):
+    """중복 제거용 작업 키 (실행 파일 + 인수 목록의 해시, -dir 제외)"""
+    payload = json.dumps([str(adda_exe)] + [str(arg) for arg in args])
+    return hashlib.sha256(payload.encode()).hexdigest()[:20]
+
+def build_manifest(config_file):
+    """config 스윕을 제출용 작업 목록으로 전개 (이미 CrossSec이 있는 파장과 굴절률이 없는 파장 제외)"""
+    config_file = str(Path(config_file).resolve())
+    config = load_config_module(config_file)
+    if orientation_shell_values(config, 1)['ORIENT_MODE'] == 'split':
+        raise ValueError("ORIENTATION_CONFIG mode 'split' is not supported by the job server; use 'adda'")
+
+    adda_params = apply_autotune(config, getattr(config, 'ADDA_PARAMS', {}))
+    orient_args = orientation_shell_values(config, 1)['ORIENT_ARGS']
+    # 완전 대칭인 read 형상은 run_simulation.sh와 같이 -sym enf로 한 편광만 계산
+    sym_args = symmetry_plan(config)['sym_args']
+    adda_exe = Path(getattr(config, 'ADDA_BIN', Path.home() / "adda" / "src")) / "mpi" / "adda_mpi"
+    model_dir = resolve_model_dir(config)
+
+    jobs, skipped = [], []
+    for wavelength in sweep_wavelengths(config):
+        if has_crosssec(model_dir / f"lambda_{wavelength}nm"):
+            continue
+        m_values = refractive_values(config_file, wavelength)
+        if m_values is None:
+            skipped.append(wavelength)
+            continue
+        args = build_adda_args(config, adda_params, wavelength, m_values, store_fields=True,
+                               orient_args=orient_args, sym_args=sym_args)
+        jobs.append({'wavelength': wavelength, 'args': args})
+
+    return {
+        'config_file': config_file,
+        'model_dir': str(model_dir),
+        'adda_exe': str(adda_exe),
+        'procs': int(getattr(config, 'MPI_PROCS', 40)),
+        'jobs': jobs,
+        'skipped': skipped,
+    }
+
+def peer_credentials(connection):
+    """Unix socket 상대 프로세스의 (uid, 사용자 이름) (SO_PEERCRED, 지원하지 않으면 (None, None))"""
+    try:
+        credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        _, uid, _ = struct.unpack('3i', credentials)
+    except (AttributeError, OSError):
+        return None, None
+    try:
+        return uid, pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return uid, str(uid)
+
+def confined_model_dir(model_dir, uid):
+    """symlink를 따라간 실제 모델 디렉토리가 uid 소유인지 확인하고 반환 (아니면 PermissionError)"""
+    model_dir = Path(model_dir)
+    if not model_dir.is_absolute():
+        raise ValueError(f"model_dir must be an absolute path: {model_dir}")
+    resolved = model_dir.resolve()
+    if not resolved.is_dir():
+        raise ValueError(f"model_dir does not exist: {resolved}")
+    if resolved.stat().st_uid != uid:
+        raise PermissionError(f"model_dir is not owned by the submitting user: {resolved}")
+    return resolved
+
+def check_lambda_dir(lambda_dir, uid):
+    """lambda 디렉토리가 symlink가 아니고 제출자 또는 서버 소유인지 확인 (없으면 통과)"""
+    lambda_dir = Path(lambda_dir)
+    confined_model_dir(lambda_dir.parent, uid)
+    try:
+        info = os.lstat(lambda_dir)
+    except FileNotFoundError:
+        return
+    if os.path.islink(lambda_dir) or info.st_uid not in (uid, os.geteuid()):
+        raise PermissionError(f"lambda directory is a symlink or owned by another user: {lambda_dir}")
+
+def signal_group(pid, sig=signal.SIGTERM):
+    """start_new_session으로 띄운 작업의 process group 전체에 신호 전달 (mpiexec와 모든 rank)"""
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        pass
+
+def group_alive(pid):
+    """process group이 아직 살아 있는지 확인"""
+    try:
+        os.killpg(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobQueue:
+    """작업 대기열, 중복 제거, fair-share 스케줄링, 결과 배포"""
+
+    def __init__(self, server_config):
+        self.cores = server_config['cores']
+        self.state_dir = server_config['state_dir']
+        self.work_dir = self.state_dir / "work"
+        self.state_file = self.state_dir / "state.json"
+        self.adda_exe = server_config['adda_exe']
+        self.mpi_exec = shutil.which('mpiexec') or shutil.which('mpirun')
+        self.lock = threading.Lock()
+        self.jobs = {}            # key -> 작업 dict
+        self.order = []           # 제출 순서의 key 목록
+        self.submissions = {}     # submission id -> 제출 dict
+        self.usage = {}           # user -> 누적 core-초
+        self.processes = {}       # key -> Popen
+        self.orphans = {}         # key -> 서버 재시작 전에 시작되어 아직 추적 중인 process group id
+        self.finished = {}        # key -> 결과를 배포한 첫 lambda 디렉토리 (이후 같은 작업은 복사)
+        self.next_id = 1
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.jobs = state.get('jobs', {})
+        self.order = [key for key in state.get('order', []) if key in self.jobs]
+        self.submissions = state.get('submissions', {})
+        self.usage = state.get('usage', {})
+        self.finished = state.get('finished', {})
+        self.next_id = state.get('next_id', 1)
+        # 서버가 멈췄을 때 실행 중이던 작업: 아직 살아 있으면 끝날 때까지 추적, 이미 끝났으면 다시 대기
+        for key, job in self.jobs.items():
+            if job['state'] != 'running':
+                continue
+            if job.get('pid') and group_alive(job['pid']):
+                self.orphans[key] = job['pid']
+            else:
+                job['state'] = 'pending'
+
+    def _save_state(self):
+        state = {'jobs': self.jobs, 'order': self.order, 'submissions': self.submissions,
+                 'usage': self.usage, 'finished': self.finished, 'next_id': self.next_id}
+        tmp_file = self.state_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_file, self.state_file)
+
+    def _validate(self, manifest, uid):
+        """제출 검증: 서버의 ADDA 실행 파일만 허용, 제출자 소유 모델 디렉토리, 서버가 계산한 작업 키"""
+        if Path(manifest['adda_exe']).expanduser().resolve() != Path(self.adda_exe).resolve():
+            raise PermissionError(f"adda_exe must be the server's ADDA binary ({self.adda_exe}), "
+                                  f"got {manifest['adda_exe']}")
+        model_dir = confined_model_dir(manifest['model_dir'], uid)
+        specs = []
+        for spec in manifest['jobs']:
+            wavelength = int(spec['wavelength'])
+            args = spec['args']
+            if not isinstance(args, list) or not all(isinstance(arg, str) for arg in args):
+                raise ValueError(f"args of {wavelength} nm must be a list of strings")
+            forbidden = sorted(set(args) & set(FORBIDDEN_ARGS))
+            if forbidden:
+                raise ValueError(f"args of {wavelength} nm must not contain {', '.join(forbidden)}")
+            key = job_key(self.adda_exe, args)
+            if spec.get('key') not in (None, key):
+                raise ValueError(f"job key of {wavelength} nm is computed by the server; do not supply one")
+            lambda_dir = model_dir / f"lambda_{wavelength}nm"
+            check_lambda_dir(lambda_dir, uid)
+            specs.append((wavelength, args, key, lambda_dir))
+        return model_dir, specs
+
+    def submit(self, manifest, user, uid):
+        """작업 목록 검증 후 등록, 제출 요약 반환"""
+        model_dir, specs = self._validate(manifest, uid)
+        with self.lock:
+            submission_id = str(self.next_id)
+            self.next_id += 1
+            procs = max(1, min(int(manifest.get('procs', 1)), self.cores))
+            submission = {'id': submission_id, 'user': user, 'uid': uid, 'model_dir': str(model_dir),
+                          'config_file': manifest.get('config_file'), 'submitted': time.time(),
+                          'wavelengths': {}, 'deduplicated': 0}
+            self.submissions[submission_id] = submission
+
+            for wavelength, args, key, lambda_dir in specs:
+                waiter = {'submission': submission_id, 'wavelength': wavelength, 'uid': uid,
+                          'lambda_dir': str(lambda_dir)}
+                submission['wavelengths'][str(wavelength)] = 'pending'
+                source = self.finished.get(key)
+                if source and not Path(source).is_symlink() and Path(source).is_dir() and has_crosssec(source):
+                    # 이미 계산된 같은 작업: 바로 복사 (archive로 묶인 결과는 복사 원본으로 쓰지 않음)
+                    submission['deduplicated'] += 1
+                    self._deliver(key, source, [waiter], 'ok', None)
+                    continue
+                job = self.jobs.get(key)
+                if job is not None and job['state'] in ('pending', 'running'):
+                    job['waiters'].append(waiter)
+                    submission['wavelengths'][str(wavelength)] = job['state']
+                    submission['deduplicated'] += 1
+                    continue
+                self.jobs[key] = {'key': key, 'user': user, 'args': args, 'procs': procs, 'wavelength': wavelength,
+                                  'state': 'pending', 'waiters': [waiter], 'submitted': time.time()}
+                self.order.append(key)
+            self._save_state()
+            return self._submission_summary(submission)
+
+    def cancel(self, submission_id, uid):
+        """제출 취소 (제출자 또는 서버 관리자만, 다른 제출이 기다리는 작업은 계속 실행)"""
+        with self.lock:
+            submission = self.submissions.get(submission_id)
+            if submission is None:
+                raise KeyError(f"Unknown submission: {submission_id}")
+            if uid not in (submission.get('uid'), 0, os.geteuid()):
+                raise PermissionError(f"Submission {submission_id} belongs to {submission['user']}")
+            cancelled = 0
+            for key in list(self.order):
+                job = self.jobs[key]
+                before = len(job['waiters'])
+                job['waiters'] = [w for w in job['waiters'] if w['submission'] != submission_id]
+                cancelled += before - len(job['waiters'])
+                if job['waiters']:
+                    continue
+                if job['state'] == 'running' and job.get('pid'):
+                    signal_group(job['pid'])
+                elif job['state'] == 'pending':
+                    self.order.remove(key)
+                    del self.jobs[key]
+            for wavelength, state in submission['wavelengths'].items():
+                if state in ('pending', 'running'):
+                    submission['wavelengths'][wavelength] = 'cancelled'
+            self._save_state()
+            return {'cancelled': cancelled}
+
+    def _running_cores(self):
+        by_user = {}
+        for key in list(self.processes) + list(self.orphans):
+            job = self.jobs[key]
+            by_user[job['user']] = by_user.get(job['user'], 0) + job['procs']
+        return by_user
+
+    def schedule(self):
+        """core 예산 안에서 fair-share 순서로 대기 작업 시작"""
+        with self.lock:
+            running = self._running_cores()
+            free = self.cores - sum(running.values())
+            pending_by_user = {}
+            for key in self.order:
+                job = self.jobs[key]
+                if job['state'] == 'pending':
+                    pending_by_user.setdefault(job['user'], []).append(job)
+            started = False
+            while pending_by_user and free > 0:
+                # 지금 쓰는 core가 적고, 누적 사용량이 적은 사용자 먼저
+                user = min(pending_by_user, key=lambda u: (running.get(u, 0), self.usage.get(u, 0.0)))
+                job = pending_by_user[user][0]
+                if job['procs'] > free:
+                    # 큰 작업이 계속 밀리지 않도록 다른 사용자의 작은 작업으로 채우지 않음
+                    break
+                self._start(job)
+                started = True
+                free -= job['procs']
+                running[user] = running.get(user, 0) + job['procs']
+                pending_by_user[user].pop(0)
+                if not pending_by_user[user]:
+                    del pending_by_user[user]
+            if started:
+                self._save_state()
+
+    def _start(self, job):
+        out_dir = self.work_dir / job['key']
+        shutil.rmtree(out_dir, ignore_errors=True)
+        out_dir.parent.mkdir(parents=True, exist_ok=True)
+        command = ([self.mpi_exec, '-n', str(job['procs']), self.adda_exe]
+                   + job['args'] + ['-dir', str(out_dir)])
+        log_file = open(self.work_dir / f"{job['key']}.out", 'w')
+        try:
+            self.processes[job['key']] = subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT,
+                                                          start_new_session=True)
+        except OSError as e:
+            log_file.write(f"Failed to start: {e}\n")
+            job['state'] = 'failed'
+            job['exit_code'] = None
+            self._deliver(job['key'], None, job['waiters'], 'error', f"job server: {e}")
+            return
+        finally:
+            log_file.close()
+        job['state'] = 'running'
+        job['started'] = time.time()
+        job['pid'] = self.processes[job['key']].pid
+        for waiter in job['waiters']:
+            self.submissions[waiter['submission']]['wavelengths'][str(waiter['wavelength'])] = 'running'
+
+    def reap(self):
+        """끝난 작업 정리 및 결과 배포"""
+        with self.lock:
+            changed = False
+            finished = []
+            for key, process in list(self.processes.items()):
+                exit_code = process.poll()
+                if exit_code is not None:
+                    del self.processes[key]
+                    finished.append((key, exit_code))
+            for key, pid in list(self.orphans.items()):
+                # 재시작 전에 시작된 작업은 종료 코드를 알 수 없으므로 CrossSec 유무로 판단
+                if not group_alive(pid):
+                    del self.orphans[key]
+                    finished.append((key, 0))
+            for key, exit_code in finished:
+                job = self.jobs[key]
+                job['ended'] = time.time()
+                job['exit_code'] = exit_code
+                self.usage[job['user']] = self.usage.get(job['user'], 0.0) + \
+                    (job['ended'] - job['started']) * job['procs']
+                out_dir = self.work_dir / key
+                ok = exit_code == 0 and has_crosssec(out_dir)
+                job['state'] = 'done' if ok else 'failed'
+                reason = None if ok else f"job server: exit code {exit_code}"
+                self._deliver(key, out_dir if ok else None, job['waiters'], 'ok' if ok else 'error', reason)
+                shutil.rmtree(out_dir, ignore_errors=True)
+                if ok:
+                    # 실패한 작업의 mpiexec 출력만 <state_dir>/work/<key>.out에 남김
+                    (self.work_dir / f"{key}.out").unlink(missing_ok=True)
+                self.order.remove(key)
+                del self.jobs[key]
+                changed = True
+            if changed:
+                self._save_state()
+
+    def _deliver(self, key, source, waiters, status, reason):
+        """결과를 각 제출의 lambda 디렉토리로 복사하고 각 모델의 실행 기록에 완료/실패 기록"""
+        job = self.jobs.get(key, {})
+        for waiter in waiters:
+            submission = self.submissions.get(waiter['submission'])
+            lambda_dir = Path(waiter['lambda_dir'])
+            model_dir = lambda_dir.parent
+            state = 'done' if status == 'ok' else 'failed'
+            record = status != 'ok'
+            try:
+                # 제출 이후 디렉토리가 symlink 등으로 바뀌지 않았는지 쓰기 직전에 다시 확인
+                check_lambda_dir(lambda_dir, waiter.get('uid', -1))
+            except (OSError, ValueError) as e:
+                print(f"[WARNING] Not delivering {key} to {lambda_dir}: {e}", flush=True)
+                if submission is not None:
+                    submission['wavelengths'][str(waiter['wavelength'])] = 'failed'
+                continue
+            if status == 'ok':
+                try:
+                    # 같은 모델 디렉토리에 중복 제출된 파장은 한 번만 배포/기록
+                    if not has_crosssec(lambda_dir):
+                        publish_lambda_dir(source, lambda_dir, keep_source=True)
+                        record = True
+                    self.finished.setdefault(key, str(lambda_dir))
+                except OSError as e:
+                    state, reason, record = 'failed', f"job server: cannot write results ({e})", True
+            if record:
+                try:
+                    with RunLedger(model_dir) as ledger:
+                        ledger.record(waiter['wavelength'], 'completed' if state == 'done' else 'failed',
+                                      reason=reason if state == 'failed' else None, params=key,
+                                      start=job.get('started'), end=job.get('ended'),
+                                      exit_code=job.get('exit_code'), nprocs=job.get('procs'), source='jobserver')
+                except (OSError, sqlite3.Error) as e:
+                    print(f"[WARNING] Cannot update run ledger in {model_dir}: {e}", flush=True)
+            if submission is not None:
+                submission['wavelengths'][str(waiter['wavelength'])] = state
+            if job.get('started'):
+                emit_span('jobserver_run', job['started'], job.get('ended', time.time()),
+                          wavelength=waiter['wavelength'], status=status,
+                          trace_file=model_dir / TRACE_FILE_NAME, nprocs=job['procs'], key=key,
+                          user=job['user'], submission=waiter['submission'])
+
+    def _submission_summary(self, submission):
+        counts = {}
+        for state in submission['wavelengths'].values():
+            counts[state] = counts.get(state, 0) + 1
+        return {'id': submission['id'], 'user': submission['user'], 'model_dir': submission['model_dir'],
+                'total': len(submission['wavelengths']), 'deduplicated': submission['deduplicated'],
+                'counts': counts}
+
+    def queue_status(self):
+        """사용자별 core 사용량, 대기/실행 작업 수, 제출별 진행률"""
+        with self.lock:
+            running = self._running_cores()
+            users = {}
+            for key in self.order:
+                job = self.jobs[key]
+                entry = users.setdefault(job['user'], {'running': 0, 'pending': 0, 'cores': 0})
+                entry[job['state']] = entry.get(job['state'], 0) + 1
+            for user, cores in running.items():
+                users.setdefault(user, {'running': 0, 'pending': 0})['cores'] = cores
+            for user, entry in users.items():
+                entry['core_hours'] = self.usage.get(user, 0.0) / 3600.0
+            active = [self._submission_summary(s) for s in self.submissions.values()
+                      if any(state in ('pending', 'running') for state in s['wavelengths'].values())]
+            return {'cores': self.cores, 'cores_in_use': sum(running.values()), 'users': users,
+                    'submissions': active}
+
+    def submission_status(self, submission_id):
+        with self.lock:
+            submission = self.submissions.get(submission_id)
+            if submission is None:
+                raise KeyError(f"Unknown submission: {submission_id}")
+            summary = self._submission_summary(submission)
+            summary['wavelengths'] = submission['wavelengths']
+            return summary
+
+    def terminate_all(self):
+        """서버 종료 시 실행 중인 작업의 process group을 종료하고 다시 대기 상태로 저장"""
+        with self.lock:
+            for key in list(self.processes) + list(self.orphans):
+                job = self.jobs[key]
+                signal_group(job['pid'])
+                job['state'] = 'pending'
+                job.pop('pid', None)
+            self.processes.clear()
+            self.orphans.clear()
+            self._save_state()
+
+class JobRequestHandler(socketserver.StreamRequestHandler):
+    """줄 단위 JSON 요청 처리"""
+
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+            response = self.server.dispatch(request, *peer_credentials(self.connection))
+        except Exception as e:
+            response = {'ok': False, 'error': str(e)}
+        self.wfile.write((json.dumps(response) + '\n').encode())
+
+class JobServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket 서버 + 스케줄러 스레드"""
+    daemon_threads = True
+
+    def __init__(self, server_config):
+        self.server_config = server_config
+        self.queue = JobQueue(server_config)
+        socket_path = Path(server_config['socket'])
+        if socket_path.exists():
+            socket_path.unlink()
+        # bind 시점부터 서버 사용자만 접근 가능하게 만든 뒤 group이 지정되면 그 그룹에만 공유
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(str(socket_path), JobRequestHandler)
+        finally:
+            os.umask(old_umask)
+        if server_config.get('group'):
+            os.chown(socket_path, -1, grp.getgrnam(server_config['group']).gr_gid)
+            os.chmod(socket_path, 0o660)
+        self.stop_event = threading.Event()
+
+    def dispatch(self, request, uid, user):
+        command = request.get('command')
+        if command in ('submit', 'cancel', 'shutdown') and uid is None:
+            raise PermissionError("Cannot identify the client (SO_PEERCRED unavailable)")
+        if command == 'submit':
+            return {'ok': True, 'submission': self.queue.submit(request['manifest'], user, uid)}
+        if command == 'queue':
+            return {'ok': True, 'queue': self.queue.queue_status()}
+        if command == 'status':
+            return {'ok': True, 'submission': self.queue.submission_status(str(request['id']))}
+        if command == 'cancel':
+            return {'ok': True, 'result': self.queue.cancel(str(request['id']), uid)}
+        if command == 'shutdown':
+            if uid not in (0, os.geteuid()):
+                raise PermissionError("Only the server user can shut the server down")
+            self.stop_event.set()
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {'ok': True}
+        raise ValueError(f"Unknown command: {command}")
+
+    def scheduler_loop(self):
+        while not self.stop_event.is_set():
+            self.queue.reap()
+            self.queue.schedule()
+            self.stop_event.wait(self.server_config['poll_interval'])
+
+    def run(self):
+        if self.queue.mpi_exec is None:
+            raise RuntimeError("No MPI implementation found (mpiexec/mpirun)")
+        scheduler = threading.Thread(target=self.scheduler_loop, daemon=True)
+        scheduler.start()
+        print(f"[JOBSERVER] Listening on {self.server_config['socket']} "
+              f"({self.queue.cores} cores, state in {self.queue.state_dir})", flush=True)
+        try:
+            self.serve_forever()
+        finally:
+            self.stop_event.set()
+            self.queue.terminate_all()
+            self.server_close()
+            Path(self.server_config['socket']).unlink(missing_ok=True)
+
+def send_request(socket_path, request):
+    """서버에 요청 하나를 보내고 응답 dict 반환"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(str(socket_path))
+        client.sendall((json.dumps(request) + '\n').encode())
+        with client.makefile('r') as reader:
+            response = json.loads(reader.readline())
+    if not response.get('ok'):
+        raise RuntimeError(response.get('error', 'request failed'))
+    return response
+
+def print_queue(queue):
+    """대기열 요약 출력"""
+    print(f"Cores in use: {queue['cores_in_use']}/{queue['cores']}")
+    print(f"{'User':<16}{'Running':>8}{'Pending':>8}{'Cores':>7}{'Core-h':>9}")
+    for user, entry in sorted(queue['users'].items()):
+        print(f"{user:<16}{entry.get('running', 0):>8}{entry.get('pending', 0):>8}"
+              f"{entry.get('cores', 0):>7}{entry.get('core_hours', 0.0):>9.2f}")
+    for submission in queue['submissions']:
+        print_submission(submission)
+
+def print_submission(submission):
+    """제출 하나의 진행률 출력"""
+    counts = submission['counts']
+    done = counts.get('done', 0)
+    print(f"[{submission['id']}] {submission['user']} {submission['model_dir']}: {done}/{submission['total']} done, "
+          f"{counts.get('running', 0)} running, {counts.get('pending', 0)} pending, "
+          f"{counts.get('failed', 0)} failed, {submission['deduplicated']} shared with other submissions")
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='ADDA 로컬 작업 서버 (Unix socket)')
+    parser.add_argument('command', choices=['start', 'serve', 'submit', 'manifest', 'queue', 'status',
+                                            'cancel', 'shutdown'])
+    parser.add_argument('target', nargs='?', help='config 파일 (status/cancel: submission id)')
+    parser.add_argument('--manifest', help='submit: 작업 목록 JSON 파일')
+    parser.add_argument('--socket', help='Unix socket 경로 (기본값: JOB_SERVER_CONFIG)')
+    parser.add_argument('--cores', type=int, help='serve/start: 전체 core 예산')
+    args = parser.parse_args()
+
+    config = None
+    if args.target and args.command not in ('status', 'cancel'):
+        config = load_config_module(args.target)
+    server_config = get_job_server_config(config)
+    if args.socket:
+        server_config['socket'] = args.socket
+    if args.cores:
+        server_config['cores'] = args.cores
+
+    try:
+        if args.command == 'serve':
+            server_config['state_dir'].mkdir(parents=True, exist_ok=True)
+            JobServer(server_config).run()
+        elif args.command == 'start':
+            server_config['state_dir'].mkdir(parents=True, exist_ok=True)
+            log_file = server_config['state_dir'] / "server.log"
+            command = [sys.executable, str(Path(__file__).resolve()), 'serve',
+                       '--socket', str(server_config['socket']), '--cores', str(server_config['cores'])]
+            if args.target:
+                command.insert(3, args.target)
+            with open(log_file, 'a') as log:
+                process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+            print(f"[JOBSERVER] Started (pid {process.pid}, log {log_file})")
+        elif args.command == 'manifest':
+            print(json.dumps(build_manifest(args.target), indent=2))
+        elif args.command == 'submit':
+            manifest = json.loads(Path(args.manifest).read_text()) if args.manifest else build_manifest(args.target)
+            if manifest.get('skipped'):
+                print(f"[WARNING] No refractive index for {manifest['skipped']} nm; not submitted")
+            if not manifest['jobs']:
+                print("[INFO] Nothing to submit (all wavelengths already have results)")
+                return
+            # 서버는 제출자 소유의 기존 모델 디렉토리에만 결과를 쓰므로 미리 생성
+            Path(manifest['model_dir']).mkdir(parents=True, exist_ok=True)
+            response = send_request(server_config['socket'], {'command': 'submit', 'manifest': manifest})
+            print_submission(response['submission'])
+        elif args.command == 'queue':
+            print_queue(send_request(server_config['socket'], {'command': 'queue'})['queue'])
+        elif args.command in ('status', 'cancel'):
+            if not args.target:
+                parser.error(f"{args.command} requires a submission id")
+            response = send_request(server_config['socket'], {'command': args.command, 'id': args.target})
+            if args.command == 'status':
+                print_submission(response['submission'])
+                for wavelength, state in sorted(response['submission']['wavelengths'].items(), key=lambda i: int(i[0])):
+                    print(f"  {wavelength:>6} nm  {state}")
+            else:
+                print(f"Cancelled {response['result']['cancelled']} job(s)")
+        elif args.command == 'shutdown':
+            send_request(server_config['socket'], {'command': 'shutdown'})
+            print("[JOBSERVER] Shutting down")
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
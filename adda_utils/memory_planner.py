@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+ADDA Memory Planner
+adda_mpi 실행 전에 rank당 메모리를 예측하여 노드 메모리에 맞는 rank 구성 또는 -opt mem 권장
+
+계산 격자는 read 형상이면 shape 파일의 좌표 범위, 그 외에는 ADDA와 같이 size, dpl(기본값 10|m|), λ로 구하며
+스윕 전체에서 가장 큰 격자(짧은 파장, 큰 |m|)를 기준으로 한다.
+메모리 모델 (ADDA 매뉴얼의 FFT 방식 추정치, rank는 z 방향 slab으로 분할):
+    FFT 격자 배열    GRID_BYTES * nx*ny*nz        (-opt mem이면 OPT_MEM_GRID_FACTOR 배)
+    쌍극자 배열      DIPOLE_BYTES * N              (반복 solver 벡터 포함)
+    root rank 추가   STORE_BYTES * N               (store_int_field/store_dip_pol 각각, 출력 시 모음)
+    rank 고정 비용   MEMORY_CONFIG['rank_overhead_mb']
+
+사용법:
+    python memory_planner.py <config_file> [--ram-gb G] [--nodes N] [--procs P] [--shell]
+"""
+import argparse
+import math
+import os
+import sys
+from pathlib import Path
+
+try:
+    from .config_loader import load_config_module, apply_autotune, sweep_wavelengths
+    from .orientation_avg import orientation_shell_values
+    from .autotune import refractive_values
+    from .shape_symmetry import iter_shape_file
+except ImportError:
+    from config_loader import load_config_module, apply_autotune, sweep_wavelengths
+    from orientation_avg import orientation_shell_values
+    from autotune import refractive_values
+    from shape_symmetry import iter_shape_file
+
+GRID_BYTES = 288
+DIPOLE_BYTES = 271
+STORE_BYTES = 96
+OPT_MEM_GRID_FACTOR = 0.67
+MB = 1024.0 * 1024.0
+
+# 내장 형상의 계산 상자 대비 쌍극자 비율
+FILL_FRACTIONS = {'sphere': math.pi / 6, 'ellipsoid': math.pi / 6, 'coated': math.pi / 6,
+                  'cylinder': math.pi / 4, 'box': 1.0}
+
+DEFAULT_MEMORY_CONFIG = {
+    'enabled': True,
+    'node_memory_gb': None,      # None이면 이 노드의 /proc/meminfo MemAvailable
+    'nodes': 1,                  # rank가 분산되는 노드 수
+    'safety_factor': 0.85,       # 노드 메모리 중 사용할 비율
+    'rank_overhead_mb': 60,      # rank당 고정 비용 (MPI 버퍼, 실행 파일 등)
+    'apply': True,               # 스윕에서 권장 rank 수와 -opt mem 적용
+    'abort_if_unsafe': True,     # 어떤 구성도 맞지 않으면 스윕 시작 전에 중단
+}
+
+def get_memory_config(config):
+    """config의 MEMORY_CONFIG를 기본값과 병합"""
+    memory_config = dict(DEFAULT_MEMORY_CONFIG)
+    memory_config.update(getattr(config, 'MEMORY_CONFIG', {}) or {})
+    return memory_config
+
+def available_memory_mb():
+    """/proc/meminfo의 MemAvailable (없으면 MemTotal, 읽을 수 없으면 None)"""
+    values = {}
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                values[key] = float(rest.split()[0]) / 1024.0
+    except (OSError, ValueError, IndexError):
+        return None
+    return values.get('MemAvailable', values.get('MemTotal'))
+
+def read_shape_grid(shape_file):
+    """형상 파일 (ADDA 또는 DDSCAT 형식)의 (nx, ny, nz, 쌍극자 수)"""
+    shape_file = os.path.expanduser(shape_file)
+    low, high = [None] * 3, [None] * 3
+    count = 0
+    for dipole in iter_shape_file(shape_file):
+        count += 1
+        for axis in range(3):
+            value = dipole[axis]
+            if low[axis] is None or value < low[axis]:
+                low[axis] = value
+            if high[axis] is None or value > high[axis]:
+                high[axis] = value
+    if not count:
+        raise ValueError(f"No dipoles in shape file: {shape_file}")
+    return high[0] - low[0] + 1, high[1] - low[1] + 1, high[2] - low[2] + 1, count
+
+def max_m_over_lambda(config_file, config):
+    """스윕 파장 중 |m|/λ(nm) 최대값 (굴절률을 구할 수 없으면 None)"""
+    best = None
+    for wavelength in sweep_wavelengths(config):
+        values = refractive_values(config_file, wavelength)
+        if not values:
+            continue
+        pairs = [float(v) for v in values]
+        m_abs = max(math.hypot(pairs[i], pairs[i + 1]) for i in range(0, len(pairs) - 1, 2))
+        ratio = m_abs / wavelength
+        if best is None or ratio > best[0]:
+            best = (ratio, wavelength, m_abs)
+    return best
+
+def computational_grid(config_file, config):
+    """스윕에서 가장 큰 계산 격자 (nx, ny, nz, 쌍극자 수, 설명 문자열)"""
+    shape_config = getattr(config, 'SHAPE_CONFIG', {'type': 'sphere', 'args': []})
+    adda_params = getattr(config, 'ADDA_PARAMS', {})
+    shape_type = shape_config.get('type', 'sphere')
+
+    if shape_type == 'read':
+        nx, ny, nz, dipoles = read_shape_grid(shape_config.get('filename'))
+        return nx, ny, nz, dipoles, f"shape file {Path(str(shape_config.get('filename'))).name}"
+
+    grid = adda_params.get('grid')
+    if grid is not None:
+        dims = list(grid) if isinstance(grid, (list, tuple)) else [grid]
+        nx = int(dims[0])
+        source = f"-grid {' '.join(map(str, dims))}"
+    else:
+        size_um = adda_params.get('size', 0.097)
+        if shape_type == 'sphere' and shape_config.get('eq_rad') is not None:
+            size_um = 2.0 * float(shape_config['eq_rad'])
+        if adda_params.get('dpl') is not None:
+            ratio = 1.0 / getattr(config, 'LAMBDA_START', 400)
+            nx = math.ceil(float(size_um) * 1000.0 * float(adda_params['dpl']) * ratio)
+            source = f"dpl {adda_params['dpl']} at {getattr(config, 'LAMBDA_START', 400)} nm"
+        else:
+            worst = max_m_over_lambda(config_file, config)
+            if worst is None:
+                raise ValueError("Refractive indices unavailable; set ADDA_PARAMS['grid'] or 'dpl'")
+            ratio, wavelength, m_abs = worst
+            nx = math.ceil(float(size_um) * 1000.0 * 10.0 * ratio)
+            source = f"dpl 10|m| (|m|={m_abs:.2f}) at {wavelength} nm"
+        nx += nx % 2
+        dims = [nx]
+
+    args = [float(a) for a in shape_config.get('args', []) or []]
+    if len(dims) == 3:
+        ny, nz = int(dims[1]), int(dims[2])
+    elif shape_type in ('ellipsoid', 'box') and len(args) >= 2:
+        ny, nz = math.ceil(nx * args[0]), math.ceil(nx * args[1])
+    elif shape_type == 'cylinder' and args:
+        ny, nz = nx, math.ceil(nx * args[0])
+    else:
+        ny, nz = nx, nx
+    dipoles = int(nx * ny * nz * FILL_FRACTIONS.get(shape_type, 1.0))
+    return nx, ny, nz, dipoles, source
+
+def rank_memory_mb(grid, procs, opt_mem=False, store_flags=0, overhead_mb=60):
+    """(일반 rank, root rank) 메모리 예측 (MB)"""
+    nx, ny, nz, dipoles = grid
+    # FFT 격자는 2nz개, 쌍극자는 nz개의 z slab을 rank가 나눠 가짐 (남는 rank는 idle)
+    grid_share = math.ceil(2 * nz / procs) / (2 * nz)
+    dipole_share = math.ceil(nz / procs) / nz
+    grid_bytes = GRID_BYTES * nx * ny * nz * (OPT_MEM_GRID_FACTOR if opt_mem else 1.0)
+    per_rank = (grid_bytes * grid_share + DIPOLE_BYTES * dipoles * dipole_share) / MB + overhead_mb
+    root = per_rank + STORE_BYTES * dipoles * store_flags / MB
+    return per_rank, root
+
+class MemoryPlanner:
+    """계산 격자와 노드 메모리로 안전한 rank 구성을 고르는 클래스"""
+
+    def __init__(self, config_file, ram_gb=None, nodes=None, procs=None):
+        self.config_file = str(Path(config_file).resolve())
+        self.config = load_config_module(self.config_file)
+        self.memory_config = get_memory_config(self.config)
+        adda_params = apply_autotune(self.config, getattr(self.config, 'ADDA_PARAMS', {}))
+
+        self.mpi_procs = procs or getattr(self.config, 'MPI_PROCS', 40)
+        self.nodes = max(1, int(nodes or self.memory_config['nodes']))
+        ram_gb = ram_gb or self.memory_config['node_memory_gb']
+        self.node_memory_mb = ram_gb * 1024.0 if ram_gb else available_memory_mb()
+        self.store_flags = int(bool(adda_params.get('store_int_field'))) + int(bool(adda_params.get('store_dip_pol')))
+        self.opt_mem_configured = adda_params.get('opt') == 'mem'
+
+        # split 배향 평균은 ORIENT_JOBS개 작업이 동시에 ORIENT_PROCS개씩 rank를 사용
+        orient = orientation_shell_values(self.config, self.mpi_procs)
+        self.split = orient['ORIENT_MODE'] == 'split'
+        self.jobs = orient['ORIENT_JOBS'] if self.split else 1
+        self.job_procs = orient['ORIENT_PROCS'] if self.split else self.mpi_procs
+
+        nx, ny, nz, dipoles, self.grid_source = computational_grid(self.config_file, self.config)
+        self.grid = (nx, ny, nz, dipoles)
+
+    @property
+    def limit_mb(self):
+        """노드당 사용 가능한 메모리 (safety_factor 적용)"""
+        if self.node_memory_mb is None:
+            return None
+        return self.node_memory_mb * self.memory_config['safety_factor']
+
+    def node_usage_mb(self, jobs, procs, opt_mem):
+        """가장 많이 쓰는 노드의 메모리 예측 (root rank가 있는 노드)"""
+        per_rank, root = rank_memory_mb(self.grid, procs, opt_mem, self.store_flags,
+                                        self.memory_config['rank_overhead_mb'])
+        ranks_per_node = math.ceil(jobs * procs / self.nodes)
+        return per_rank * (ranks_per_node - 1) + root, per_rank, root
+
+    def evaluate(self, jobs, procs, opt_mem):
+        """구성 하나의 예측 결과 dict"""
+        node_mb, per_rank, root = self.node_usage_mb(jobs, procs, opt_mem)
+        fits = self.limit_mb is None or node_mb <= self.limit_mb
+        return {'jobs': jobs, 'procs': procs, 'opt_mem': opt_mem, 'per_rank_mb': per_rank,
+                'root_mb': root, 'node_mb': node_mb, 'fits': fits}
+
+    def plan(self):
+        """설정 그대로 -> -opt mem -> rank/동시 작업 수 축소 순으로 맞는 구성 선택"""
+        configured = self.evaluate(self.jobs, self.job_procs, self.opt_mem_configured)
+        if self.limit_mb is None:
+            return dict(configured, status='unknown', reason='node memory unknown')
+        if configured['fits']:
+            return dict(configured, status='ok', reason='configured layout fits')
+        if not self.opt_mem_configured:
+            candidate = self.evaluate(self.jobs, self.job_procs, True)
+            if candidate['fits']:
+                return dict(candidate, status='opt_mem', reason='fits only with -opt mem')
+
+        # split 모드는 동시 작업 수를, 그 외에는 rank 수를 줄여 rank 고정 비용을 덜어냄
+        for opt_mem in (self.opt_mem_configured, True):
+            if self.split:
+                candidates = [(jobs, self.job_procs) for jobs in range(self.jobs - 1, 0, -1)]
+            else:
+                candidates = [(1, procs) for procs in range(self.job_procs - 1, 0, -1)]
+            for jobs, procs in candidates:
+                candidate = self.evaluate(jobs, procs, opt_mem)
+                if candidate['fits']:
+                    return dict(candidate, status='reduced',
+                                reason=f"fits with {jobs * procs} ranks{' and -opt mem' if opt_mem else ''}")
+        return dict(self.evaluate(1, 1, True), status='unsafe',
+                    reason='does not fit even on one rank with -opt mem; add nodes or coarsen the shape')
+
+    def report(self, result):
+        """예측 결과 출력"""
+        nx, ny, nz, dipoles = self.grid
+        print(f"[GRID] {nx} x {ny} x {nz} ({dipoles:,} dipoles) from {self.grid_source}")
+        memory = f"{self.node_memory_mb / 1024.0:.1f} GB" if self.node_memory_mb else 'unknown'
+        print(f"[NODE] {self.nodes} node(s), {memory} each, safety factor {self.memory_config['safety_factor']}")
+        print(f"{'Layout':<22} {'opt':>4} {'Rank MB':>10} {'Root MB':>10} {'Node MB':>10}  Fits")
+        rows = [self.evaluate(self.jobs, self.job_procs, self.opt_mem_configured), result]
+        labels = ['configured', 'planned']
+        for label, row in zip(labels, rows):
+            layout = f"{label} {row['jobs']}x{row['procs']}" if self.split else f"{label} {row['procs']}"
+            print(f"{layout:<22} {'mem' if row['opt_mem'] else '-':>4} {row['per_rank_mb']:>10.0f} "
+                  f"{row['root_mb']:>10.0f} {row['node_mb']:>10.0f}  {'yes' if row['fits'] else 'NO'}")
+        print(f"[{result['status'].upper()}] {result['reason']}")
+
+def print_shell_values(result):
+    """run_simulation.sh가 eval할 형태로 출력"""
+    print(f'MEM_STATUS="{result["status"]}"')
+    print(f'MEM_REASON="{result["reason"]}"')
+    print(f'MEM_PROCS={result["procs"]}')
+    print(f'MEM_JOBS={result["jobs"]}')
+    print(f'MEM_OPT_MEM={1 if result["opt_mem"] else 0}')
+    print(f'MEM_NODE_MB={result["node_mb"]:.0f}')
+    print(f'MEM_RANK_MB={result["per_rank_mb"]:.0f}')
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='ADDA MPI 작업 메모리 예측 및 rank 구성 선택')
+    parser.add_argument('config_file', help='config 파일 경로')
+    parser.add_argument('--ram-gb', type=float, help='노드당 메모리 (GB, 기본값: MEMORY_CONFIG 또는 MemAvailable)')
+    parser.add_argument('--nodes', type=int, help='rank가 분산되는 노드 수')
+    parser.add_argument('--procs', type=int, help='MPI 프로세스 수 (기본값: MPI_PROCS)')
+    parser.add_argument('--shell', action='store_true', help='bash eval용 MEM_* 변수로 출력')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.config_file):
+        print(f"[ERROR] Config file not found: {args.config_file}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        planner = MemoryPlanner(args.config_file, args.ram_gb, args.nodes, args.procs)
+    except (OSError, ValueError) as e:
+        if args.shell:
+            print('MEM_STATUS="unknown"')
+            print(f'MEM_REASON="{e}"')
+            return
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+
+    result = planner.plan()
+    if args.shell:
+        print_shell_values(result)
+    else:
+        planner.report(result)
+
+if __name__ == "__main__":
+    main()
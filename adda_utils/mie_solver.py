@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+ADDA Mie Fast Path
+구(sphere)와 동심 core-shell(coated) 형상의 정확한 Mie 해를 스윕 파장 격자 전체에 대해 numpy 벡터 연산으로 계산
+
+- 빠른 경로: 결과가 없는 파장의 Cext/Qext/Cabs/Qabs를 한 번에 계산하여 ADDA와 같은 lambda_XXXnm/CrossSec-X/Y
+  + log 형식으로 기록하고 ledger에 completed로 남김 (MIE_CONFIG['fast_path']이면 run_simulation.sh가 ADDA 실행 전에 호출)
+- 검증: 기존 ADDA 결과와 정확한 해의 상대 편차를 쌍극자 해상도(dpl)별로 보고 (<결과 디렉토리>/mie_validation.json),
+  convergence_study.py의 .convergence/dpl_*/ 디렉토리도 --results로 지정 가능
+- 다층 구 계수는 로그 미분 D1/D3와 ψ/ξ 비의 재귀식(Yang 2003)으로 계산하므로 흡수가 큰 금속 core에서도 안정
+- 굴절률 순서는 ADDA coated 형상과 같음: 첫 번째 세트가 바깥 껍질, 두 번째 세트가 core
+- 중심이 어긋난 coated, -beam/-surf 설정, 그 외 형상은 정확한 해가 없으므로 적용하지 않음
+
+사용법:
+    python mie_solver.py sweep <config_file> [--force] [--shell]
+    python mie_solver.py validate <config_file> [--results DIR] [--tolerance 0.03]
+    python mie_solver.py eval <config_file> <lambda_nm> [<lambda_nm> ...]
+"""
+import argparse
+import json
+import math
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from .orientation_avg import read_crosssec_values, polarization_average, AVERAGED_FILE_NAME, AVERAGED_KEYS
+    from .retry_policy import has_crosssec
+    from .run_ledger import RunLedger, param_hash
+    from .scratch_stage import publish_lambda_dir
+    from .stage_tracer import trace_span, TRACE_FILE_NAME
+except ImportError:
+    from orientation_avg import read_crosssec_values, polarization_average, AVERAGED_FILE_NAME, AVERAGED_KEYS
+    from retry_policy import has_crosssec
+    from run_ledger import RunLedger, param_hash
+    from scratch_stage import publish_lambda_dir
+    from stage_tracer import trace_span, TRACE_FILE_NAME
+
+VALIDATION_FILE_NAME = 'mie_validation.json'
+WORK_DIR_NAME = '.mie'
+LOG_MARKER = 'exact Mie solution'
+UNSUPPORTED_PARAMS = ('beam', 'surf')
+COMMAND_PATTERN = re.compile(r"command:\s*'([^']*)'")
+DPL_PATTERN = re.compile(r'Dipoles/lambda:\s*([0-9.eE+-]+)')
+
+DEFAULT_MIE_CONFIG = {
+    'fast_path': False,          # sphere/coated: ADDA 대신 정확한 해를 기록
+    'validate': False,           # 스윕이 끝나면 ADDA 결과를 정확한 해와 비교
+    'tolerance': 0.03,           # 검증 통과 기준 상대 오차 (Qext, Qabs)
+}
+
+def get_mie_config(config):
+    """config의 MIE_CONFIG를 기본값과 병합"""
+    mie_config = dict(DEFAULT_MIE_CONFIG)
+    mie_config.update(getattr(config, 'MIE_CONFIG', {}) or {})
+    return mie_config
+
+def mie_geometry(config):
+    """정확한 해가 있는 형상이면 {'shape', 'radius_um', 'core_ratio', 'domains'}, 아니면 ValueError"""
+    shape_config = getattr(config, 'SHAPE_CONFIG', {'type': 'sphere', 'args': []})
+    adda_params = getattr(config, 'ADDA_PARAMS', {})
+    shape_type = shape_config.get('type', 'sphere')
+    for key in UNSUPPORTED_PARAMS:
+        if adda_params.get(key) is not None:
+            raise ValueError(f"-{key} is set; the Mie solution assumes a plane wave in free space")
+
+    if shape_type == 'sphere':
+        if shape_config.get('eq_rad') is not None:
+            radius = float(shape_config['eq_rad'])
+        else:
+            radius = float(adda_params.get('size', 0.097)) / 2.0
+        return {'shape': 'sphere', 'radius_um': radius, 'core_ratio': None, 'domains': 1}
+    if shape_type == 'coated':
+        args = [float(a) for a in shape_config.get('args', []) or []]
+        if not args or not 0.0 < args[0] < 1.0:
+            raise ValueError("coated requires 0 < d_in/d < 1")
+        if any(args[1:]):
+            raise ValueError("off-center inclusion has no Mie solution")
+        return {'shape': 'coated', 'radius_um': float(adda_params.get('size', 0.097)) / 2.0,
+                'core_ratio': args[0], 'domains': 2}
+    raise ValueError(f"shape '{shape_type}' has no Mie solution (sphere and concentric coated only)")
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("numpy is required for the Mie solver")
+
+def _nmax(x):
+    """Wiscombe 급수 항 수"""
+    return int(round(x + 4.05 * x ** (1.0 / 3.0) + 2.0))
+
+def _log_derivative(z, nmax):
+    """D1_n(z) = ψ_n'/ψ_n (n = 0..nmax), 하향 재귀"""
+    start = int(max(nmax, np.abs(z).max())) + 16
+    d = np.zeros((start + 1,) + z.shape, dtype=complex)
+    for n in range(start, 0, -1):
+        d[n - 1] = n / z - 1.0 / (d[n] + n / z)
+    return d[:nmax + 1]
+
+def _d3(z, d1, nmax):
+    """D3_n(z) = ξ_n'/ξ_n (n = 0..nmax), ψ_nξ_n 곱의 상향 재귀 (흡수 매질에서도 넘치지 않음)"""
+    d3 = np.zeros_like(d1)
+    product = 0.5 * (1.0 - np.exp(2j * z))
+    d3[0] = 1j
+    for n in range(1, nmax + 1):
+        product = product * (n / z - d1[n - 1]) * (n / z - d3[n - 1])
+        d3[n] = d1[n] + 1j / product
+    return d3
+
+def _shell_ratio(z_inner, z_outer, d1_inner, d3_inner, d1_outer, d3_outer, nmax):
+    """Q_n = (ψ_n/ξ_n)(z_inner) / (ψ_n/ξ_n)(z_outer), exp(2 Im z) 증폭을 미리 약분"""
+    a1, b1 = z_inner.real, z_inner.imag
+    a2, b2 = z_outer.real, z_outer.imag
+    q = np.zeros_like(d1_inner)
+    q[0] = (np.exp(2.0 * (b1 - b2)) * (np.exp(-2.0 * b1) - np.exp(-2j * a1))
+            / (np.exp(-2.0 * b2) - np.exp(-2j * a2)))
+    for n in range(1, nmax + 1):
+        inner = (n / z_inner - d1_inner[n - 1]) / (n / z_inner - d3_inner[n - 1])
+        outer = (n / z_outer - d1_outer[n - 1]) / (n / z_outer - d3_outer[n - 1])
+        q[n] = q[n - 1] * inner / outer
+    return q
+
+def layered_coefficients(x_layers, m_layers):
+    """동심 다층 구의 Mie 계수 (a_n, b_n), n = 1..nmax 행 × 파장 열
+
+    x_layers, m_layers는 안쪽 층부터 바깥 층까지의 크기 변수와 상대 굴절률 배열 목록.
+    파장마다 필요한 항 수가 다르므로 nmax는 가장 큰 크기 변수 기준이고 나머지 항은 0으로 둔다.
+    """
+    x_outer = x_layers[-1]
+    nmax = _nmax(float(x_outer.max()))
+    orders = np.arange(nmax + 1)[:, None]
+
+    with np.errstate(all='ignore'):
+        z = m_layers[0] * x_layers[0]
+        h_a = h_b = _log_derivative(z, nmax)
+        for layer in range(1, len(x_layers)):
+            m_l, m_prev = m_layers[layer], m_layers[layer - 1]
+            z_inner, z_outer = m_l * x_layers[layer - 1], m_l * x_layers[layer]
+            d1_inner, d1_outer = _log_derivative(z_inner, nmax), _log_derivative(z_outer, nmax)
+            d3_inner, d3_outer = _d3(z_inner, d1_inner, nmax), _d3(z_outer, d1_outer, nmax)
+            q = _shell_ratio(z_inner, z_outer, d1_inner, d3_inner, d1_outer, d3_outer, nmax)
+            g1 = m_l * h_a - m_prev * d1_inner
+            g2 = m_l * h_a - m_prev * d3_inner
+            h_a = (g2 * d1_outer - q * g1 * d3_outer) / (g2 - q * g1)
+            g1 = m_prev * h_b - m_l * d1_inner
+            g2 = m_prev * h_b - m_l * d3_inner
+            h_b = (g2 * d1_outer - q * g1 * d3_outer) / (g2 - q * g1)
+
+        # 주변 매질(진공)의 ψ_n, χ_n은 n <= nmax 범위에서 상향 재귀 (BHMIE와 같음)
+        psi = np.zeros((nmax + 1,) + x_outer.shape)
+        chi = np.zeros_like(psi)
+        psi[0], chi[0] = np.sin(x_outer), np.cos(x_outer)
+        psi_prev, chi_prev = np.cos(x_outer), -np.sin(x_outer)
+        for n in range(1, nmax + 1):
+            psi[n] = (2 * n - 1) / x_outer * psi[n - 1] - (psi[n - 2] if n > 1 else psi_prev)
+            chi[n] = (2 * n - 1) / x_outer * chi[n - 1] - (chi[n - 2] if n > 1 else chi_prev)
+        xi = psi - 1j * chi
+
+        m_out = m_layers[-1]
+        n_x = orders[1:] / x_outer
+        term_a = h_a[1:] / m_out + n_x
+        term_b = h_b[1:] * m_out + n_x
+        a = (term_a * psi[1:] - psi[:-1]) / (term_a * xi[1:] - xi[:-1])
+        b = (term_b * psi[1:] - psi[:-1]) / (term_b * xi[1:] - xi[:-1])
+
+    needed = orders[1:] <= np.array([_nmax(float(x)) for x in x_outer])[None, :]
+    a = np.where(needed & np.isfinite(a), a, 0.0)
+    b = np.where(needed & np.isfinite(b), b, 0.0)
+    return a, b
+
+def mie_cross_sections(wavelengths_nm, radius_um, m_outer, m_core=None, core_ratio=None):
+    """파장 배열에 대한 {'Cext', 'Qext', 'Cabs', 'Qabs', 'Csca', 'Qsca'} (단면적 µm², Q는 πr² 기준)
+
+    m_outer, m_core는 파장별 복소 굴절률 n + ik 배열 (coated의 바깥 껍질과 core).
+    """
+    _require_numpy()
+    wavelengths_um = np.asarray(wavelengths_nm, dtype=float) / 1000.0
+    x = 2.0 * math.pi * radius_um / wavelengths_um
+    m_outer = np.asarray(m_outer, dtype=complex)
+    if m_core is None:
+        a, b = layered_coefficients([x], [m_outer])
+    else:
+        a, b = layered_coefficients([x * core_ratio, x], [np.asarray(m_core, dtype=complex), m_outer])
+    weights = (2 * np.arange(1, a.shape[0] + 1) + 1)[:, None]
+    qext = 2.0 / x ** 2 * np.sum(weights * (a + b).real, axis=0)
+    qsca = 2.0 / x ** 2 * np.sum(weights * (np.abs(a) ** 2 + np.abs(b) ** 2), axis=0)
+    area = math.pi * radius_um ** 2
+    return {'Cext': qext * area, 'Qext': qext, 'Cabs': (qext - qsca) * area, 'Qabs': qext - qsca,
+            'Csca': qsca * area, 'Qsca': qsca}
+
+def read_result(lambda_dir):
+    """파장 디렉토리의 ADDA 결과 (배향 평균 CrossSec 또는 X/Y 편광 평균), 없으면 None"""
+    averaged = Path(lambda_dir) / AVERAGED_FILE_NAME
+    if averaged.exists():
+        values = read_crosssec_values(averaged)
+        return values if all(key in values for key in AVERAGED_KEYS) else None
+    return polarization_average(lambda_dir)
+
+def read_log_run(log_path):
+    """ADDA log에서 (-m 값 목록, Dipoles/lambda), Mie 빠른 경로 log이거나 읽을 수 없으면 None"""
+    try:
+        text = Path(log_path).read_text(errors='replace')
+    except OSError:
+        return None
+    if LOG_MARKER in text.split('\n', 1)[0]:
+        return None
+    m_values, dpl = None, None
+    command = COMMAND_PATTERN.search(text)
+    if command:
+        tokens = command.group(1).split()
+        if '-m' in tokens:
+            values = []
+            for token in tokens[tokens.index('-m') + 1:]:
+                try:
+                    values.append(float(token))
+                except ValueError:
+                    break
+            m_values = values or None
+    match = DPL_PATTERN.search(text)
+    if match:
+        dpl = float(match.group(1))
+    return m_values, dpl
+
+class MieSolver:
+    """config 하나의 파장 격자에 대한 Mie 계산, 결과 기록 및 ADDA 결과 검증"""
+
+    def __init__(self, config_file):
+        # sweep_plan이 이 모듈의 mie_geometry를 쓰므로 여기서 import
+        try:
+            from .sweep_plan import SweepPlan
+        except ImportError:
+            from sweep_plan import SweepPlan
+        self.plan = SweepPlan(config_file)
+        self.config = self.plan.config
+        self.model_dir = self.plan.model_dir
+        self.wavelengths = self.plan.wavelengths
+        self.mie_config = get_mie_config(self.config)
+        self.geometry = mie_geometry(self.config)
+        self._points = None
+
+    def m_values(self, wavelength):
+        """해당 파장의 -m 값 목록 [n1, k1, n2, k2, ...] (구할 수 없으면 None)"""
+        if self._points is None:
+            _, self._points = self.plan.coverage()
+        sets = self.plan.m_values(self._points, wavelength)
+        if sets is None:
+            return None
+        return [value for pair in sets for value in pair]
+
+    def compute(self, wavelengths, m_lists):
+        """파장별 -m 값 목록으로 단면적 배열 dict 계산 (ADDA와 같이 남는 굴절률 세트는 무시)"""
+        domains = self.geometry['domains']
+        if any(len(m) < 2 * domains for m in m_lists):
+            raise ValueError(f"{self.geometry['shape']} needs {domains} refractive index set(s)"
+                             + (" (shell, core)" if domains == 2 else ""))
+        m_outer = [complex(m[0], m[1]) for m in m_lists]
+        m_core = [complex(m[2], m[3]) for m in m_lists] if domains == 2 else None
+        return mie_cross_sections(wavelengths, self.geometry['radius_um'], m_outer, m_core,
+                                  self.geometry['core_ratio'])
+
+    def describe(self):
+        """형상 설명 문자열"""
+        geometry = self.geometry
+        text = f"{geometry['shape']}, radius {geometry['radius_um']:g} um"
+        if geometry['core_ratio'] is not None:
+            text += f", core/outer diameter {geometry['core_ratio']:g}"
+        return text
+
+    def write_lambda_dir(self, lambda_dir, wavelength, m_values, values, index):
+        """CrossSec-X/Y와 log를 ADDA 형식으로 기록"""
+        lambda_dir.mkdir(parents=True, exist_ok=True)
+        refractive = ', '.join(f"{m_values[i]}+{m_values[i + 1]}i" for i in range(0, 2 * self.geometry['domains'], 2))
+        with open(lambda_dir / 'log', 'w') as f:
+            f.write(f"Generated by adda_utils/mie_solver.py ({LOG_MARKER}, no ADDA run)\n")
+            f.write(f"shape: {self.describe()}\n")
+            f.write(f"lambda: {wavelength / 1000.0:g}\n")
+            f.write(f"refractive index: {refractive}\n")
+            f.write(f"command: 'mie_solver -lambda {wavelength / 1000.0:g} -m {' '.join(map(str, m_values))}'\n")
+        for pol in ('X', 'Y'):
+            with open(lambda_dir / f"CrossSec-{pol}", 'w') as f:
+                for key in AVERAGED_KEYS:
+                    f.write(f"{key}\t= {float(values[key][index]):.10g}\n")
+
+    def write_sweep(self, force=False):
+        """결과가 없는 스윕 파장을 정확한 해로 기록, {'written', 'existing', 'uncovered', 'remaining'} 반환"""
+        targets, m_lists, existing, uncovered = [], [], [], []
+        for wavelength in self.wavelengths:
+            if not force and has_crosssec(self.model_dir / f"lambda_{wavelength}nm"):
+                existing.append(wavelength)
+                continue
+            m_values = self.m_values(wavelength)
+            if m_values is None:
+                uncovered.append(wavelength)
+                continue
+            targets.append(wavelength)
+            m_lists.append(m_values)
+
+        if targets:
+            with trace_span('mie_fast_path', None, self.model_dir / TRACE_FILE_NAME, profile=False,
+                            wavelengths=len(targets), shape=self.geometry['shape']):
+                values = self.compute(targets, m_lists)
+            work_dir = self.model_dir / WORK_DIR_NAME
+            with RunLedger(self.model_dir) as ledger:
+                for index, (wavelength, m_values) in enumerate(zip(targets, m_lists)):
+                    name = f"lambda_{wavelength}nm"
+                    staged = work_dir / name
+                    shutil.rmtree(staged, ignore_errors=True)
+                    self.write_lambda_dir(staged, wavelength, m_values, values, index)
+                    publish_lambda_dir(staged, self.model_dir / name)
+                    ledger.record(wavelength, 'completed', source='mie', nprocs=None,
+                                  params=param_hash(f"mie {self.describe()} -m {' '.join(map(str, m_values))}"))
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return {'written': targets, 'existing': existing, 'uncovered': uncovered,
+                'remaining': len(uncovered)}
+
+    def validate(self, results_dir=None, tolerance=None):
+        """results_dir의 ADDA 결과와 정확한 해 비교 결과 dict"""
+        results_dir = Path(results_dir) if results_dir else self.model_dir
+        tolerance = tolerance or self.mie_config['tolerance']
+        rows = []
+        for lambda_dir in sorted(results_dir.glob('lambda_*nm')):
+            try:
+                wavelength = int(lambda_dir.name[len('lambda_'):-len('nm')])
+            except ValueError:
+                continue
+            run = read_log_run(lambda_dir / 'log')
+            values = read_result(lambda_dir)
+            if run is None or values is None:
+                continue
+            m_values, dpl = run
+            m_values = m_values or self.m_values(wavelength)
+            if m_values is None:
+                continue
+            if dpl is None:
+                dpl = self.default_dpl(wavelength, m_values)
+            rows.append({'wavelength': wavelength, 'dpl': dpl, 'm': m_values, 'adda': values})
+
+        if rows:
+            exact = self.compute([row['wavelength'] for row in rows], [row['m'] for row in rows])
+            for index, row in enumerate(rows):
+                row['mie'] = {key: float(exact[key][index]) for key in AVERAGED_KEYS + ['Qsca']}
+                row['adda']['Qsca'] = row['adda']['Qext'] - row['adda']['Qabs']
+                row['error'] = {key: (row['adda'][key] - row['mie'][key]) / row['mie'][key]
+                                if row['mie'][key] else math.inf for key in ('Qext', 'Qabs', 'Qsca')}
+
+        # 기본 해상도(10|m|)는 파장마다 다르므로 0.5 간격으로 묶음
+        groups = {}
+        for row in rows:
+            groups.setdefault(round(row['dpl'] * 2.0) / 2.0, []).append(row)
+        summary = []
+        for dpl, group in sorted(groups.items()):
+            entry = {'dpl': dpl, 'wavelengths': len(group)}
+            for key in ('Qext', 'Qabs', 'Qsca'):
+                errors = [abs(row['error'][key]) for row in group]
+                worst = max(group, key=lambda row: abs(row['error'][key]))
+                entry[key] = {'max': max(errors), 'rms': math.sqrt(sum(e * e for e in errors) / len(errors)),
+                              'worst_wavelength': worst['wavelength']}
+            entry['pass'] = entry['Qext']['max'] <= tolerance and entry['Qabs']['max'] <= tolerance
+            summary.append(entry)
+        return {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results_dir': str(results_dir),
+                'geometry': self.geometry, 'tolerance': tolerance, 'summary': summary, 'rows': rows}
+
+    def default_dpl(self, wavelength, m_values):
+        """log에 Dipoles/lambda가 없을 때 설정에서 추정한 해상도 (dpl, grid, 또는 ADDA 기본값 10|m|)"""
+        adda_params = getattr(self.config, 'ADDA_PARAMS', {})
+        if adda_params.get('dpl') is not None:
+            return float(adda_params['dpl'])
+        grid = adda_params.get('grid')
+        if grid is not None:
+            nx = float(grid[0] if isinstance(grid, (list, tuple)) else grid)
+            return nx * wavelength / (2000.0 * self.geometry['radius_um'])
+        return 10.0 * max(math.hypot(m_values[i], m_values[i + 1]) for i in range(0, len(m_values) - 1, 2))
+
+def print_validation(report):
+    """검증 결과 요약 출력"""
+    print(f"[MIE] {report['geometry']['shape']} exact solution vs ADDA results in {report['results_dir']}")
+    if not report['summary']:
+        print("  No ADDA results to compare")
+        return
+    print(f"  {'dpl':>7}  {'N':>4}  {'max|dQext|':>10}  {'rms':>7}  {'max|dQabs|':>10}  {'rms':>7}  "
+          f"{'max|dQsca|':>10}  Result")
+    for entry in report['summary']:
+        print(f"  {entry['dpl']:>7g}  {entry['wavelengths']:>4}  {entry['Qext']['max']:>9.2%}  "
+              f"{entry['Qext']['rms']:>6.2%}  {entry['Qabs']['max']:>9.2%}  {entry['Qabs']['rms']:>6.2%}  "
+              f"{entry['Qsca']['max']:>9.2%}  "
+              f"{'PASS' if entry['pass'] else 'FAIL'} (worst Qabs at {entry['Qabs']['worst_wavelength']} nm)")
+    print(f"  Tolerance: {report['tolerance']:.1%} on Qext and Qabs")
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='구/동심 core-shell의 정확한 Mie 해 (빠른 경로 및 ADDA 검증)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    sweep_parser = subparsers.add_parser('sweep', help='결과가 없는 스윕 파장을 정확한 해로 기록')
+    sweep_parser.add_argument('config_file')
+    sweep_parser.add_argument('--force', action='store_true', help='기존 결과도 다시 기록')
+    sweep_parser.add_argument('--shell', action='store_true', help='bash eval용 MIE_* 변수 출력')
+    validate_parser = subparsers.add_parser('validate', help='ADDA 결과와 정확한 해 비교')
+    validate_parser.add_argument('config_file')
+    validate_parser.add_argument('--results', help='lambda_*nm 디렉토리들이 있는 위치 (기본: 모델 디렉토리)')
+    validate_parser.add_argument('--tolerance', type=float, help='통과 기준 상대 오차')
+    eval_parser = subparsers.add_parser('eval', help='기록 없이 파장별 값 출력')
+    eval_parser.add_argument('config_file')
+    eval_parser.add_argument('wavelengths', nargs='+', type=float)
+    args = parser.parse_args()
+
+    try:
+        solver = MieSolver(args.config_file)
+    except (ValueError, OSError) as e:
+        if args.command == 'sweep' and args.shell:
+            print('MIE_STATUS="skipped"')
+            print(f'MIE_REASON="{e}"')
+            return
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        if args.command == 'sweep':
+            result = solver.write_sweep(force=args.force)
+            if args.shell:
+                print('MIE_STATUS="ok"')
+                print(f"MIE_WRITTEN={len(result['written'])}")
+                print(f"MIE_REMAINING={result['remaining']}")
+                print(f'MIE_SHAPE="{solver.describe()}"')
+            else:
+                print(f"[MIE] {solver.describe()}: wrote {len(result['written'])} wavelength(s), "
+                      f"{len(result['existing'])} already present, {len(result['uncovered'])} without m(lambda)")
+        elif args.command == 'validate':
+            report = solver.validate(args.results, args.tolerance)
+            print_validation(report)
+            output_file = Path(report['results_dir']) / VALIDATION_FILE_NAME
+            if report['rows']:
+                with open(output_file, 'w') as f:
+                    json.dump(report, f, indent=2)
+                print(f"  Saved: {output_file}")
+        else:
+            m_lists = [solver.m_values(w) for w in args.wavelengths]
+            missing = [w for w, m in zip(args.wavelengths, m_lists) if m is None]
+            if missing:
+                raise ValueError(f"no refractive index at {', '.join(f'{w:g}' for w in missing)} nm")
+            values = solver.compute(args.wavelengths, m_lists)
+            print(f"# {solver.describe()}")
+            print(f"{'lambda_nm':>10} {'Cext':>14} {'Cabs':>14} {'Csca':>14} {'Qext':>10} {'Qabs':>10} {'Qsca':>10}")
+            for index, wavelength in enumerate(args.wavelengths):
+                print(f"{wavelength:>10g} " + ' '.join(f"{values[key][index]:>14.6e}" for key in ('Cext', 'Cabs', 'Csca'))
+                      + ' ' + ' '.join(f"{values[key][index]:>10.5f}" for key in ('Qext', 'Qabs', 'Qsca')))
+    except (ValueError, RuntimeError, OSError) as e:
+        if args.command == 'sweep' and args.shell:
+            print('MIE_STATUS="skipped"')
+            print(f'MIE_REASON="{e}"')
+            return
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
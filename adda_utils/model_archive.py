@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+ADDA Model Archive
+끝난 모델의 lambda_*nm 디렉토리들을 index가 있는 archive 하나로 묶어 inode 수를 줄임
+
+- <모델 디렉토리>/lambda_archive.zip: zip 중앙 디렉토리가 member index 역할을 하여 파일 하나를
+  압축 해제 없이 임의 접근 (member별 압축: stored, deflate, bzip2, lzma, ARCHIVE_CONFIG['compression'])
+- pack은 새 archive를 임시 파일에 쓰고 CRC 검사 후 교체한 뒤 묶은 디렉토리를 삭제 (keep_dirs면 유지),
+  기존 archive가 있으면 디스크의 파장 디렉토리가 archive의 같은 파장을 대체
+- 실행 중인 작업(.run/*.pid)이 있으면 묶지 않음
+- 디스크의 lambda_*nm이 archive보다 우선 (unpack 후 재실행한 파장 등)
+- 후처리(ADDAModelAnalyzer/WavelengthData)는 CrossSec/log를 archive에서 직접 읽고,
+  필드 파일(IntField/DipPol)은 ModelArchive.open()으로 member 단위로 읽음
+- 완료 판단(retry_policy.has_crosssec, job_server)도 archive의 CrossSec을 인식
+
+사용법:
+    python model_archive.py pack <config_file> [--model-dir DIR] [--compression deflate] [--keep]
+    python model_archive.py unpack <config_file> [--model-dir DIR] [lambda ...]
+    python model_archive.py list <config_file> [--model-dir DIR]
+    python model_archive.py wavelengths <config_file> [--model-dir DIR]    # CrossSec이 묶인 파장 (run_simulation.sh용)
+"""
+import argparse
+import functools
+import os
+import re
+import shutil
+import sys
+import zipfile
+from pathlib import Path
+
+try:
+    from .config_loader import load_config_module, resolve_model_dir
+except ImportError:
+    from config_loader import load_config_module, resolve_model_dir
+
+ARCHIVE_FILE_NAME = 'lambda_archive.zip'
+CROSSSEC_FILE_NAMES = ('CrossSec', 'CrossSec-X', 'CrossSec-Y')
+LAMBDA_PATTERN = re.compile(r'lambda_(\d+)nm$')
+COMPRESSION_TYPES = {
+    'stored': zipfile.ZIP_STORED,
+    'deflate': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+}
+
+DEFAULT_ARCHIVE_CONFIG = {
+    'compression': 'stored',     # member별 압축 방식 (stored: 압축 없음, 가장 빠른 임의 접근)
+    'keep_dirs': False,          # True면 묶은 lambda_*nm 디렉토리를 삭제하지 않음
+}
+
+def get_archive_config(config):
+    """config의 ARCHIVE_CONFIG를 기본값과 병합"""
+    archive_config = dict(DEFAULT_ARCHIVE_CONFIG)
+    archive_config.update(getattr(config, 'ARCHIVE_CONFIG', {}) or {})
+    return archive_config
+
+def archive_path(model_dir):
+    """모델 디렉토리의 archive 경로"""
+    return Path(model_dir) / ARCHIVE_FILE_NAME
+
+@functools.lru_cache(maxsize=16)
+def _read_index(path, mtime_ns, size):
+    """archive의 {lambda 디렉토리명: {상대 경로: (크기, CRC)}} (파일 변경 시 다시 읽도록 mtime/크기를 키로 사용)"""
+    index = {}
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            lambda_name, _, name = info.filename.partition('/')
+            if name and not info.is_dir():
+                index.setdefault(lambda_name, {})[name] = (info.file_size, info.CRC)
+    return index
+
+def archive_index(model_dir):
+    """모델 archive의 member index (archive가 없거나 읽을 수 없으면 빈 dict)"""
+    path = archive_path(model_dir)
+    try:
+        stat = path.stat()
+        return _read_index(str(path), stat.st_mtime_ns, stat.st_size)
+    except (OSError, zipfile.BadZipFile):
+        return {}
+
+def archived_crosssec(lambda_dir):
+    """lambda 디렉토리가 디스크에 없을 때 모델 archive에 CrossSec이 있는지"""
+    lambda_dir = Path(lambda_dir)
+    files = archive_index(lambda_dir.parent).get(lambda_dir.name, {})
+    return any(name in files for name in CROSSSEC_FILE_NAMES)
+
+def archived_wavelengths(model_dir):
+    """archive에 CrossSec이 있는 파장 목록"""
+    wavelengths = []
+    for lambda_name, files in archive_index(model_dir).items():
+        match = LAMBDA_PATTERN.match(lambda_name)
+        if match and any(name in files for name in CROSSSEC_FILE_NAMES):
+            wavelengths.append(int(match.group(1)))
+    return sorted(wavelengths)
+
+class ModelArchive:
+    """모델 archive 읽기 (member 단위 임의 접근)"""
+
+    def __init__(self, model_dir):
+        self.path = archive_path(model_dir)
+        self.zip = zipfile.ZipFile(self.path)
+        self.members = {}
+        for info in self.zip.infolist():
+            lambda_name, _, name = info.filename.partition('/')
+            if name and not info.is_dir():
+                self.members.setdefault(lambda_name, {})[name] = info
+
+    def close(self):
+        self.zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def lambda_names(self):
+        """archive의 lambda_*nm 이름 목록"""
+        return sorted(name for name in self.members if LAMBDA_PATTERN.match(name))
+
+    def exists(self, lambda_name, name):
+        """member 존재 여부"""
+        return name in self.members.get(lambda_name, {})
+
+    def open(self, lambda_name, name):
+        """member를 바이너리 파일 객체로 열기 (stored member는 seek가 복사 없이 동작)"""
+        return self.zip.open(self.members[lambda_name][name])
+
+    def read_text(self, lambda_name, name):
+        """member 전체를 문자열로 읽기"""
+        return self.zip.read(self.members[lambda_name][name]).decode(errors='replace')
+
+    def signature(self, lambda_name, names):
+        """member들의 [이름, 크기, CRC] 목록 (없는 member 제외)"""
+        files = self.members.get(lambda_name, {})
+        return [[name, files[name].file_size, files[name].CRC] for name in names if name in files]
+
+def running_jobs(model_dir):
+    """실행 중인 작업의 pid 파일 목록"""
+    return sorted((Path(model_dir) / '.run').glob('*.pid'))
+
+def pack_model(model_dir, compression='stored', keep_dirs=False):
+    """lambda_*nm 디렉토리를 archive에 묶기, {'packed', 'kept', 'members', 'bytes', 'archive'} 반환"""
+    model_dir = Path(model_dir)
+    if compression not in COMPRESSION_TYPES:
+        raise ValueError(f"unknown compression '{compression}' ({', '.join(COMPRESSION_TYPES)})")
+    if running_jobs(model_dir):
+        raise ValueError(f"{len(running_jobs(model_dir))} job(s) still running in {model_dir / '.run'}")
+    lambda_dirs = sorted(item for item in model_dir.iterdir() if item.is_dir() and LAMBDA_PATTERN.match(item.name))
+    path = archive_path(model_dir)
+    if not lambda_dirs:
+        raise ValueError(f"no lambda_*nm directories to pack in {model_dir}")
+
+    compress_type = COMPRESSION_TYPES[compression]
+    on_disk = {item.name for item in lambda_dirs}
+    temp_path = path.with_name(path.name + '.tmp')
+    kept, members = 0, 0
+    with zipfile.ZipFile(temp_path, 'w', compression=compress_type) as new_archive:
+        # 기존 archive에서 디스크에 다시 생긴 파장은 제외하고 옮김
+        if path.exists():
+            with zipfile.ZipFile(path) as old_archive:
+                kept_names = set()
+                for info in old_archive.infolist():
+                    lambda_name = info.filename.partition('/')[0]
+                    if lambda_name in on_disk:
+                        continue
+                    info.compress_type = compress_type
+                    new_archive.writestr(info, old_archive.read(info))
+                    kept_names.add(lambda_name)
+                    members += 1
+                kept = len(kept_names)
+        for lambda_dir in lambda_dirs:
+            for file_path in sorted(lambda_dir.rglob('*')):
+                if file_path.is_file():
+                    new_archive.write(file_path, file_path.relative_to(model_dir).as_posix())
+                    members += 1
+    with zipfile.ZipFile(temp_path) as check:
+        bad_member = check.testzip()
+    if bad_member is not None:
+        temp_path.unlink()
+        raise ValueError(f"CRC check failed for {bad_member}; archive not replaced")
+    os.replace(temp_path, path)
+
+    if not keep_dirs:
+        for lambda_dir in lambda_dirs:
+            shutil.rmtree(lambda_dir)
+    return {'packed': [item.name for item in lambda_dirs], 'kept': kept, 'members': members,
+            'bytes': path.stat().st_size, 'archive': str(path)}
+
+def unpack_model(model_dir, lambda_names=None):
+    """archive의 파장 디렉토리를 모델 디렉토리에 풀기 (디스크에 이미 있는 파장은 건너뜀), 모두 풀면 archive 삭제"""
+    model_dir = Path(model_dir)
+    path = archive_path(model_dir)
+    with ModelArchive(model_dir) as archive:
+        available = archive.lambda_names()
+        targets = [name for name in (lambda_names or available) if name in available]
+        extracted = []
+        for lambda_name in targets:
+            if (model_dir / lambda_name).exists():
+                continue
+            for name in archive.members[lambda_name]:
+                archive.zip.extract(archive.members[lambda_name][name], model_dir)
+            extracted.append(lambda_name)
+    if all((model_dir / name).exists() for name in available):
+        path.unlink()
+    return extracted
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='끝난 모델의 lambda_*nm 디렉토리 archive 묶기/풀기')
+    parser.add_argument('command', choices=['pack', 'unpack', 'list', 'wavelengths'])
+    parser.add_argument('config_file')
+    parser.add_argument('lambdas', nargs='*', type=int, help='unpack할 파장 (기본: 전체)')
+    parser.add_argument('--model-dir', type=str, help='모델 디렉토리 (기본: config의 RESEARCH_BASE_DIR/MAT_TYPE)')
+    parser.add_argument('--compression', choices=list(COMPRESSION_TYPES), help='member 압축 방식')
+    parser.add_argument('--keep', action='store_true', help='묶은 디렉토리를 삭제하지 않음')
+    args = parser.parse_args()
+
+    config = load_config_module(args.config_file)
+    archive_config = get_archive_config(config)
+    model_dir = Path(args.model_dir).expanduser() if args.model_dir else resolve_model_dir(config)
+
+    try:
+        if args.command == 'pack':
+            result = pack_model(model_dir, args.compression or archive_config['compression'],
+                                args.keep or archive_config['keep_dirs'])
+            print(f"[ARCHIVE] Packed {len(result['packed'])} wavelength dir(s) into {result['archive']}")
+            kept = f", {result['kept']} wavelength(s) kept from the previous archive" if result['kept'] else ''
+            print(f"  {result['members']} member(s), {result['bytes'] / 1e6:.1f} MB{kept}")
+        elif args.command == 'unpack':
+            names = [f"lambda_{wavelength}nm" for wavelength in args.lambdas] or None
+            extracted = unpack_model(model_dir, names)
+            print(f"[ARCHIVE] Extracted {len(extracted)} wavelength dir(s) into {model_dir}")
+            if not archive_path(model_dir).exists():
+                print("  Archive removed (all wavelengths are on disk)")
+        elif args.command == 'wavelengths':
+            print(' '.join(map(str, archived_wavelengths(model_dir))))
+        else:
+            with ModelArchive(model_dir) as archive:
+                names = archive.lambda_names()
+                infos = [info for files in archive.members.values() for info in files.values()]
+            wavelengths = archived_wavelengths(model_dir)
+            print(f"[ARCHIVE] {archive_path(model_dir)}: {len(names)} wavelength dir(s), {len(infos)} member(s)")
+            print(f"  Size: {sum(info.file_size for info in infos) / 1e6:.1f} MB, "
+                  f"stored {sum(info.compress_size for info in infos) / 1e6:.1f} MB")
+            print(f"  Wavelengths with CrossSec: {len(wavelengths)}")
+    except (ValueError, OSError, KeyError, zipfile.BadZipFile) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+ADDA Orientation Averaging
+무작위 배향 입자(타원체, 원기둥, 박스 등)의 배향 평균 단면적 계산
+
+ORIENTATION_CONFIG['mode']:
+    'none'   단일 배향 (기존 동작, X/Y 편광 평균만)
+    'adda'   ADDA 내장 배향 평균 (-orient avg), 결과는 lambda_XXXnm/CrossSec
+    'split'  (beta, gamma) 구적점마다 독립된 ADDA 작업(-orient 0 beta gamma)을 유휴 코어에 분산 실행 후
+             가중 평균하여 lambda_XXXnm/CrossSec에 기록
+
+X/Y 두 직교 편광의 평균 단면적은 입사축 회전(alpha)에 불변이므로 alpha는 적분하지 않는다.
+beta는 cos(beta)에 대한 Gauss-Legendre, gamma는 균등 분할(주기 함수의 사다리꼴 규칙)로 적분한다.
+
+사용법:
+    python orientation_avg.py plan <config_file> <lambda_dir>   # orientations.txt 기록, "dir beta gamma" 출력
+    python orientation_avg.py reduce <lambda_dir>               # 배향 결과를 가중 평균하여 CrossSec 기록
+"""
+import math
+import sys
+from pathlib import Path
+
+PLAN_FILE_NAME = 'orientations.txt'
+AVERAGED_FILE_NAME = 'CrossSec'
+AVERAGED_KEYS = ['Cext', 'Qext', 'Cabs', 'Qabs']
+
+DEFAULT_ORIENTATION_CONFIG = {
+    'mode': 'none',
+    'beta_points': 8,
+    'gamma_points': 8,
+    'gamma_max': 360.0,
+    'procs_per_job': 4,
+    'avg_params_file': None,
+}
+
+def get_orientation_config(config):
+    """config의 ORIENTATION_CONFIG를 기본값과 병합"""
+    orientation_config = dict(DEFAULT_ORIENTATION_CONFIG)
+    orientation_config.update(getattr(config, 'ORIENTATION_CONFIG', {}) or {})
+    if orientation_config['mode'] in (None, False, ''):
+        orientation_config['mode'] = 'none'
+    return orientation_config
+
+def gauss_legendre(n):
+    """[-1, 1] 구간 n점 Gauss-Legendre 노드와 가중치 (Newton 반복)"""
+    nodes, weights = [], []
+    for i in range(1, n + 1):
+        x = math.cos(math.pi * (i - 0.25) / (n + 0.5))
+        for _ in range(100):
+            p0, p1 = 1.0, x
+            for k in range(2, n + 1):
+                p0, p1 = p1, ((2 * k - 1) * x * p1 - (k - 1) * p0) / k
+            dp = n * (x * p1 - p0) / (x * x - 1.0) if n > 1 else 1.0
+            dx = p1 / dp
+            x -= dx
+            if abs(dx) < 1e-15:
+                break
+        nodes.append(x)
+        weights.append(2.0 / ((1.0 - x * x) * dp * dp))
+    return nodes, weights
+
+def orientation_quadrature(beta_points, gamma_points, gamma_max=360.0):
+    """(beta, gamma, weight) 목록 반환 (각도는 degree, 가중치 합은 1)"""
+    nodes, weights = gauss_legendre(int(beta_points))
+    gamma_step = float(gamma_max) / int(gamma_points)
+    quadrature = []
+    for x, w in zip(nodes, weights):
+        beta = math.degrees(math.acos(max(-1.0, min(1.0, x))))
+        for j in range(int(gamma_points)):
+            quadrature.append((beta, j * gamma_step, w / 2.0 / int(gamma_points)))
+    return quadrature
+
+def orient_dir_name(beta, gamma):
+    """배향별 하위 디렉토리 이름"""
+    return f"orient_b{beta:07.3f}_g{gamma:07.3f}"
+
+def job_layout(mpi_procs, n_orientations, procs_per_job):
+    """전체 MPI 프로세스 수를 (동시 작업 수, 작업당 프로세스 수)로 분할"""
+    procs_per_job = max(1, min(int(procs_per_job), int(mpi_procs)))
+    jobs = max(1, min(int(mpi_procs) // procs_per_job, n_orientations))
+    return jobs, procs_per_job
+
+def orientation_shell_values(config, mpi_procs):
+    """config_loader가 bash용으로 출력할 배향 평균 설정값 dict"""
+    orientation_config = get_orientation_config(config)
+    mode = orientation_config['mode']
+    values = {'ORIENT_MODE': mode, 'ORIENT_ARGS': '', 'ORIENT_COUNT': 1,
+              'ORIENT_JOBS': 1, 'ORIENT_PROCS': mpi_procs}
+    if mode == 'adda':
+        avg_file = orientation_config.get('avg_params_file')
+        values['ORIENT_ARGS'] = f"-orient avg {avg_file}" if avg_file else "-orient avg"
+    elif mode == 'split':
+        count = int(orientation_config['beta_points']) * int(orientation_config['gamma_points'])
+        jobs, procs = job_layout(mpi_procs, count, orientation_config['procs_per_job'])
+        values.update({'ORIENT_COUNT': count, 'ORIENT_JOBS': jobs, 'ORIENT_PROCS': procs})
+    elif mode != 'none':
+        raise ValueError(f"Unknown ORIENTATION_CONFIG mode: {mode}")
+    return values
+
+def write_orientation_plan(lambda_dir, quadrature):
+    """파장 디렉토리에 배향 목록과 가중치(orientations.txt) 기록"""
+    lambda_dir = Path(lambda_dir)
+    lambda_dir.mkdir(parents=True, exist_ok=True)
+    plan_file = lambda_dir / PLAN_FILE_NAME
+    with open(plan_file, 'w') as f:
+        f.write("# dir beta gamma weight\n")
+        for beta, gamma, weight in quadrature:
+            f.write(f"{orient_dir_name(beta, gamma)} {beta:.6f} {gamma:.6f} {weight:.12e}\n")
+    return plan_file
+
+def read_orientation_plan(lambda_dir):
+    """orientations.txt에서 (dir, beta, gamma, weight) 목록 로드"""
+    plan = []
+    with open(Path(lambda_dir) / PLAN_FILE_NAME, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            name, beta, gamma, weight = line.split()
+            plan.append((name, float(beta), float(gamma), float(weight)))
+    return plan
+
+def read_crosssec_values(file_path):
+    """CrossSec 파일의 'key = value' 항목을 dict로 읽기"""
+    values = {}
+    with open(file_path, 'r') as f:
+        for line in f:
+            if '=' in line:
+                key, value = line.split('=', 1)
+                try:
+                    values[key.strip()] = float(value.strip())
+                except ValueError:
+                    continue
+    return values
+
+def polarization_average(orient_dir):
+    """배향 하나의 X/Y 편광 평균 단면적 (파일이 없으면 None)"""
+    samples = []
+    for pol in ('X', 'Y'):
+        crosssec_file = Path(orient_dir) / f"CrossSec-{pol}"
+        if crosssec_file.exists():
+            values = read_crosssec_values(crosssec_file)
+            if all(key in values for key in AVERAGED_KEYS):
+                samples.append(values)
+    if not samples:
+        return None
+    return {key: sum(sample[key] for sample in samples) / len(samples) for key in AVERAGED_KEYS}
+
+def reduce_orientations(lambda_dir):
+    """배향별 결과를 구적 가중치로 평균하여 CrossSec 기록, 누락된 배향이 있으면 ValueError"""
+    lambda_dir = Path(lambda_dir)
+    plan = read_orientation_plan(lambda_dir)
+    totals = {key: 0.0 for key in AVERAGED_KEYS}
+    missing = []
+    for name, _, _, weight in plan:
+        values = polarization_average(lambda_dir / name)
+        if values is None:
+            missing.append(name)
+            continue
+        for key in AVERAGED_KEYS:
+            totals[key] += weight * values[key]
+    if missing:
+        raise ValueError(f"{len(missing)}/{len(plan)} orientations missing (e.g. {missing[0]})")
+
+    # 가중치 합으로 정규화 (구적 가중치 합은 1이지만 반올림 오차 보정)
+    weight_sum = sum(weight for _, _, _, weight in plan)
+    with open(lambda_dir / AVERAGED_FILE_NAME, 'w') as f:
+        for key in AVERAGED_KEYS:
+            f.write(f"{key}\t= {totals[key] / weight_sum:.10g}\n")
+        f.write(f"Norient\t= {len(plan)}\n")
+    return {key: totals[key] / weight_sum for key in AVERAGED_KEYS}
+
+def main():
+    """메인 함수"""
+    if len(sys.argv) < 3 or sys.argv[1] not in ('plan', 'reduce'):
+        print(f"Usage: {sys.argv[0]} plan <config_file> <lambda_dir> | reduce <lambda_dir>", file=sys.stderr)
+        sys.exit(1)
+
+    if sys.argv[1] == 'plan':
+        # config_loader가 이 모듈을 import하므로 순환 import를 피해 여기서 로드
+        try:
+            from .config_loader import load_config_module
+        except ImportError:
+            from config_loader import load_config_module
+        if len(sys.argv) != 4:
+            print(f"Usage: {sys.argv[0]} plan <config_file> <lambda_dir>", file=sys.stderr)
+            sys.exit(1)
+        orientation_config = get_orientation_config(load_config_module(sys.argv[2]))
+        quadrature = orientation_quadrature(orientation_config['beta_points'],
+                                            orientation_config['gamma_points'],
+                                            orientation_config['gamma_max'])
+        write_orientation_plan(sys.argv[3], quadrature)
+        for beta, gamma, _ in quadrature:
+            print(f"{orient_dir_name(beta, gamma)} {beta:.6f} {gamma:.6f}")
+    else:
+        try:
+            values = reduce_orientations(sys.argv[2])
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Orientation reduction failed: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"[ORIENT] Cext={values['Cext']:.6e} Cabs={values['Cabs']:.6e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+ADDA Quasi-static Preview
+ellipsoid/cylinder/box 형상의 공명 위치를 DDA 스윕 전에 해석적으로 미리 계산
+
+- 입자를 타원체로 근사 (ellipsoid는 그대로, cylinder는 같은 종횡비의 회전타원체, box는 변 길이를 축으로 하는 타원체)하여
+  편광 인자 L_x, L_y, L_z (Carlson R_D 적분)와 실제 입자 부피로 Gans 편극률 계산
+- modified long-wavelength approximation (동적 편광 k²α/4πl + 복사 감쇠 ik³α/6π) 보정 (PREVIEW_CONFIG['mlwa'])
+- 모든 파장 × 세 축 방향을 numpy 배열로 한 번에 계산, ADDA 기본 입사(z 방향)의 X/Y 편광 평균을 사용하고
+  ORIENTATION_CONFIG가 켜져 있으면 세 축 평균(무작위 배향)을 사용
+- 축별 Cext 피크와 반치폭으로 공명 구간을 찾고, PREVIEW_CONFIG['focus_sweep']이면 run_simulation.sh가
+  공명 구간 파장과 그 밖의 stride 간격 파장을 먼저, 나머지를 나중에 계산 (전체 파장 격자는 그대로)
+- ADDA 결과와 같은 DataFrame/CSV/플롯은 postprocess의 preview_model_from_config (process_result.py --preview)
+
+사용법:
+    python quasistatic_preview.py show <config_file>     # 편광 인자와 공명 구간 요약
+    python quasistatic_preview.py order <config_file>    # bash eval용 SWEEP_LAMBDAS (공명 구간 우선 순서)
+"""
+import argparse
+import math
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from .orientation_avg import get_orientation_config
+    from .sweep_plan import SweepPlan, format_ranges
+except ImportError:
+    from orientation_avg import get_orientation_config
+    from sweep_plan import SweepPlan, format_ranges
+
+AXES = ('x', 'y', 'z')
+
+DEFAULT_PREVIEW_CONFIG = {
+    'mlwa': True,                # False면 순수 준정적(Gans) 편극률
+    'resolution_nm': 1.0,        # 미리보기 파장 간격
+    'min_rel_height': 0.1,       # 공명으로 인정할 최소 상대 높이 (축별 최대값 대비)
+    'focus_sweep': False,        # 공명 구간 파장을 먼저 계산하도록 스윕 순서 변경
+    'window': 1.0,               # 공명 구간 = 피크 ± window × FWHM
+    'stride': 3,                 # 첫 단계에서 공명 구간 밖은 stride 간격 파장만 계산
+}
+
+def get_preview_config(config):
+    """config의 PREVIEW_CONFIG를 기본값과 병합"""
+    preview_config = dict(DEFAULT_PREVIEW_CONFIG)
+    preview_config.update(getattr(config, 'PREVIEW_CONFIG', {}) or {})
+    return preview_config
+
+def carlson_rd(x, y, z):
+    """Carlson 대칭 타원 적분 R_D(x, y, z) (duplication 방법)"""
+    total, factor = 0.0, 1.0
+    for _ in range(100):
+        root_x, root_y, root_z = math.sqrt(x), math.sqrt(y), math.sqrt(z)
+        lam = root_x * root_y + root_y * root_z + root_z * root_x
+        total += factor / (root_z * (z + lam))
+        factor *= 0.25
+        x, y, z = 0.25 * (x + lam), 0.25 * (y + lam), 0.25 * (z + lam)
+        mean = (x + y + 3.0 * z) / 5.0
+        if max(abs(x - mean), abs(y - mean), abs(z - mean)) < 1e-12 * mean:
+            break
+    return 3.0 * total + factor * mean ** -1.5
+
+def depolarization_factors(semi_axes):
+    """반축 (a, b, c)의 편광 인자 (L_x, L_y, L_z), 합은 1"""
+    a, b, c = semi_axes
+    squares = (a * a, b * b, c * c)
+    factors = []
+    for axis in range(3):
+        others = [squares[i] for i in range(3) if i != axis]
+        factors.append(a * b * c / 3.0 * carlson_rd(others[0], others[1], squares[axis]))
+    return tuple(factors)
+
+def preview_geometry(config):
+    """근사 타원체 반축 (µm), 실제 부피, 부피 등가 반지름, 편광 인자 dict (지원하지 않는 형상은 ValueError)"""
+    shape_config = getattr(config, 'SHAPE_CONFIG', {'type': 'sphere', 'args': []})
+    adda_params = getattr(config, 'ADDA_PARAMS', {})
+    shape_type = shape_config.get('type', 'sphere')
+    args = [float(a) for a in shape_config.get('args', []) or []]
+    size = float(adda_params.get('size', 0.097))
+
+    if shape_type == 'sphere':
+        radius = float(shape_config['eq_rad']) if shape_config.get('eq_rad') is not None else size / 2.0
+        semi_axes = (radius, radius, radius)
+        volume = 4.0 / 3.0 * math.pi * radius ** 3
+    elif shape_type in ('ellipsoid', 'box'):
+        if len(args) == 1 or len(args) > 2:
+            raise ValueError(f"{shape_type} requires y/x and z/x ratios")
+        ratio_y, ratio_z = args if args else (1.0, 1.0)
+        semi_axes = (size / 2.0, size * ratio_y / 2.0, size * ratio_z / 2.0)
+        if shape_type == 'ellipsoid':
+            volume = 4.0 / 3.0 * math.pi * semi_axes[0] * semi_axes[1] * semi_axes[2]
+        else:
+            volume = size ** 3 * ratio_y * ratio_z
+    elif shape_type == 'cylinder':
+        if len(args) != 1:
+            raise ValueError("cylinder requires the height/diameter ratio")
+        # ADDA cylinder: 축은 z, -size는 지름
+        semi_axes = (size / 2.0, size / 2.0, size * args[0] / 2.0)
+        volume = math.pi * (size / 2.0) ** 2 * size * args[0]
+    else:
+        raise ValueError(f"shape '{shape_type}' has no quasi-static preview (ellipsoid, cylinder, box, sphere only)")
+    return {'shape': shape_type, 'semi_axes_um': semi_axes, 'volume_um3': volume,
+            'eq_radius_um': (3.0 * volume / (4.0 * math.pi)) ** (1.0 / 3.0),
+            'depolarization': depolarization_factors(semi_axes)}
+
+def polarizabilities(wavelengths_nm, epsilon, geometry, mlwa=True):
+    """축별 편극률 α (µm³, p = ε0 α E), (3, 파장 수) 복소 배열"""
+    k = 2.0 * math.pi / (np.asarray(wavelengths_nm, dtype=float) / 1000.0)
+    factors = np.asarray(geometry['depolarization'])[:, None]
+    alpha = geometry['volume_um3'] * (epsilon - 1.0) / (1.0 + factors * (epsilon - 1.0))
+    if mlwa:
+        semi_axes = np.asarray(geometry['semi_axes_um'])[:, None]
+        alpha = alpha / (1.0 - k ** 2 / (4.0 * math.pi * semi_axes) * alpha - 1j * k ** 3 / (6.0 * math.pi) * alpha)
+    return alpha
+
+def axis_cross_sections(wavelengths_nm, epsilon, geometry, mlwa=True):
+    """축 방향 편광별 {'Cext', 'Cabs', 'Csca'} (3, 파장 수) 배열 (µm²)"""
+    k = 2.0 * math.pi / (np.asarray(wavelengths_nm, dtype=float) / 1000.0)
+    alpha = polarizabilities(wavelengths_nm, epsilon, geometry, mlwa)
+    cext = k * alpha.imag
+    csca = k ** 4 / (6.0 * math.pi) * np.abs(alpha) ** 2
+    return {'Cext': cext, 'Cabs': cext - csca, 'Csca': csca}
+
+def find_features(wavelengths, spectrum, min_rel_height=0.1):
+    """스펙트럼 하나의 국소 최대 목록 [{'wavelength', 'value', 'fwhm', 'at_edge'}] (반치 교차점이 범위 밖이면 한쪽 폭의 2배)"""
+    x = np.asarray(wavelengths, dtype=float)
+    y = np.asarray(spectrum, dtype=float)
+    if len(y) < 3:
+        return []
+    peaks = [i for i in range(1, len(y) - 1) if y[i] > y[i - 1] and y[i] >= y[i + 1]]
+    if not peaks:
+        peaks = [int(y.argmax())]
+    features = []
+    for index in peaks:
+        if y[index] < min_rel_height * y.max():
+            continue
+        half = y[index] / 2.0
+        left = index
+        while left > 0 and y[left] > half:
+            left -= 1
+        right = index
+        while right < len(y) - 1 and y[right] > half:
+            right += 1
+        left_width = x[index] - x[left] if y[left] <= half else None
+        right_width = x[right] - x[index] if y[right] <= half else None
+        if left_width is None and right_width is None:
+            fwhm = x[-1] - x[0]
+        else:
+            fwhm = (left_width if left_width is not None else right_width) \
+                + (right_width if right_width is not None else left_width)
+        features.append({'wavelength': float(x[index]), 'value': float(y[index]), 'fwhm': float(fwhm),
+                         'at_edge': index in (0, len(y) - 1)})
+    return features
+
+class QuasiStaticPreview:
+    """config 하나의 준정적 미리보기 스펙트럼과 공명 구간"""
+
+    def __init__(self, config_file):
+        self.plan = SweepPlan(config_file)
+        self.config = self.plan.config
+        self.preview_config = get_preview_config(self.config)
+        self.geometry = preview_geometry(self.config)
+        # 무작위 배향이면 세 축 평균, 아니면 ADDA 기본 입사(z)의 X/Y 편광 평균
+        orientation_mode = get_orientation_config(self.config)['mode']
+        self.axes = AXES if orientation_mode != 'none' else AXES[:2]
+
+    def compute(self):
+        """미리보기 격자의 파장, 굴절률, 축별/평균 단면적 dict"""
+        if np is None:
+            raise RuntimeError("numpy is required for the quasi-static preview")
+        start, end = self.plan.wavelengths[0], self.plan.wavelengths[-1]
+        resolution = float(self.preview_config['resolution_nm'])
+        grid = np.arange(start, end + resolution / 2.0, resolution)
+        _, points = self.plan.coverage()
+        wavelengths, m_values = [], []
+        for wavelength in grid:
+            sets = self.plan.m_values(points, float(wavelength))
+            if sets is not None:
+                wavelengths.append(float(wavelength))
+                m_values.append(complex(sets[0][0], sets[0][1]))
+        if len(wavelengths) < 3:
+            raise ValueError("refractive index unavailable over the wavelength range")
+
+        wavelengths = np.asarray(wavelengths)
+        epsilon = np.asarray(m_values) ** 2
+        per_axis = axis_cross_sections(wavelengths, epsilon, self.geometry, self.preview_config['mlwa'])
+        used = [AXES.index(axis) for axis in self.axes]
+        area = math.pi * self.geometry['eq_radius_um'] ** 2
+        averaged = {key: values[used].mean(axis=0) for key, values in per_axis.items()}
+        for key in ('ext', 'abs', 'sca'):
+            averaged[f"Q{key}"] = averaged[f"C{key}"] / area
+        return {'wavelength': wavelengths, 'm': np.asarray(m_values), 'per_axis': per_axis,
+                'averaged': averaged, 'axes': self.axes}
+
+    def features(self, result):
+        """편광 축별 Cext 공명 목록 (파장 순)"""
+        features = []
+        for axis in result['axes']:
+            spectrum = result['per_axis']['Cext'][AXES.index(axis)]
+            for feature in find_features(result['wavelength'], spectrum, self.preview_config['min_rel_height']):
+                feature['axis'] = axis
+                features.append(feature)
+        return sorted(features, key=lambda feature: feature['wavelength'])
+
+    def sweep_order(self, features):
+        """(공명 구간 우선 파장 순서, 첫 단계 파장 수): 공명 구간 + 구간 밖 stride 간격 파장, 이후 나머지"""
+        window = float(self.preview_config['window'])
+        stride = max(int(self.preview_config['stride']), 1)
+        step = self.plan.step
+        first, rest = [], []
+        for index, wavelength in enumerate(self.plan.wavelengths):
+            focused = any(abs(wavelength - feature['wavelength']) <= max(window * feature['fwhm'], step)
+                          for feature in features)
+            (first if focused or index % stride == 0 else rest).append(wavelength)
+        return first + rest, len(first)
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='준정적(Gans/MLWA) 미리보기: 공명 구간 예측 및 스윕 순서')
+    parser.add_argument('command', choices=['show', 'order'])
+    parser.add_argument('config_file')
+    args = parser.parse_args()
+
+    try:
+        preview = QuasiStaticPreview(args.config_file)
+        result = preview.compute()
+        features = preview.features(result)
+    except (ValueError, RuntimeError, OSError) as e:
+        if args.command == 'order':
+            # 스윕은 기본 순서로 진행
+            print(f'PREVIEW_REASON="{e}"')
+            return
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == 'order':
+        order, first = preview.sweep_order(features)
+        resonances = ', '.join(f"{feature['wavelength']:.0f}nm({feature['axis']})" for feature in features)
+        print(f'SWEEP_LAMBDAS="{" ".join(map(str, order))}"')
+        print(f'PREVIEW_FIRST={first}')
+        print(f'PREVIEW_FEATURES="{resonances or "none"}"')
+        return
+
+    geometry = preview.geometry
+    axes_nm = ' x '.join(f"{2000.0 * a:.1f}" for a in geometry['semi_axes_um'])
+    print(f"[PREVIEW] {geometry['shape']}, ellipsoid axes {axes_nm} nm, "
+          f"V = {geometry['volume_um3'] * 1e9:.4g} nm^3 (r_eq {geometry['eq_radius_um'] * 1000.0:.2f} nm)")
+    print("  Depolarization factors: " + ', '.join(f"L{axis}={value:.4f}" for axis, value
+                                                   in zip(AXES, geometry['depolarization'])))
+    print(f"  Method: {'MLWA' if preview.preview_config['mlwa'] else 'quasi-static (Gans)'}, "
+          f"{'orientation average' if len(result['axes']) == 3 else 'X/Y polarization average'}, "
+          f"{len(result['wavelength'])} wavelengths")
+    if not features:
+        print("  No resonance in the sweep range")
+    for feature in features:
+        edge = " (spectrum edge)" if feature['at_edge'] else ""
+        print(f"  {feature['axis']}-polarized resonance: {feature['wavelength']:.0f} nm, "
+              f"FWHM {feature['fwhm']:.0f} nm, Cext {feature['value']:.4e} um^2{edge}")
+    order, first = preview.sweep_order(features)
+    print(f"  Focused first pass: {first}/{len(order)} wavelengths "
+          f"({format_ranges(sorted(order[:first]), preview.plan.step)})")
+
+if __name__ == "__main__":
+    main()
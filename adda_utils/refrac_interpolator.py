@@ -7,36 +7,44 @@ import sys
 import os
 from pathlib import Path
 
+try:
+    from .stage_tracer import trace_span
+except ImportError:
+    from stage_tracer import trace_span
+
 def linear_interpolate(x, x1, y1, x2, y2):
     """선형 보간 함수"""
     if x2 == x1:
         return y1
     return y1 + (x - x1) * (y2 - y1) / (x2 - x1)
 
+def read_data_points(file_path):
+    """굴절률 파일의 (파장, 값) 목록을 파장 순으로 반환"""
+    data_points = []
+    with open(file_path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                parts = line.split()
+                if len(parts) >= 2:
+                    try:
+                        wl = float(parts[0])
+                        val = float(parts[1])
+                        data_points.append((wl, val))
+                    except ValueError:
+                        continue
+    # 파장 기준으로 정렬
+    data_points.sort(key=lambda x: x[0])
+    return data_points
+
 def read_and_interpolate_file(file_path, target_wavelength):
     """파일에서 데이터를 읽고 목표 파장에 대해 보간"""
-    data_points = []
-    
     try:
-        with open(file_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    parts = line.split()
-                    if len(parts) >= 2:
-                        try:
-                            wl = float(parts[0])
-                            val = float(parts[1])
-                            data_points.append((wl, val))
-                        except ValueError:
-                            continue
+        data_points = read_data_points(file_path)
         
         if not data_points:
             return None
         
-        # 파장 기준으로 정렬
-        data_points.sort(key=lambda x: x[0])
-        
         # 정확히 일치하는 파장이 있는지 확인
         for wl, val in data_points:
             if abs(wl - target_wavelength) < 1e-6:
@@ -109,6 +117,12 @@ def get_refractive_indices(config_file, wavelength):
         config = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(config)
         
+        # dispersion_fit은 이 모듈의 read_data_points를 쓰므로 여기서 import
+        try:
+            from .dispersion_fit import fitted_nk
+        except ImportError:
+            from dispersion_fit import fitted_nk
+        
         # ADDA_PARAMS에서 굴절률 세트들 가져오기
         adda_params = getattr(config, 'ADDA_PARAMS', {})
         refrac_sets = adda_params.get('refractive_index_sets', [['n_100', 'k_100']])
@@ -137,14 +151,19 @@ def get_refractive_indices(config_file, wavelength):
                     n_key = n_item
                     k_key = k_item
                     
+                    # DISPERSION_CONFIG가 켜져 있으면 fitting 모델 사용 (품질 미달/범위 밖이면 None)
+                    n_val = k_val = None
+                    fitted = fitted_nk(config, n_key, k_key, wavelength)
+                    if fitted is not None:
+                        n_val, k_val = fitted
+                        print(f"# Dispersion fit {wavelength}nm: n={n_val:.6f}, k={k_val:.6f}", file=sys.stderr)
+                    
                     # n 값 읽기 (보간 사용)
-                    n_val = None
-                    if n_key in refrac_files:
+                    if n_val is None and n_key in refrac_files:
                         n_val = read_and_interpolate_file(refrac_files[n_key], wavelength)
                     
                     # k 값 읽기 (보간 사용)
-                    k_val = None
-                    if k_key in refrac_files:
+                    if k_val is None and k_key in refrac_files:
                         k_val = read_and_interpolate_file(refrac_files[k_key], wavelength)
                     
                     if n_val is not None and k_val is not None:
@@ -192,7 +211,9 @@ def main():
         print(f'echo "[ERROR] Config file not found: {config_file}"; exit 1')
         sys.exit(1)
     
-    get_refractive_indices(config_file, wavelength)
+    # run_simulation.sh가 ADDA_TRACE_FILE을 지정한 경우 파장별 보간 시간 기록
+    with trace_span('interpolation', wavelength=wavelength):
+        get_refractive_indices(config_file, wavelength)
 
 if __name__ == "__main__":
     main()
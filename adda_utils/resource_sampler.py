@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+ADDA Resource Sampler
+실행 중인 ADDA 작업의 MPI rank별 CPU/메모리/쓰기량을 /proc에서 주기적으로 읽어 실행 기록에 남기고,
+활용도가 낮거나 메모리에 막힌 파장을 보고
+
+- run_simulation.sh가 작업마다 백그라운드로 실행: 작업 PID의 자손 중 adda* 프로세스를 rank로 보고
+  interval 초마다 /proc/<pid>/stat (CPU 시간, major fault), status (VmRSS/VmHWM, 비자발적 context switch),
+  io (write_bytes/read_bytes)와 /proc/meminfo를 읽음
+- 작업이 끝나면 rank별/전체 CPU%, 동시 RSS 최댓값, rank별 최대 RSS, 쓰기/읽기 바이트, major fault,
+  노드 최소 가용 메모리를 run_ledger.sqlite의 resources 테이블에 시도 id로 기록
+  (rank별 값과 sample 시계열은 detail JSON)
+- 다른 노드의 rank는 보이지 않으므로 실행 노드의 rank만 집계 (보고서에 sampled/요청 rank 수 표시)
+- 판정 (RESOURCE_CONFIG):
+  under-utilized: rank당 평균 CPU%가 low_cpu_pct 미만 (rank 수가 CPU 수보다 많으면 함께 표시)
+  memory-bound: 노드 메모리 사용률이 memory_fraction 이상이거나 major fault가 major_faults_per_s 이상
+  (/proc에는 메모리 대역폭 계수기가 없으므로 paging과 가용 메모리로 판단)
+
+사용법:
+    python resource_sampler.py sample <config_file> <model_dir> <lambda> <attempt_id> <pid>   # run_simulation.sh용
+    python resource_sampler.py report <config_file> [--model-dir DIR]
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+
+try:
+    from .config_loader import load_config_module, resolve_model_dir
+    from .run_ledger import RunLedger, read_resources
+    from .sweep_monitor import collect_descendants
+except ImportError:
+    from config_loader import load_config_module, resolve_model_dir
+    from run_ledger import RunLedger, read_resources
+    from sweep_monitor import collect_descendants
+
+DEFAULT_RESOURCE_CONFIG = {
+    'enabled': True,             # run_simulation.sh에서 작업마다 sampler 실행
+    'interval': 5.0,             # sample 주기 (초)
+    'process_name': 'adda',      # rank로 집계할 프로세스 이름 접두어 (/proc/<pid>/comm)
+    'low_cpu_pct': 70.0,         # rank당 평균 CPU%가 이보다 낮으면 under-utilized
+    'memory_fraction': 0.9,      # 노드 메모리 사용률이 이보다 높으면 memory-bound
+    'major_faults_per_s': 10.0,  # 초당 major fault(디스크 paging)가 이보다 많으면 memory-bound
+}
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+def get_resource_config(config):
+    """config의 RESOURCE_CONFIG를 기본값과 병합"""
+    resource_config = dict(DEFAULT_RESOURCE_CONFIG)
+    resource_config.update(getattr(config, 'RESOURCE_CONFIG', {}) or {})
+    return resource_config
+
+def boot_time():
+    """/proc/stat의 부팅 시각 (epoch 초)"""
+    with open('/proc/stat', 'r') as f:
+        for line in f:
+            if line.startswith('btime'):
+                return float(line.split()[1])
+    return 0.0
+
+def read_meminfo():
+    """/proc/meminfo의 (MemTotal, MemAvailable) 바이트"""
+    values = {}
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in ('MemTotal', 'MemAvailable'):
+                    values[key] = int(rest.split()[0]) * 1024
+    except OSError:
+        pass
+    return values.get('MemTotal'), values.get('MemAvailable')
+
+def read_process(pid, btime):
+    """프로세스 하나의 자원 값 dict (종료되었거나 읽을 수 없으면 None)"""
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as f:
+            stat = f.read()
+        comm = stat[stat.index('(') + 1:stat.rindex(')')]
+        # 마지막 ')' 이후 필드: 0 state, 9 majflt, 11 utime, 12 stime, 19 starttime
+        fields = stat.rsplit(')', 1)[1].split()
+        if fields[0] == 'Z':
+            return None
+        sample = {
+            'comm': comm,
+            'cpu_s': (int(fields[11]) + int(fields[12])) / CLOCK_TICKS,
+            'start': btime + int(fields[19]) / CLOCK_TICKS,
+            'major_faults': int(fields[9]),
+        }
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in ('VmRSS', 'VmHWM'):
+                    sample[key.lower()] = int(rest.split()[0]) * 1024
+                elif key == 'nonvoluntary_ctxt_switches':
+                    sample['involuntary_switches'] = int(rest)
+    except (OSError, ValueError, IndexError):
+        return None
+    try:
+        with open(f'/proc/{pid}/io', 'r') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in ('write_bytes', 'read_bytes', 'wchar'):
+                    sample[key] = int(rest)
+    except OSError:
+        # 다른 사용자의 프로세스 등 io를 읽을 수 없는 경우
+        pass
+    return sample
+
+def job_alive(pid):
+    """작업 프로세스가 살아 있는지 (종료 후 회수 전 zombie 포함하지 않음)"""
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except (OSError, IndexError):
+        return False
+
+class ResourceSampler:
+    """작업 하나의 rank별 자원 사용 집계"""
+
+    def __init__(self, job_pid, interval=5.0, process_name='adda'):
+        self.job_pid = job_pid
+        self.interval = interval
+        self.process_name = process_name
+        self.btime = boot_time()
+        self.ranks = {}
+        self.series = []
+        self.mem_total = None
+        self.mem_available_min = None
+        self.started = time.time()
+
+    def sample(self):
+        """rank 목록을 다시 찾고 값을 한 번 읽음"""
+        now = time.time()
+        total_cpu, total_rss, seen = 0.0, 0, 0
+        for pid in collect_descendants(self.job_pid):
+            values = read_process(pid, self.btime)
+            if values is None or not values['comm'].startswith(self.process_name):
+                continue
+            previous = self.ranks.get(pid)
+            if previous is not None:
+                elapsed = now - previous['time']
+                if elapsed > 0:
+                    total_cpu += (values['cpu_s'] - previous['cpu_s']) / elapsed * 100.0
+            else:
+                # 처음 본 rank는 시작 이후 평균
+                lifetime = now - values['start']
+                if lifetime > 0:
+                    total_cpu += values['cpu_s'] / lifetime * 100.0
+            values['time'] = now
+            values['vmhwm'] = max(values.get('vmhwm', 0), previous.get('vmhwm', 0) if previous else 0)
+            self.ranks[pid] = values
+            total_rss += values.get('vmrss', 0)
+            seen += 1
+
+        mem_total, mem_available = read_meminfo()
+        if mem_total:
+            self.mem_total = mem_total
+        if mem_available is not None and (self.mem_available_min is None or mem_available < self.mem_available_min):
+            self.mem_available_min = mem_available
+        if seen:
+            self.series.append([round(now - self.started, 1), seen, round(total_cpu, 1), total_rss])
+
+    def run(self):
+        """작업이 끝날 때까지 sample (종료는 0.5초 단위로 확인)"""
+        next_sample = time.time() + min(1.0, self.interval)
+        while job_alive(self.job_pid):
+            if time.time() >= next_sample:
+                self.sample()
+                next_sample += self.interval
+            time.sleep(min(0.5, self.interval))
+
+    def metrics(self):
+        """resources 테이블 한 행 dict (rank를 한 번도 보지 못했으면 None)"""
+        if not self.ranks:
+            return None
+        per_rank = []
+        for pid, values in sorted(self.ranks.items()):
+            lifetime = values['time'] - values['start']
+            per_rank.append({
+                'pid': pid,
+                'cpu_pct': round(values['cpu_s'] / lifetime * 100.0, 1) if lifetime > 0 else None,
+                'cpu_s': round(values['cpu_s'], 2),
+                'peak_rss': values.get('vmhwm'),
+                'write_bytes': values.get('write_bytes'),
+                'read_bytes': values.get('read_bytes'),
+                'wchar': values.get('wchar'),
+                'major_faults': values['major_faults'],
+                'involuntary_switches': values.get('involuntary_switches'),
+            })
+        cpu = [rank['cpu_pct'] for rank in per_rank if rank['cpu_pct'] is not None]
+        first_start = min(values['start'] for values in self.ranks.values())
+        last_seen = max(values['time'] for values in self.ranks.values())
+
+        def total(key):
+            values = [rank[key] for rank in per_rank if rank[key] is not None]
+            return sum(values) if values else None
+
+        try:
+            cpus = len(os.sched_getaffinity(0))
+        except AttributeError:
+            cpus = os.cpu_count()
+        return {
+            'host': socket.gethostname(),
+            'interval': self.interval,
+            'samples': len(self.series),
+            'ranks': len(per_rank),
+            'cpus': cpus,
+            'wall': round(last_seen - first_start, 2),
+            'cpu_total': round(sum(cpu), 1) if cpu else None,
+            'cpu_rank_mean': round(sum(cpu) / len(cpu), 1) if cpu else None,
+            'cpu_rank_min': min(cpu) if cpu else None,
+            'peak_rss': max((point[3] for point in self.series), default=None),
+            'peak_rank_rss': max((rank['peak_rss'] or 0 for rank in per_rank), default=None),
+            'write_bytes': total('write_bytes'),
+            'read_bytes': total('read_bytes'),
+            'major_faults': total('major_faults'),
+            'mem_total': self.mem_total,
+            'mem_available_min': self.mem_available_min,
+            'detail': json.dumps({'per_rank': per_rank, 'series': self.series}),
+        }
+
+def classify(row, resource_config):
+    """자원 기록 한 행의 판정 [(flag, 사유), ...] (flag: 'under-utilized', 'memory-bound')"""
+    flags = []
+    if row['cpu_rank_mean'] is not None and row['cpu_rank_mean'] < resource_config['low_cpu_pct']:
+        reason = f"{row['cpu_rank_mean']:.0f}% CPU per rank"
+        if row['cpus'] and row['ranks'] > row['cpus']:
+            reason += f", {row['ranks']} ranks on {row['cpus']} CPUs"
+        flags.append(('under-utilized', reason))
+    reasons = []
+    if row['mem_total'] and row['mem_available_min'] is not None:
+        used = 1.0 - row['mem_available_min'] / row['mem_total']
+        if used >= resource_config['memory_fraction']:
+            reasons.append(f"node memory {used:.0%} used")
+    if row['major_faults'] and row['wall']:
+        rate = row['major_faults'] / row['wall']
+        if rate >= resource_config['major_faults_per_s']:
+            reasons.append(f"{rate:.0f} major faults/s")
+    if reasons:
+        flags.append(('memory-bound', ', '.join(reasons)))
+    return flags
+
+def format_bytes(value):
+    """바이트를 읽기 쉬운 단위로"""
+    if value is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(value) < 1024 or unit == 'GB':
+            return f"{value:.0f} {unit}" if unit == 'B' else f"{value:.1f} {unit}"
+        value /= 1024.0
+
+def print_report(model_dir, resource_config):
+    """파장별 자원 사용 표와 under-utilized/memory-bound 파장 요약 출력"""
+    rows = read_resources(model_dir)
+    if not rows:
+        print(f"No resource samples recorded in {model_dir}")
+        return
+    print(f"[RESOURCES] {model_dir}: {len(rows)} wavelength(s)")
+    print(f"{'Lambda':>8}  {'Ranks':>7}  {'CPU/rank':>8}  {'Min':>5}  {'Total':>7}  {'Peak RSS':>9}  "
+          f"{'Rank RSS':>9}  {'Written':>9}  {'Wall(s)':>8}  Flags")
+    flagged = {'under-utilized': [], 'memory-bound': []}
+    for row in rows:
+        flags = classify(row, resource_config)
+        for flag, reason in flags:
+            flagged[flag].append((row['wavelength'], reason))
+        ranks = f"{row['ranks']}/{row['nprocs']}" if row['nprocs'] else str(row['ranks'])
+        cpu_mean = f"{row['cpu_rank_mean']:.0f}%" if row['cpu_rank_mean'] is not None else '-'
+        cpu_min = f"{row['cpu_rank_min']:.0f}%" if row['cpu_rank_min'] is not None else '-'
+        cpu_total = f"{row['cpu_total']:.0f}%" if row['cpu_total'] is not None else '-'
+        print(f"{row['wavelength']:>8}  {ranks:>7}  {cpu_mean:>8}  {cpu_min:>5}  {cpu_total:>7}  "
+              f"{format_bytes(row['peak_rss']):>9}  {format_bytes(row['peak_rank_rss']):>9}  "
+              f"{format_bytes(row['write_bytes']):>9}  {row['wall'] or 0:>8.0f}  "
+              f"{', '.join(flag for flag, _ in flags)}")
+
+    partial = [row['wavelength'] for row in rows if row['nprocs'] and row['ranks'] < row['nprocs']]
+    if partial:
+        print(f"\n  Note: {len(partial)} wavelength(s) sampled fewer ranks than requested "
+              f"(ranks on other nodes are not visible)")
+    for flag, entries in flagged.items():
+        if not entries:
+            continue
+        print(f"\n  {flag.capitalize()} ({len(entries)}):")
+        for wavelength, reason in entries:
+            print(f"    {wavelength} nm: {reason}")
+    if not any(flagged.values()):
+        print("\n  No under-utilized or memory-bound wavelengths")
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='ADDA 작업의 rank별 자원 사용 sample 및 보고')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    sample_parser = subparsers.add_parser('sample', help='작업이 끝날 때까지 sample 후 ledger에 기록')
+    sample_parser.add_argument('config_file')
+    sample_parser.add_argument('model_dir')
+    sample_parser.add_argument('wavelength', type=int)
+    sample_parser.add_argument('attempt_id', type=int)
+    sample_parser.add_argument('pid', type=int)
+    report_parser = subparsers.add_parser('report', help='파장별 자원 사용 보고')
+    report_parser.add_argument('config_file')
+    report_parser.add_argument('--model-dir', type=str, help='모델 디렉토리 (기본: config의 RESEARCH_BASE_DIR/MAT_TYPE)')
+    args = parser.parse_args()
+
+    config = load_config_module(args.config_file)
+    resource_config = get_resource_config(config)
+
+    if args.command == 'report':
+        model_dir = os.path.expanduser(args.model_dir) if args.model_dir else resolve_model_dir(config)
+        print_report(model_dir, resource_config)
+        return
+
+    sampler = ResourceSampler(args.pid, float(resource_config['interval']), resource_config['process_name'])
+    sampler.run()
+    metrics = sampler.metrics()
+    if metrics is None:
+        print(f"     [RESOURCES] No '{resource_config['process_name']}*' processes seen", file=sys.stderr)
+        return
+    with RunLedger(args.model_dir) as ledger:
+        ledger.record_resources(args.attempt_id, args.wavelength, metrics)
+    cpu = f"{metrics['cpu_rank_mean']:.0f}%" if metrics['cpu_rank_mean'] is not None else '-'
+    print(f"     [RESOURCES] {metrics['ranks']} rank(s), {cpu} CPU per rank, "
+          f"peak RSS {format_bytes(metrics['peak_rss'])}, wrote {format_bytes(metrics['write_bytes'])}")
+
+if __name__ == "__main__":
+    main()
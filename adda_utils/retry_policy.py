@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+ADDA Retry Policy
+실패한 파장을 원인별로 분류하고 solver 설정을 단계적으로 바꿔가며 재시도
+
+실패 분류 (exit code, stdout, lambda 디렉토리와 배향별 하위 디렉토리의 log, 모니터 중단 marker 기준):
+    not_converged   반복 횟수 초과, residual 정체, sweep_monitor.py의 정체 중단
+    out_of_memory   메모리 할당 실패, SIGKILL (OOM killer)
+    no_crosssec     정상 종료했지만 CrossSec 파일 없음
+    error           그 외
+
+시도별 분류와 재시도 단계는 실행 기록(<모델 디렉토리>/run_ledger.sqlite)의 시도 행에 함께 기록되어
+재실행(resume) 시에도 같은 설정으로 반복하지 않고 다음 단계부터 이어가며, 단계를 모두 소진한 파장은 건너뛴다.
+(기존 retry_attempts.jsonl은 ledger를 처음 열 때 가져옴)
+
+사용법 (run_simulation.sh가 eval 가능한 VAR=... 형태로 출력을 사용):
+    python retry_policy.py plan <config_file> <model_dir> <lambda>
+    python retry_policy.py record <config_file> <model_dir> <lambda> <exit_code> [stdout_file] [run_dir] [attempt_id]
+    python retry_policy.py status <model_dir>
+    python retry_policy.py reset <model_dir> [lambda ...]
+"""
+import re
+import sys
+import time
+from pathlib import Path
+
+try:
+    from .config_loader import load_config_module, process_extra_adda_params, apply_autotune
+    from .model_archive import archived_crosssec
+    from .run_ledger import RunLedger, read_retry_history, LEDGER_FILE_NAME, LEGACY_RETRY_FILE
+except ImportError:
+    from config_loader import load_config_module, process_extra_adda_params, apply_autotune
+    from model_archive import archived_crosssec
+    from run_ledger import RunLedger, read_retry_history, LEDGER_FILE_NAME, LEGACY_RETRY_FILE
+
+RUN_STATE_DIR = '.run'
+
+FAILURE_PATTERNS = [
+    ('out_of_memory', re.compile(r'malloc|allocate|out of memory|bad_alloc|not enough memory', re.IGNORECASE)),
+    ('not_converged', re.compile(r"converge|maximum allowed number of iterations|stagnat", re.IGNORECASE)),
+]
+OOM_EXIT_CODES = {137, -9}
+
+DEFAULT_RETRY_CONFIG = {
+    'enabled': True,
+    'max_attempts': 5,           # 첫 시도를 포함한 파장당 최대 시도 횟수
+    'ladder': {
+        'not_converged': [{'iter': 'bicgstab'}, {'iter': 'bicg'}, {'pol': 'fcd'}, {'eps_relax': 1}],
+        'out_of_memory': [{'opt': 'mem'}, {'opt': 'mem', 'procs_factor': 0.5}],
+        'no_crosssec': [{}],
+        'error': [{}],
+    },
+}
+
+def get_retry_config(config):
+    """config의 RETRY_CONFIG를 기본값과 병합 (ladder는 분류별로 덮어씀)"""
+    retry_config = dict(DEFAULT_RETRY_CONFIG)
+    user_config = dict(getattr(config, 'RETRY_CONFIG', {}) or {})
+    ladder = dict(DEFAULT_RETRY_CONFIG['ladder'])
+    ladder.update(user_config.pop('ladder', {}) or {})
+    retry_config.update(user_config)
+    retry_config['ladder'] = ladder
+    return retry_config
+
+def load_attempts(model_dir, wavelength=None):
+    """실행 기록에서 시도 이력 로드 (wavelength 지정 시 해당 파장만)"""
+    return read_retry_history(model_dir, wavelength)
+
+def current_series(attempts):
+    """마지막 성공 이후의 시도만 반환 (결과를 지우고 다시 돌리는 경우 새 시리즈로 취급)"""
+    for index in range(len(attempts) - 1, -1, -1):
+        if attempts[index].get('failure') == 'none':
+            return attempts[index + 1:]
+    return attempts
+
+def _read_tail(file_path, max_bytes=20000):
+    try:
+        with open(file_path, 'rb') as f:
+            f.seek(0, 2)
+            f.seek(max(f.tell() - max_bytes, 0))
+            return f.read().decode('utf-8', errors='replace')
+    except OSError:
+        return ''
+
+def has_crosssec(lambda_dir):
+    """편광별 또는 배향 평균 CrossSec 파일 존재 여부 (디렉토리가 없으면 모델 archive에서 확인)"""
+    if Path(lambda_dir).is_dir():
+        return any((Path(lambda_dir) / name).exists() for name in ('CrossSec-X', 'CrossSec-Y', 'CrossSec'))
+    return archived_crosssec(lambda_dir)
+
+def classify_failure(exit_code, lambda_dir, stdout_file=None, aborted_marker=None):
+    """실패 원인 분류, 성공이면 'none'"""
+    lambda_dir = Path(lambda_dir)
+    if exit_code == 0 and has_crosssec(lambda_dir):
+        return 'none'
+    if aborted_marker is not None and Path(aborted_marker).exists():
+        # 모니터는 residual 정체/반복 예산 초과 시에만 중단함
+        return 'not_converged'
+    if exit_code in OOM_EXIT_CODES:
+        return 'out_of_memory'
+
+    # 배향 split 모드는 배향별 하위 디렉토리에 log를, lambda 디렉토리에 배향별 stdout(<배향>.out)을 남김
+    log_files = sorted(lambda_dir.glob('**/log')) + sorted(lambda_dir.glob('*.out'))
+    text = ''.join(_read_tail(log_file) for log_file in log_files)
+    if stdout_file:
+        text += _read_tail(stdout_file)
+    for failure, pattern in FAILURE_PATTERNS:
+        if pattern.search(text):
+            return failure
+    if exit_code == 0:
+        return 'no_crosssec'
+    return 'error'
+
+def next_attempt(retry_config, attempts):
+    """이력을 바탕으로 다음 시도의 (step dict, label) 또는 소진 시 (None, 사유) 반환"""
+    attempts = current_series(attempts)
+    if not attempts:
+        return {}, 'initial'
+    if not retry_config.get('enabled', True):
+        return None, 'retry disabled'
+    if len(attempts) >= retry_config['max_attempts']:
+        return None, f"{attempts[-1]['failure']} after {len(attempts)} attempts"
+
+    failure = attempts[-1]['failure']
+    ladder = retry_config['ladder'].get(failure, [])
+    # 같은 분류로 이미 사용한 단계 수만큼 건너뜀
+    used = sum(1 for record in attempts[1:] if record.get('retry_for') == failure)
+    if used >= len(ladder):
+        return None, f"{failure} after {len(attempts)} attempts (ladder exhausted)"
+
+    step = dict(ladder[used])
+    # 메모리 관련 조정은 노드 메모리가 그대로이므로 이후 시도에도 유지
+    for record in attempts[1:]:
+        if record.get('retry_for') == 'out_of_memory':
+            for key, value in record.get('step', {}).items():
+                step.setdefault(key, value)
+    label = ', '.join(f"{key}={value}" for key, value in step.items()) or 'same settings'
+    return step, label
+
+def apply_step(config, step):
+    """step을 config 기본값에 적용하여 (pol, eps, procs, extra 파라미터 문자열) 계산"""
+    adda_params = dict(apply_autotune(config, getattr(config, 'ADDA_PARAMS', {})))
+    mpi_procs = getattr(config, 'MPI_PROCS', 40)
+
+    pol = step.get('pol', adda_params.get('pol', 'ldr'))
+    eps = adda_params.get('eps', 5) - step.get('eps_relax', 0)
+    procs = max(1, int(mpi_procs * step.get('procs_factor', 1.0)))
+    for key in ('iter', 'opt'):
+        if key in step:
+            adda_params[key] = step[key]
+    extra_params_str, _ = process_extra_adda_params(adda_params)
+    return pol, eps, procs, extra_params_str
+
+def print_plan(config, retry_config, attempts):
+    """다음 시도 설정을 bash 변수로 출력"""
+    step, label = next_attempt(retry_config, attempts)
+    attempts = current_series(attempts)
+    if step is None:
+        print('RETRY_ALLOWED=0')
+        print(f'RETRY_REASON="{label}"')
+        return
+    pol, eps, procs, extra_params_str = apply_step(config, step)
+    print('RETRY_ALLOWED=1')
+    print(f'RETRY_ATTEMPT={len(attempts) + 1}')
+    print(f'RETRY_LABEL="{label}"')
+    print(f'RETRY_POL="{pol}"')
+    print(f'RETRY_EPS={eps}')
+    print(f'RETRY_PROCS={procs}')
+    print(f'RETRY_EXTRA="{extra_params_str}"')
+
+def record_attempt(config, model_dir, wavelength, exit_code, stdout_file=None, lambda_dir=None, attempt_id=None):
+    """방금 끝난 시도를 분류하여 실행 기록의 시도 행에 추가하고 기록한 레코드 반환
+
+    lambda_dir: scratch 실행 디렉토리, attempt_id: run_ledger.py start가 돌려준 시도 id
+    """
+    model_dir = Path(model_dir)
+    retry_config = get_retry_config(config)
+    attempts = current_series(load_attempts(model_dir, wavelength))
+    step, _ = next_attempt(retry_config, attempts)
+
+    lambda_dir = Path(lambda_dir) if lambda_dir else model_dir / f"lambda_{wavelength}nm"
+    marker = model_dir / RUN_STATE_DIR / f"lambda_{wavelength}nm.aborted"
+    failure = classify_failure(exit_code, lambda_dir, stdout_file, marker)
+    record = {
+        'wavelength': wavelength,
+        'attempt': len(attempts) + 1,
+        'step': step or {},
+        'retry_for': attempts[-1]['failure'] if attempts else None,
+        'exit_code': exit_code,
+        'failure': failure,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    with RunLedger(model_dir) as ledger:
+        record['id'] = ledger.record_retry(wavelength, failure, record['step'], record['retry_for'], exit_code,
+                                           attempt=record['attempt'], attempt_id=attempt_id)
+    return record
+
+def reset_attempts(model_dir, wavelengths=None):
+    """실행 기록의 재시도 이력 초기화 (wavelengths 지정 시 해당 파장만, 시도 행 자체는 유지)"""
+    model_dir = Path(model_dir)
+    if not (model_dir / LEDGER_FILE_NAME).exists() and not (model_dir / LEGACY_RETRY_FILE).exists():
+        return 0
+    with RunLedger(model_dir) as ledger:
+        return ledger.reset_retry(wavelengths)
+
+def print_status(model_dir):
+    """파장별 시도 이력 요약 출력"""
+    by_lambda = {}
+    for record in load_attempts(model_dir):
+        by_lambda.setdefault(record['wavelength'], []).append(record)
+    if not by_lambda:
+        print("No retry attempts recorded")
+        return
+    print(f"{'Lambda':>8}  {'Tries':>5}  {'Result':<15} History")
+    for wavelength in sorted(by_lambda):
+        records = by_lambda[wavelength]
+        history = ' -> '.join(
+            f"{','.join(f'{k}={v}' for k, v in r['step'].items()) or 'base'}:{r['failure']}" for r in records)
+        print(f"{wavelength:>8}  {len(records):>5}  {records[-1]['failure']:<15} {history}")
+
+def main():
+    """메인 함수"""
+    usage = (f"Usage: {sys.argv[0]} plan <config_file> <model_dir> <lambda> | "
+             f"record <config_file> <model_dir> <lambda> <exit_code> [stdout_file] [run_dir] [attempt_id] | "
+             f"status <model_dir> | reset <model_dir> [lambda ...]")
+    if len(sys.argv) < 3:
+        print(usage, file=sys.stderr)
+        sys.exit(1)
+
+    command = sys.argv[1]
+    if command == 'status':
+        print_status(sys.argv[2])
+    elif command == 'reset':
+        wavelengths = {int(value) for value in sys.argv[3:]} or None
+        print(f"Cleared retry history of {reset_attempts(sys.argv[2], wavelengths)} attempt(s)")
+    elif command == 'plan' and len(sys.argv) == 5:
+        config = load_config_module(sys.argv[2])
+        attempts = load_attempts(sys.argv[3], int(sys.argv[4]))
+        print_plan(config, get_retry_config(config), attempts)
+    elif command == 'record' and len(sys.argv) in (6, 7, 8, 9):
+        config = load_config_module(sys.argv[2])
+        wavelength = int(sys.argv[4])
+        record = record_attempt(config, sys.argv[3], wavelength, int(sys.argv[5]),
+                                sys.argv[6] if len(sys.argv) >= 7 else None,
+                                sys.argv[7] if len(sys.argv) >= 8 else None,
+                                int(sys.argv[8]) if len(sys.argv) == 9 and sys.argv[8] else None)
+        print(f'FAILURE_CLASS="{record["failure"]}"')
+        print(f'ATTEMPTS_USED={record["attempt"]}')
+        if record['failure'] == 'none':
+            print('RETRY_ALLOWED=0')
+        else:
+            print_plan(config, get_retry_config(config), load_attempts(sys.argv[3], wavelength))
+    else:
+        print(usage, file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
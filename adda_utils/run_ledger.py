@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+ADDA Run Ledger
+모델 디렉토리별 실행 기록 (SQLite WAL, <모델 디렉토리>/run_ledger.sqlite)
+
+시도마다 한 행(파장, 파라미터 해시, 시작/종료 시각, exit code, 상태, host, rank 수, 실패 사유)을 남기고,
+(resource_sampler.py가 켜져 있으면 시도별 CPU/RSS/쓰기량 요약을 resources 테이블에 남김)
+파장별 최종 상태는 wavelengths 테이블에 같은 트랜잭션으로 갱신하므로 재실행/상태/요약은
+파장당 한 번의 primary key 조회로 판단한다. 재시도로 같은 파장이 여러 번 기록되어도 요약은
+파장 단위로 세므로 성공률이 100%를 넘지 않는다.
+retry_policy.py의 실패 분류와 재시도 단계(failure, retry_for, step)도 같은 시도 행에 기록한다.
+
+처음 열 때 기존 completed_simulations.txt / failed_simulations.txt (파장[\\t사유])와
+retry_attempts.jsonl (재시도 이력)을 가져온다.
+
+사용법 (run_simulation.sh가 eval 가능한 VAR=... 형태로 출력을 사용):
+    python run_ledger.py completed <model_dir>                                # 완료 파장 목록 (공백 구분)
+    python run_ledger.py start <model_dir> <lambda> <attempt> <nprocs> <adda_args...>
+    python run_ledger.py finish <model_dir> <attempt_id> <exit_code> completed|failed [reason]
+    python run_ledger.py record <model_dir> <lambda> completed|failed [reason]  # 실행 없이 기록
+    python run_ledger.py summary <model_dir> <lambda_start> <lambda_end> <lambda_step>
+    python run_ledger.py status <model_dir>
+"""
+import hashlib
+import json
+import socket
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+LEDGER_FILE_NAME = 'run_ledger.sqlite'
+LEGACY_COMPLETED_FILE = 'completed_simulations.txt'
+LEGACY_FAILED_FILE = 'failed_simulations.txt'
+LEGACY_RETRY_FILE = 'retry_attempts.jsonl'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    wavelength INTEGER NOT NULL,
+    attempt INTEGER,
+    param_hash TEXT,
+    start REAL,
+    end REAL,
+    exit_code INTEGER,
+    status TEXT NOT NULL,
+    host TEXT,
+    nprocs INTEGER,
+    reason TEXT,
+    source TEXT,
+    failure TEXT,
+    retry_for TEXT,
+    step TEXT
+);
+CREATE INDEX IF NOT EXISTS attempts_wavelength ON attempts (wavelength);
+CREATE TABLE IF NOT EXISTS wavelengths (
+    wavelength INTEGER PRIMARY KEY,
+    status TEXT NOT NULL,
+    last_attempt INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    reason TEXT,
+    updated REAL
+);
+CREATE TABLE IF NOT EXISTS resources (
+    attempt_id INTEGER PRIMARY KEY,
+    wavelength INTEGER NOT NULL,
+    host TEXT,
+    interval REAL,
+    samples INTEGER,
+    ranks INTEGER,
+    cpus INTEGER,
+    wall REAL,
+    cpu_total REAL,
+    cpu_rank_mean REAL,
+    cpu_rank_min REAL,
+    peak_rss INTEGER,
+    peak_rank_rss INTEGER,
+    write_bytes INTEGER,
+    read_bytes INTEGER,
+    major_faults INTEGER,
+    mem_total INTEGER,
+    mem_available_min INTEGER,
+    detail TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# 재시도 이력 열 (이전 스키마의 ledger에는 열 때 추가)
+RETRY_COLUMNS = ('failure', 'retry_for', 'step')
+
+RESOURCE_COLUMNS = ('host', 'interval', 'samples', 'ranks', 'cpus', 'wall', 'cpu_total', 'cpu_rank_mean',
+                    'cpu_rank_min', 'peak_rss', 'peak_rank_rss', 'write_bytes', 'read_bytes', 'major_faults',
+                    'mem_total', 'mem_available_min', 'detail')
+
+def param_hash(args):
+    """ADDA 인수 문자열의 해시 (공백 정규화)"""
+    return hashlib.sha256(' '.join(str(args).split()).encode()).hexdigest()[:16]
+
+def read_legacy_list(file_path):
+    """completed/failed 텍스트 파일에서 {파장: 사유} 읽기 (중복 행은 마지막 사유)"""
+    entries = {}
+    try:
+        with open(file_path, 'r') as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t', 1)
+                field = parts[0].strip()
+                if field.isdigit():
+                    entries[int(field)] = parts[1].strip() if len(parts) > 1 else None
+    except OSError:
+        pass
+    return entries
+
+def read_legacy_retry(file_path, wavelength=None):
+    """retry_attempts.jsonl 시도 이력 읽기 (wavelength 지정 시 해당 파장만)"""
+    records = []
+    try:
+        with open(file_path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if wavelength is None or record.get('wavelength') == wavelength:
+                    records.append(record)
+    except OSError:
+        pass
+    return records
+
+def _retry_record(row):
+    """attempts 행을 재시도 이력 dict로 변환"""
+    return {
+        'id': row['id'],
+        'wavelength': row['wavelength'],
+        'attempt': row['attempt'],
+        'step': json.loads(row['step']) if row['step'] else {},
+        'retry_for': row['retry_for'],
+        'exit_code': row['exit_code'],
+        'failure': row['failure'],
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(row['end'] or row['start'] or 0)),
+    }
+
+def _query_retry(connection, wavelength=None):
+    """시도 순서대로 재시도 이력 dict 목록 (wavelength 지정 시 해당 파장만)"""
+    query = "SELECT * FROM attempts WHERE failure IS NOT NULL"
+    params = []
+    if wavelength is not None:
+        query += " AND wavelength = ?"
+        params.append(wavelength)
+    return [_retry_record(row) for row in connection.execute(query + " ORDER BY id", params)]
+
+class RunLedger:
+    """모델 디렉토리의 실행 기록"""
+
+    def __init__(self, model_dir):
+        self.model_dir = Path(model_dir)
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        self.db_file = self.model_dir / LEDGER_FILE_NAME
+        # 여러 프로세스(스윕, 모니터, 스트리밍 후처리, 작업 서버)가 같은 파일을 씀
+        self.connection = sqlite3.connect(str(self.db_file), timeout=30, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self._add_retry_columns()
+        self._import_legacy()
+        self._import_retry_history()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _transaction(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+
+    def _add_retry_columns(self):
+        """재시도 열이 없는 이전 ledger에 열 추가"""
+        columns = {row['name'] for row in self.connection.execute("PRAGMA table_info(attempts)")}
+        for column in RETRY_COLUMNS:
+            if column not in columns:
+                try:
+                    self.connection.execute(f"ALTER TABLE attempts ADD COLUMN {column} TEXT")
+                except sqlite3.OperationalError:
+                    # 다른 프로세스가 먼저 추가
+                    pass
+
+    def _import_retry_history(self):
+        """retry_attempts.jsonl 이력을 한 번만 attempts 행으로 가져옴 (파장 상태는 바꾸지 않음)"""
+        if self.connection.execute("SELECT 1 FROM meta WHERE key = 'retry_imported'").fetchone():
+            return
+        self._transaction()
+        try:
+            if not self.connection.execute("SELECT 1 FROM meta WHERE key = 'retry_imported'").fetchone():
+                records = read_legacy_retry(self.model_dir / LEGACY_RETRY_FILE)
+                for record in records:
+                    try:
+                        end = time.mktime(time.strptime(record.get('timestamp', ''), '%Y-%m-%dT%H:%M:%S'))
+                    except ValueError:
+                        end = None
+                    failure = record.get('failure')
+                    self.connection.execute(
+                        "INSERT INTO attempts (wavelength, attempt, start, end, exit_code, status, reason, source, "
+                        "failure, retry_for, step) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (record['wavelength'], record.get('attempt'), end, end, record.get('exit_code'),
+                         'completed' if failure == 'none' else 'failed', None if failure == 'none' else failure,
+                         f"import:{LEGACY_RETRY_FILE}", failure, record.get('retry_for'),
+                         json.dumps(record.get('step') or {})))
+                self.connection.execute("INSERT INTO meta (key, value) VALUES ('retry_imported', ?)",
+                                        (f"{len(records)} attempts",))
+            self.connection.execute('COMMIT')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+
+    def _import_legacy(self):
+        """기존 텍스트 기록을 한 번만 가져옴"""
+        if self.connection.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+            return
+        self._transaction()
+        try:
+            if not self.connection.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+                completed = read_legacy_list(self.model_dir / LEGACY_COMPLETED_FILE)
+                failed = read_legacy_list(self.model_dir / LEGACY_FAILED_FILE)
+                for wavelength in sorted(completed):
+                    self._insert(wavelength, 'completed', source=f"import:{LEGACY_COMPLETED_FILE}")
+                for wavelength, reason in sorted(failed.items()):
+                    if wavelength not in completed:
+                        self._insert(wavelength, 'failed', reason=reason, source=f"import:{LEGACY_FAILED_FILE}")
+                self.connection.execute("INSERT INTO meta (key, value) VALUES ('legacy_imported', ?)",
+                                        (f"{len(completed)} completed, {len(set(failed) - set(completed))} failed",))
+            self.connection.execute('COMMIT')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+
+    def _insert(self, wavelength, status, attempt=None, params=None, start=None, end=None, exit_code=None,
+                nprocs=None, reason=None, source='sweep'):
+        """트랜잭션 안에서 시도 한 행 추가 및 파장 상태 갱신, 행 id 반환"""
+        now = time.time()
+        cursor = self.connection.execute(
+            "INSERT INTO attempts (wavelength, attempt, param_hash, start, end, exit_code, status, host, nprocs, "
+            "reason, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (wavelength, attempt, params, start if start is not None else now,
+             end if end is not None or status == 'running' else now,
+             exit_code, status, socket.gethostname(), nprocs, reason, source))
+        attempt_id = cursor.lastrowid
+        self.connection.execute(
+            "INSERT INTO wavelengths (wavelength, status, last_attempt, attempts, reason, updated) "
+            "VALUES (?, ?, ?, 1, ?, ?) ON CONFLICT (wavelength) DO UPDATE SET status = excluded.status, "
+            "last_attempt = excluded.last_attempt, attempts = attempts + 1, reason = excluded.reason, "
+            "updated = excluded.updated",
+            (wavelength, status, attempt_id, reason, now))
+        return attempt_id
+
+    def start_attempt(self, wavelength, attempt=None, params=None, nprocs=None):
+        """실행 시작 기록 (같은 파장의 끝나지 않은 이전 시도는 interrupted로 닫음), 시도 id 반환"""
+        self._transaction()
+        try:
+            self.connection.execute(
+                "UPDATE attempts SET status = 'failed', end = ?, reason = COALESCE(reason, 'interrupted') "
+                "WHERE wavelength = ? AND status = 'running'", (time.time(), wavelength))
+            attempt_id = self._insert(wavelength, 'running', attempt=attempt, params=params, nprocs=nprocs)
+            self.connection.execute('COMMIT')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        return attempt_id
+
+    def finish_attempt(self, attempt_id, exit_code, status, reason=None):
+        """실행 종료 기록 (모니터가 먼저 남긴 중단 사유는 유지)"""
+        now = time.time()
+        self._transaction()
+        try:
+            row = self.connection.execute("SELECT wavelength, reason FROM attempts WHERE id = ?",
+                                          (attempt_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Unknown attempt id: {attempt_id}")
+            reason = None if status == 'completed' else (row['reason'] or reason)
+            self.connection.execute("UPDATE attempts SET end = ?, exit_code = ?, status = ?, reason = ? WHERE id = ?",
+                                    (now, exit_code, status, reason, attempt_id))
+            self.connection.execute("UPDATE wavelengths SET status = ?, reason = ?, updated = ? "
+                                    "WHERE wavelength = ? AND last_attempt = ?",
+                                    (status, reason, now, row['wavelength'], attempt_id))
+            self.connection.execute('COMMIT')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+
+    def record(self, wavelength, status, reason=None, **fields):
+        """실행 중 상태를 거치지 않는 기록 (기존 결과 발견, 굴절률 없음, 작업 서버 결과 등)"""
+        self._transaction()
+        try:
+            attempt_id = self._insert(wavelength, status, reason=reason, **fields)
+            self.connection.execute('COMMIT')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        return attempt_id
+
+    def annotate_running(self, wavelength, reason):
+        """실행 중인 시도에 중단 사유 기록 (sweep_monitor.py가 작업을 종료하기 전에 호출)"""
+        self._transaction()
+        try:
+            self.connection.execute("UPDATE attempts SET reason = ? WHERE wavelength = ? AND status = 'running'",
+                                    (reason, wavelength))
+            self.connection.execute("UPDATE wavelengths SET reason = ? WHERE wavelength = ? AND status = 'running'",
+                                    (reason, wavelength))
+            self.connection.execute('COMMIT')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+
+    def record_retry(self, wavelength, failure, step=None, retry_for=None, exit_code=None, attempt=None,
+                     attempt_id=None):
+        """retry_policy.py의 분류 결과를 시도 행에 기록하고 행 id 반환
+
+        attempt_id가 없으면 해당 파장의 실행 중인 마지막 시도에, 그것도 없으면 새 시도 행으로 기록
+        """
+        self._transaction()
+        try:
+            if attempt_id is None:
+                row = self.connection.execute(
+                    "SELECT id FROM attempts WHERE wavelength = ? AND status = 'running' ORDER BY id DESC LIMIT 1",
+                    (wavelength,)).fetchone()
+                attempt_id = row['id'] if row else None
+            if attempt_id is None:
+                attempt_id = self._insert(wavelength, 'completed' if failure == 'none' else 'failed',
+                                          attempt=attempt, exit_code=exit_code,
+                                          reason=None if failure == 'none' else failure, source='retry')
+            self.connection.execute(
+                "UPDATE attempts SET failure = ?, retry_for = ?, step = ?, attempt = COALESCE(attempt, ?) "
+                "WHERE id = ?", (failure, retry_for, json.dumps(step or {}), attempt, attempt_id))
+            self.connection.execute('COMMIT')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        return attempt_id
+
+    def reset_retry(self, wavelengths=None):
+        """재시도 이력 초기화 (시도 행은 실행 기록으로 남기고 분류/단계만 지움), 초기화한 행 수 반환"""
+        query = "UPDATE attempts SET failure = NULL, retry_for = NULL, step = NULL WHERE failure IS NOT NULL"
+        params = []
+        if wavelengths:
+            query += f" AND wavelength IN ({', '.join('?' * len(wavelengths))})"
+            params = sorted(wavelengths)
+        return self.connection.execute(query, params).rowcount
+
+    def retry_history(self, wavelength=None):
+        """시도 순서대로 재시도 이력 dict 목록 (wavelength 지정 시 해당 파장만)"""
+        return _query_retry(self.connection, wavelength)
+
+    def record_resources(self, attempt_id, wavelength, metrics):
+        """시도의 자원 사용 요약 기록 (resource_sampler.py, 같은 시도는 덮어씀)"""
+        columns = [column for column in RESOURCE_COLUMNS if column in metrics]
+        values = [metrics[column] for column in columns]
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO resources (attempt_id, wavelength, {', '.join(columns)}) "
+            f"VALUES (?, ?{', ?' * len(columns)})", [attempt_id, wavelength] + values)
+
+    def status(self, wavelength):
+        """파장의 최종 상태 ('completed', 'failed', 'running' 또는 None)"""
+        row = self.connection.execute("SELECT status FROM wavelengths WHERE wavelength = ?", (wavelength,)).fetchone()
+        return row['status'] if row else None
+
+    def is_completed(self, wavelength):
+        return self.status(wavelength) == 'completed'
+
+    def wavelengths(self, status):
+        """상태별 파장 집합"""
+        rows = self.connection.execute("SELECT wavelength FROM wavelengths WHERE status = ?", (status,))
+        return {row['wavelength'] for row in rows}
+
+    def summary(self, wavelengths):
+        """설정된 파장 기준 상태별 개수 (파장당 한 번)"""
+        states = {row['wavelength']: row['status']
+                  for row in self.connection.execute("SELECT wavelength, status FROM wavelengths")}
+        counts = {'total': 0, 'completed': 0, 'failed': 0, 'running': 0, 'pending': 0}
+        for wavelength in wavelengths:
+            counts['total'] += 1
+            counts[states.get(wavelength) or 'pending'] += 1
+        counts['attempts'] = self.connection.execute(
+            "SELECT COUNT(*) FROM attempts WHERE source NOT LIKE 'import:%'").fetchone()[0]
+        return counts
+
+    def rows(self):
+        """파장별 상태와 마지막 시도 정보"""
+        return self.connection.execute(
+            "SELECT w.wavelength, w.status, w.attempts, w.reason, a.start, a.end, a.exit_code, a.host, a.nprocs, "
+            "a.param_hash FROM wavelengths w LEFT JOIN attempts a ON a.id = w.last_attempt "
+            "ORDER BY w.wavelength").fetchall()
+
+def _open_read_only(model_dir):
+    """기존 ledger를 읽기 전용으로 열기 (없으면 None, 파일을 만들지 않음)"""
+    db_file = Path(model_dir) / LEDGER_FILE_NAME
+    if not db_file.exists():
+        return None
+    connection = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True, timeout=30)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+def read_wavelength_states(model_dir):
+    """{파장: 최종 상태} (ledger가 아직 없으면 기존 텍스트 기록 기준)"""
+    connection = _open_read_only(model_dir)
+    if connection is None:
+        states = {w: 'failed' for w in read_legacy_list(Path(model_dir) / LEGACY_FAILED_FILE)}
+        states.update({w: 'completed' for w in read_legacy_list(Path(model_dir) / LEGACY_COMPLETED_FILE)})
+        return states
+    try:
+        return {row['wavelength']: row['status']
+                for row in connection.execute("SELECT wavelength, status FROM wavelengths")}
+    finally:
+        connection.close()
+
+def read_retry_history(model_dir, wavelength=None):
+    """재시도 이력을 읽기 전용으로 조회 (ledger가 없거나 아직 가져오지 않았으면 retry_attempts.jsonl)"""
+    legacy_file = Path(model_dir) / LEGACY_RETRY_FILE
+    connection = _open_read_only(model_dir)
+    if connection is None:
+        return read_legacy_retry(legacy_file, wavelength)
+    try:
+        if not connection.execute("SELECT 1 FROM meta WHERE key = 'retry_imported'").fetchone():
+            return read_legacy_retry(legacy_file, wavelength)
+        return _query_retry(connection, wavelength)
+    except sqlite3.OperationalError:
+        # 재시도 열이 생기기 전의 ledger
+        return read_legacy_retry(legacy_file, wavelength)
+    finally:
+        connection.close()
+
+def read_completed_costs(model_dir):
+    """완료된 실제 실행의 (파장, wall time 초, rank 수) 목록"""
+    connection = _open_read_only(model_dir)
+    if connection is None:
+        return []
+    try:
+        rows = connection.execute(
+            "SELECT wavelength, end - start AS wall, nprocs FROM attempts WHERE status = 'completed' "
+            "AND nprocs IS NOT NULL AND end > start AND source NOT LIKE 'import:%'").fetchall()
+        return [(row['wavelength'], row['wall'], row['nprocs']) for row in rows]
+    finally:
+        connection.close()
+
+def read_resources(model_dir):
+    """파장별 가장 최근 자원 기록 (시도 번호, 상태, 요청 rank 수 포함)"""
+    connection = _open_read_only(model_dir)
+    if connection is None:
+        return []
+    try:
+        return connection.execute(
+            "SELECT r.*, a.attempt, a.status, a.nprocs FROM resources r "
+            "LEFT JOIN attempts a ON a.id = r.attempt_id "
+            "WHERE r.attempt_id = (SELECT MAX(attempt_id) FROM resources WHERE wavelength = r.wavelength) "
+            "ORDER BY r.wavelength").fetchall()
+    except sqlite3.OperationalError:
+        # resources 테이블이 생기기 전의 ledger
+        return []
+    finally:
+        connection.close()
+
+def print_status(model_dir):
+    """파장별 최종 상태 표 출력"""
+    with RunLedger(model_dir) as ledger:
+        rows = ledger.rows()
+        if not rows:
+            print("No runs recorded")
+            return
+        print(f"{'Lambda':>8}  {'Status':<10} {'Tries':>5}  {'Wall(s)':>8}  {'Ranks':>5}  {'Host':<16} Reason")
+        for row in rows:
+            wall = f"{row['end'] - row['start']:.0f}" if row['end'] and row['start'] else '-'
+            print(f"{row['wavelength']:>8}  {row['status']:<10} {row['attempts']:>5}  {wall:>8}  "
+                  f"{row['nprocs'] or '-':>5}  {(row['host'] or '-'):<16} {row['reason'] or ''}")
+
+def main():
+    """메인 함수"""
+    usage = (f"Usage: {sys.argv[0]} completed <model_dir> | "
+             f"start <model_dir> <lambda> <attempt> <nprocs> <adda_args...> | "
+             f"finish <model_dir> <attempt_id> <exit_code> completed|failed [reason] | "
+             f"record <model_dir> <lambda> completed|failed [reason] | "
+             f"summary <model_dir> <lambda_start> <lambda_end> <lambda_step> | status <model_dir>")
+    if len(sys.argv) < 3:
+        print(usage, file=sys.stderr)
+        sys.exit(1)
+
+    command, model_dir = sys.argv[1], sys.argv[2]
+    if command == 'status':
+        print_status(model_dir)
+        return
+    with RunLedger(model_dir) as ledger:
+        if command == 'completed' and len(sys.argv) == 3:
+            print(' '.join(str(w) for w in sorted(ledger.wavelengths('completed'))))
+        elif command == 'start' and len(sys.argv) >= 6:
+            attempt_id = ledger.start_attempt(int(sys.argv[3]), attempt=int(sys.argv[4]),
+                                              params=param_hash(' '.join(sys.argv[6:])), nprocs=int(sys.argv[5]))
+            print(f"LEDGER_ATTEMPT_ID={attempt_id}")
+        elif command == 'finish' and len(sys.argv) in (6, 7) and sys.argv[5] in ('completed', 'failed'):
+            try:
+                ledger.finish_attempt(int(sys.argv[3]), int(sys.argv[4]), sys.argv[5],
+                                      sys.argv[6] if len(sys.argv) == 7 else None)
+            except KeyError as e:
+                print(f"[ERROR] {e}", file=sys.stderr)
+                sys.exit(1)
+        elif command == 'record' and len(sys.argv) in (5, 6) and sys.argv[4] in ('completed', 'failed'):
+            ledger.record(int(sys.argv[3]), sys.argv[4], sys.argv[5] if len(sys.argv) == 6 else None)
+        elif command == 'summary' and len(sys.argv) == 6:
+            start, end, step = (int(value) for value in sys.argv[3:6])
+            # run_simulation.sh의 seq와 같이 end를 넘지 않는 파장
+            counts = ledger.summary(range(start, end + 1, step))
+            for key in ('total', 'completed', 'failed', 'running', 'pending', 'attempts'):
+                print(f"LEDGER_{key.upper()}={counts[key]}")
+        else:
+            print(usage, file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+ADDA Scratch Staging
+노드 로컬 scratch에서 끝난 파장 디렉토리를 공유 저장소(RESEARCH_BASE_DIR)로 한 번에 옮김
+
+같은 파일시스템이면 rename 한 번으로, 다른 파일시스템이면 대상 옆의 숨김 임시 디렉토리
+(.lambda_XXXnm.staging-<pid>)로 일괄 복사한 뒤 rename하므로, lambda_*nm 이름으로 보이는 디렉토리는
+항상 완전한 결과이고 CrossSec 기반 완료 판단이 부분 결과를 보지 않는다.
+
+사용법 (run_simulation.sh에서 호출):
+    python scratch_stage.py publish <scratch_lambda_dir> <final_lambda_dir>
+    python scratch_stage.py clean <scratch_model_dir>
+"""
+import errno
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+try:
+    from .stage_tracer import emit_span
+except ImportError:
+    from stage_tracer import emit_span
+
+def directory_size(path):
+    """디렉토리 전체 파일 크기 (bytes)"""
+    return sum(entry.stat().st_size for entry in Path(path).rglob('*') if entry.is_file())
+
+def _replace_dir(source, target):
+    """source를 target 이름으로 rename (기존 target은 숨김 이름으로 옮긴 뒤 삭제)"""
+    target = Path(target)
+    stale = None
+    if target.exists():
+        stale = target.with_name(f".{target.name}.stale-{os.getpid()}")
+        os.rename(target, stale)
+    os.rename(source, target)
+    if stale is not None:
+        shutil.rmtree(stale, ignore_errors=True)
+
+def publish_lambda_dir(scratch_dir, final_dir, keep_source=False):
+    """scratch 결과 디렉토리를 최종 위치로 원자적으로 이동 (keep_source면 복사), (방식, bytes) 반환"""
+    scratch_dir = Path(scratch_dir)
+    final_dir = Path(final_dir)
+    if not scratch_dir.is_dir():
+        raise FileNotFoundError(f"Scratch directory not found: {scratch_dir}")
+    final_dir.parent.mkdir(parents=True, exist_ok=True)
+    size = directory_size(scratch_dir)
+
+    if not keep_source:
+        try:
+            _replace_dir(scratch_dir, final_dir)
+            return 'rename', size
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+
+    # 다른 파일시스템: 대상 파일시스템의 숨김 디렉토리로 일괄 복사 후 rename
+    staging = final_dir.with_name(f".{final_dir.name}.staging-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    try:
+        # symlink는 그대로 복사 (공유 작업 서버가 대상 파일을 대신 읽지 않도록)
+        shutil.copytree(scratch_dir, staging, symlinks=True)
+        _replace_dir(staging, final_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    if not keep_source:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+    return 'copy', size
+
+def clean_scratch(scratch_root):
+    """비어 있는 scratch 모델 디렉토리 정리 (남은 파장 디렉토리는 유지)"""
+    scratch_root = Path(scratch_root)
+    removed = 0
+    for path in sorted(scratch_root.rglob('*'), key=lambda p: len(p.parts), reverse=True):
+        if path.is_dir() and not any(path.iterdir()):
+            path.rmdir()
+            removed += 1
+    if scratch_root.is_dir() and not any(scratch_root.iterdir()):
+        scratch_root.rmdir()
+    return removed
+
+def main():
+    """메인 함수"""
+    usage = f"Usage: {sys.argv[0]} publish <scratch_lambda_dir> <final_lambda_dir> | clean <scratch_model_dir>"
+    if len(sys.argv) == 4 and sys.argv[1] == 'publish':
+        start = time.time()
+        try:
+            method, size = publish_lambda_dir(sys.argv[2], sys.argv[3])
+        except OSError as e:
+            print(f"[ERROR] Failed to publish {sys.argv[2]}: {e}", file=sys.stderr)
+            sys.exit(1)
+        name = Path(sys.argv[3]).name
+        wavelength = int(name[len('lambda_'):-len('nm')]) if name.startswith('lambda_') else None
+        emit_span('stage_out', start, time.time(), wavelength=wavelength, method=method, bytes=size)
+        print(f"  [STAGE] Moved {size / 1024.0 / 1024.0:.1f} MB to shared storage ({method})")
+    elif len(sys.argv) == 3 and sys.argv[1] == 'clean':
+        clean_scratch(sys.argv[2])
+    else:
+        print(usage, file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
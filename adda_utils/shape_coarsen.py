@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+ADDA Shape Coarsening
+production 해상도의 read 형상 파일을 정수 배율로 거칠게 만든 미리보기용 형상 pyramid
+
+- 배율 f마다 f×f×f 쌍극자 블록을 거친 쌍극자 하나로 합침. 블록 배치는 가능한 축에서 경계 상자 중심에 대해
+  대칭이 되도록 맞추므로 거울 대칭이 유지되지만, 상자 폭이 홀수인 축을 짝수 배율로 나누면 중심 쌍극자가 블록 경계에
+  걸려 대칭 배치가 불가능하고 그 축의 거울 대칭은 보존되지 않음 (홀수 배율 사용 권장, symmetric_axes에 기록)
+- 블록에서 채워진 쌍극자 비율이 fill_fraction 이상이면 거친 쌍극자를 두고, domain은 블록 안의 다수결
+  (동수이면 작은 domain 번호)
+- 쌍극자 간격은 f배가 되므로 ADDA_PARAMS['dpl']을 1/f로 줄이고, preserve_volume이면 채움 규칙으로 생긴
+  부피 차이를 간격에 반영하여 입자 부피 (등가 반경)를 유지 (-grid는 ceil(grid/f))
+- 거친 형상은 cache_dir (기본값: <형상 파일 디렉토리>/.coarse_shapes)에 원본 서명 (크기, mtime)과 함께 보관하고
+  원본이 바뀌지 않았으면 다시 만들지 않음
+- 환경변수 ADDA_COARSE_FACTOR=f가 있으면 config 로드 시 SHAPE_CONFIG['filename'], ADDA_PARAMS의 dpl/grid,
+  MAT_TYPE (<MAT_TYPE>_coarse<f>)을 거친 형상 기준으로 바꾸므로 스윕/후처리 전체가 그대로 미리보기 스윕이 됨
+
+사용법:
+    python shape_coarsen.py pyramid <config_file>                   # COARSEN_CONFIG['factors'] 형상 생성 및 요약
+    python shape_coarsen.py pyramid <config_file> --shell           # bash eval용 COARSE_* 변수 출력
+    python shape_coarsen.py coarsen <shape_file> <factor> [--output FILE] [--fill 0.5]
+"""
+import argparse
+import json
+import math
+import os
+import sys
+from pathlib import Path
+
+try:
+    from .shape_symmetry import iter_shape_file
+except ImportError:
+    from shape_symmetry import iter_shape_file
+
+COARSE_FACTOR_ENV = 'ADDA_COARSE_FACTOR'
+COARSE_CACHE_DIR = '.coarse_shapes'
+
+DEFAULT_COARSEN_CONFIG = {
+    'factors': [2, 4],           # pyramid 배율
+    'fill_fraction': 0.5,        # 블록에서 이 비율 이상 채워지면 거친 쌍극자 생성
+    'preserve_volume': True,     # 채움 규칙의 부피 차이를 dpl에 반영하여 입자 부피 유지
+    'cache_dir': None,           # None이면 <형상 파일 디렉토리>/.coarse_shapes
+}
+
+def get_coarsen_config(config):
+    """config의 COARSEN_CONFIG를 기본값과 병합"""
+    coarsen_config = dict(DEFAULT_COARSEN_CONFIG)
+    coarsen_config.update(getattr(config, 'COARSEN_CONFIG', {}) or {})
+    return coarsen_config
+
+def _domain_number(domain, shape_file):
+    """DDSCAT 등방 (ICOMP 세 값이 같은) domain을 정수로"""
+    if isinstance(domain, tuple):
+        if not domain[0] == domain[1] == domain[2]:
+            raise ValueError(f"anisotropic dipoles cannot be coarsened ({shape_file})")
+        return domain[0]
+    return domain
+
+def coarsen_dipoles(shape_file, factor, fill_fraction=0.5):
+    """형상 파일을 factor배로 거칠게 만든 ({(x, y, z): domain}, 통계 dict)"""
+    factor = int(factor)
+    if factor < 2:
+        raise ValueError(f"coarsening factor must be an integer >= 2 (got {factor})")
+    # 첫 번째 읽기: 경계 상자와 domain별 쌍극자 수
+    low, high, fine_counts = None, None, {}
+    for x, y, z, domain in iter_shape_file(shape_file):
+        domain = _domain_number(domain, shape_file)
+        fine_counts[domain] = fine_counts.get(domain, 0) + 1
+        if low is None:
+            low, high = [x, y, z], [x, y, z]
+        else:
+            low = [min(low[0], x), min(low[1], y), min(low[2], z)]
+            high = [max(high[0], x), max(high[1], y), max(high[2], z)]
+    if low is None:
+        raise ValueError(f"no dipoles found in shape file {shape_file}")
+    box = [h - l + 1 for l, h in zip(low, high)]
+    # 남는 칸 (c·f - n)을 양쪽에 똑같이 나누면 블록 배치가 상자 중심에 대해 대칭. 남는 칸이 홀수이면
+    # 홀수 배율은 블록을 하나 더 두어 짝수로 맞추고, 짝수 배율 (상자 폭 홀수)은 한 칸 치우칠 수밖에 없음
+    origin, symmetric_axes = [], []
+    for l, n in zip(low, box):
+        padding = math.ceil(n / factor) * factor - n
+        if padding % 2 and factor % 2:
+            padding += factor
+        origin.append(l - padding // 2)
+        symmetric_axes.append(padding % 2 == 0)
+
+    # 두 번째 읽기: 블록별 domain 수 (메모리는 거친 쌍극자 수에 비례)
+    blocks = {}
+    for x, y, z, domain in iter_shape_file(shape_file):
+        key = ((x - origin[0]) // factor, (y - origin[1]) // factor, (z - origin[2]) // factor)
+        counts = blocks.setdefault(key, {})
+        domain = _domain_number(domain, shape_file)
+        counts[domain] = counts.get(domain, 0) + 1
+
+    threshold = fill_fraction * factor ** 3
+    cells = {}
+    for key, counts in blocks.items():
+        if sum(counts.values()) >= threshold:
+            cells[key] = min(counts, key=lambda d: (-counts[d], d))
+    if not cells:
+        raise ValueError(f"no coarse dipoles left at factor {factor} (fill_fraction {fill_fraction})")
+
+    coarse_counts = {}
+    for domain in cells.values():
+        coarse_counts[domain] = coarse_counts.get(domain, 0) + 1
+    fine_total = sum(fine_counts.values())
+    stats = {
+        'factor': factor,
+        'fill_fraction': fill_fraction,
+        'fine_dipoles': fine_total,
+        'dipoles': len(cells),
+        'fine_box': box,
+        'symmetric_axes': symmetric_axes,
+        'box': [max(cell[axis] for cell in cells) - min(cell[axis] for cell in cells) + 1 for axis in range(3)],
+        # 거친 쌍극자 부피 / 원래 부피 (간격을 f배로 했을 때)
+        'volume_ratio': len(cells) * factor ** 3 / fine_total,
+        'domains': {str(d): {'fine': fine_counts.get(d, 0) / fine_total,
+                             'coarse': coarse_counts.get(d, 0) / len(cells)}
+                    for d in sorted(set(fine_counts) | set(coarse_counts))},
+    }
+    return cells, stats
+
+def write_shape(output_file, cells, header):
+    """ADDA 형식 ("x y z [domain]")으로 거친 형상 기록 (임시 파일 후 교체)"""
+    output_file = Path(output_file)
+    n_domains = max(cells.values())
+    tmp_file = output_file.with_name(f"{output_file.name}.{os.getpid()}.tmp")
+    with open(tmp_file, 'w') as f:
+        f.write(f"# {header}\n")
+        if n_domains > 1:
+            f.write(f"Nmat={n_domains}\n")
+        for (x, y, z), domain in sorted(cells.items(), key=lambda item: (item[0][2], item[0][1], item[0][0])):
+            f.write(f"{x} {y} {z} {domain}\n" if n_domains > 1 else f"{x} {y} {z}\n")
+    os.replace(tmp_file, output_file)
+
+def _source_signature(shape_file):
+    """원본 형상 파일 서명 (절대 경로, 크기, mtime)"""
+    stat = os.stat(shape_file)
+    return [str(Path(shape_file).resolve()), stat.st_size, stat.st_mtime_ns]
+
+def coarse_paths(shape_file, factor, cache_dir=None):
+    """거친 형상 파일과 메타데이터 파일 경로"""
+    shape_file = Path(shape_file).expanduser()
+    cache_dir = Path(cache_dir).expanduser() if cache_dir else shape_file.parent / COARSE_CACHE_DIR
+    stem = f"{shape_file.stem}_coarse{int(factor)}"
+    return cache_dir / f"{stem}{shape_file.suffix or '.shape'}", cache_dir / f"{stem}.json"
+
+def coarse_variant(shape_file, factor, coarsen_config):
+    """배율 factor의 거친 형상 메타데이터 (cache가 원본/설정과 맞지 않으면 새로 생성)"""
+    shape_file = Path(shape_file).expanduser()
+    output_file, meta_file = coarse_paths(shape_file, factor, coarsen_config['cache_dir'])
+    signature = _source_signature(shape_file)
+    try:
+        with open(meta_file, 'r') as f:
+            meta = json.load(f)
+        # symmetric_axes가 없는 cache는 대칭 배치 이전에 만든 형상이므로 다시 생성
+        if (meta.get('source') == signature and meta.get('fill_fraction') == coarsen_config['fill_fraction']
+                and 'symmetric_axes' in meta and output_file.exists()):
+            meta['cached'] = True
+            return meta
+    except (OSError, ValueError):
+        pass
+
+    cells, stats = coarsen_dipoles(shape_file, factor, coarsen_config['fill_fraction'])
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    write_shape(output_file, cells, f"coarsened x{int(factor)} from {shape_file.name} "
+                                    f"(fill {coarsen_config['fill_fraction']}, majority domain)")
+    meta = dict(stats, source=signature, file=str(output_file))
+    tmp_file = meta_file.with_name(f"{meta_file.name}.{os.getpid()}.tmp")
+    with open(tmp_file, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_file, meta_file)
+    meta['cached'] = False
+    return meta
+
+def scale_adda_params(adda_params, meta, preserve_volume=True):
+    """거친 형상에 맞게 dpl/grid를 바꾼 ADDA_PARAMS 사본
+
+    간격 d_c = f·d (preserve_volume이면 d·(N/N_c)^(1/3))이므로 dpl_c = dpl·d/d_c
+    """
+    adda_params = dict(adda_params)
+    if adda_params.get('dpl') is None:
+        raise ValueError("coarse read shapes need ADDA_PARAMS['dpl'] (ADDA's default 10|m| dipoles per "
+                         "wavelength would shrink the particle instead of coarsening it)")
+    factor = meta['factor']
+    spacing_ratio = (meta['fine_dipoles'] / meta['dipoles']) ** (1.0 / 3.0) if preserve_volume else factor
+    adda_params['dpl'] = round(float(adda_params['dpl']) / spacing_ratio, 6)
+    grid = adda_params.get('grid')
+    if grid is not None:
+        dims = list(grid) if isinstance(grid, (list, tuple)) else [grid]
+        scaled = [max(int(math.ceil(int(value) / factor)), 1) for value in dims]
+        adda_params['grid'] = scaled if isinstance(grid, (list, tuple)) else scaled[0]
+    return adda_params
+
+def apply_coarse_variant(config, factor=None):
+    """ADDA_COARSE_FACTOR (또는 factor)가 있으면 config의 형상/dpl/MAT_TYPE을 거친 형상 기준으로 교체"""
+    factor = factor or os.environ.get(COARSE_FACTOR_ENV)
+    if not factor or getattr(config, 'COARSE_FACTOR', None):
+        return config
+    factor = int(factor)
+    if factor <= 1:
+        return config
+    shape_config = dict(getattr(config, 'SHAPE_CONFIG', {}) or {})
+    if shape_config.get('type') != 'read' or not shape_config.get('filename'):
+        raise ValueError(f"{COARSE_FACTOR_ENV}={factor} requires a read shape with a filename")
+    coarsen_config = get_coarsen_config(config)
+    meta = coarse_variant(shape_config['filename'], factor, coarsen_config)
+
+    config.ADDA_PARAMS = scale_adda_params(getattr(config, 'ADDA_PARAMS', {}), meta,
+                                           coarsen_config['preserve_volume'])
+    shape_config['filename'] = meta['file']
+    config.SHAPE_CONFIG = shape_config
+    config.MAT_TYPE = f"{getattr(config, 'MAT_TYPE', None) or 'custom_shape'}_coarse{factor}"
+    config.COARSE_FACTOR = factor
+    return config
+
+def estimated_speedup(meta):
+    """FFT 격자 셀 수 기준 대략적인 반복당 속도 향상 (원래 상자 / 거친 상자)"""
+    fine = meta['fine_box'][0] * meta['fine_box'][1] * meta['fine_box'][2]
+    coarse = meta['box'][0] * meta['box'][1] * meta['box'][2]
+    return fine / coarse
+
+def print_variant(meta, dpl=None):
+    """거친 형상 하나의 요약 행 출력"""
+    dpl_str = f"{dpl:g}" if dpl is not None else '-'
+    source = 'cached' if meta.get('cached') else 'built'
+    print(f"{meta['factor']:>6}{meta['dipoles']:>12,}{'x'.join(map(str, meta['box'])):>16}"
+          f"{meta['volume_ratio']:>10.3f}{dpl_str:>9}{estimated_speedup(meta):>9.0f}x  {source}")
+    broken = [axis for axis, symmetric in zip('xyz', meta['symmetric_axes']) if not symmetric]
+    if broken:
+        print(f"{'':>6}  [WARN] mirror symmetry along {','.join(broken)} not preserved "
+              f"(odd box width at an even factor; use an odd factor to keep -sym)")
+    for domain, share in meta['domains'].items():
+        if len(meta['domains']) > 1 or share['coarse'] != 1.0:
+            drift = share['coarse'] - share['fine']
+            warning = '  [WARN] domain vanished' if share['fine'] > 0 and share['coarse'] == 0 else ''
+            print(f"{'':>6}  domain {domain}: {share['fine']:.1%} -> {share['coarse']:.1%} "
+                  f"({drift:+.1%}){warning}")
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='read 형상 파일의 다해상도 coarsening')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    pyramid_parser = subparsers.add_parser('pyramid', help='config 형상의 거친 형상 pyramid 생성 및 요약')
+    pyramid_parser.add_argument('config_file')
+    pyramid_parser.add_argument('--factors', type=int, nargs='+', help='배율 (기본값: COARSEN_CONFIG)')
+    pyramid_parser.add_argument('--shell', action='store_true', help='bash eval용 COARSE_* 변수 출력')
+    coarsen_parser = subparsers.add_parser('coarsen', help='형상 파일 하나를 거칠게 만들기')
+    coarsen_parser.add_argument('shape_file')
+    coarsen_parser.add_argument('factor', type=int)
+    coarsen_parser.add_argument('--output', help='출력 파일 (기본값: <형상 디렉토리>/.coarse_shapes/)')
+    coarsen_parser.add_argument('--fill', type=float, default=DEFAULT_COARSEN_CONFIG['fill_fraction'],
+                                help='거친 쌍극자를 만들 최소 채움 비율')
+    args = parser.parse_args()
+
+    if args.command == 'coarsen':
+        try:
+            cells, stats = coarsen_dipoles(args.shape_file, args.factor, args.fill)
+        except (ValueError, OSError) as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            sys.exit(1)
+        output_file = Path(args.output) if args.output else coarse_paths(args.shape_file, args.factor)[0]
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        write_shape(output_file, cells, f"coarsened x{args.factor} from {Path(args.shape_file).name} "
+                                        f"(fill {args.fill}, majority domain)")
+        print(f"[COARSEN] {stats['fine_dipoles']:,} -> {stats['dipoles']:,} dipoles, "
+              f"box {'x'.join(map(str, stats['box']))}, volume ratio {stats['volume_ratio']:.3f}")
+        print(f"[SAVED] {output_file}")
+        return
+
+    # config_loader가 이 모듈을 import하므로 순환 import를 피해 여기서 로드
+    try:
+        from .config_loader import load_config_module
+    except ImportError:
+        from config_loader import load_config_module
+    saved_factor = os.environ.pop(COARSE_FACTOR_ENV, None)
+    try:
+        config = load_config_module(args.config_file)
+    finally:
+        if saved_factor is not None:
+            os.environ[COARSE_FACTOR_ENV] = saved_factor
+    coarsen_config = get_coarsen_config(config)
+    shape_config = getattr(config, 'SHAPE_CONFIG', {}) or {}
+    adda_params = getattr(config, 'ADDA_PARAMS', {})
+    factors = args.factors or coarsen_config['factors']
+    if args.shell:
+        try:
+            if shape_config.get('type') != 'read' or not shape_config.get('filename'):
+                raise ValueError("shape coarsening applies to read shapes with SHAPE_CONFIG['filename']")
+            for factor in factors:
+                scale_adda_params(adda_params, coarse_variant(shape_config['filename'], factor, coarsen_config),
+                                  coarsen_config['preserve_volume'])
+        except (ValueError, OSError) as e:
+            print('COARSE_STATUS="error"')
+            print(f'COARSE_REASON="{e}"')
+            return
+        print('COARSE_STATUS="ok"')
+        print(f'COARSE_FACTORS="{" ".join(str(int(factor)) for factor in factors)}"')
+        print(f'COARSE_MAX={max(int(factor) for factor in factors)}')
+        return
+
+    if shape_config.get('type') != 'read' or not shape_config.get('filename'):
+        print("[ERROR] shape coarsening applies to read shapes with SHAPE_CONFIG['filename']", file=sys.stderr)
+        sys.exit(1)
+    print(f"[COARSEN] {shape_config['filename']} (fill {coarsen_config['fill_fraction']}, "
+          f"preserve_volume {coarsen_config['preserve_volume']})")
+    print(f"\n{'Factor':>6}{'Dipoles':>12}{'Box':>16}{'Vol ratio':>10}{'dpl':>9}{'Speedup':>10}")
+    for factor in factors:
+        try:
+            meta = coarse_variant(shape_config['filename'], factor, coarsen_config)
+            dpl = None
+            if adda_params.get('dpl') is not None:
+                dpl = scale_adda_params(adda_params, meta, coarsen_config['preserve_volume'])['dpl']
+        except (ValueError, OSError) as e:
+            print(f"[ERROR] factor {factor}: {e}", file=sys.stderr)
+            sys.exit(1)
+        print_variant(meta, dpl)
+    if adda_params.get('dpl') is None:
+        print("\n[WARNING] ADDA_PARAMS has no 'dpl'; set it so coarse sweeps keep the particle size")
+    print(f"\nPreview sweep: COARSE_FACTOR={max(factors)} ./master.sh --coarse-preview "
+          f"(results in {getattr(config, 'MAT_TYPE', None) or 'custom_shape'}_coarse<factor>)")
+
+if __name__ == "__main__":
+    main()
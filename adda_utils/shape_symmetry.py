@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+ADDA Shape Symmetry Analyzer
+입자 대칭성을 검사하여 대칭 입자는 한 편광만 풀도록 ADDA 대칭 옵션 결정
+
+- read 형상 파일 (ADDA "x y z [domain]" 형식, DDSCAT "JA IX IY IZ ICOMP(x,y,z)" 형식)을 읽어
+  경계 상자 중심에 대한 x/y/z 거울 대칭과 z축 90° 회전 대칭을 domain 배치까지 포함하여 검사
+- 네 대칭이 모두 성립하면 -sym enf 전달: ADDA는 read 형상의 대칭을 스스로 검사하지 않으므로
+  지정하지 않으면 두 편광을 모두 풀지만, 지정하면 y 편광만 풀고 결과를 CrossSec 하나에 기록
+  (-sym enf는 거울 대칭도 함께 가정하므로 회전 대칭만 있는 입자에는 전달하지 않음)
+- 내장 형상은 인수로 대칭을 판단하여 보고만 함 (ADDA -sym auto가 같은 판단을 함)
+- 입사 방향/빔/배향을 바꾸는 설정(prop, beam, orient, ORIENTATION_CONFIG)이 있으면 적용하지 않음
+- 후처리(WavelengthData)는 단일 편광 CrossSec을 X/Y 양쪽에 반영 (symmetric_solve 열)
+
+사용법:
+    python shape_symmetry.py plan <config_file>            # config의 형상 대칭과 ADDA 옵션 요약
+    python shape_symmetry.py plan <config_file> --shell    # bash eval용 SYM_* 변수 출력
+    python shape_symmetry.py check <shape_file>            # 형상 파일 하나 검사 (-save_geom 결과 포함)
+"""
+import argparse
+import sys
+from pathlib import Path
+
+try:
+    from .config_loader import load_config_module
+    from .orientation_avg import get_orientation_config
+except ImportError:
+    from config_loader import load_config_module
+    from orientation_avg import get_orientation_config
+
+SYMMETRY_NAMES = ('mirror_x', 'mirror_y', 'mirror_z', 'rotation_z')
+
+DEFAULT_SYMMETRY_CONFIG = {
+    'enabled': True,             # read 형상이 완전 대칭이면 -sym enf 전달
+}
+
+# 입사 방향이나 입자 배향을 바꾸어 z축 대칭 가정이 깨지는 ADDA 옵션
+BREAKING_PARAMS = ('prop', 'beam', 'orient')
+
+def get_symmetry_config(config):
+    """config의 SYMMETRY_CONFIG를 기본값과 병합"""
+    symmetry_config = dict(DEFAULT_SYMMETRY_CONFIG)
+    symmetry_config.update(getattr(config, 'SYMMETRY_CONFIG', {}) or {})
+    return symmetry_config
+
+def iter_shape_file(shape_file):
+    """형상 파일의 (x, y, z, domain) 행 generator (DDSCAT 형식의 domain은 (ICOMPx, ICOMPy, ICOMPz))"""
+    with open(shape_file, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' in line:
+                continue
+            try:
+                values = [int(token) for token in line.split()]
+            except ValueError:
+                # DDSCAT 헤더 등 정수 행이 아닌 줄
+                continue
+            if len(values) == 3:
+                yield (values[0], values[1], values[2], 1)
+            elif len(values) == 4:
+                yield tuple(values)
+            elif len(values) == 7:
+                yield (values[1], values[2], values[3], tuple(values[4:7]))
+
+def read_shape_file(shape_file):
+    """형상 파일의 (x, y, z, domain) 목록"""
+    dipoles = list(iter_shape_file(shape_file))
+    if not dipoles:
+        raise ValueError(f"no dipoles found in shape file {shape_file}")
+    return dipoles
+
+def _swap_xy(domain):
+    """z축 90° 회전 시 이방성 domain (ICOMPx, ICOMPy, ICOMPz)의 x/y 성분 교환"""
+    return (domain[1], domain[0], domain[2]) if isinstance(domain, tuple) else domain
+
+def analyze_dipoles(dipoles):
+    """쌍극자 배치의 거울/회전 대칭 dict (경계 상자 중심 기준, 좌표는 2배로 하여 정수 연산)"""
+    occupied = set(dipoles)
+    xs = [d[0] for d in dipoles]
+    ys = [d[1] for d in dipoles]
+    zs = [d[2] for d in dipoles]
+    sum_x, sum_y, sum_z = min(xs) + max(xs), min(ys) + max(ys), min(zs) + max(zs)
+    box = [max(xs) - min(xs) + 1, max(ys) - min(ys) + 1, max(zs) - min(zs) + 1]
+
+    def holds(transform):
+        return all(transform(d) in occupied for d in dipoles)
+
+    result = {
+        'mirror_x': holds(lambda d: (sum_x - d[0], d[1], d[2], d[3])),
+        'mirror_y': holds(lambda d: (d[0], sum_y - d[1], d[2], d[3])),
+        'mirror_z': holds(lambda d: (d[0], d[1], sum_z - d[2], d[3])),
+        'rotation_z': False,
+    }
+    # 중심 (cx, cy)에 대한 회전: x' = cx + cy - y, y' = cy - cx + x (box[0] == box[1]이면 정수)
+    if box[0] == box[1]:
+        shift_x, shift_y = (sum_x + sum_y) // 2, (sum_y - sum_x) // 2
+        result['rotation_z'] = holds(lambda d: (shift_x - d[1], shift_y + d[0], d[2], _swap_xy(d[3])))
+    result['dipoles'] = len(occupied)
+    result['box'] = box
+    result['domains'] = len({d[3] for d in dipoles})
+    return result
+
+def predefined_symmetries(shape_type, args):
+    """내장 형상의 대칭 dict (판단할 수 없는 형상은 None)"""
+    args = [float(a) for a in args or []]
+    if shape_type == 'sphere':
+        return dict.fromkeys(SYMMETRY_NAMES, True)
+    if shape_type == 'coated':
+        # 추가 인수는 core 중심 위치 (x, y, z)
+        offset = args[1:4] + [0.0] * (3 - len(args[1:4]))
+        return {'mirror_x': offset[0] == 0, 'mirror_y': offset[1] == 0, 'mirror_z': offset[2] == 0,
+                'rotation_z': offset[0] == 0 and offset[1] == 0}
+    if shape_type == 'cylinder':
+        return dict.fromkeys(SYMMETRY_NAMES, True)
+    if shape_type in ('ellipsoid', 'box'):
+        result = dict.fromkeys(SYMMETRY_NAMES, True)
+        result['rotation_z'] = not args or args[0] == 1.0
+        return result
+    return None
+
+def symmetry_plan(config):
+    """config의 대칭 판단과 ADDA 옵션 dict {'status', 'sym_args', 'single_pol', 'reason', 'symmetries', ...}"""
+    symmetry_config = get_symmetry_config(config)
+    adda_params = getattr(config, 'ADDA_PARAMS', {})
+    shape_config = getattr(config, 'SHAPE_CONFIG', {'type': 'sphere', 'args': []})
+    shape_type = shape_config.get('type', 'sphere')
+    plan = {'status': 'none', 'sym_args': '', 'single_pol': False, 'reason': '', 'shape': shape_type,
+            'symmetries': None}
+
+    if not symmetry_config['enabled']:
+        plan.update(status='disabled', reason='SYMMETRY_CONFIG disabled')
+        return plan
+    if 'sym' in adda_params:
+        plan.update(status='user', reason=f"ADDA_PARAMS sets -sym {adda_params['sym']}")
+        return plan
+    breaking = [key for key in BREAKING_PARAMS if key in adda_params]
+    if breaking:
+        plan.update(status='skipped', reason=f"ADDA_PARAMS {', '.join(breaking)} changes the incidence geometry")
+        return plan
+    if get_orientation_config(config)['mode'] != 'none':
+        plan.update(status='skipped', reason='orientation averaging rotates the particle')
+        return plan
+
+    if shape_type == 'read':
+        shape_file = shape_config.get('filename')
+        if not shape_file:
+            raise ValueError("read shape requires filename")
+        analysis = analyze_dipoles(read_shape_file(Path(shape_file).expanduser()))
+        plan['symmetries'] = {name: analysis[name] for name in SYMMETRY_NAMES}
+        plan.update(dipoles=analysis['dipoles'], box=analysis['box'], domains=analysis['domains'])
+        if all(plan['symmetries'].values()):
+            plan.update(status='enforce', sym_args='-sym enf', single_pol=True,
+                        reason='mirror and 90 degree rotation symmetric')
+        elif analysis['rotation_z']:
+            plan['reason'] = 'rotation symmetric only; -sym enf would also assume mirror planes'
+        else:
+            plan['reason'] = 'no 90 degree rotation symmetry about the incidence axis'
+        return plan
+
+    symmetries = predefined_symmetries(shape_type, shape_config.get('args', []))
+    plan['symmetries'] = symmetries
+    if symmetries is None:
+        plan['reason'] = f"symmetry of shape '{shape_type}' is left to ADDA -sym auto"
+    else:
+        plan.update(status='auto', single_pol=symmetries['rotation_z'],
+                    reason='ADDA -sym auto detects the symmetry of built-in shapes')
+    return plan
+
+def format_symmetries(symmetries):
+    """대칭 dict를 'mirror_x, rotation_z' 형태로"""
+    if symmetries is None:
+        return 'unknown'
+    names = [name for name in SYMMETRY_NAMES if symmetries.get(name)]
+    return ', '.join(names) if names else 'none'
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='형상 대칭 검사 및 ADDA 대칭 옵션 결정')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    plan_parser = subparsers.add_parser('plan', help='config 형상의 대칭과 ADDA 옵션')
+    plan_parser.add_argument('config_file')
+    plan_parser.add_argument('--shell', action='store_true', help='bash eval용 SYM_* 변수 출력')
+    check_parser = subparsers.add_parser('check', help='형상 파일 하나 검사')
+    check_parser.add_argument('shape_file')
+    args = parser.parse_args()
+
+    if args.command == 'check':
+        try:
+            analysis = analyze_dipoles(read_shape_file(args.shape_file))
+        except (ValueError, OSError) as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"[SYMMETRY] {args.shape_file}: {analysis['dipoles']:,} dipoles, "
+              f"box {'x'.join(map(str, analysis['box']))}, {analysis['domains']} domain(s)")
+        for name in SYMMETRY_NAMES:
+            print(f"  {name:<11} {'yes' if analysis[name] else 'no'}")
+        full = all(analysis[name] for name in SYMMETRY_NAMES)
+        print(f"  ADDA option: {'-sym enf (single polarization)' if full else 'none (both polarizations)'}")
+        return
+
+    try:
+        plan = symmetry_plan(load_config_module(args.config_file))
+    except (ValueError, OSError) as e:
+        if args.shell:
+            print('SYM_STATUS="skipped"')
+            print('SYM_ARGS=""')
+            print(f'SYM_REASON="{e}"')
+            return
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.shell:
+        print(f'SYM_STATUS="{plan["status"]}"')
+        print(f'SYM_ARGS="{plan["sym_args"]}"')
+        print(f'SYM_FOUND="{format_symmetries(plan["symmetries"])}"')
+        print(f'SYM_REASON="{plan["reason"]}"')
+        return
+
+    print(f"[SYMMETRY] shape {plan['shape']}: {format_symmetries(plan['symmetries'])}")
+    if 'dipoles' in plan:
+        print(f"  {plan['dipoles']:,} dipoles, box {'x'.join(map(str, plan['box']))}, {plan['domains']} domain(s)")
+    print(f"  Status: {plan['status']} ({plan['reason']})")
+    print(f"  ADDA option: {plan['sym_args'] or 'none'}, "
+          f"{'single polarization' if plan['single_pol'] else 'both polarizations'} per wavelength")
+
+if __name__ == "__main__":
+    main()
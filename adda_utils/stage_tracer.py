@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+ADDA Stage Tracer
+파이프라인 단계별/파장별 실행 시간 span을 JSON lines로 기록하고 요약 리포트 출력
+
+기록 위치: <모델 디렉토리>/trace.jsonl (run_simulation.sh가 ADDA_TRACE_FILE로 전달)
+span 레코드 예:
+    {"run_id": "...", "stage": "adda_run", "wavelength": 500, "start": ..., "end": ...,
+     "duration_s": 12.3, "status": "ok", "pid": 1234, "host": "node01", "attrs": {...}}
+
+환경변수:
+    ADDA_TRACE=0          span 기록 끄기 (기본값: 켜짐)
+    ADDA_TRACE_FILE       span을 기록할 파일 경로
+    ADDA_TRACE_RUN_ID     같은 실행(master.sh 1회)에 속한 span을 묶는 ID
+    ADDA_PROFILE=1        Python 단계에 cProfile 적용 (<trace 디렉토리>/profiles/*.prof)
+
+사용법:
+    python stage_tracer.py report <model_dir | trace.jsonl> [--all-runs] [--profiles N]
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+TRACE_FILE_NAME = 'trace.jsonl'
+PROFILE_DIR_NAME = 'profiles'
+
+_adhoc_run_id = None
+_active_profiler = None
+
+def is_tracing_enabled():
+    """ADDA_TRACE 환경변수로 tracing 여부 결정 (기본값: 켜짐)"""
+    return os.environ.get('ADDA_TRACE', '1') != '0'
+
+def is_profiling_enabled():
+    """ADDA_PROFILE 환경변수로 cProfile 적용 여부 결정 (기본값: 꺼짐)"""
+    return os.environ.get('ADDA_PROFILE', '0') == '1'
+
+def get_run_id():
+    """현재 실행 ID (ADDA_TRACE_RUN_ID가 없으면 프로세스당 하나의 임시 ID)"""
+    global _adhoc_run_id
+    run_id = os.environ.get('ADDA_TRACE_RUN_ID')
+    if run_id:
+        return run_id
+    if _adhoc_run_id is None:
+        _adhoc_run_id = f"adhoc-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+    return _adhoc_run_id
+
+def resolve_trace_file(trace_file=None):
+    """명시적 경로 > ADDA_TRACE_FILE 순으로 trace 파일 결정 (없으면 None)"""
+    if trace_file is not None:
+        return Path(trace_file)
+    env_file = os.environ.get('ADDA_TRACE_FILE')
+    return Path(env_file) if env_file else None
+
+def emit_span(stage, start, end, wavelength=None, status='ok', trace_file=None, **attrs):
+    """완료된 span 하나를 trace 파일에 추가"""
+    trace_file = resolve_trace_file(trace_file)
+    if trace_file is None or not is_tracing_enabled():
+        return None
+
+    record = {
+        'run_id': get_run_id(),
+        'stage': stage,
+        'wavelength': wavelength,
+        'start': start,
+        'end': end,
+        'duration_s': end - start,
+        'status': status,
+        'pid': os.getpid(),
+        'host': socket.gethostname(),
+        'attrs': attrs,
+    }
+    try:
+        trace_file.parent.mkdir(parents=True, exist_ok=True)
+        # 한 줄 단위 append는 여러 프로세스가 동시에 기록해도 섞이지 않음
+        with open(trace_file, 'a') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+    except OSError as e:
+        print(f"# WARNING: Failed to write trace span to {trace_file}: {e}", file=sys.stderr)
+    return record
+
+@contextmanager
+def trace_span(stage, wavelength=None, trace_file=None, profile=True, **attrs):
+    """with 블록의 실행 시간을 span으로 기록 (ADDA_PROFILE=1이면 cProfile도 저장)
+
+    블록 안에서 yield된 dict에 값을 넣으면 span의 attrs에 함께 기록된다.
+    span이 중첩되면 가장 바깥 span에서만 cProfile을 적용한다.
+    """
+    global _active_profiler
+    profiler = None
+    resolved_file = resolve_trace_file(trace_file)
+    if profile and _active_profiler is None and is_profiling_enabled():
+        import cProfile
+        profiler = cProfile.Profile()
+        _active_profiler = profiler
+        profiler.enable()
+
+    span_attrs = dict(attrs)
+    status = 'ok'
+    start = time.time()
+    try:
+        yield span_attrs
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        end = time.time()
+        if profiler is not None:
+            profiler.disable()
+            _active_profiler = None
+            _dump_profile(profiler, stage, wavelength, resolved_file)
+        emit_span(stage, start, end, wavelength, status, resolved_file, **span_attrs)
+
+def _dump_profile(profiler, stage, wavelength, trace_file):
+    """cProfile 결과를 trace 파일 옆 profiles/ 디렉토리에 저장"""
+    base_dir = trace_file.parent if trace_file is not None else Path.cwd()
+    profile_dir = base_dir / PROFILE_DIR_NAME
+    suffix = f"_{wavelength}nm" if wavelength is not None else ""
+    try:
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(profile_dir / f"{stage}{suffix}_{os.getpid()}.prof")
+    except OSError as e:
+        print(f"# WARNING: Failed to write profile for {stage}: {e}", file=sys.stderr)
+
+def load_spans(trace_path):
+    """trace 파일(또는 trace.jsonl을 담은 모델 디렉토리)에서 span 목록 로드"""
+    trace_path = Path(trace_path)
+    if trace_path.is_dir():
+        trace_path = trace_path / TRACE_FILE_NAME
+    spans = []
+    with open(trace_path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+def _percentile(sorted_values, fraction):
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def summarize_spans(spans):
+    """stage별 통계 (count, total, mean, p50, p95, max, error 수) 계산"""
+    by_stage = {}
+    for span in spans:
+        by_stage.setdefault(span['stage'], []).append(span)
+
+    summary = {}
+    for stage, items in by_stage.items():
+        durations = sorted(item['duration_s'] for item in items)
+        summary[stage] = {
+            'count': len(items),
+            'total_s': sum(durations),
+            'mean_s': sum(durations) / len(durations),
+            'p50_s': _percentile(durations, 0.5),
+            'p95_s': _percentile(durations, 0.95),
+            'max_s': durations[-1],
+            'errors': sum(1 for item in items if item.get('status') != 'ok'),
+        }
+    return summary
+
+def print_report(spans, top=5):
+    """stage별 요약과 가장 느린 파장 목록 출력"""
+    if not spans:
+        print("No spans found")
+        return
+
+    run_ids = sorted({span.get('run_id') for span in spans})
+    wall_start = min(span['start'] for span in spans)
+    wall_end = max(span['end'] for span in spans)
+    wall = max(wall_end - wall_start, 1e-9)
+
+    print(f"\n{'='*78}")
+    print(f"STAGE TIMING REPORT ({len(spans)} spans, {len(run_ids)} run(s))")
+    print(f"{'='*78}")
+    print(f"Wall clock covered: {wall:.1f}s")
+    print(f"\n{'Stage':<20}{'Count':>7}{'Total(s)':>12}{'Mean(s)':>10}{'P95(s)':>10}"
+          f"{'Max(s)':>10}{'Wall%':>7}{'Err':>5}")
+    summary = summarize_spans(spans)
+    for stage, stats in sorted(summary.items(), key=lambda item: -item[1]['total_s']):
+        print(f"{stage:<20}{stats['count']:>7}{stats['total_s']:>12.2f}{stats['mean_s']:>10.3f}"
+              f"{stats['p95_s']:>10.3f}{stats['max_s']:>10.3f}"
+              f"{stats['total_s'] / wall * 100:>6.1f}%{stats['errors']:>5}")
+
+    per_lambda = [span for span in spans if span.get('wavelength') is not None]
+    if per_lambda:
+        print("\nSlowest wavelength spans:")
+        for span in sorted(per_lambda, key=lambda s: -s['duration_s'])[:top]:
+            print(f"  {span['stage']:<18} lambda={span['wavelength']}nm  {span['duration_s']:.2f}s  "
+                  f"({span.get('status')})")
+    print(f"{'='*78}")
+
+def print_profiles(profile_dir, top=15):
+    """profiles/*.prof를 합쳐 누적 시간 상위 함수 출력"""
+    import pstats
+    files = sorted(Path(profile_dir).glob("*.prof"))
+    if not files:
+        print(f"No profiles found in {profile_dir}")
+        return
+    stats = pstats.Stats(str(files[0]))
+    for extra in files[1:]:
+        stats.add(str(extra))
+    print(f"\n[PROFILE] {len(files)} profile(s) from {profile_dir}")
+    stats.sort_stats('cumulative').print_stats(top)
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='ADDA 단계별 실행 시간 trace 리포트')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    report_parser = subparsers.add_parser('report', help='trace.jsonl 요약 출력')
+    report_parser.add_argument('trace_path', help='모델 디렉토리 또는 trace.jsonl 경로')
+    report_parser.add_argument('--all-runs', action='store_true',
+                               help='모든 실행을 합쳐서 요약 (기본값: 가장 최근 실행만)')
+    report_parser.add_argument('--run-id', type=str, help='특정 실행 ID만 요약')
+    report_parser.add_argument('--top', type=int, default=5, help='느린 파장 표시 개수')
+    report_parser.add_argument('--profiles', type=int, metavar='N',
+                               help='profiles/*.prof 상위 N개 함수도 출력')
+    args = parser.parse_args()
+
+    trace_path = Path(args.trace_path)
+    try:
+        spans = load_spans(trace_path)
+    except FileNotFoundError:
+        print(f"[ERROR] Trace file not found: {trace_path}")
+        sys.exit(1)
+
+    if args.run_id:
+        spans = [span for span in spans if span.get('run_id') == args.run_id]
+    elif not args.all_runs and spans:
+        latest = max(spans, key=lambda span: span['end']).get('run_id')
+        spans = [span for span in spans if span.get('run_id') == latest]
+
+    print_report(spans, args.top)
+    if args.profiles:
+        base_dir = trace_path if trace_path.is_dir() else trace_path.parent
+        print_profiles(base_dir / PROFILE_DIR_NAME, args.profiles)
+
+if __name__ == "__main__":
+    main()
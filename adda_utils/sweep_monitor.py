@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+ADDA Sweep Monitor
+실행 중인 파장별 adda_mpi 작업의 residual 이력 추적, 스윕 ETA 계산 및 정체(stagnation) 감시
+
+run_simulation.sh는 각 작업의 PID와 stdout을 <모델 디렉토리>/.run/ 아래에 기록하고,
+ADDA는 <lambda 디렉토리>/log 에 residual (RE_xxx) 이력을 남긴다.
+이 스크립트는 두 파일을 tail 하면서 진행률을 보여주고,
+residual이 더 이상 감소하지 않거나 예산을 넘긴 작업을 중단시킨 뒤
+실행 기록(run_ledger.sqlite)의 해당 시도에 사유를 남긴다.
+"""
+import argparse
+import math
+import os
+import re
+import signal
+import sys
+import time
+from pathlib import Path
+
+try:
+    from .config_loader import load_config_module, resolve_model_dir, sweep_wavelengths
+    from .run_ledger import RunLedger
+except ImportError:
+    from config_loader import load_config_module, resolve_model_dir, sweep_wavelengths
+    from run_ledger import RunLedger
+
+RUN_STATE_DIR = '.run'
+
+RESIDUAL_PATTERN = re.compile(r'RE_(\d+)\s*=\s*([-+0-9.eE]+)')
+WALL_TIME_PATTERN = re.compile(r'Total wall time:\s*([0-9.]+)')
+LAMBDA_DIR_PATTERN = re.compile(r'^lambda_(\d+)nm$')
+
+DEFAULT_MONITOR_CONFIG = {
+    'interval': 30,              # 갱신 주기 (초)
+    'stagnation_window': 500,    # residual 최솟값이 갱신되지 않아도 허용하는 반복 수
+    'min_improvement': 0.01,     # 최솟값 "갱신"으로 인정하는 최소 상대 감소율
+    'max_iterations': None,      # 작업당 반복 수 상한 (None이면 제한 없음)
+    'max_wall_time': None,       # 작업당 실행 시간 상한, 초 (None이면 제한 없음)
+    'abort': True,               # False면 중단하지 않고 경고만 출력
+    'auto_start': False,         # run_simulation.sh 실행 시 백그라운드로 자동 시작
+}
+
+def get_monitor_config(config, overrides=None):
+    """config의 MONITOR_CONFIG를 기본값과 병합"""
+    monitor_config = dict(DEFAULT_MONITOR_CONFIG)
+    monitor_config.update(getattr(config, 'MONITOR_CONFIG', {}) or {})
+    for key, value in (overrides or {}).items():
+        if value is not None:
+            monitor_config[key] = value
+    return monitor_config
+
+def parse_wall_time(log_path):
+    """완료된 ADDA log에서 총 wall time(초) 추출"""
+    try:
+        with open(log_path, 'r', errors='replace') as f:
+            match = WALL_TIME_PATTERN.search(f.read())
+        return float(match.group(1)) if match else None
+    except OSError:
+        return None
+
+def collect_descendants(pid):
+    """/proc을 스캔하여 pid와 모든 자손 프로세스 pid 목록 반환"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                stat = f.read()
+            # comm 필드에 공백이 있을 수 있으므로 마지막 ')' 이후를 파싱
+            ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    result = []
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        result.append(current)
+        stack.extend(children.get(current, []))
+    return result
+
+def is_stagnating(history, window, min_improvement):
+    """최근 window 반복 동안 residual 최솟값이 min_improvement 이상 갱신되지 않았는지 확인"""
+    if not history or window is None:
+        return False
+    iterations = sorted(history)
+    best = None
+    best_iter = iterations[0]
+    for it in iterations:
+        residual = history[it]
+        if best is None or residual < best * (1.0 - min_improvement):
+            best = residual
+            best_iter = it
+    return iterations[-1] - best_iter >= window
+
+class LogTail:
+    """파일을 마지막으로 읽은 위치부터 이어서 읽는 tail 헬퍼"""
+
+    def __init__(self, file_path: Path):
+        self.file_path = Path(file_path)
+        self.offset = 0
+        self._partial = ''
+
+    def read_new_lines(self):
+        """새로 추가된 완전한 줄들만 반환"""
+        try:
+            with open(self.file_path, 'r', errors='replace') as f:
+                f.seek(self.offset)
+                chunk = f.read()
+                self.offset = f.tell()
+        except OSError:
+            return []
+
+        data = self._partial + chunk
+        lines = data.split('\n')
+        self._partial = lines.pop()
+        return lines
+
+class JobState:
+    """실행 중인 파장 작업 하나의 상태"""
+
+    def __init__(self, wavelength: int, model_dir: Path, pid: int, started: float):
+        self.wavelength = wavelength
+        self.pid = pid
+        self.started = started
+        self.lambda_dir = Path(model_dir) / f"lambda_{wavelength}nm"
+        run_dir = Path(model_dir) / RUN_STATE_DIR
+        self.tails = [
+            LogTail(self.lambda_dir / "log"),
+            LogTail(run_dir / f"lambda_{wavelength}nm.out"),
+        ]
+        self.history = {}
+        self.aborted_reason = None
+
+    def update(self):
+        """log 및 stdout에서 새 residual 값 수집 (반복 번호 기준으로 병합)"""
+        for tail in self.tails:
+            for line in tail.read_new_lines():
+                match = RESIDUAL_PATTERN.search(line)
+                if match:
+                    try:
+                        self.history[int(match.group(1))] = float(match.group(2))
+                    except ValueError:
+                        continue
+
+    @property
+    def iterations(self):
+        return max(self.history) if self.history else 0
+
+    @property
+    def residual(self):
+        return self.history[self.iterations] if self.history else None
+
+    @property
+    def elapsed(self):
+        return time.time() - self.started
+
+    def progress(self, eps_exponent):
+        """log 스케일 residual 감소량 기준 진행률 (0~1)"""
+        if not self.history or 0 not in self.history:
+            return 0.0
+        r0 = self.history[0]
+        current = min(self.history.values())
+        target = 10.0 ** (-eps_exponent)
+        if r0 <= 0 or current <= 0 or r0 <= target:
+            return 0.0
+        fraction = math.log(r0 / current) / math.log(r0 / target)
+        return max(0.0, min(fraction, 1.0))
+
+class SweepMonitor:
+    """모델 디렉토리 하나의 파장 스윕 감시"""
+
+    def __init__(self, config, model_dir: Path, monitor_config: dict):
+        self.config = config
+        self.model_dir = Path(model_dir)
+        self.run_dir = self.model_dir / RUN_STATE_DIR
+        self.monitor_config = monitor_config
+
+        self.wavelengths = sweep_wavelengths(config)
+        self.eps_exponent = float(getattr(config, 'ADDA_PARAMS', {}).get('eps', 5))
+
+        self.jobs = {}
+        self.cost_history = {}
+
+    def _scan_active_jobs(self):
+        """.run/*.pid 파일에서 실행 중인 작업 목록 갱신"""
+        active = {}
+        if self.run_dir.exists():
+            for pid_file in self.run_dir.glob("lambda_*nm.pid"):
+                match = LAMBDA_DIR_PATTERN.match(pid_file.stem)
+                if not match:
+                    continue
+                wavelength = int(match.group(1))
+                try:
+                    pid = int(pid_file.read_text().strip())
+                    started = pid_file.stat().st_mtime
+                except (OSError, ValueError):
+                    continue
+                if not Path(f'/proc/{pid}').exists():
+                    continue
+
+                job = self.jobs.get(wavelength)
+                if job is None or job.pid != pid:
+                    job = JobState(wavelength, self.model_dir, pid, started)
+                active[wavelength] = job
+        self.jobs = active
+
+    def _scan_cost_history(self):
+        """완료된 파장 log에서 wall time 이력 수집"""
+        for wavelength in self.wavelengths:
+            if wavelength in self.cost_history or wavelength in self.jobs:
+                continue
+            lambda_dir = self.model_dir / f"lambda_{wavelength}nm"
+            if any((lambda_dir / name).exists() for name in ("CrossSec-X", "CrossSec-Y", "CrossSec")):
+                wall_time = parse_wall_time(lambda_dir / "log")
+                if wall_time is not None:
+                    self.cost_history[wavelength] = wall_time
+
+    def check_job(self, job: JobState):
+        """정체/예산 초과 여부 판단, 중단 사유 문자열 또는 None 반환"""
+        cfg = self.monitor_config
+        if cfg.get('max_wall_time') and job.elapsed > cfg['max_wall_time']:
+            return f"wall time budget exceeded ({job.elapsed:.0f}s > {cfg['max_wall_time']}s)"
+        if cfg.get('max_iterations') and job.iterations > cfg['max_iterations']:
+            return f"iteration budget exceeded ({job.iterations} > {cfg['max_iterations']})"
+        if is_stagnating(job.history, cfg.get('stagnation_window'), cfg.get('min_improvement', 0.0)):
+            return (f"residual stagnated for {cfg['stagnation_window']} iterations "
+                    f"(RE={job.residual:.3e} at iteration {job.iterations})")
+        return None
+
+    def abort_job(self, job: JobState, reason: str):
+        """중단 사유 기록 후 작업 프로세스 트리 종료"""
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        # retry_policy.py가 정체 중단으로 분류하도록 marker를 먼저 남기고, 사유는 실행 중인 시도에 기록
+        marker = self.run_dir / f"lambda_{job.wavelength}nm.aborted"
+        marker.write_text(reason + '\n')
+        with RunLedger(self.model_dir) as ledger:
+            ledger.annotate_running(job.wavelength, f"monitor: {reason}")
+
+        pids = collect_descendants(job.pid)
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            for pid in reversed(pids):
+                try:
+                    os.kill(pid, sig)
+                except ProcessLookupError:
+                    continue
+                except PermissionError:
+                    print(f"[WARNING] No permission to signal pid {pid}", file=sys.stderr)
+            if sig == signal.SIGTERM:
+                time.sleep(5)
+        job.aborted_reason = reason
+        print(f"[ABORT] lambda={job.wavelength}nm: {reason}")
+
+    def estimate_eta(self, pending_count):
+        """완료 작업 평균 비용과 실행 중 작업 진행률로 스윕 잔여 시간(초) 추정"""
+        if not self.cost_history:
+            return None
+        mean_cost = sum(self.cost_history.values()) / len(self.cost_history)
+        remaining = pending_count * mean_cost
+        for job in self.jobs.values():
+            if job.aborted_reason:
+                continue
+            fraction = job.progress(self.eps_exponent)
+            if fraction > 0.05:
+                remaining += max(job.elapsed / fraction - job.elapsed, 0.0)
+            else:
+                remaining += max(mean_cost - job.elapsed, 0.0)
+        return remaining
+
+    def poll(self):
+        """한 번 스캔하여 상태 갱신 및 필요 시 작업 중단"""
+        self._scan_active_jobs()
+        self._scan_cost_history()
+
+        for job in self.jobs.values():
+            job.update()
+            reason = self.check_job(job)
+            if reason and job.aborted_reason is None:
+                if self.monitor_config.get('abort', True):
+                    self.abort_job(job, reason)
+                else:
+                    print(f"[WARNING] lambda={job.wavelength}nm: {reason}")
+
+    def report(self):
+        """진행 상황 출력"""
+        with RunLedger(self.model_dir) as ledger:
+            completed = ledger.wavelengths('completed')
+            failed = ledger.wavelengths('failed')
+        done = completed | failed
+        pending = [w for w in self.wavelengths if w not in done and w not in self.jobs]
+        running = [w for w, job in self.jobs.items() if not job.aborted_reason]
+
+        print(f"\n[MONITOR] {time.strftime('%Y-%m-%d %H:%M:%S')}  {self.model_dir}")
+        print(f"  Completed: {len(completed)}  Failed: {len(failed)}  "
+              f"Running: {len(running)}  Pending: {len(pending)}  Total: {len(self.wavelengths)}")
+
+        for wavelength in sorted(self.jobs):
+            job = self.jobs[wavelength]
+            residual = f"{job.residual:.3e}" if job.residual is not None else "-"
+            status = "ABORTED" if job.aborted_reason else "running"
+            print(f"  [JOB] lambda={wavelength}nm pid={job.pid} iter={job.iterations} "
+                  f"RE={residual} progress={job.progress(self.eps_exponent) * 100:.0f}% "
+                  f"elapsed={job.elapsed:.0f}s {status}")
+
+        eta = self.estimate_eta(len(pending))
+        if eta is not None:
+            hours, rest = divmod(int(eta), 3600)
+            print(f"  [ETA] {hours:02d}:{rest // 60:02d}:{rest % 60:02d} "
+                  f"(mean cost {sum(self.cost_history.values()) / len(self.cost_history):.1f}s "
+                  f"over {len(self.cost_history)} wavelengths)")
+        else:
+            print("  [ETA] unknown (no completed wavelength with timing yet)")
+        sys.stdout.flush()
+
+        return not pending and not running
+
+    def run(self, once=False):
+        """주기적으로 poll/report 반복 (모든 파장이 끝나면 종료)"""
+        while True:
+            self.poll()
+            finished = self.report()
+            if once or finished:
+                return
+            time.sleep(self.monitor_config['interval'])
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='ADDA 스윕 진행 모니터 및 정체 감시')
+    parser.add_argument('config_file', help='Config 파일 경로')
+    parser.add_argument('--model-dir', type=str,
+                        help='감시할 모델 디렉토리 (기본값: config의 RESEARCH_BASE_DIR/MAT_TYPE)')
+    parser.add_argument('--interval', type=float, help='갱신 주기 (초)')
+    parser.add_argument('--window', type=int, dest='stagnation_window',
+                        help='정체로 판단하는 반복 수')
+    parser.add_argument('--max-iterations', type=int, help='작업당 반복 수 상한')
+    parser.add_argument('--max-wall-time', type=float, help='작업당 실행 시간 상한 (초)')
+    parser.add_argument('--no-abort', action='store_true', help='중단하지 않고 경고만 출력')
+    parser.add_argument('--once', action='store_true', help='한 번만 상태 출력 후 종료')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.config_file):
+        print(f"[ERROR] Config file not found: {args.config_file}")
+        sys.exit(1)
+
+    config = load_config_module(args.config_file)
+    overrides = {
+        'interval': args.interval,
+        'stagnation_window': args.stagnation_window,
+        'max_iterations': args.max_iterations,
+        'max_wall_time': args.max_wall_time,
+        'abort': False if args.no_abort else None,
+    }
+    monitor_config = get_monitor_config(config, overrides)
+    model_dir = Path(args.model_dir) if args.model_dir else resolve_model_dir(config)
+
+    monitor = SweepMonitor(config, model_dir, monitor_config)
+    try:
+        monitor.run(once=args.once)
+    except KeyboardInterrupt:
+        print("\n[MONITOR] Stopped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+ADDA Sweep Planner (dry run)
+config가 실제로 실행할 작업 목록을 아무것도 실행하지 않고 펼쳐서 보여줌
+
+- 파장별 작업 상태: completed (실행 기록), cached (CrossSec이 이미 있어 건너뜀), partial (split 배향 일부 완료),
+  retry (이전 실패, 다음 재시도 단계), exhausted (재시도 단계 소진으로 건너뜀), uncovered (m(λ) 없음), pending,
+  mie (MIE_CONFIG['fast_path']로 ADDA 대신 정확한 해를 기록, 비용 없음)
+- 굴절률 세트는 한 ADDA 실행의 -m에 함께 들어가므로 작업은 (모델, λ[, 배향]) 단위이며 세트별 m 값을 함께 표시
+- REFRACTIVE_INDEX_FILES 각 파일의 파장 범위로 m(λ) coverage를 스윕 전에 검사 (보간은 범위 안에서만 가능)
+- DISPERSION_CONFIG가 켜져 있으면 fitting 모델(외삽 허용 범위 포함)로 m(λ)를 구함
+- core-hour 예측: 이 모델의 실행 기록(run_ledger.sqlite) → 이 모델의 ADDA log → 같은 RESEARCH_BASE_DIR의
+  다른 모델 log (쌍극자 수 비율로 환산) 순으로 이력을 사용, 파장 사이는 선형 보간
+- 최대 메모리: memory_planner.py의 rank/노드 메모리 예측
+
+사용법:
+    python sweep_plan.py <config_file> [--json plan.json] [--csv jobs.csv]
+"""
+import argparse
+import bisect
+import csv
+import json
+import re
+import statistics
+import sys
+from pathlib import Path
+
+try:
+    from .config_loader import load_config_module, resolve_model_dir, resolve_mat_type, sweep_wavelengths
+    from .refrac_interpolator import read_data_points, linear_interpolate
+    from .orientation_avg import orientation_shell_values
+    from .retry_policy import get_retry_config, load_attempts, next_attempt, has_crosssec
+    from .run_ledger import read_wavelength_states, read_completed_costs
+    from .memory_planner import MemoryPlanner
+    from .dispersion_fit import fitted_nk
+    from .mie_solver import get_mie_config, mie_geometry, np as mie_numpy
+except ImportError:
+    from config_loader import load_config_module, resolve_model_dir, resolve_mat_type, sweep_wavelengths
+    from refrac_interpolator import read_data_points, linear_interpolate
+    from orientation_avg import orientation_shell_values
+    from retry_policy import get_retry_config, load_attempts, next_attempt, has_crosssec
+    from run_ledger import read_wavelength_states, read_completed_costs
+    from memory_planner import MemoryPlanner
+    from dispersion_fit import fitted_nk
+    from mie_solver import get_mie_config, mie_geometry, np as mie_numpy
+
+WALL_TIME_PATTERN = re.compile(r'Total wall time:\s*([0-9.]+)')
+PROCESSES_PATTERN = re.compile(r'\((\d+) process(?:es|ors)')
+DIPOLES_PATTERN = re.compile(r'occupied dipoles:\s*(\d+)')
+RUN_STATES = ('pending', 'retry', 'partial')
+
+def interpolate_points(points, wavelength):
+    """정렬된 (파장, 값) 목록에서 refrac_interpolator와 같은 규칙으로 값 계산 (범위 밖이면 None)"""
+    if not points or wavelength < points[0][0] or wavelength > points[-1][0]:
+        return None
+    index = bisect.bisect_left(points, (wavelength, float('-inf')))
+    x2, y2 = points[index]
+    if abs(x2 - wavelength) < 1e-6 or index == 0:
+        return y2
+    x1, y1 = points[index - 1]
+    return linear_interpolate(wavelength, x1, y1, x2, y2)
+
+def format_ranges(values, step):
+    """정수 목록을 '500-550, 700' 형태로 압축"""
+    ranges = []
+    for value in sorted(values):
+        if ranges and value - ranges[-1][1] == step:
+            ranges[-1][1] = value
+        else:
+            ranges.append([value, value])
+    return ', '.join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+def parse_log_cost(log_path):
+    """ADDA log에서 (wall time 초, 프로세스 수, 쌍극자 수) 추출, 없는 항목은 None"""
+    try:
+        text = Path(log_path).read_text(errors='replace')
+    except OSError:
+        return None, None, None
+    values = []
+    for pattern, cast in ((WALL_TIME_PATTERN, float), (PROCESSES_PATTERN, int), (DIPOLES_PATTERN, int)):
+        match = pattern.search(text)
+        values.append(cast(match.group(1)) if match else None)
+    return tuple(values)
+
+class SweepPlan:
+    """config 하나의 작업 목록, m(λ) coverage, 비용 예측"""
+
+    def __init__(self, config_file):
+        self.config_file = str(Path(config_file).resolve())
+        self.config = load_config_module(self.config_file)
+        self.model_dir = resolve_model_dir(self.config)
+        self.mat_type = resolve_mat_type(self.config)
+        self.mpi_procs = int(getattr(self.config, 'MPI_PROCS', 40))
+        self.step = getattr(self.config, 'LAMBDA_STEP', 10)
+        self.wavelengths = sweep_wavelengths(self.config)
+        self.orientation = orientation_shell_values(self.config, self.mpi_procs)
+        self._memory_planner = None
+
+    def memory_planner(self):
+        """MemoryPlanner (계산 격자를 한 번만 구함)"""
+        if self._memory_planner is None:
+            self._memory_planner = MemoryPlanner(self.config_file)
+        return self._memory_planner
+
+    def coverage(self):
+        """굴절률 세트의 파일별 범위와 범위 밖 파장, 파일별 데이터 점 dict 반환"""
+        adda_params = getattr(self.config, 'ADDA_PARAMS', {})
+        refrac_sets = adda_params.get('refractive_index_sets', [['n_100', 'k_100']])
+        refrac_files = getattr(self.config, 'REFRACTIVE_INDEX_FILES', {})
+        entries, points, fit_covered = [], {}, {}
+        # DISPERSION_CONFIG fitting으로 구할 수 있는 파장은 범위 밖이어도 missing이 아님
+        for item in refrac_sets:
+            if isinstance(item, (list, tuple)) and len(item) == 2 and all(isinstance(key, str) for key in item):
+                covered = {w for w in self.wavelengths if fitted_nk(self.config, item[0], item[1], w) is not None}
+                for key in item:
+                    fit_covered[key] = fit_covered.get(key, set()) | covered
+        for item in refrac_sets:
+            for key in (item if isinstance(item, (list, tuple)) else [item]):
+                if not isinstance(key, str) or key in points:
+                    continue
+                entry = {'key': key, 'file': str(refrac_files.get(key)) if key in refrac_files else None,
+                         'range': None, 'points': 0, 'missing': [], 'error': None}
+                points[key] = []
+                if key not in refrac_files:
+                    entry['error'] = 'not defined in REFRACTIVE_INDEX_FILES'
+                else:
+                    try:
+                        points[key] = read_data_points(refrac_files[key])
+                    except OSError as e:
+                        entry['error'] = f"cannot read file ({e.strerror})"
+                if points[key]:
+                    entry['range'] = [points[key][0][0], points[key][-1][0]]
+                    entry['points'] = len(points[key])
+                elif entry['error'] is None:
+                    entry['error'] = 'no data points'
+                entry['missing'] = [w for w in self.wavelengths if w not in fit_covered.get(key, ())
+                                    and interpolate_points(points[key], w) is None]
+                entries.append(entry)
+        return entries, points
+
+    def m_values(self, points, wavelength):
+        """세트별 (n, k) 목록 (하나라도 구할 수 없으면 None)"""
+        adda_params = getattr(self.config, 'ADDA_PARAMS', {})
+        values = []
+        for item in adda_params.get('refractive_index_sets', [['n_100', 'k_100']]):
+            if not isinstance(item, (list, tuple)) or len(item) != 2:
+                return None
+            if all(isinstance(value, str) for value in item):
+                fitted = fitted_nk(self.config, item[0], item[1], wavelength)
+                if fitted is not None:
+                    values.append(list(fitted))
+                    continue
+            pair = []
+            for value in item:
+                if isinstance(value, (int, float)):
+                    pair.append(float(value))
+                elif isinstance(value, str):
+                    pair.append(interpolate_points(points.get(value, []), wavelength))
+                else:
+                    return None
+            if None in pair:
+                return None
+            values.append(pair)
+        return values
+
+    def split_progress(self, lambda_dir):
+        """split 모드에서 끝난 배향 수"""
+        if not lambda_dir.is_dir():
+            return 0
+        return sum(1 for item in lambda_dir.glob('orient_*') if item.is_dir() and has_crosssec(item))
+
+    def mie_domains(self):
+        """Mie 빠른 경로가 적용되면 필요한 굴절률 세트 수, 아니면 None"""
+        if not get_mie_config(self.config)['fast_path'] or mie_numpy is None:
+            return None
+        try:
+            return mie_geometry(self.config)['domains']
+        except ValueError:
+            return None
+
+    def jobs(self, points):
+        """파장별 작업 dict 목록"""
+        mie_domains = self.mie_domains()
+        states = read_wavelength_states(self.model_dir)
+        retry_config = get_retry_config(self.config)
+        attempts = {}
+        for record in load_attempts(self.model_dir):
+            attempts.setdefault(record.get('wavelength'), []).append(record)
+        split = self.orientation['ORIENT_MODE'] == 'split'
+        count = self.orientation['ORIENT_COUNT']
+
+        jobs = []
+        for wavelength in self.wavelengths:
+            lambda_dir = self.model_dir / f"lambda_{wavelength}nm"
+            m_values = self.m_values(points, wavelength)
+            job = {'wavelength': wavelength, 'm': m_values, 'orientations': count, 'done_orientations': 0,
+                   'status': 'pending', 'note': ''}
+            step, label = next_attempt(retry_config, attempts.get(wavelength, []))
+            if states.get(wavelength) == 'completed':
+                job['status'] = 'completed'
+            elif has_crosssec(lambda_dir):
+                job['status'] = 'cached'
+            elif m_values is None:
+                job['status'] = 'uncovered'
+            elif step is None:
+                job['status'], job['note'] = 'exhausted', label
+            else:
+                if label != 'initial':
+                    job['status'], job['note'] = 'retry', label
+                if split:
+                    done = self.split_progress(lambda_dir)
+                    job['done_orientations'] = done
+                    if done and job['status'] == 'pending':
+                        job['status'], job['note'] = 'partial', f"{done}/{count} orientations done"
+            if mie_domains is not None and job['status'] in ('pending', 'retry', 'partial', 'exhausted') \
+                    and len(m_values) >= mie_domains:
+                job['status'], job['note'] = 'mie', 'exact Mie solution'
+            jobs.append(job)
+        return jobs
+
+    def cost_history(self):
+        """(파장별 core-초 표본 dict, 근거 설명) 또는 ({}, 사유)"""
+        samples = {}
+        for wavelength, wall, nprocs in read_completed_costs(self.model_dir):
+            samples.setdefault(wavelength, []).append(wall * nprocs)
+        if samples:
+            return {w: statistics.median(v) for w, v in samples.items()}, \
+                f"{sum(len(v) for v in samples.values())} completed run(s) in the run ledger"
+
+        for lambda_dir in self.model_dir.glob('lambda_*nm'):
+            wall, nprocs, _ = parse_log_cost(lambda_dir / 'log')
+            if wall is not None:
+                samples[int(lambda_dir.name[len('lambda_'):-len('nm')])] = wall * (nprocs or self.mpi_procs)
+        if samples:
+            return samples, f"{len(samples)} ADDA log(s) of this model"
+
+        # 다른 모델의 log: 쌍극자 하나당 core-초를 이 모델의 쌍극자 수로 환산
+        try:
+            dipoles = self.memory_planner().grid[3]
+        except (ValueError, OSError):
+            return {}, 'no history for this model and its dipole count is unknown'
+        rates = []
+        for log_path in self.model_dir.parent.glob('*/lambda_*nm/log'):
+            wall, nprocs, log_dipoles = parse_log_cost(log_path)
+            if wall is not None and log_dipoles:
+                rates.append(wall * (nprocs or 1) / log_dipoles)
+        if not rates:
+            return {}, 'no completed runs with timing in this model or its research directory'
+        cost = statistics.median(rates) * dipoles
+        return {w: cost for w in self.wavelengths}, \
+            f"{len(rates)} log(s) of other models, scaled to {dipoles:,} dipoles"
+
+    def estimate(self, jobs):
+        """실행할 작업의 core-hour와 순차 wall time 예측"""
+        samples, basis = self.cost_history()
+        if not samples:
+            return {'basis': basis, 'core_hours': None, 'wall_hours': None}
+        known = sorted(samples.items())
+        xs = [w for w, _ in known]
+        total = 0.0
+        for job in jobs:
+            if job['status'] not in RUN_STATES:
+                continue
+            index = bisect.bisect_left(xs, job['wavelength'])
+            if index < len(xs) and xs[index] == job['wavelength']:
+                cost = known[index][1]
+            elif index == 0:
+                cost = known[0][1]
+            elif index == len(xs):
+                cost = known[-1][1]
+            else:
+                cost = linear_interpolate(job['wavelength'], *known[index - 1], *known[index])
+            remaining = 1.0 - job['done_orientations'] / job['orientations'] if job['orientations'] else 1.0
+            job['core_seconds'] = cost * remaining
+            total += job['core_seconds']
+        return {'basis': basis, 'core_hours': total / 3600.0, 'wall_hours': total / self.mpi_procs / 3600.0}
+
+    def memory(self):
+        """memory_planner.py 예측 요약"""
+        try:
+            planner = self.memory_planner()
+            result = planner.plan()
+        except (ValueError, OSError) as e:
+            return {'status': 'unknown', 'reason': str(e)}
+        nx, ny, nz, dipoles = planner.grid
+        return {'status': result['status'], 'reason': result['reason'], 'grid': [nx, ny, nz], 'dipoles': dipoles,
+                'procs': result['procs'], 'jobs': result['jobs'], 'opt_mem': result['opt_mem'],
+                'rank_mb': result['per_rank_mb'], 'root_mb': result['root_mb'], 'node_mb': result['node_mb']}
+
+    def build(self):
+        """전체 계획 dict"""
+        coverage, points = self.coverage()
+        jobs = self.jobs(points)
+        counts = {}
+        for job in jobs:
+            counts[job['status']] = counts.get(job['status'], 0) + 1
+        return {
+            'config_file': self.config_file,
+            'model_dir': str(self.model_dir),
+            'mat_type': self.mat_type,
+            'mpi_procs': self.mpi_procs,
+            'orientation': {'mode': self.orientation['ORIENT_MODE'], 'count': self.orientation['ORIENT_COUNT'],
+                            'jobs': self.orientation['ORIENT_JOBS'], 'procs': self.orientation['ORIENT_PROCS']},
+            'coverage': coverage,
+            'counts': counts,
+            'estimate': self.estimate(jobs),
+            'memory': self.memory(),
+            'jobs': jobs,
+        }
+
+def print_plan(plan, step):
+    """계획 요약 출력"""
+    print(f"[MODEL] {plan['mat_type']} -> {plan['model_dir']}")
+    orientation = plan['orientation']
+    if orientation['mode'] == 'split':
+        print(f"[ORIENT] split: {orientation['count']} orientations per wavelength, "
+              f"{orientation['jobs']} x {orientation['procs']} ranks")
+    elif orientation['mode'] == 'adda':
+        print("[ORIENT] ADDA -orient avg")
+
+    print("\n[COVERAGE] Refractive index files:")
+    uncovered = False
+    for entry in plan['coverage']:
+        source = f"{entry['range'][0]:g}-{entry['range'][1]:g} nm ({entry['points']} points)" if entry['range'] \
+            else entry['error']
+        print(f"  {entry['key']:<16} {source}")
+        if entry['missing']:
+            uncovered = True
+            print(f"  {'':<16} [MISSING] {format_ranges(entry['missing'], step)} nm")
+    if not uncovered:
+        print("  All wavelengths covered")
+
+    print(f"\n[JOBS] {len(plan['jobs'])} wavelength(s):")
+    for status in ('completed', 'cached', 'mie', 'partial', 'retry', 'pending', 'exhausted', 'uncovered'):
+        wavelengths = [job['wavelength'] for job in plan['jobs'] if job['status'] == status]
+        if wavelengths:
+            print(f"  {status:<10} {len(wavelengths):>5}  {format_ranges(wavelengths, step)}")
+    for job in plan['jobs']:
+        if job['note'] and job['status'] in ('retry', 'exhausted'):
+            print(f"    {job['wavelength']} nm: {job['note']}")
+
+    estimate = plan['estimate']
+    print("\n[ESTIMATE]")
+    if estimate['core_hours'] is None:
+        print(f"  Cost unknown: {estimate['basis']}")
+    else:
+        print(f"  {estimate['core_hours']:.3g} core-hours, ~{estimate['wall_hours']:.3g} h on {plan['mpi_procs']} "
+              f"ranks (from {estimate['basis']})")
+    memory = plan['memory']
+    if 'node_mb' in memory:
+        print(f"  Peak memory: {memory['rank_mb']:.0f} MB/rank, {memory['root_mb']:.0f} MB root, "
+              f"{memory['node_mb']:.0f} MB/node ({memory['status']}: {memory['reason']})")
+    else:
+        print(f"  Peak memory unknown: {memory['reason']}")
+
+def write_csv(plan, csv_path):
+    """작업 목록을 CSV로 저장"""
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['wavelength_nm', 'status', 'm', 'orientations_done', 'orientations', 'core_seconds', 'note'])
+        for job in plan['jobs']:
+            m_text = ' '.join(f"{n:g}+{k:g}i" for n, k in job['m']) if job['m'] else ''
+            core_seconds = f"{job['core_seconds']:.0f}" if 'core_seconds' in job else ''
+            writer.writerow([job['wavelength'], job['status'], m_text, job['done_orientations'],
+                             job['orientations'], core_seconds, job['note']])
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='ADDA 스윕 dry run: 작업 목록, m(λ) coverage, core-hour/메모리 예측')
+    parser.add_argument('config_file', help='config 파일 경로')
+    parser.add_argument('--json', help='계획 전체를 JSON으로 저장')
+    parser.add_argument('--csv', help='파장별 작업 목록을 CSV로 저장')
+    args = parser.parse_args()
+
+    try:
+        planner = SweepPlan(args.config_file)
+        plan = planner.build()
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    print_plan(plan, planner.step)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(plan, f, indent=2)
+        print(f"\n[SAVED] {args.json}")
+    if args.csv:
+        write_csv(plan, args.csv)
+        print(f"[SAVED] {args.csv}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+"""
+합성 RESEARCH_BASE_DIR 트리 생성기
+benchmarks/generate_tree.py
+
+사용법:
+    python benchmarks/generate_tree.py OUT_DIR --models 1000
+    python benchmarks/generate_tree.py OUT_DIR --models 10 --int-field --dip-pol --grid 24
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from synthetic import generate_research_tree
+
+def main():
+    parser = argparse.ArgumentParser(description='합성 ADDA 결과 트리 생성 (model_XXXX_*/lambda_*nm)')
+    parser.add_argument('out_dir', type=str, help='생성할 RESEARCH_BASE_DIR 경로')
+    parser.add_argument('--models', type=int, default=100, help='모델 수 (기본값: 100)')
+    parser.add_argument('--lambda-start', type=int, default=400)
+    parser.add_argument('--lambda-end', type=int, default=1200)
+    parser.add_argument('--lambda-step', type=int, default=10)
+    parser.add_argument('--int-field', action='store_true', help='IntField-X/Y 파일 생성')
+    parser.add_argument('--dip-pol', action='store_true', help='DipPol-X/Y 파일 생성')
+    parser.add_argument('--grid', type=int, default=16, help='필드 파일 격자 크기 (기본값: 16)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    model_dirs = generate_research_tree(
+        args.out_dir, args.models, args.lambda_start, args.lambda_end, args.lambda_step,
+        store_int_field=args.int_field, store_dip_pol=args.dip_pol, grid=args.grid, seed=args.seed
+    )
+    elapsed = time.perf_counter() - start
+    n_lambda = len(range(args.lambda_start, args.lambda_end + 1, args.lambda_step))
+    print(f"[OK] Generated {len(model_dirs)} models x {n_lambda} wavelengths in {Path(args.out_dir)} "
+          f"({elapsed:.1f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+"""
+ADDA 파이프라인 벤치마크
+benchmarks/run_benchmarks.py
+
+실제 ADDA 실행 없이 오케스트레이션/후처리 단계의 소요 시간을 측정하고
+benchmarks/results/history.jsonl에 누적 저장하여 버전 간 성능 회귀를 확인한다.
+
+측정 항목:
+    config_load          adda_utils/config_loader.py의 load_config_values
+    refrac_interp        get_refractive_indices (프로세스 내부 호출, 파장당)
+    refrac_subprocess    run_simulation.sh와 같은 방식의 refrac_interpolator.py 서브프로세스 호출
+    sweep_overhead       fake adda_mpi로 run_simulation.sh 실행 시 파장당 스케줄링 오버헤드
+    analyzer_ingest      ADDAModelAnalyzer 스캔 + create_dataframe (모델당)
+    plot_render          ADDAPlotter.plot_optical_properties (모델당)
+
+사용법:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --models 1000 --repeat 5
+    python benchmarks/run_benchmarks.py --only analyzer_ingest plot_render --no-save
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import matplotlib
+matplotlib.use('Agg')
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(BENCH_DIR))
+
+import adda_utils
+from adda_utils import load_config_values, get_refractive_indices
+from postprocess.postprocess import ADDAModelAnalyzer
+from postprocess.post_util import ADDAPlotter
+from synthetic import generate_research_tree, write_config, write_refractive_files
+
+DEFAULT_RESULTS_FILE = BENCH_DIR / "results" / "history.jsonl"
+FAKE_ADDA_BIN = BENCH_DIR / "fake_adda"
+REGRESSION_THRESHOLD = 1.2  # 이전 결과 대비 20% 이상 느려지면 회귀로 표시
+
+BENCHMARKS = ['config_load', 'refrac_interp', 'refrac_subprocess', 'sweep_overhead',
+              'analyzer_ingest', 'plot_render']
+
+def time_repeated(func, repeat):
+    """func를 repeat번 실행하여 각 실행 시간(초) 목록 반환"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def summarize(timings, items=1):
+    """실행 시간 목록을 결과 레코드로 요약 (items: 1회 실행당 처리 단위 수)"""
+    median = statistics.median(timings)
+    return {
+        'median_s': median,
+        'min_s': min(timings),
+        'max_s': max(timings),
+        'repeat': len(timings),
+        'items': items,
+        'per_item_s': median / items if items else None,
+    }
+
+def git_revision():
+    """현재 git 커밋 해시 (git이 없으면 None)"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class BenchmarkSuite:
+    """합성 데이터셋을 준비하고 각 벤치마크를 실행하는 클래스"""
+
+    def __init__(self, work_dir: Path, n_models: int, n_lambda_sweep: int, repeat: int):
+        self.work_dir = Path(work_dir)
+        self.n_models = n_models
+        self.n_lambda_sweep = n_lambda_sweep
+        self.repeat = repeat
+
+        self.dataset_dir = self.work_dir / "dataset"
+        self.research_dir = self.work_dir / "research"
+        self.tree_dir = self.work_dir / "tree"
+        self.config_path = self.work_dir / "config" / "bench_config.py"
+        self.wavelengths = list(range(400, 1201, 10))
+        self.model_dirs = []
+
+    def prepare(self, need_tree: bool):
+        """n/k 파일, config, (필요 시) 합성 결과 트리 생성"""
+        write_refractive_files(self.dataset_dir / "refrac")
+        write_config(self.config_path, self.research_dir, self.dataset_dir, FAKE_ADDA_BIN,
+                     lambda_start=400, lambda_end=400 + 10 * (self.n_lambda_sweep - 1))
+        if need_tree:
+            print(f"[PREPARE] Generating {self.n_models} synthetic models...")
+            self.model_dirs = generate_research_tree(self.tree_dir, self.n_models)
+
+    def bench_config_load(self):
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                load_config_values(self.config_path)
+        return summarize(time_repeated(run, self.repeat))
+
+    def bench_refrac_interp(self):
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                for wavelength in self.wavelengths:
+                    get_refractive_indices(self.config_path, wavelength)
+        return summarize(time_repeated(run, self.repeat), len(self.wavelengths))
+
+    def bench_refrac_subprocess(self):
+        script = REPO_ROOT / "adda_utils" / "refrac_interpolator.py"
+        sample = self.wavelengths[::20]
+
+        def run():
+            for wavelength in sample:
+                subprocess.run([sys.executable, str(script), str(self.config_path), str(wavelength)],
+                               capture_output=True, check=True)
+        return summarize(time_repeated(run, self.repeat), len(sample))
+
+    def bench_sweep_overhead(self):
+        if shutil.which('bc') is None or (shutil.which('mpiexec') is None and shutil.which('mpirun') is None):
+            print("[SKIP] sweep_overhead requires bc and mpiexec/mpirun")
+            return None
+
+        env = dict(os.environ, ADDA_CONFIG_FILE=str(self.config_path), FAKE_ADDA_SLEEP='0')
+        env.pop('ADDA_REFRACTIVE_TEST_MODE', None)
+
+        def run():
+            shutil.rmtree(self.research_dir, ignore_errors=True)
+            subprocess.run(['bash', str(REPO_ROOT / "run_simulation.sh")], cwd=REPO_ROOT, env=env,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        return summarize(time_repeated(run, self.repeat), self.n_lambda_sweep)
+
+    def bench_analyzer_ingest(self):
+        def run():
+            for model_dir in self.model_dirs:
+                ADDAModelAnalyzer(model_dir).create_dataframe()
+        return summarize(time_repeated(run, self.repeat), len(self.model_dirs))
+
+    def bench_plot_render(self):
+        sample = self.model_dirs[:min(len(self.model_dirs), 3)]
+        frames = [(model_dir.name, ADDAModelAnalyzer(model_dir).create_dataframe()) for model_dir in sample]
+        plot_dir = self.work_dir / "plots"
+
+        def run():
+            for name, df in frames:
+                ADDAPlotter(df, name).plot_optical_properties(plot_dir, show=False)
+        return summarize(time_repeated(run, self.repeat), len(frames))
+
+    def run(self, selected):
+        """선택된 벤치마크 실행 후 {이름: 요약} 반환"""
+        self.prepare(need_tree=bool({'analyzer_ingest', 'plot_render'} & set(selected)))
+        results = {}
+        for name in selected:
+            print(f"[BENCH] {name}...", end=' ', flush=True)
+            summary = getattr(self, f"bench_{name}")()
+            if summary is None:
+                continue
+            results[name] = summary
+            print(f"median {summary['median_s']:.4f}s ({summary['per_item_s'] * 1000:.3f} ms/item)")
+        return results
+
+def load_previous(results_file: Path, params: dict):
+    """같은 파라미터로 실행된 가장 최근 결과 레코드 반환"""
+    if not results_file.exists():
+        return None
+    previous = None
+    with open(results_file, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get('params') == params:
+                previous = record
+    return previous
+
+def print_comparison(results: dict, previous: dict):
+    """이전 결과 대비 변화율 출력"""
+    print(f"\n{'='*60}")
+    if previous is None:
+        print("No previous run with the same parameters to compare against")
+        print(f"{'='*60}")
+        return
+    print(f"Comparison with {previous.get('git_rev')} ({previous.get('timestamp')})")
+    print(f"{'='*60}")
+    for name, summary in results.items():
+        old = previous.get('results', {}).get(name)
+        if not old or not old.get('per_item_s'):
+            print(f"  {name:<20} new")
+            continue
+        ratio = summary['per_item_s'] / old['per_item_s']
+        flag = "  [REGRESSION]" if ratio > REGRESSION_THRESHOLD else ""
+        print(f"  {name:<20} {old['per_item_s'] * 1000:10.3f} -> {summary['per_item_s'] * 1000:10.3f} "
+              f"ms/item  (x{ratio:.2f}){flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description='ADDA 오케스트레이션/후처리 벤치마크')
+    parser.add_argument('--models', type=int, default=50, help='합성 모델 수 (기본값: 50)')
+    parser.add_argument('--sweep-wavelengths', type=int, default=11,
+                        help='sweep_overhead에서 실행할 파장 수 (기본값: 11)')
+    parser.add_argument('--repeat', type=int, default=3, help='반복 횟수 (기본값: 3)')
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, help='실행할 벤치마크 선택')
+    parser.add_argument('--work-dir', type=str, help='합성 데이터 작업 디렉토리 (기본값: 임시 디렉토리)')
+    parser.add_argument('--keep', action='store_true', help='작업 디렉토리 삭제하지 않음')
+    parser.add_argument('--results-file', type=str, default=str(DEFAULT_RESULTS_FILE),
+                        help='결과 누적 파일 (JSON lines)')
+    parser.add_argument('--no-save', action='store_true', help='결과를 저장하지 않음')
+    args = parser.parse_args()
+
+    selected = args.only or BENCHMARKS
+    work_dir = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix='adda_bench_'))
+    params = {'models': args.models, 'sweep_wavelengths': args.sweep_wavelengths}
+
+    try:
+        suite = BenchmarkSuite(work_dir, args.models, args.sweep_wavelengths, args.repeat)
+        results = suite.run(selected)
+    finally:
+        if not args.keep and not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    results_file = Path(args.results_file)
+    print_comparison(results, load_previous(results_file, params))
+
+    record = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'version': adda_utils.__version__,
+        'git_rev': git_revision(),
+        'python': platform.python_version(),
+        'host': platform.node(),
+        'params': params,
+        'results': results,
+    }
+    if not args.no_save:
+        results_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(results_file, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+        print(f"\n[SAVED] {results_file}")
+
+if __name__ == "__main__":
+    main()
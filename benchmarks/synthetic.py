@@ -0,0 +1,215 @@
+"""
+합성 ADDA 결과 파일 생성 모듈
+benchmarks/synthetic.py
+
+fake adda_mpi (benchmarks/fake_adda/mpi/adda_mpi)와 합성 RESEARCH_BASE_DIR 트리 생성기
+(benchmarks/generate_tree.py)가 공유하는 파일 writer 모음.
+실제 ADDA 출력과 같은 형식의 CrossSec-X/Y, log, IntField/DipPol 파일을 만든다.
+"""
+import json
+import math
+import random
+from pathlib import Path
+
+def synthetic_cross_sections(wavelength_nm, size_um=0.02, resonance_nm=520.0, width_nm=60.0,
+                             noise=0.0, rng=None):
+    """Lorentzian 플라즈몬 공명 + Rayleigh 산란 형태의 그럴듯한 단면적 값 생성"""
+    radius_um = size_um / 2.0
+    geometric = math.pi * radius_um ** 2
+    x = (wavelength_nm - resonance_nm) / (width_nm / 2.0)
+    lorentz = 1.0 / (1.0 + x * x)
+
+    qabs = 0.2 + 3.0 * lorentz
+    qsca = (2.0 * math.pi * radius_um * 1000.0 / wavelength_nm) ** 4 * (1.0 + 8.0 * lorentz)
+    if noise and rng is not None:
+        qabs *= 1.0 + rng.gauss(0.0, noise)
+        qsca *= 1.0 + rng.gauss(0.0, noise)
+    qext = qabs + qsca
+
+    return {
+        'Cext': qext * geometric,
+        'Qext': qext,
+        'Cabs': qabs * geometric,
+        'Qabs': qabs,
+    }
+
+def write_crosssec(file_path, values):
+    """ADDA CrossSec 파일 형식으로 저장"""
+    with open(file_path, 'w') as f:
+        for key in ('Cext', 'Qext', 'Cabs', 'Qabs'):
+            f.write(f"{key}\t= {values[key]:.10g}\n")
+
+def residual_history(iterations, eps=5):
+    """eps에 수렴하는 단조 감소 residual 이력 생성"""
+    target = 10.0 ** (-eps)
+    iterations = max(int(iterations), 1)
+    rate = target ** (1.0 / iterations)
+    return [rate ** i for i in range(iterations + 1)]
+
+def write_log(file_path, wavelength_nm, m_values, iterations, wall_time, eps=5, nprocs=1,
+              shape='sphere', extra_args='', dpl=None, nx=None):
+    """ADDA log 파일 형식(헤더 + RE_xxx 이력 + Timing Results)으로 저장"""
+    with open(file_path, 'w') as f:
+        f.write("Generated by ADDA v.1.4.0 (stand-in)\n")
+        f.write(f"The program was run on: localhost ({nprocs} processes)\n")
+        f.write(f"command: 'adda_mpi -shape {shape} -lambda {wavelength_nm / 1000.0:g} "
+                f"-m {' '.join(map(str, m_values))} -eps {eps}{' ' + extra_args if extra_args else ''}'\n")
+        f.write(f"lambda: {wavelength_nm / 1000.0:g}\n")
+        f.write(f"refractive index: {m_values[0]}+{m_values[1] if len(m_values) > 1 else 0}i\n")
+        if nx is not None:
+            f.write(f"box dimensions: {nx}x{nx}x{nx}\n")
+        if dpl is not None:
+            f.write(f"Dipoles/lambda: {dpl:g}\n")
+        f.write(f"Stopping criterion for iterative solver: {10.0 ** (-eps):g}\n\n")
+        f.write("here we go, calc Y\n\n")
+        for i, residual in enumerate(residual_history(iterations, eps)):
+            f.write(f"RE_{i:03d} = {residual:.10E}  {'+' if i else ''}\n")
+        f.write("\n               ~~~ Timing Results ~~~\n")
+        f.write(f"Total number of iterations: {iterations}\n\n")
+        f.write(f"Total wall time:     {wall_time:.3f}\n")
+
+def write_field_file(file_path, grid, value_scale=1.0, prefix='E'):
+    """IntField/DipPol 형식 (x y z |F|^2 Fx.r Fx.i Fy.r Fy.i Fz.r Fz.i) 저장, 구 내부 격자점만 기록"""
+    half = (grid - 1) / 2.0
+    with open(file_path, 'w') as f:
+        f.write(f"x y z |{prefix}|^2 {prefix}x.r {prefix}x.i {prefix}y.r {prefix}y.i "
+                f"{prefix}z.r {prefix}z.i\n")
+        for ix in range(grid):
+            for iy in range(grid):
+                for iz in range(grid):
+                    dx, dy, dz = ix - half, iy - half, iz - half
+                    if dx * dx + dy * dy + dz * dz > half * half:
+                        continue
+                    re_x = value_scale * (1.0 + 0.01 * dx)
+                    im_x = value_scale * 0.1
+                    f.write(f"{dx:g} {dy:g} {dz:g} {re_x * re_x + im_x * im_x:.6E} "
+                            f"{re_x:.6E} {im_x:.6E} 0 0 0 0\n")
+
+def write_lambda_dir(lambda_dir, wavelength_nm, size_um=0.02, m_values=(0.5, 2.0),
+                     resonance_nm=520.0, iterations=40, wall_time=10.0, eps=5,
+                     polarizations=('X', 'Y'), store_int_field=False, store_dip_pol=False,
+                     grid=16, rng=None, orientation_averaged=False, symmetric=False, dpl=None, nx=None):
+    """파장 디렉토리 하나 (CrossSec + log + 선택적 필드 파일) 생성"""
+    lambda_dir = Path(lambda_dir)
+    lambda_dir.mkdir(parents=True, exist_ok=True)
+
+    values = synthetic_cross_sections(wavelength_nm, size_um, resonance_nm,
+                                      noise=0.01 if rng is not None else 0.0, rng=rng)
+    extra_args = '-orient avg' if orientation_averaged else '-sym enf' if symmetric else ''
+    write_log(lambda_dir / "log", wavelength_nm, m_values, iterations, wall_time, eps, extra_args=extra_args,
+              dpl=dpl, nx=nx)
+    if orientation_averaged or symmetric:
+        # ADDA -orient avg는 편광/배향 평균 결과를, 대칭 입자(-sym)는 y 편광 결과만 CrossSec 하나에 기록
+        if symmetric and store_int_field:
+            write_field_file(lambda_dir / "IntField-Y", grid, prefix='E')
+        if symmetric and store_dip_pol:
+            write_field_file(lambda_dir / "DipPol-Y", grid, value_scale=1e-3, prefix='P')
+        write_crosssec(lambda_dir / "CrossSec", values)
+        return
+    for pol in polarizations:
+        if store_int_field:
+            write_field_file(lambda_dir / f"IntField-{pol}", grid, prefix='E')
+        if store_dip_pol:
+            write_field_file(lambda_dir / f"DipPol-{pol}", grid, value_scale=1e-3, prefix='P')
+        # CrossSec는 완료 여부 판단에 쓰이므로 마지막에 기록
+        write_crosssec(lambda_dir / f"CrossSec-{pol}", values)
+
+def gold_like_refractive_index(wavelength_nm):
+    """금(Au)과 비슷한 n, k 값 (Drude 근사)"""
+    energy = 1239.84 / wavelength_nm
+    eps_inf, wp, gamma = 9.5, 8.9, 0.07
+    eps = complex(eps_inf, 0.0) - wp ** 2 / complex(energy ** 2, gamma * energy)
+    root = eps ** 0.5
+    return abs(root.real), abs(root.imag)
+
+def write_refractive_files(out_dir, name='bench', n_points=43, wl_min=300.0, wl_max=1300.0):
+    """Johnson & Christy 데이터셋과 비슷한 밀도의 합성 n/k 파일 쌍 생성"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    n_file = out_dir / f"{name}_n.txt"
+    k_file = out_dir / f"{name}_k.txt"
+    step = (wl_max - wl_min) / (n_points - 1)
+    with open(n_file, 'w') as fn, open(k_file, 'w') as fk:
+        fn.write("# wavelength(nm) n\n")
+        fk.write("# wavelength(nm) k\n")
+        for i in range(n_points):
+            wl = wl_min + i * step
+            n_val, k_val = gold_like_refractive_index(wl)
+            fn.write(f"{wl:.2f} {n_val:.6f}\n")
+            fk.write(f"{wl:.2f} {k_val:.6f}\n")
+    return n_file, k_file
+
+def write_config(config_path, research_base, dataset_dir, adda_bin, mat_type='bench_sphere',
+                 lambda_start=400, lambda_end=1200, lambda_step=10, mpi_procs=1,
+                 refrac_name='bench', extra_params=None):
+    """벤치마크용 config.py 생성 (config/config.py와 같은 구조)"""
+    extra_params = extra_params or {}
+    extra_lines = ''.join(f"    {key!r}: {value!r},\n" for key, value in extra_params.items())
+    config_path = Path(config_path)
+    config_path.parent.mkdir(parents=True, exist_ok=True)
+    config_path.write_text(f'''from pathlib import Path
+
+ADDA_BIN = {str(adda_bin)!r}
+RESEARCH_BASE_DIR = {str(research_base)!r}
+DATASET_DIR = Path({str(dataset_dir)!r})
+
+REFRAC_DIR = DATASET_DIR / "refrac"
+REFRACTIVE_INDEX_FILES = {{
+    'n_{refrac_name}': REFRAC_DIR / "{refrac_name}_n.txt",
+    'k_{refrac_name}': REFRAC_DIR / "{refrac_name}_k.txt",
+}}
+
+LAMBDA_START = {lambda_start}
+LAMBDA_END = {lambda_end}
+LAMBDA_STEP = {lambda_step}
+
+MAT_TYPE = {mat_type!r}
+SHAPE_CONFIG = {{
+    'type': 'sphere',
+    'args': []
+}}
+
+ADDA_PARAMS = {{
+    'size': 0.02,
+    'eps': 5,
+    'maxiter': 10000000,
+    'pol': 'ldr',
+    'refractive_index_sets': [
+        ['n_{refrac_name}', 'k_{refrac_name}']
+    ],
+{extra_lines}}}
+
+MPI_PROCS = {mpi_procs}
+''')
+    return config_path
+
+def generate_research_tree(base_dir, n_models=100, lambda_start=400, lambda_end=1200,
+                           lambda_step=10, store_int_field=False, store_dip_pol=False,
+                           grid=16, seed=0):
+    """model_XXXX_* 디렉토리 n_models개와 파장별 결과로 구성된 합성 RESEARCH_BASE_DIR 생성"""
+    base_dir = Path(base_dir)
+    rng = random.Random(seed)
+    wavelengths = list(range(lambda_start, lambda_end + 1, lambda_step))
+    model_dirs = []
+
+    for index in range(n_models):
+        size_um = round(rng.uniform(0.01, 0.1), 4)
+        resonance_nm = rng.uniform(500.0, 800.0)
+        model_dir = base_dir / f"model_{index:04d}_sphere_{size_um}"
+        model_dir.mkdir(parents=True, exist_ok=True)
+
+        for wavelength in wavelengths:
+            n_val, k_val = gold_like_refractive_index(wavelength)
+            write_lambda_dir(model_dir / f"lambda_{wavelength}nm", wavelength, size_um,
+                             (round(n_val, 6), round(k_val, 6)), resonance_nm,
+                             iterations=rng.randint(20, 200), wall_time=rng.uniform(5.0, 60.0),
+                             store_int_field=store_int_field, store_dip_pol=store_dip_pol,
+                             grid=grid, rng=rng)
+
+        with open(model_dir / "completed_simulations.txt", 'w') as f:
+            f.write(''.join(f"{wavelength}\n" for wavelength in wavelengths))
+        with open(model_dir / "model_params.json", 'w') as f:
+            json.dump({'shape_type': 'sphere', 'size': size_um}, f)
+        model_dirs.append(model_dir)
+
+    return model_dirs
@@ -97,6 +97,218 @@ ADDA_PARAMS = {
 # MPI setting
 MPI_PROCS = 40
 
+# Setting for sweep monitor (adda_utils/sweep_monitor.py, master.sh --monitor)
+MONITOR_CONFIG = {
+    'interval': 30,              # refresh period (s)
+    'stagnation_window': 500,    # abort if the residual minimum does not improve for this many iterations
+    'min_improvement': 0.01,     # relative decrease counted as an improvement
+    'max_iterations': None,      # per-job iteration budget (None: unlimited)
+    'max_wall_time': None,       # per-job wall time budget in seconds (None: unlimited)
+    'abort': True,               # False: only warn
+    'auto_start': False          # start the monitor in the background from run_simulation.sh
+}
+
+# Setting for per-stage timing trace (<model dir>/trace.jsonl, master.sh --trace-report)
+TRACE_CONFIG = {
+    'enabled': True,             # write timing spans for config/interpolation/ADDA run/postprocess
+    'profile': False             # cProfile the Python stages into <model dir>/profiles/
+}
+
+# Setting for node-local scratch staging (adda_utils/scratch_stage.py)
+# Each job writes to <dir>/<MAT_TYPE>/lambda_XXXnm and the finished directory is moved into
+# RESEARCH_BASE_DIR in one rename (or a bulk copy + rename across filesystems)
+SCRATCH_CONFIG = {
+    'enabled': False,
+    'dir': None                  # node-local scratch root (None: $ADDA_SCRATCH_DIR or $TMPDIR/adda_$USER)
+}
+
+# Setting for memory planning before the sweep (adda_utils/memory_planner.py, master.sh --memory-plan)
+# Per-rank memory is predicted from the largest computational grid of the sweep; when the configured
+# layout does not fit, the sweep runs with -opt mem and/or fewer ranks (fewer parallel jobs in split mode)
+MEMORY_CONFIG = {
+    'enabled': True,
+    'node_memory_gb': None,      # memory per node (None: MemAvailable of the node running the sweep)
+    'nodes': 1,                  # nodes the MPI ranks are spread over
+    'safety_factor': 0.85,       # fraction of node memory the plan may use
+    'rank_overhead_mb': 60,      # fixed cost per rank (MPI buffers, binary)
+    'apply': True,               # False: only warn
+    'abort_if_unsafe': True      # stop before the sweep if no layout fits
+}
+
+# Setting for solver autotune (adda_utils/autotune.py, master.sh --autotune)
+# The fastest (pol, iter) pair and the fastest iter for each pol are saved to <model dir>/autotune.json
+AUTOTUNE_CONFIG = {
+    'iters': ['qmr', 'qmr2', 'bicgstab', 'bicg'],
+    'pols': ['ldr', 'fcd', 'igt_so'],
+    'wavelengths': None,         # test wavelengths in nm (None: both ends and the middle of the sweep)
+    'maxiter': 3000,             # trial iteration cap, a trial above it counts as not converged
+    'procs': None,               # MPI processes per trial (None: MPI_PROCS)
+    'timeout': None,             # per-trial time limit in seconds
+    'apply': True,               # use the fastest autotune.json iter for the ADDA_PARAMS pol when present
+    'apply_pol': False           # apply the overall best pol and iter (changes the polarizability model, i.e. the results)
+}
+
+# Setting for discretization convergence study (adda_utils/convergence_study.py, master.sh --convergence)
+# Cext/Cabs are extrapolated to zero dipole size; the result is saved to <model dir>/convergence.json
+CONVERGENCE_CONFIG = {
+    'wavelengths': None,         # test wavelengths in nm (None: both ends and the middle of the sweep)
+    'factors': [0.5, 0.7, 1.0],  # resolutions relative to production dpl (or grid when ADDA_PARAMS sets 'grid')
+    'target': 0.01,              # relative error the recommended resolution must meet
+    'procs': None                # MPI processes per run (None: MPI_PROCS)
+}
+
+# Setting for A/B benchmarks of ADDA builds and MPI settings (adda_utils/binary_benchmark.py, master.sh --bench-binaries)
+# Every binary x procs combination runs the same small job matrix; the first combination is the reference that the
+# others must match within rtol (Cext/Cabs). The result is saved to <model dir>/binary_benchmark.json
+BINARY_BENCHMARK_CONFIG = {
+    'binaries': None,            # e.g. [{'label': 'temperton', 'adda_bin': '~/adda/src'},
+                                 #       {'label': 'fftw', 'adda_bin': '~/adda-fftw/src', 'mpi_args': ['--bind-to', 'core'],
+                                 #        'env': {'OMP_NUM_THREADS': '1'}}] (None: ADDA_BIN only)
+    'procs': None,               # rank counts to compare (None: [MPI_PROCS])
+    'wavelengths': None,         # test wavelengths in nm (None: both ends and the middle of the sweep)
+    'repeat': 1,                 # repetitions per combination (the fastest one is used)
+    'rtol': 1e-3,                # allowed relative difference of Cext/Cabs from the reference
+    'timeout': None              # time limit per run in seconds
+}
+
+# Setting for automatic retry of failed wavelengths (adda_utils/retry_policy.py)
+# Each failure is classified (not_converged, out_of_memory, no_crosssec, error) and retried with the
+# next step of its ladder; attempts are kept in the run ledger (<model dir>/run_ledger.sqlite) across resumes
+# procs_factor scales MPI_PROCS, or the number of parallel orientation jobs in ORIENTATION_CONFIG 'split' mode
+RETRY_CONFIG = {
+    'enabled': True,
+    'max_attempts': 5,           # per wavelength, including the first run
+    'ladder': {
+        'not_converged': [{'iter': 'bicgstab'}, {'iter': 'bicg'}, {'pol': 'fcd'}, {'eps_relax': 1}],
+        'out_of_memory': [{'opt': 'mem'}, {'opt': 'mem', 'procs_factor': 0.5}],
+        'no_crosssec': [{}],
+        'error': [{}]
+    }
+}
+
+# Setting for orientation averaging of non-spherical particles (adda_utils/orientation_avg.py)
+ORIENTATION_CONFIG = {
+    'mode': 'none',              # 'none': single orientation, 'adda': ADDA -orient avg, 'split': parallel orientation jobs
+    'beta_points': 8,            # 'split': Gauss-Legendre points in cos(beta)
+    'gamma_points': 8,           # 'split': uniform points in gamma
+    'gamma_max': 360.0,          # 'split': gamma period in degrees (180 or 90 for symmetric shapes)
+    'procs_per_job': 4,          # 'split': MPI processes per orientation job (MPI_PROCS // procs_per_job jobs in parallel)
+    'avg_params_file': None      # 'adda': optional avg_params.dat passed to -orient avg
+}
+
+# Setting for streaming postprocess during the sweep (process_result.py --stream, master.sh --stream)
+# Finished wavelengths are cached in <model dir>/.postprocess_cache.json so the final postprocess only parses new ones
+STREAM_CONFIG = {
+    'interval': 30,              # model directory polling period (s)
+    'min_update_interval': 120,  # minimum time between CSV/summary updates (s)
+    'plot_interval': 900         # minimum time between plot updates (s)
+}
+
+# Setting for the local job server (adda_utils/job_server.py, master.sh --submit/--queue)
+# Identical (geometry, m, lambda, solver) jobs from different submissions run once and are copied to each model
+JOB_SERVER_CONFIG = {
+    'socket': '/tmp/adda_jobserver.sock',
+    'state_dir': '~/.adda_jobserver',  # queue state, run directories and server.log
+    'cores': None,               # global core budget shared by all users (None: all cores of the workstation)
+    'poll_interval': 1.0,        # job completion check period (s)
+    'group': None                # Unix group allowed to use the socket (None: only the server user)
+}
+
+# Setting for the exact Mie solution of spheres and concentric coated spheres (adda_utils/mie_solver.py, master.sh --mie)
+# fast_path writes lambda_XXXnm/CrossSec-X/Y from the Mie solution instead of running ADDA; coated uses the ADDA domain
+# order of refractive_index_sets (shell first, then core)
+MIE_CONFIG = {
+    'fast_path': False,
+    'validate': False,           # compare ADDA results with the exact solution after the sweep (mie_validation.json)
+    'tolerance': 0.03            # relative Qext/Qabs error reported as PASS
+}
+
+# Setting for the particle symmetry check (adda_utils/shape_symmetry.py, master.sh --symmetry)
+# A 'read' shape file that is mirror symmetric in x, y, z and symmetric under 90 degree rotation about z (including
+# the domain layout) is run with -sym enf, so ADDA solves a single polarization and postprocessing uses it for both;
+# built-in shapes are left to ADDA's own -sym auto. Not applied with prop/beam/orient or ORIENTATION_CONFIG
+SYMMETRY_CONFIG = {
+    'enabled': True
+}
+
+# Setting for coarse preview variants of read shapes (adda_utils/shape_coarsen.py, master.sh --coarsen / --coarse-preview)
+# Each factor f merges f x f x f dipole blocks (filled when at least fill_fraction of the block is occupied, majority
+# domain) and divides ADDA_PARAMS['dpl'] accordingly; with ADDA_COARSE_FACTOR=f set, the sweep and postprocessing use
+# the cached coarse shape and write to <MAT_TYPE>_coarse<f>
+COARSEN_CONFIG = {
+    'factors': [2, 4],           # pyramid of coarsening factors (odd factors keep the mirror symmetry of odd-width shapes)
+    'fill_fraction': 0.5,        # minimum occupied fraction of a block to keep a coarse dipole
+    'preserve_volume': True,     # adjust dpl so the coarse particle keeps the original volume
+    'cache_dir': None            # None: <shape file dir>/.coarse_shapes
+}
+
+# Setting for per-job resource sampling (adda_utils/resource_sampler.py, master.sh --resource-report)
+# A sampler reads /proc for the local adda* ranks of each job every interval seconds and stores per-rank and total
+# CPU%, peak RSS and bytes written in run_ledger.sqlite; the report flags under-utilized and memory-bound wavelengths
+RESOURCE_CONFIG = {
+    'enabled': True,
+    'interval': 5.0,             # sampling period (s)
+    'process_name': 'adda',      # process name prefix counted as a rank
+    'low_cpu_pct': 70.0,         # under-utilized below this mean CPU% per rank
+    'memory_fraction': 0.9,      # memory-bound when node memory use reaches this fraction
+    'major_faults_per_s': 10.0   # or when ranks page from disk at this rate
+}
+
+# Setting for per-domain/per-material absorption (postprocess/post_util/domain_absorption.py)
+# With store_dip_pol and store_int_field, postprocessing sums 4*pi*k*Im(P.E*) over the dipoles of each shape domain
+# (read shape file, or the *.geom written by -save_geom) and adds Cabs_domainN and Cabs_<material> spectrum columns;
+# domain N is the N-th refractive_index_sets entry, and domains sharing a material are summed in its column
+ABSORPTION_CONFIG = {
+    'enabled': True,
+    'materials': None,           # material name per domain (None: names from refractive_index_sets, n_au/k_au -> au)
+    'chunk_rows': 200000         # field file rows read at a time (bounds memory)
+}
+
+# Setting for polydisperse ensemble spectra (postprocess/post_util/ensemble.py, master.sh --ensemble)
+# Models under RESEARCH_BASE_DIR with the same shape type and refractive index sets form the size (x aspect) library;
+# spectra are interpolated log-log between library sizes and averaged over the distribution quadrature nodes
+# Distributions: lognormal (median, sigma), normal (mean, std), uniform (min, max), table (values, weights)
+ENSEMBLE_CONFIG = {
+    'size': None,                # e.g. {'distribution': 'lognormal', 'median': 0.05, 'sigma': 0.1} (param: size or eq_rad)
+    'aspect': None,              # e.g. {'param': 'arg0', 'distribution': 'normal', 'mean': 1.5, 'std': 0.1}
+    'nodes': 24,                 # quadrature nodes per distribution
+    'suggest': 3                 # number of additional library points to suggest
+}
+
+# Setting for packing finished models (adda_utils/model_archive.py, master.sh --pack / --unpack)
+# The lambda_*nm directories are bundled into <model dir>/lambda_archive.zip (zip central directory as index);
+# postprocessing and completion checks read CrossSec/log members directly without extracting
+ARCHIVE_CONFIG = {
+    'compression': 'stored',     # per-member compression: 'stored', 'deflate', 'bzip2' or 'lzma'
+    'keep_dirs': False           # keep the packed directories (default: remove them to free inodes)
+}
+
+# Setting for the quasi-static (Gans/MLWA) preview of ellipsoid, cylinder and box (adda_utils/quasistatic_preview.py,
+# master.sh --preview); cylinder and box are approximated by the ellipsoid with the same axes and the true particle volume
+# With focus_sweep, run_simulation.sh first runs the wavelengths within window x FWHM of each predicted resonance
+# plus every stride-th wavelength elsewhere, then the rest of the grid
+PREVIEW_CONFIG = {
+    'mlwa': True,                # dynamic depolarization and radiative damping corrections (False: plain Gans)
+    'resolution_nm': 1.0,        # wavelength spacing of the preview spectrum
+    'min_rel_height': 0.1,       # smallest resonance reported, relative to the strongest one per polarization
+    'focus_sweep': False,
+    'window': 1.0,
+    'stride': 3
+}
+
+# Setting for analytic dispersion fits of REFRACTIVE_INDEX_FILES (adda_utils/dispersion_fit.py, master.sh --fit-dispersion)
+# When enabled, each (n, k) file pair is fitted once (cached next to the n file) and m(lambda) is evaluated from the model;
+# pairs whose fit misses max_rel_rms fall back to linear interpolation of the table
+DISPERSION_CONFIG = {
+    'enabled': False,
+    'model': 'drude_lorentz',    # 'drude_lorentz' or 'critical_point'
+    'oscillators': 2,            # number of Lorentz / critical-point terms
+    'max_rel_rms': 0.05,         # maximum relative RMS misfit of n+ik for the fit to be used
+    'extrapolate_nm': 0,         # allowed evaluation distance outside the tabulated range (nm)
+    'cache_dir': None,           # None: <n file dir>/.dispersion_fits
+    'surface_damping': None      # e.g. {'A': 1.0, 'fermi_velocity': 1.4e6, 'radius_nm': None} (radius None: from SHAPE_CONFIG)
+}
+
 # Setting for postprocess
 PLOT_CONFIG = {
     'figsize': (15, 10),
@@ -37,10 +37,14 @@ log_step() {
 # 기본 설정
 DEFAULT_CONFIG="./config/config.py"
 CONFIG_FILE=""
+STREAM_POSTPROCESS=false
 
 # 시작 시간 기록
 START_TIME=$(date +%s)
 
+# 단계별 timing trace에서 이번 실행의 span을 묶는 ID
+export ADDA_TRACE_RUN_ID="${ADDA_TRACE_RUN_ID:-$(date +%Y%m%d-%H%M%S)-$$}"
+
 print_header() {
     echo -e "${BLUE}"
     echo "=========================================================="
@@ -95,6 +99,29 @@ OPTIONS:
     --refractive-test       굴절률 테스트 모드 (굴절률 이름을 폴더명으로 사용)
     --check-status          시뮬레이션 상태 확인
     --check-shape           형상 설정 확인
+    --monitor               실행 중인 스윕 진행률/ETA 모니터 및 정체 작업 중단
+    --trace-report          단계별 실행 시간 요약 (모델 디렉토리의 trace.jsonl)
+    --profile               Python 단계에 cProfile 적용 (다른 옵션과 함께 사용)
+    --stream                시뮬레이션과 함께 후처리 실행, 끝난 파장부터 결과/플롯 갱신 (다른 옵션과 함께 사용)
+    --autotune              대표 파장에서 -iter/-pol 조합 시험 후 가장 빠른 설정 기록
+    --memory-plan           rank당 메모리 예측 및 노드 메모리에 맞는 rank 구성 출력
+    --plan                  실행 없이 작업 목록, m(λ) 범위 검사, core-hour/메모리 예측 출력 (PLAN_EXPORT_DIR=DIR: JSON/CSV 저장)
+    --fit-dispersion        굴절률 파일 쌍의 분산 모델 fitting 및 품질 보고 (REFIT=1: 캐시 무시)
+    --mie                   구/동심 coated를 ADDA 없이 정확한 Mie 해로 계산하여 결과 기록
+    --mie-validate          ADDA 결과와 정확한 Mie 해의 편차를 해상도별로 보고 (MIE_RESULTS=DIR: 다른 결과 위치)
+    --preview               ellipsoid/cylinder/box 준정적(Gans/MLWA) 미리보기 스펙트럼과 공명 구간 출력
+    --symmetry              형상(read 파일 포함)의 거울/회전 대칭 검사 및 단일 편광 계산 여부 출력
+    --coarsen               read 형상 파일의 거친 형상 pyramid (COARSEN_CONFIG['factors']) 생성 및 요약
+    --coarse-preview        거친 read 형상으로 전체 스펙트럼 미리보기 스윕 + 후처리 (COARSE_FACTOR=N, 기본값: 가장 큰 배율)
+    --pack                  끝난 모델의 lambda_*nm 디렉토리를 lambda_archive.zip 하나로 묶기
+    --unpack                lambda_archive.zip을 lambda_*nm 디렉토리로 풀기 (UNPACK_LAMBDAS="500 510": 일부만)
+    --ensemble              ENSEMBLE_CONFIG 크기(/종횡비) 분포의 다분산 앙상블 스펙트럼과 추가 계산할 크기 추천
+    --resource-report       파장별 rank CPU%/최대 RSS/쓰기량과 under-utilized/memory-bound 파장 출력
+    --bench-binaries        여러 ADDA 빌드/rank 수로 작은 작업 행렬 실행, 시간/반복당 시간/결과 일치 비교
+                            (BENCH_BINS="temperton=~/adda/src fftw=~/adda-fftw/src", BENCH_PROCS="8 16")
+    --convergence           여러 해상도로 계산하여 외삽, production 해상도 오차와 권장 dpl 출력
+    --submit                로컬 작업 서버에 스윕 제출 (서버가 없으면 시작, 같은 작업은 한 번만 계산)
+    --queue                 로컬 작업 서버의 사용자별 core 사용량과 제출 진행률 출력
     --resume                실패한 시뮬레이션 재실행
     --clean                 결과 디렉토리 정리
     -h, --help              도움말 출력
@@ -108,6 +135,9 @@ Examples:
     $0 --process-only                           # config의 MAT_TYPE 모델만 후처리
     $0 --check-shape                            # 현재 형상 설정 확인
     $0 --check-status                           # 상태 확인
+    $0 --monitor                                # 다른 터미널에서 스윕 감시
+    $0 --autotune && $0 --sim-only              # solver 조합 선택 후 스윕
+    $0 --stream                                 # 스윕 중 결과 갱신, 최종 후처리는 캐시 재사용
 
 Refractive Test Mode:
     굴절률 테스트 모드에서는 config의 refractive_index_sets에서
@@ -134,6 +164,14 @@ parse_arguments() {
                 CONFIG_FILE="$2"
                 shift 2
                 ;;
+            --profile)
+                export ADDA_PROFILE=1
+                shift
+                ;;
+            --stream)
+                STREAM_POSTPROCESS=true
+                shift
+                ;;
             *)
                 temp_args+=("$1")
                 shift
@@ -481,7 +519,23 @@ run_simulations() {
     # config 파일을 환경변수로 전달
     export ADDA_CONFIG_FILE="$CONFIG_FILE"
     
-    if ./run_simulation.sh; then
+    # 스트리밍 후처리: 스윕과 함께 실행하고 스윕이 끝나면 마지막 갱신 후 종료
+    local stream_pid=""
+    if [ "$STREAM_POSTPROCESS" = "true" ]; then
+        log_info "Starting streaming post-processing alongside the sweep"
+        python process_result.py --config "$CONFIG_FILE" --stream &
+        stream_pid=$!
+    fi
+    
+    local sim_status=0
+    ./run_simulation.sh || sim_status=1
+    
+    if [ -n "$stream_pid" ]; then
+        kill -TERM "$stream_pid" 2>/dev/null
+        wait "$stream_pid" 2>/dev/null
+    fi
+    
+    if [ $sim_status -eq 0 ]; then
         log_success "Simulations completed successfully"
         return 0
     else
@@ -607,6 +661,11 @@ check_status() {
         if [ -d "$MODEL_DIR" ]; then
             lambda_count=$(find "$MODEL_DIR" -name "lambda_*nm" -type d 2>/dev/null | wc -l)
             echo "[FOUND] Found target model: $MAT_TYPE ($lambda_count wavelengths)"
+            # 파장별 최종 상태 (기존 completed/failed 텍스트 기록은 처음 조회할 때 가져옴)
+            if [ -f "$MODEL_DIR/run_ledger.sqlite" ] || [ -f "$MODEL_DIR/completed_simulations.txt" ]; then
+                echo ""
+                python adda_utils/run_ledger.py status "$MODEL_DIR"
+            fi
         else
             echo "[NOT FOUND] Target model not found: $MAT_TYPE"
         fi
@@ -630,6 +689,178 @@ check_status() {
     fi
 }
 
+# config에서 모델 디렉토리 가져오기 (RESEARCH_BASE_DIR/MAT_TYPE)
+get_model_dir_from_config() {
+    python -c "
+from adda_utils.config_loader import load_config_module, resolve_model_dir
+print(resolve_model_dir(load_config_module('$CONFIG_FILE')))
+"
+}
+
+# 단계별 실행 시간 리포트
+run_trace_report() {
+    log_step "Stage timing report..."
+    MODEL_DIR=$(get_model_dir_from_config)
+    python adda_utils/stage_tracer.py report "$MODEL_DIR" --profiles 15
+}
+
+# 반복 solver/polarizability autotune (결과는 모델 디렉토리의 autotune.json)
+run_autotune() {
+    log_step "Autotuning iterative solver and polarizability..."
+    python adda_utils/autotune.py "$CONFIG_FILE"
+}
+
+# MPI 작업 메모리 예측 (스윕 시작 시에도 자동 적용됨)
+run_memory_plan() {
+    log_step "Planning ADDA memory footprint..."
+    python adda_utils/memory_planner.py "$CONFIG_FILE"
+}
+
+# 스윕 dry run (아무것도 실행하지 않음, PLAN_EXPORT_DIR 지정 시 plan.json/plan_jobs.csv 저장)
+run_plan() {
+    log_step "Planning sweep (dry run)..."
+    if [ -n "$PLAN_EXPORT_DIR" ]; then
+        python adda_utils/sweep_plan.py "$CONFIG_FILE" --json "$PLAN_EXPORT_DIR/plan.json" --csv "$PLAN_EXPORT_DIR/plan_jobs.csv"
+    else
+        python adda_utils/sweep_plan.py "$CONFIG_FILE"
+    fi
+}
+
+# 굴절률 데이터 분산 모델 fitting (결과는 n 파일 옆의 .dispersion_fits 캐시)
+run_fit_dispersion() {
+    log_step "Fitting dispersion models to refractive index data..."
+    if [ "$REFIT" = "1" ]; then
+        python adda_utils/dispersion_fit.py fit "$CONFIG_FILE" --refit
+    else
+        python adda_utils/dispersion_fit.py fit "$CONFIG_FILE"
+    fi
+}
+
+# 정확한 Mie 해로 결과가 없는 파장 기록 (sphere/coated)
+run_mie() {
+    log_step "Computing exact Mie solution..."
+    python adda_utils/mie_solver.py sweep "$CONFIG_FILE"
+}
+
+# ADDA 결과 검증 (결과는 모델 디렉토리의 mie_validation.json)
+run_mie_validate() {
+    log_step "Validating ADDA results against the exact Mie solution..."
+    if [ -n "$MIE_RESULTS" ]; then
+        python adda_utils/mie_solver.py validate "$CONFIG_FILE" --results "$MIE_RESULTS"
+    else
+        python adda_utils/mie_solver.py validate "$CONFIG_FILE"
+    fi
+}
+
+# 다분산 앙상블 스펙트럼 (결과는 RESEARCH_BASE_DIR의 ensemble_<형상>_*.csv)
+run_ensemble() {
+    log_step "Computing polydisperse ensemble spectrum from the simulated library..."
+    python process_result.py --config "$CONFIG_FILE" --ensemble
+}
+
+# 준정적 미리보기 (결과는 모델 디렉토리의 <MAT_TYPE>_preview.csv/플롯)
+run_preview() {
+    log_step "Computing quasi-static preview spectrum..."
+    python process_result.py --config "$CONFIG_FILE" --preview
+}
+
+# 형상 대칭 검사 (완전 대칭 read 형상은 스윕에서 -sym enf 사용)
+run_symmetry() {
+    log_step "Checking particle symmetry..."
+    python adda_utils/shape_symmetry.py plan "$CONFIG_FILE"
+}
+
+# read 형상의 거친 형상 pyramid 생성 (형상 디렉토리의 .coarse_shapes/)
+run_coarsen() {
+    log_step "Building coarse shape pyramid..."
+    python adda_utils/shape_coarsen.py pyramid "$CONFIG_FILE"
+}
+
+# 거친 형상 미리보기 스윕 (결과는 <MAT_TYPE>_coarse<배율> 모델 디렉토리)
+run_coarse_preview() {
+    log_step "Running coarse-shape preview sweep..."
+    eval "$(python adda_utils/shape_coarsen.py pyramid "$CONFIG_FILE" --shell)"
+    if [ "$COARSE_STATUS" != "ok" ]; then
+        log_error "Coarse shapes not available: $COARSE_REASON"
+        return 1
+    fi
+    local factor="${COARSE_FACTOR:-$COARSE_MAX}"
+    log_info "Coarsening factor: $factor (available: $COARSE_FACTORS)"
+    
+    export ADDA_COARSE_FACTOR="$factor"
+    export ADDA_CONFIG_FILE="$CONFIG_FILE"
+    if ./run_simulation.sh; then
+        log_success "Coarse preview sweep completed (factor $factor)"
+        if ! python process_result.py --config "$CONFIG_FILE"; then
+            log_warning "Post-processing failed for the coarse preview"
+        fi
+    else
+        log_error "Coarse preview sweep failed (factor $factor)"
+        unset ADDA_COARSE_FACTOR
+        return 1
+    fi
+    unset ADDA_COARSE_FACTOR
+}
+
+# 끝난 모델의 파장 디렉토리를 archive 하나로 묶기 (실행 중인 작업이 있으면 거부)
+run_pack() {
+    log_step "Packing wavelength directories into the model archive..."
+    python adda_utils/model_archive.py pack "$CONFIG_FILE"
+}
+
+# archive를 파장 디렉토리로 풀기 (재실행/외부 도구용)
+run_unpack() {
+    log_step "Unpacking the model archive..."
+    python adda_utils/model_archive.py unpack "$CONFIG_FILE" $UNPACK_LAMBDAS
+}
+
+# 작업별 자원 sample 보고 (run_simulation.sh가 ledger에 남긴 rank별 CPU/메모리/쓰기량)
+run_resource_report() {
+    log_step "Reporting per-wavelength resource usage..."
+    python adda_utils/resource_sampler.py report "$CONFIG_FILE"
+}
+
+# ADDA 빌드/rank 수 A/B 벤치마크 (결과는 모델 디렉토리의 binary_benchmark.json)
+run_bench_binaries() {
+    log_step "Benchmarking ADDA binaries and rank counts..."
+    local bench_args=()
+    local spec
+    for spec in $BENCH_BINS; do
+        bench_args+=(--bin "$spec")
+    done
+    if [ -n "$BENCH_PROCS" ]; then
+        bench_args+=(--procs $BENCH_PROCS)
+    fi
+    python adda_utils/binary_benchmark.py "$CONFIG_FILE" "${bench_args[@]}"
+}
+
+# 이산화 해상도 수렴 검사 (결과는 모델 디렉토리의 convergence.json)
+run_convergence() {
+    log_step "Running discretization convergence study..."
+    python adda_utils/convergence_study.py "$CONFIG_FILE"
+}
+
+# 로컬 작업 서버에 스윕 제출 (서버가 응답하지 않으면 백그라운드로 시작)
+run_submit() {
+    log_step "Submitting sweep to local job server..."
+    if ! python adda_utils/job_server.py queue "$CONFIG_FILE" > /dev/null 2>&1; then
+        python adda_utils/job_server.py start "$CONFIG_FILE" || return 1
+        sleep 2
+    fi
+    python adda_utils/job_server.py submit "$CONFIG_FILE"
+}
+
+# 로컬 작업 서버 대기열 조회
+run_queue() {
+    python adda_utils/job_server.py queue "$CONFIG_FILE"
+}
+
+# 스윕 모니터 실행 (Ctrl+C로 종료)
+run_monitor() {
+    log_step "Starting sweep monitor..."
+    python adda_utils/sweep_monitor.py "$CONFIG_FILE"
+}
+
 # 실패한 시뮬레이션 재실행
 resume_simulations() {
     log_step "Resuming failed simulations..."
@@ -731,6 +962,117 @@ main() {
                 action_performed=true
                 break
                 ;;
+            --profile|--stream)
+                # 이미 처리됨
+                shift
+                ;;
+            --trace-report)
+                check_structure
+                run_trace_report
+                action_performed=true
+                break
+                ;;
+            --monitor)
+                check_structure
+                run_monitor
+                action_performed=true
+                break
+                ;;
+            --autotune)
+                check_dependencies
+                run_autotune
+                action_performed=true
+                break
+                ;;
+            --memory-plan)
+                run_memory_plan
+                action_performed=true
+                break
+                ;;
+            --plan)
+                run_plan
+                action_performed=true
+                break
+                ;;
+            --fit-dispersion)
+                run_fit_dispersion
+                action_performed=true
+                break
+                ;;
+            --mie)
+                run_mie
+                action_performed=true
+                break
+                ;;
+            --mie-validate)
+                run_mie_validate
+                action_performed=true
+                break
+                ;;
+            --preview)
+                run_preview
+                action_performed=true
+                break
+                ;;
+            --symmetry)
+                run_symmetry
+                action_performed=true
+                break
+                ;;
+            --coarsen)
+                run_coarsen
+                action_performed=true
+                break
+                ;;
+            --coarse-preview)
+                check_dependencies
+                run_coarse_preview
+                action_performed=true
+                break
+                ;;
+            --pack)
+                run_pack
+                action_performed=true
+                break
+                ;;
+            --unpack)
+                run_unpack
+                action_performed=true
+                break
+                ;;
+            --ensemble)
+                run_ensemble
+                action_performed=true
+                break
+                ;;
+            --resource-report)
+                run_resource_report
+                action_performed=true
+                break
+                ;;
+            --bench-binaries)
+                check_dependencies
+                run_bench_binaries
+                action_performed=true
+                break
+                ;;
+            --convergence)
+                check_dependencies
+                run_convergence
+                action_performed=true
+                break
+                ;;
+            --submit)
+                check_dependencies
+                run_submit
+                action_performed=true
+                break
+                ;;
+            --queue)
+                run_queue
+                action_performed=true
+                break
+                ;;
             --resume)
                 check_dependencies
                 resume_simulations
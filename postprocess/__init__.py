@@ -3,13 +3,18 @@ ADDA 후처리 패키지
 postprocess/__init__.py
 """
 # post_util 모듈들 import
-from .post_util import CrossSecData, WavelengthData, ADDAPlotter
+from .post_util import CrossSecData, WavelengthData, ADDAPlotter, collect_peak_tables
 # 메인 분석 함수들 import
 from .postprocess import (
     analyze_model,
     analyze_all_models,
     analyze_model_from_config,
     analyze_all_models_from_config,
+    analyze_models_batch,
+    query_surrogate,
+    ensemble_from_config,
+    stream_model_from_config,
+    preview_model_from_config,
     load_config
 )
 
@@ -18,6 +23,7 @@ __all__ = [
     'CrossSecData',
     'WavelengthData', 
     'ADDAPlotter',
+    'collect_peak_tables',
     
     # 함수들 - 기존 방식
     'analyze_model',
@@ -26,5 +32,10 @@ __all__ = [
     # 함수들 - config 기반 (새로운 방식)
     'analyze_model_from_config',
     'analyze_all_models_from_config',
+    'analyze_models_batch',
+    'query_surrogate',
+    'ensemble_from_config',
+    'stream_model_from_config',
+    'preview_model_from_config',
     'load_config'
 ]
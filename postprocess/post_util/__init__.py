@@ -6,9 +6,35 @@ postprocess/post_util/__init__.py
 from .adda_parser import CrossSecData
 from .data_analysis import WavelengthData  
 from .plot_results import ADDAPlotter
+from .spectral_analysis import (
+    stack_spectra, find_peaks_batch, absorption_fraction_integrals,
+    analyze_spectra, analyze_dataframe, collect_peak_tables
+)
+from .surrogate import SpectralSurrogate, build_surrogate, write_model_params, surrogate_query_frame
+from .ensemble import EnsembleLibrary, ensemble_spectrum, get_ensemble_config
+from .result_cache import ResultCache, crosssec_signature
+from .domain_absorption import DomainGrid, wavelength_absorption, get_absorption_config
 
 __all__ = [  # **all** -> __all__ 수정
     'CrossSecData',
     'WavelengthData',
-    'ADDAPlotter'
+    'ADDAPlotter',
+    'stack_spectra',
+    'find_peaks_batch',
+    'absorption_fraction_integrals',
+    'analyze_spectra',
+    'analyze_dataframe',
+    'collect_peak_tables',
+    'SpectralSurrogate',
+    'build_surrogate',
+    'write_model_params',
+    'surrogate_query_frame',
+    'EnsembleLibrary',
+    'ensemble_spectrum',
+    'get_ensemble_config',
+    'ResultCache',
+    'crosssec_signature',
+    'DomainGrid',
+    'wavelength_absorption',
+    'get_absorption_config'
 ]
@@ -2,6 +2,7 @@
 ADDA 출력 파일 파싱 모듈
 postprocess/post_util/adda_parser.py
 """
+import io
 import logging
 from pathlib import Path
 from typing import Dict, Optional
@@ -11,20 +12,20 @@ logger = logging.getLogger(__name__)
 class CrossSecData:
     """개별 CrossSec 파일 데이터 클래스"""
     
-    def __init__(self, file_path: Path):
+    def __init__(self, file_path: Path, text: Optional[str] = None):
         self.file_path = Path(file_path)
         self.data = {}
         self.is_valid = False
-        self._parse_file()
+        self._parse_file(text)
     
-    def _parse_file(self):
-        """CrossSec 파일 파싱"""
-        if not self.file_path.exists():
+    def _parse_file(self, text: Optional[str] = None):
+        """CrossSec 파일 파싱 (text가 주어지면 파일 대신 사용, 모델 archive member 등)"""
+        if text is None and not self.file_path.exists():
             logger.warning(f"File not found: {self.file_path}")
             return
         
         try:
-            with open(self.file_path, 'r') as f:
+            with (io.StringIO(text) if text is not None else open(self.file_path, 'r')) as f:
                 for line in f:
                     line = line.strip()
                     if '=' in line:
@@ -2,6 +2,7 @@
 데이터 분석 모듈
 postprocess/post_util/data_analysis.py
 """
+import io
 import logging
 import re
 from pathlib import Path
@@ -14,25 +15,59 @@ logger = logging.getLogger(__name__)
 class WavelengthData:
     """특정 파장에 대한 데이터 클래스"""
     
-    def __init__(self, wavelength: int, lambda_dir: Path):
+    def __init__(self, wavelength: int, lambda_dir: Path, archive=None):
         self.wavelength = wavelength
         self.lambda_dir = Path(lambda_dir)
+        # 모델 archive (adda_utils.model_archive.ModelArchive)로 묶인 파장은 디렉토리 대신 member를 읽음
+        self.archive = archive
         self.crosssec_x = None
         self.crosssec_y = None
+        self.crosssec_orient = None
+        self.orientation_averaged = False
+        self.symmetric_solve = False
         self.is_valid = False
         self._load_crosssec_files()
     
+    def _exists(self, name: str) -> bool:
+        """파장 디렉토리 (또는 archive)에 파일이 있는지"""
+        if self.archive is not None:
+            return self.archive.exists(self.lambda_dir.name, name)
+        return (self.lambda_dir / name).exists()
+    
+    def _crosssec(self, name: str) -> CrossSecData:
+        """CrossSec 파일 파싱 (archive member 포함)"""
+        text = self.archive.read_text(self.lambda_dir.name, name) if self.archive is not None else None
+        return CrossSecData(self.lambda_dir / name, text)
+    
+    def open_text(self, name: str):
+        """파장 디렉토리의 파일을 텍스트로 열기 (archive는 압축 해제 없이 member 단위로, IntField/DipPol 등)"""
+        if self.archive is not None:
+            return io.TextIOWrapper(self.archive.open(self.lambda_dir.name, name), errors='replace')
+        return open(self.lambda_dir / name, 'r', errors='replace')
+    
     def _load_crosssec_files(self):
         """CrossSec 파일들 로드"""
-        crosssec_x_path = self.lambda_dir / "CrossSec-X"
-        crosssec_y_path = self.lambda_dir / "CrossSec-Y"
+        # 편광 구분 없는 CrossSec: 배향 평균 결과 (ADDA -orient avg 또는 orientation_avg.py reduce)이거나
+        # 대칭 입자에서 ADDA가 한 편광만 푼 결과 (-sym), 후자는 같은 값을 X/Y 양쪽에 반영
+        if self._exists("CrossSec"):
+            crosssec = self._crosssec("CrossSec")
+            if crosssec.is_valid:
+                crosssec.calculate_scattering()
+                if self._is_orientation_average(crosssec):
+                    self.crosssec_orient = crosssec
+                    self.orientation_averaged = True
+                else:
+                    self.crosssec_x = self.crosssec_y = crosssec
+                    self.symmetric_solve = True
+                self.is_valid = True
+                return
         
         # X, Y 파일 로드
-        if crosssec_x_path.exists():
-            self.crosssec_x = CrossSecData(crosssec_x_path)
+        if self._exists("CrossSec-X"):
+            self.crosssec_x = self._crosssec("CrossSec-X")
         
-        if crosssec_y_path.exists():
-            self.crosssec_y = CrossSecData(crosssec_y_path)
+        if self._exists("CrossSec-Y"):
+            self.crosssec_y = self._crosssec("CrossSec-Y")
         
         # 유효성 확인
         if self.crosssec_x and self.crosssec_x.is_valid:
@@ -47,11 +82,35 @@ class WavelengthData:
             if self.crosssec_y:
                 self.crosssec_y.calculate_scattering()
     
+    def _is_orientation_average(self, crosssec: CrossSecData) -> bool:
+        """CrossSec 하나가 배향 평균 결과인지 (log 명령행에 -orient avg가 없으면 대칭 단일 편광 결과)"""
+        if 'Norient' in crosssec.data:
+            return True
+        try:
+            with self.open_text("log") as f:
+                for _, line in zip(range(20), f):
+                    match = re.match(r"command: '(.*)'", line.strip())
+                    if match:
+                        return '-orient avg' in match.group(1)
+        except (OSError, KeyError):
+            pass
+        # log로 판단할 수 없으면 기존과 같이 배향 평균으로 취급
+        return True
+    
     def get_averaged_data(self) -> Dict[str, float]:
         """X, Y 평균 데이터 반환"""
         if not self.is_valid:
             return {}
         
+        # 배향 평균 결과는 편광 평균까지 포함되어 있으므로 그대로 사용
+        if self.orientation_averaged:
+            data = {'wavelength': self.wavelength}
+            for key in ['Cext', 'Cabs', 'Qext', 'Qabs', 'Csca', 'Qsca']:
+                data[key] = self.crosssec_orient.get_value(key)
+            data['orientation_averaged'] = True
+            data['n_orientations'] = int(self.crosssec_orient.get_value('Norient', 0))
+            return data
+        
         # X, Y 둘 다 있으면 평균
         if (self.crosssec_x and self.crosssec_x.is_valid and 
             self.crosssec_y and self.crosssec_y.is_valid):
@@ -63,6 +122,8 @@ class WavelengthData:
                 x_val = self.crosssec_x.get_value(key)
                 y_val = self.crosssec_y.get_value(key)
                 averaged_data[key] = (x_val + y_val) / 2
+            if self.symmetric_solve:
+                averaged_data['symmetric_solve'] = True
             
             return averaged_data
         
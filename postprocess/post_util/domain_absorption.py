@@ -0,0 +1,192 @@
+"""
+domain/물질별 흡수 분해 모듈
+postprocess/post_util/domain_absorption.py
+
+store_dip_pol/store_int_field로 저장된 DipPol-{X,Y}와 IntField-{X,Y}를 같은 순서의 쌍극자 행으로 읽어
+쌍극자별 흡수 Cabs_i = 4πk Im(P_i · E_i*) (|E0| = 1, 길이 단위 µm)를 domain별로 합산한다.
+쌍극자의 domain은 형상 파일 (read 형상의 SHAPE_CONFIG['filename'] 또는 -save_geom의 *.geom)을
+경계 상자 크기의 uint8 격자로 만든 뒤 ADDA 좌표 (상자 중심 원점, 간격 d = λ/dpl)를 격자 index로 바꾸어 찾는다.
+필드 파일은 chunk_rows 행씩 읽으므로 메모리는 격자와 chunk 크기로 제한된다.
+domain n은 refractive_index_sets의 n번째 세트 (ADDA -m 순서)이며, 같은 물질의 domain은 물질 열에서 합산한다.
+"""
+import logging
+import math
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from adda_utils.shape_symmetry import iter_shape_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ABSORPTION_CONFIG = {
+    'enabled': True,             # 필드 파일과 domain이 2개 이상인 형상 파일이 있으면 분해 열 추가
+    'materials': None,           # domain 순서의 물질 이름 (None: refractive_index_sets의 n_/k_ 이름)
+    'chunk_rows': 200000,        # 필드 파일을 한 번에 읽는 행 수
+}
+
+ABSORPTION_CACHE_FILE_NAME = '.absorption_cache.json'
+FIELD_PREFIXES = ('DipPol', 'IntField')
+FIELD_FILE_NAMES = tuple(f"{prefix}-{pol}" for prefix in FIELD_PREFIXES for pol in ('X', 'Y')) + ('log',)
+DPL_PATTERN = re.compile(r'^Dipoles/lambda:\s*([0-9.eE+-]+)')
+LAMBDA_PATTERN = re.compile(r'^lambda:\s*([0-9.eE+-]+)')
+
+def get_absorption_config(config) -> Dict:
+    """config의 ABSORPTION_CONFIG를 기본값과 병합"""
+    absorption_config = dict(DEFAULT_ABSORPTION_CONFIG)
+    absorption_config.update(getattr(config, 'ABSORPTION_CONFIG', {}) or {})
+    return absorption_config
+
+def material_names(config, n_domains: int) -> List[str]:
+    """domain 순서의 물질 이름 (n_au/k_au -> au, 이름이 없는 domain은 domainN)"""
+    names = list(get_absorption_config(config)['materials'] or [])
+    if not names:
+        refrac_sets = getattr(config, 'ADDA_PARAMS', {}).get('refractive_index_sets', [])
+        for refrac_set in refrac_sets:
+            n_key, k_key = refrac_set[0], refrac_set[1]
+            if n_key.startswith('n_') and k_key.startswith('k_') and n_key[2:] == k_key[2:]:
+                names.append(n_key[2:])
+            else:
+                names.append(f"{n_key}_{k_key}")
+    return [names[i] if i < len(names) else f"domain{i + 1}" for i in range(n_domains)]
+
+def _shape_rows(shape_file: Path):
+    """형상 파일의 (x, y, z, domain) 정수 행 (DDSCAT 형식은 등방 쌍극자만 허용)"""
+    for x, y, z, domain in iter_shape_file(shape_file):
+        if isinstance(domain, tuple):
+            if not domain[0] == domain[1] == domain[2]:
+                raise ValueError(f"anisotropic dipoles are not supported ({shape_file})")
+            domain = domain[0]
+        yield x, y, z, domain
+
+class DomainGrid:
+    """형상 파일의 domain 격자 (경계 상자 크기의 uint8 배열, 0은 빈 칸)"""
+
+    def __init__(self, shape_file: Path):
+        self.shape_file = Path(shape_file)
+        # 첫 번째 읽기: 경계 상자, 두 번째 읽기: 격자 채우기 (쌍극자 목록을 메모리에 두지 않음)
+        low, high, n_domains = None, None, 0
+        for x, y, z, domain in _shape_rows(self.shape_file):
+            if low is None:
+                low, high = [x, y, z], [x, y, z]
+            else:
+                low = [min(low[0], x), min(low[1], y), min(low[2], z)]
+                high = [max(high[0], x), max(high[1], y), max(high[2], z)]
+            n_domains = max(n_domains, domain)
+        if low is None:
+            raise ValueError(f"no dipoles found in shape file {self.shape_file}")
+        if n_domains > 255:
+            raise ValueError(f"too many domains ({n_domains}) in {self.shape_file}")
+        self.box = np.array([h - l + 1 for l, h in zip(low, high)])
+        self.n_domains = n_domains
+        self.grid = np.zeros(tuple(self.box), dtype=np.uint8)
+        for x, y, z, domain in _shape_rows(self.shape_file):
+            self.grid[x - low[0], y - low[1], z - low[2]] = domain
+
+    def lookup(self, xyz: np.ndarray, spacing: float) -> np.ndarray:
+        """ADDA 쌍극자 좌표 (상자 중심 원점) 배열의 domain 번호"""
+        index = np.rint(xyz / spacing + (self.box - 1) / 2.0).astype(np.int64)
+        inside = np.all((index >= 0) & (index < self.box), axis=1)
+        if not inside.all():
+            raise ValueError(f"{int((~inside).sum())} dipole(s) fall outside the {self.shape_file.name} box")
+        domains = self.grid[index[:, 0], index[:, 1], index[:, 2]]
+        if (domains == 0).any():
+            raise ValueError(f"{int((domains == 0).sum())} dipole(s) are not in {self.shape_file.name}")
+        return domains
+
+def find_shape_file(config, lambda_dir: Optional[Path] = None) -> Optional[Path]:
+    """domain을 읽을 형상 파일 (read 형상 파일, 없으면 파장 디렉토리의 -save_geom 결과)"""
+    shape_config = getattr(config, 'SHAPE_CONFIG', {})
+    if shape_config.get('type') == 'read' and shape_config.get('filename'):
+        return Path(shape_config['filename']).expanduser()
+    if lambda_dir is not None and Path(lambda_dir).is_dir():
+        geometry_files = sorted(Path(lambda_dir).glob('*.geom'))
+        if geometry_files:
+            return geometry_files[0]
+    return None
+
+def dipole_spacing(log_text: Optional[str]) -> Optional[float]:
+    """ADDA log의 lambda와 Dipoles/lambda로 쌍극자 간격 d (µm) 계산"""
+    if not log_text:
+        return None
+    wavelength = dpl = None
+    for line in log_text.splitlines():
+        line = line.strip()
+        match = LAMBDA_PATTERN.match(line)
+        if match and wavelength is None:
+            wavelength = float(match.group(1))
+        match = DPL_PATTERN.match(line)
+        if match:
+            dpl = float(match.group(1))
+            break
+    return wavelength / dpl if wavelength and dpl else None
+
+def _infer_spacing(xyz: np.ndarray) -> float:
+    """좌표 배열에서 같은 축의 가장 작은 양의 간격"""
+    steps = []
+    for axis in range(3):
+        values = np.unique(xyz[:, axis])
+        if len(values) > 1:
+            steps.append(np.diff(values).min())
+    if not steps:
+        raise ValueError("cannot infer the dipole spacing (single dipole column); log has no Dipoles/lambda")
+    return float(min(steps))
+
+def polarization_absorption(open_text: Callable, pol: str, grid: DomainGrid, wavelength_um: float,
+                            spacing: Optional[float], chunk_rows: int) -> np.ndarray:
+    """편광 하나의 domain별 흡수 단면적 (index = domain 번호, 0은 사용하지 않음)"""
+    k = 2.0 * math.pi / wavelength_um
+    totals = np.zeros(grid.n_domains + 1)
+    with open_text(f"DipPol-{pol}") as pol_file, open_text(f"IntField-{pol}") as field_file:
+        pol_chunks = pd.read_csv(pol_file, sep=r'\s+', chunksize=chunk_rows)
+        field_chunks = pd.read_csv(field_file, sep=r'\s+', chunksize=chunk_rows)
+        for pol_chunk, field_chunk in zip(pol_chunks, field_chunks):
+            p = pol_chunk.to_numpy(dtype=float)
+            e = field_chunk.to_numpy(dtype=float)
+            if p.shape != e.shape or not np.allclose(p[:, :3], e[:, :3]):
+                raise ValueError(f"DipPol-{pol} and IntField-{pol} list different dipoles")
+            if spacing is None:
+                spacing = _infer_spacing(p[:, :3])
+            # 열: x y z |F|^2 Fx.r Fx.i Fy.r Fy.i Fz.r Fz.i, Im(P·E*) = Σ (P.i E.r - P.r E.i)
+            absorbed = (p[:, 5::2] * e[:, 4::2] - p[:, 4::2] * e[:, 5::2]).sum(axis=1)
+            domains = grid.lookup(p[:, :3], spacing)
+            totals += np.bincount(domains, weights=absorbed, minlength=grid.n_domains + 1)
+    return 4.0 * math.pi * k * totals
+
+def wavelength_absorption(open_text: Callable, exists: Callable, wavelength: int, grid: DomainGrid,
+                          chunk_rows: int) -> Optional[np.ndarray]:
+    """파장 하나의 domain별 흡수 (두 편광 평균, 한 편광만 있으면 그 값), 필드 파일이 없으면 None"""
+    pols = [pol for pol in ('X', 'Y') if all(exists(f"{prefix}-{pol}") for prefix in FIELD_PREFIXES)]
+    if not pols:
+        return None
+    log_text = None
+    if exists('log'):
+        with open_text('log') as f:
+            log_text = f.read()
+    spacing = dipole_spacing(log_text)
+    results = [polarization_absorption(open_text, pol, grid, wavelength / 1000.0, spacing, chunk_rows)
+               for pol in pols]
+    return np.mean(results, axis=0)
+
+def absorption_columns(values: np.ndarray, materials: List[str]) -> Dict[str, float]:
+    """domain별 흡수 배열을 스펙트럼 열 dict로 (Cabs_domainN, Cabs_<물질>)"""
+    row = {f"Cabs_domain{n}": float(values[n]) for n in range(1, len(values))}
+    by_material = {}
+    for n, name in enumerate(materials, start=1):
+        by_material[f"Cabs_{name}"] = by_material.get(f"Cabs_{name}", 0.0) + float(values[n])
+    row.update(by_material)
+    return row
+
+def field_signature(lambda_dir: Path) -> List:
+    """파장 디렉토리의 필드 파일과 log 서명 ([이름, 크기, mtime])"""
+    signature = []
+    for name in FIELD_FILE_NAMES:
+        try:
+            stat = (Path(lambda_dir) / name).stat()
+        except OSError:
+            continue
+        signature.append([name, stat.st_size, stat.st_mtime_ns])
+    return signature
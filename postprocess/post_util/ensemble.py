@@ -0,0 +1,293 @@
+"""
+다분산(polydisperse) 앙상블 스펙트럼 모듈
+postprocess/post_util/ensemble.py
+
+이미 계산된 모델들 (*_results.csv + model_params.json)을 크기 (선택적으로 종횡비) 라이브러리로 보고,
+크기 분포 (lognormal/normal/uniform/측정 histogram)의 구적점에서 log(C)-log(크기) 선형 (2차원은 bilinear)
+보간한 스펙트럼을 가중 평균하여 입자당 평균 Cext/Cabs/Csca를 계산한다.
+모든 구적점과 파장을 한 번의 배열 연산으로 보간하며, 라이브러리 간격의 보간 오차 (h²/8 |f''|)를
+분포 가중치로 구간별로 합산하여 추가 계산 시 앙상블 오차를 가장 많이 줄일 크기/종횡비를 추천한다.
+라이브러리 범위 밖의 분포 질량은 가장 가까운 모델 값으로 고정하고 별도로 보고한다.
+"""
+import logging
+import math
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .spectral_analysis import QUANTITIES, stack_spectra
+from .surrogate import load_spectral_library, LOG_SCALE_PARAMS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENSEMBLE_CONFIG = {
+    'size': None,                # 크기 분포 dict (예: {'distribution': 'lognormal', 'median': 0.05, 'sigma': 0.1})
+    'aspect': None,              # 선택적 두 번째 분포 (예: {'param': 'arg0', 'distribution': 'normal', 'mean': 1.5, 'std': 0.1})
+    'nodes': 24,                 # 분포당 구적점 수
+    'suggest': 3,                # 추천할 추가 크기/종횡비 수
+}
+
+def get_ensemble_config(config) -> Dict:
+    """config의 ENSEMBLE_CONFIG를 기본값과 병합"""
+    ensemble_config = dict(DEFAULT_ENSEMBLE_CONFIG)
+    ensemble_config.update(getattr(config, 'ENSEMBLE_CONFIG', {}) or {})
+    return ensemble_config
+
+def distribution_nodes(spec: Dict, n_nodes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """분포 dict의 (구적점 값, 합이 1인 가중치)
+
+    lognormal: median, sigma (ln 표준편차) / normal: mean, std (0 이하 구적점 제외) /
+    uniform: min, max / table: values, weights (측정 histogram 등)
+    """
+    kind = spec.get('distribution', 'lognormal')
+    if kind == 'table':
+        values = np.asarray(spec['values'], dtype=float)
+        weights = np.asarray(spec.get('weights', np.ones(len(values))), dtype=float)
+    elif kind == 'uniform':
+        z, w = np.polynomial.legendre.leggauss(n_nodes)
+        values = spec['min'] + (z + 1.0) / 2.0 * (spec['max'] - spec['min'])
+        weights = w
+    elif kind in ('lognormal', 'normal'):
+        # 확률론자 Hermite 구적 (가중치 exp(-z²/2))
+        z, w = np.polynomial.hermite_e.hermegauss(n_nodes)
+        if kind == 'lognormal':
+            values = spec['median'] * np.exp(spec['sigma'] * z)
+        else:
+            values = spec['mean'] + spec['std'] * z
+        weights = w
+    else:
+        raise ValueError(f"unknown distribution '{kind}' (lognormal, normal, uniform, table)")
+    keep = values > 0
+    if not keep.any() or weights[keep].sum() <= 0:
+        raise ValueError(f"distribution {spec} has no positive support")
+    return values[keep], weights[keep] / weights[keep].sum()
+
+def _axis_transform(name: str, values: np.ndarray) -> np.ndarray:
+    """보간 좌표 (크기는 log)"""
+    return np.log(values) if name in LOG_SCALE_PARAMS else np.asarray(values, dtype=float)
+
+def _bracket(axis: np.ndarray, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """구적점의 (왼쪽 라이브러리 index, 구간 내 위치 0..1, 범위 밖 여부), 범위 밖은 끝 값으로 고정"""
+    if len(axis) == 1:
+        return np.zeros(len(points), dtype=int), np.zeros(len(points)), points != axis[0]
+    index = np.clip(np.searchsorted(axis, points) - 1, 0, len(axis) - 2)
+    frac = (points - axis[index]) / (axis[index + 1] - axis[index])
+    outside = (frac < 0) | (frac > 1)
+    return index, np.clip(frac, 0.0, 1.0), outside
+
+def _curvature(axis: np.ndarray, table: np.ndarray) -> Optional[np.ndarray]:
+    """축 방향 구간별 |f''| 추정 (축 길이-1, ...), 라이브러리 점이 3개 미만이면 None"""
+    if len(axis) < 3:
+        return None
+    h = np.diff(axis)
+    shape = (-1,) + (1,) * (table.ndim - 1)
+    slopes = np.diff(table, axis=0) / h.reshape(shape)
+    # 비균일 3점 2차 미분 (내부 점), 양 끝은 이웃 내부 점 값 사용
+    second = 2.0 * np.diff(slopes, axis=0) / (h[:-1] + h[1:]).reshape(shape)
+    second = np.abs(np.concatenate([second[:1], second, second[-1:]], axis=0))
+    return np.maximum(second[:-1], second[1:])
+
+class EnsembleLibrary:
+    """크기 (와 종횡비) 라이브러리 위의 log 스펙트럼 표와 분포 평균"""
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], params: Dict[str, Dict], axes: List[str],
+                 quantities: List[str] = None):
+        self.axes = list(axes)
+        self.quantities = quantities or QUANTITIES
+        grid, stacked, names = stack_spectra(frames, self.quantities)
+        complete = np.all([np.isfinite(stacked[q]).all(axis=0) for q in self.quantities], axis=0)
+        if not complete.any():
+            raise ValueError("No wavelength is available in every library model")
+        if not complete.all():
+            logger.warning(f"Dropping {int((~complete).sum())} wavelengths missing in some library models")
+        self.wavelengths = grid[complete]
+
+        coords = np.array([[float(params[name][axis]) for axis in self.axes] for name in names])
+        self.values = [np.unique(coords[:, j]) for j in range(len(self.axes))]
+        self.axis_coords = [_axis_transform(axis, values) for axis, values in zip(self.axes, self.values)]
+        # 직교 격자 (크기 × 종횡비)의 log 스펙트럼 표: (크기 수, [종횡비 수,] 물리량 수, 파장 수)
+        shape = tuple(len(values) for values in self.values)
+        self.table = np.full(shape + (len(self.quantities), len(self.wavelengths)), np.nan)
+        self.models = {}
+        for row, name in enumerate(names):
+            index = tuple(int(np.searchsorted(values, coords[row, j])) for j, values in enumerate(self.values))
+            if index in self.models:
+                logger.warning(f"Duplicate library point {coords[row]}: using {name} over {self.models[index]}")
+            self.models[index] = name
+            self.table[index] = np.log(np.maximum(
+                np.vstack([stacked[q][row, complete] for q in self.quantities]), 1e-300))
+        missing = [tuple(float(self.values[j][i]) for j, i in enumerate(index))
+                   for index in np.ndindex(*shape) if index not in self.models]
+        if missing:
+            raise ValueError(f"Library is not a full {' x '.join(self.axes)} grid; missing models at {missing}")
+
+    def interpolate(self, points: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """구적점 좌표 배열들 (축별, 원래 단위)의 (log 스펙트럼 (점 수, 물리량 수, 파장 수), 범위 밖 여부)"""
+        coords = [_axis_transform(axis, np.asarray(p, dtype=float)) for axis, p in zip(self.axes, points)]
+        brackets = [_bracket(axis, c) for axis, c in zip(self.axis_coords, coords)]
+        outside = np.any([b[2] for b in brackets], axis=0)
+        if len(self.axes) == 1:
+            (index, frac, _), = brackets
+            upper = np.minimum(index + 1, len(self.axis_coords[0]) - 1)
+            f = frac[:, None, None]
+            return (1 - f) * self.table[index] + f * self.table[upper], outside
+        (i, fi, _), (j, fj, _) = brackets
+        i1 = np.minimum(i + 1, len(self.axis_coords[0]) - 1)
+        j1 = np.minimum(j + 1, len(self.axis_coords[1]) - 1)
+        fi, fj = fi[:, None, None], fj[:, None, None]
+        return ((1 - fi) * (1 - fj) * self.table[i, j] + fi * (1 - fj) * self.table[i1, j]
+                + (1 - fi) * fj * self.table[i, j1] + fi * fj * self.table[i1, j1]), outside
+
+    def average(self, distributions: List[Tuple[np.ndarray, np.ndarray]]) -> Dict:
+        """분포 (축별 (값, 가중치))의 앙상블 스펙트럼과 오차 기여 dict"""
+        grids = np.meshgrid(*[values for values, _ in distributions], indexing='ij')
+        points = [g.ravel() for g in grids]
+        weights = np.prod(np.meshgrid(*[w for _, w in distributions], indexing='ij'), axis=0).ravel()
+        log_spectra, outside = self.interpolate(points)
+        spectra = np.exp(log_spectra)
+        weighted = weights[:, None, None] * spectra
+        mean = weighted.sum(axis=0)
+
+        # 구간별 보간 오차: 구적점 기여 × h²/8 |f''| 을 앙상블 값에 대한 비율로 합산
+        contributions = []
+        for a, axis in enumerate(self.axes):
+            curvature = _curvature(self.axis_coords[a], np.moveaxis(self.table, a, 0))
+            coord = _axis_transform(axis, points[a])
+            index, _, axis_outside = _bracket(self.axis_coords[a], coord)
+            h = np.diff(self.axis_coords[a])
+            for k in range(len(h)):
+                members = (index == k) & ~outside
+                if not members.any():
+                    continue
+                if curvature is None:
+                    error = np.ones_like(mean)
+                    known = False
+                else:
+                    # 다른 축 방향은 가장 가까운 라이브러리 행의 곡률 사용
+                    local = curvature[k]
+                    if len(self.axes) == 2:
+                        other = 1 - a
+                        other_index, other_frac, _ = _bracket(
+                            self.axis_coords[other], _axis_transform(self.axes[other], points[other][members]))
+                        rows = np.clip(other_index + np.rint(other_frac).astype(int), 0,
+                                       len(self.axis_coords[other]) - 1)
+                        error = (weighted[members] * local[rows]).sum(axis=0) * h[k] ** 2 / 8.0 / mean
+                    else:
+                        error = weighted[members].sum(axis=0) * local * h[k] ** 2 / 8.0 / mean
+                    known = True
+                contributions.append({
+                    'param': axis, 'low': float(self.values[a][k]), 'high': float(self.values[a][k + 1]),
+                    'mass': float(weights[members].sum()),
+                    'rel_error': float(error.max()) if known else float('nan'),
+                    'error_spectrum': error if known else None,
+                })
+            for side, mask in (('below', coord < self.axis_coords[a][0]), ('above', coord > self.axis_coords[a][-1])):
+                if mask.any():
+                    # 범위 밖 질량이 앙상블 값에서 차지하는 비율 (고정값 사용에 따른 오차의 상한 지표)
+                    share = weighted[mask].sum(axis=0) / mean
+                    tail = np.exp(np.average(coord[mask], weights=weights[mask])) if axis in LOG_SCALE_PARAMS \
+                        else float(np.average(coord[mask], weights=weights[mask]))
+                    contributions.append({
+                        'param': axis, 'low': float(tail), 'high': float(tail), 'side': side,
+                        'mass': float(weights[mask].sum()), 'rel_error': float(share.max()),
+                        'error_spectrum': share,
+                    })
+        return {'mean': mean, 'weights': weights, 'outside_mass': float(weights[outside].sum()),
+                'contributions': contributions}
+
+    def suggestions(self, contributions: List[Dict], n_points: int) -> pd.DataFrame:
+        """오차 기여가 큰 순서의 추가 계산 후보 (구간은 log 중점, 범위 밖은 가중 평균 위치)"""
+        rows = []
+        for item in contributions:
+            if 'side' in item:
+                value, reason = item['low'], f"{item['mass']:.1%} of the distribution {item['side']} the library"
+                gain = item['rel_error']
+            else:
+                if item['param'] in LOG_SCALE_PARAMS:
+                    value = math.sqrt(item['low'] * item['high'])
+                else:
+                    value = (item['low'] + item['high']) / 2.0
+                reason = f"between {item['low']:g} and {item['high']:g} ({item['mass']:.1%} of the distribution)"
+                # 간격을 절반으로 줄이면 선형 보간 오차는 1/4
+                gain = 0.75 * item['rel_error'] if np.isfinite(item['rel_error']) else item['mass']
+            rows.append({'param': item['param'], 'value': value, 'est_rel_error': item['rel_error'],
+                         'expected_gain': gain, 'reason': reason})
+        df = pd.DataFrame(rows, columns=['param', 'value', 'est_rel_error', 'expected_gain', 'reason'])
+        if len(df) and len(self.axes) == 2:
+            other = {self.axes[0]: self.axes[1], self.axes[1]: self.axes[0]}
+            df['reason'] += df['param'].map(lambda p: f"; run at every {other[p]} in the library")
+        return df.sort_values('expected_gain', ascending=False).head(n_points).reset_index(drop=True)
+
+def library_axes(params: Dict[str, Dict], ensemble_config: Dict) -> List[str]:
+    """분포를 적용할 라이브러리 파라미터 (크기: size/eq_rad 중 모델마다 다른 것, 종횡비: aspect['param'])"""
+    size_spec = ensemble_config['size'] or {}
+    size_param = size_spec.get('param')
+    if size_param is None:
+        varying = [key for key in ('eq_rad', 'size')
+                   if len({p.get(key) for p in params.values()}) > 1
+                   and all(isinstance(p.get(key), (int, float)) for p in params.values())]
+        if not varying:
+            raise ValueError("Library models do not differ in size or eq_rad")
+        size_param = varying[0]
+    axes = [size_param]
+    aspect_spec = ensemble_config['aspect']
+    if aspect_spec:
+        axes.append(aspect_spec.get('param', 'arg0'))
+    for axis in axes:
+        bad = [name for name, p in params.items() if not isinstance(p.get(axis), (int, float))]
+        if bad:
+            raise ValueError(f"Library models without numeric '{axis}': {bad}")
+    # 분포를 주지 않은 형상 인수가 모델마다 다르면 서로 다른 입자가 섞이므로 거부
+    other = sorted({key for p in params.values() for key in p if key.startswith('arg') and key not in axes
+                    and len({str(q.get(key)) for q in params.values()}) > 1})
+    if other:
+        raise ValueError(f"Library models differ in {other}; set ENSEMBLE_CONFIG['aspect'] or separate the library")
+    return axes
+
+def ensemble_spectrum(base_dir: Path, ensemble_config: Dict, shape_type: str = None,
+                      refractive_index_sets=None) -> Tuple[pd.DataFrame, Dict, EnsembleLibrary]:
+    """라이브러리로 다분산 앙상블 스펙트럼 계산, (wavelength/Cext/Cabs/Csca/..._rel_error DataFrame, 보고 dict, 라이브러리)"""
+    if not ensemble_config.get('size'):
+        raise ValueError("ENSEMBLE_CONFIG['size'] distribution is required")
+    frames, params = load_spectral_library(base_dir, shape_type, refractive_index_sets)
+    if not frames:
+        raise ValueError(f"No simulated spectra with known parameters under {base_dir}")
+    axes = library_axes(params, ensemble_config)
+    library = EnsembleLibrary(frames, params, axes)
+
+    n_nodes = int(ensemble_config['nodes'])
+    specs = [ensemble_config['size']] + ([ensemble_config['aspect']] if ensemble_config['aspect'] else [])
+    result = library.average([distribution_nodes(spec, n_nodes) for spec in specs])
+    # 구적 오차: 구적점 수를 절반으로 한 결과와의 차이 (table 분포는 구적점이 고정이므로 모든 축이 table이면 NaN)
+    if all(spec.get('distribution', 'lognormal') == 'table' for spec in specs):
+        quadrature_error = float('nan')
+    else:
+        coarse_specs = [distribution_nodes(spec, max(n_nodes // 2, 2)) for spec in specs]
+        coarse = library.average(coarse_specs)['mean']
+        quadrature_error = float(np.max(np.abs(coarse - result['mean']) / result['mean']))
+
+    data = {'wavelength': library.wavelengths}
+    for q_index, q in enumerate(library.quantities):
+        data[q] = result['mean'][q_index]
+    interval_error = [c['error_spectrum'] for c in result['contributions']
+                      if c['error_spectrum'] is not None and 'side' not in c]
+    if interval_error:
+        total = np.sum(interval_error, axis=0)
+        for q_index, q in enumerate(library.quantities):
+            data[f'{q}_rel_error'] = total[q_index]
+    df = pd.DataFrame(data)
+
+    report = {
+        'axes': axes,
+        'library': {axis: [float(v) for v in values] for axis, values in zip(axes, library.values)},
+        'models': len(library.models),
+        'nodes': len(result['weights']),
+        'outside_mass': result['outside_mass'],
+        'quadrature_error': quadrature_error,
+        'interpolation_error': float(df[[c for c in df.columns if c.endswith('_rel_error')]].max().max())
+        if interval_error else float('nan'),
+        'suggestions': library.suggestions(result['contributions'], int(ensemble_config['suggest'])),
+    }
+    return df, report, library
@@ -0,0 +1,93 @@
+"""
+파장별 분석 결과 캐시 모듈
+postprocess/post_util/result_cache.py
+
+파장 디렉토리의 CrossSec 파일 (이름, 크기, mtime)을 서명으로 삼아 평균 단면적 행을
+<모델 디렉토리>/.postprocess_cache.json에 보관한다. 서명이 같은 파장은 다시 파싱하지 않으므로
+스트리밍 후처리가 이미 읽은 파장은 최종 후처리에서도 바로 재사용된다.
+"""
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE_NAME = '.postprocess_cache.json'
+CROSSSEC_FILE_NAMES = ('CrossSec', 'CrossSec-X', 'CrossSec-Y')
+
+def crosssec_signature(lambda_dir: Path) -> List:
+    """파장 디렉토리의 CrossSec 파일 서명 (없으면 빈 목록)"""
+    signature = []
+    for name in CROSSSEC_FILE_NAMES:
+        try:
+            stat = os.stat(Path(lambda_dir) / name)
+        except OSError:
+            continue
+        signature.append([name, stat.st_size, stat.st_mtime_ns])
+    # CrossSec 하나만 있으면 배향 평균/대칭 단일 편광 구분에 log를 읽으므로 서명에 포함
+    if signature and signature[0][0] == 'CrossSec':
+        try:
+            stat = os.stat(Path(lambda_dir) / 'log')
+            signature.append(['log', stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            pass
+    return signature
+
+def archived_crosssec_signature(archive, lambda_name: str) -> List:
+    """모델 archive에 묶인 파장의 CrossSec member 서명 ([이름, 크기, CRC], 디스크 서명과 같은 규칙)"""
+    signature = archive.signature(lambda_name, CROSSSEC_FILE_NAMES)
+    if signature and signature[0][0] == 'CrossSec':
+        signature += archive.signature(lambda_name, ['log'])
+    return signature
+
+class ResultCache:
+    """파장별 평균 단면적 행 캐시 (file_name으로 다른 파장별 결과도 같은 방식으로 보관)"""
+
+    def __init__(self, model_dir: Path, file_name: str = CACHE_FILE_NAME):
+        self.cache_file = Path(model_dir) / file_name
+        self.entries = {}
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+            self.entries = {int(wavelength): entry for wavelength, entry in data.items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable result cache {self.cache_file}: {e}")
+
+    def get(self, wavelength: int, signature: List) -> Optional[Dict]:
+        """서명이 일치하는 캐시 행 (없으면 None)"""
+        entry = self.entries.get(wavelength)
+        if entry is not None and signature and entry['signature'] == signature:
+            return entry['row']
+        return None
+
+    def put(self, wavelength: int, signature: List, row: Dict):
+        """캐시 행 저장"""
+        self.entries[wavelength] = {'signature': signature, 'row': row}
+        self.dirty = True
+
+    def prune(self, wavelengths):
+        """디렉토리가 사라진 파장 제거"""
+        for wavelength in set(self.entries) - set(wavelengths):
+            del self.entries[wavelength]
+            self.dirty = True
+
+    def save(self):
+        """변경이 있으면 임시 파일에 쓴 뒤 교체"""
+        if not self.dirty:
+            return
+        tmp_file = self.cache_file.with_name(f"{self.cache_file.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump({str(w): entry for w, entry in sorted(self.entries.items())}, f)
+            os.replace(tmp_file, self.cache_file)
+            self.dirty = False
+        except OSError as e:
+            logger.warning(f"Failed to write result cache {self.cache_file}: {e}")
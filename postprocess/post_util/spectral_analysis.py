@@ -0,0 +1,217 @@
+"""
+스펙트럼 공명/피크 일괄 분석 모듈
+postprocess/post_util/spectral_analysis.py
+
+여러 모델의 스펙트럼을 (모델 수, 파장 수) 배열로 쌓아 한 번의 NumPy 연산으로
+서브그리드 피크 위치(국소 2차 함수 피팅), FWHM, 다중 피크, 흡수 비율 적분을 계산
+"""
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+QUANTITIES = ['Cext', 'Cabs', 'Csca']
+PEAKS_FILE_SUFFIX = '_peaks.csv'
+
+def stack_spectra(frames: Dict[str, pd.DataFrame], quantities: List[str] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray], List[str]]:
+    """모델별 DataFrame들을 공통 파장 격자 위의 (모델 수, 파장 수) 배열로 변환 (없는 값은 NaN)"""
+    quantities = quantities or QUANTITIES
+    names = list(frames.keys())
+    grid = np.unique(np.concatenate([frames[name]['wavelength'].to_numpy(dtype=float) for name in names]))
+
+    stacked = {q: np.full((len(names), len(grid)), np.nan) for q in quantities}
+    for row, name in enumerate(names):
+        df = frames[name]
+        columns = np.searchsorted(grid, df['wavelength'].to_numpy(dtype=float))
+        for q in quantities:
+            if q in df:
+                stacked[q][row, columns] = df[q].to_numpy(dtype=float)
+    return grid, stacked, names
+
+def _parabola_vertex(x0, x1, x2, y0, y1, y2):
+    """세 점을 지나는 2차 함수의 꼭짓점 (비균일 격자 지원, 배열 연산)"""
+    denom = (x0 - x1) * (x0 - x2) * (x1 - x2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a = (x2 * (y1 - y0) + x1 * (y0 - y2) + x0 * (y2 - y1)) / denom
+        b = (x2 ** 2 * (y0 - y1) + x1 ** 2 * (y2 - y0) + x0 ** 2 * (y1 - y2)) / denom
+        c = (x1 * x2 * (x1 - x2) * y0 + x2 * x0 * (x2 - x0) * y1 + x0 * x1 * (x0 - x1) * y2) / denom
+        xv = -b / (2 * a)
+        yv = c - b ** 2 / (4 * a)
+
+    # 아래로 볼록하지 않거나 구간을 벗어나면 격자점 값 사용
+    ok = np.isfinite(xv) & np.isfinite(yv) & (a < 0) & (xv >= x0) & (xv <= x2)
+    return np.where(ok, xv, x1), np.where(ok, yv, y1)
+
+def _half_max_width(x, Y, peak_idx, peak_val):
+    """피크 양쪽에서 절반 높이를 처음 지나는 지점을 선형 보간하여 FWHM 계산 (배열 연산)"""
+    n, m = Y.shape
+    rows = np.arange(n)
+    cols = np.arange(m)[None, :]
+    half = peak_val / 2.0
+    below = Y < half[:, None]
+
+    left = np.where(below & (cols < peak_idx[:, None]), cols, -1).max(axis=1)
+    right = np.where(below & (cols > peak_idx[:, None]), cols, m).min(axis=1)
+    valid = (peak_idx >= 0) & (left >= 0) & (right < m)
+
+    left_c = np.clip(left, 0, m - 2)
+    right_c = np.clip(right, 1, m - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        xl = x[left_c] + (half - Y[rows, left_c]) * (x[left_c + 1] - x[left_c]) / (Y[rows, left_c + 1] - Y[rows, left_c])
+        xr = x[right_c - 1] + (half - Y[rows, right_c - 1]) * (x[right_c] - x[right_c - 1]) / (Y[rows, right_c] - Y[rows, right_c - 1])
+    return np.where(valid, xr - xl, np.nan)
+
+def find_peaks_batch(wavelengths, spectra, max_peaks: int = 3, min_rel_height: float = 0.1,
+                     min_separation: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """(모델 수, 파장 수) 스펙트럼 배열에서 모델별 상위 max_peaks개 피크 검출
+
+    반환값 (모두 (모델 수, max_peaks) 배열, 피크가 없으면 index=-1 / 나머지 NaN):
+        index           격자상의 피크 인덱스
+        grid_wavelength 격자상의 피크 파장
+        wavelength      2차 함수 피팅으로 보정한 서브그리드 피크 파장
+        value           보정된 피크 값
+        fwhm            반치폭 (nm)
+        at_edge         국소 최대가 없어 스펙트럼 끝의 최댓값을 사용한 경우 True
+    """
+    x = np.asarray(wavelengths, dtype=float)
+    Y = np.atleast_2d(np.asarray(spectra, dtype=float))
+    n, m = Y.shape
+    rows = np.arange(n)
+    filled = np.where(np.isfinite(Y), Y, -np.inf)
+
+    # 국소 최대 후보 (양 옆보다 크거나 같은 점) + 상대 높이 필터
+    is_max = np.zeros((n, m), dtype=bool)
+    if m >= 3:
+        is_max[:, 1:-1] = (filled[:, 1:-1] > filled[:, :-2]) & (filled[:, 1:-1] >= filled[:, 2:])
+    global_max = filled.max(axis=1)
+    is_max &= filled >= min_rel_height * global_max[:, None]
+    candidates = np.where(is_max, filled, -np.inf)
+
+    # 높은 피크부터 하나씩 선택하고 min_separation 이내 후보 제거
+    peak_idx = np.full((n, max_peaks), -1, dtype=int)
+    for k in range(max_peaks):
+        idx = candidates.argmax(axis=1)
+        valid = np.isfinite(candidates[rows, idx])
+        peak_idx[valid, k] = idx[valid]
+        if min_separation:
+            suppress = np.abs(x[None, :] - x[idx][:, None]) < min_separation
+        else:
+            suppress = np.arange(m)[None, :] == idx[:, None]
+        candidates[suppress & valid[:, None]] = -np.inf
+
+    # 국소 최대가 전혀 없으면 (단조 스펙트럼) 전체 최댓값을 끝점 피크로 사용
+    at_edge = np.zeros((n, max_peaks), dtype=bool)
+    no_peak = (peak_idx[:, 0] < 0) & np.isfinite(global_max)
+    peak_idx[no_peak, 0] = filled[no_peak].argmax(axis=1)
+    at_edge[no_peak, 0] = True
+
+    result = {key: np.full((n, max_peaks), np.nan) for key in ('grid_wavelength', 'wavelength', 'value', 'fwhm')}
+    result['index'] = peak_idx
+    result['at_edge'] = at_edge
+
+    for k in range(max_peaks):
+        p = peak_idx[:, k]
+        found = p >= 0
+        p_safe = np.where(found, p, 0)
+        grid_val = Y[rows, p_safe]
+
+        # 양 옆 점이 있는 경우에만 2차 함수 보정
+        inner = found & (p_safe > 0) & (p_safe < m - 1) & ~at_edge[:, k]
+        i0 = np.clip(p_safe - 1, 0, m - 1)
+        i2 = np.clip(p_safe + 1, 0, m - 1)
+        xv, yv = _parabola_vertex(x[i0], x[p_safe], x[i2], Y[rows, i0], grid_val, Y[rows, i2])
+        xv = np.where(inner, xv, x[p_safe])
+        yv = np.where(inner, yv, grid_val)
+
+        width = _half_max_width(x, Y, np.where(found & ~at_edge[:, k], p, -1), yv)
+
+        result['grid_wavelength'][:, k] = np.where(found, x[p_safe], np.nan)
+        result['wavelength'][:, k] = np.where(found, xv, np.nan)
+        result['value'][:, k] = np.where(found, yv, np.nan)
+        result['fwhm'][:, k] = width
+
+    return result
+
+def absorption_fraction_integrals(wavelengths, cabs, cext) -> Dict[str, np.ndarray]:
+    """모델별 흡수 비율: ∫Cabs dλ / ∫Cext dλ (사다리꼴 적분, NaN 구간 제외) 및 평균 Cabs/Cext"""
+    x = np.asarray(wavelengths, dtype=float)
+    cabs = np.atleast_2d(np.asarray(cabs, dtype=float))
+    cext = np.atleast_2d(np.asarray(cext, dtype=float))
+
+    valid = np.isfinite(cabs) & np.isfinite(cext)
+    segment = valid[:, :-1] & valid[:, 1:]
+    dx = np.diff(x)[None, :]
+    abs_integral = np.where(segment, 0.5 * (cabs[:, :-1] + cabs[:, 1:]) * dx, 0.0).sum(axis=1)
+    ext_integral = np.where(segment, 0.5 * (cext[:, :-1] + cext[:, 1:]) * dx, 0.0).sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        integral_fraction = np.where(ext_integral > 0, abs_integral / ext_integral, np.nan)
+        ratio = np.where(valid & (cext != 0), cabs / cext, np.nan)
+        counts = np.isfinite(ratio).sum(axis=1)
+        mean_fraction = np.where(counts > 0, np.nansum(ratio, axis=1) / np.maximum(counts, 1), np.nan)
+
+    return {
+        'abs_integral': abs_integral,
+        'ext_integral': ext_integral,
+        'abs_fraction_integral': integral_fraction,
+        'abs_fraction_mean': mean_fraction,
+    }
+
+def analyze_spectra(wavelengths, stacked: Dict[str, np.ndarray], names: List[str], max_peaks: int = 3,
+                    min_rel_height: float = 0.1, min_separation: Optional[float] = 20.0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """쌓인 스펙트럼 전체를 한 번에 분석하여 (모델별 요약 DataFrame, 피크 long-format DataFrame) 반환"""
+    x = np.asarray(wavelengths, dtype=float)
+    summary = {'model': names, 'n_points': np.isfinite(stacked[QUANTITIES[0]]).sum(axis=1)}
+    peak_frames = []
+
+    for q in QUANTITIES:
+        if q not in stacked:
+            continue
+        peaks = find_peaks_batch(x, stacked[q], max_peaks, min_rel_height, min_separation)
+        # 스펙트럼 끝의 최댓값 (국소 최대가 없는 단조 스펙트럼)은 공명이 아니므로 별도 열로만 기록
+        edge = peaks['at_edge'][:, 0]
+        summary[f'{q}_peak_wavelength'] = np.where(edge, np.nan, peaks['wavelength'][:, 0])
+        summary[f'{q}_peak_value'] = np.where(edge, np.nan, peaks['value'][:, 0])
+        summary[f'{q}_fwhm'] = np.where(edge, np.nan, peaks['fwhm'][:, 0])
+        summary[f'{q}_n_peaks'] = ((peaks['index'] >= 0) & ~peaks['at_edge']).sum(axis=1)
+        summary[f'{q}_edge_max_wavelength'] = np.where(edge, peaks['wavelength'][:, 0], np.nan)
+
+        found = (peaks['index'] >= 0) & ~peaks['at_edge']
+        model_idx, rank_idx = np.nonzero(found)
+        peak_frames.append(pd.DataFrame({
+            'model': np.asarray(names, dtype=object)[model_idx],
+            'quantity': q,
+            'rank': rank_idx + 1,
+            'wavelength': peaks['wavelength'][found],
+            'value': peaks['value'][found],
+            'fwhm': peaks['fwhm'][found],
+            'grid_wavelength': peaks['grid_wavelength'][found],
+        }))
+
+    if 'Cabs' in stacked and 'Cext' in stacked:
+        fractions = absorption_fraction_integrals(x, stacked['Cabs'], stacked['Cext'])
+        summary['abs_fraction_integral'] = fractions['abs_fraction_integral']
+        summary['abs_fraction_mean'] = fractions['abs_fraction_mean']
+
+    summary_df = pd.DataFrame(summary)
+    peaks_df = pd.concat(peak_frames, ignore_index=True) if peak_frames else pd.DataFrame()
+    return summary_df, peaks_df
+
+def analyze_dataframe(df: pd.DataFrame, model_name: str, **kwargs) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """단일 모델 DataFrame (wavelength, Cext, Cabs, Csca) 분석"""
+    grid, stacked, names = stack_spectra({model_name: df})
+    return analyze_spectra(grid, stacked, names, **kwargs)
+
+def collect_peak_tables(base_dir: Path) -> pd.DataFrame:
+    """RESEARCH_BASE_DIR 아래 모델들의 *_peaks.csv를 모아 하나의 DataFrame으로 반환 (모델 간 비교용)"""
+    base_dir = Path(base_dir)
+    # lambda_*nm 내부까지 내려가지 않도록 모델 디렉토리 깊이(1~2단계)만 검색
+    files = sorted(base_dir.glob(f"*{PEAKS_FILE_SUFFIX}")) + sorted(base_dir.glob(f"*/*{PEAKS_FILE_SUFFIX}")) \
+        + sorted(base_dir.glob(f"*/*/*{PEAKS_FILE_SUFFIX}"))
+    frames = [pd.read_csv(f) for f in files]
+    logger.info(f"Collected {len(frames)} peak tables from {base_dir}")
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
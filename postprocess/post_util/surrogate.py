@@ -0,0 +1,276 @@
+"""
+스펙트럼 대리 모델(surrogate) 모듈
+postprocess/post_util/surrogate.py
+
+이미 계산된 모델들의 스펙트럼(*_results.csv)과 형상 파라미터(model_params.json)로
+Gaussian process 회귀를 구성하여, 새 파라미터(size, eq_rad, shape args)와 임의 파장에서의
+Cext/Cabs/Csca를 불확실도와 함께 예측하고 오차를 가장 줄일 다음 시뮬레이션 지점을 추천
+"""
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .spectral_analysis import QUANTITIES, stack_spectra
+
+logger = logging.getLogger(__name__)
+
+PARAMS_FILE_NAME = 'model_params.json'
+LOG_SCALE_PARAMS = ('size', 'eq_rad')
+
+# config_loader.generate_mat_type_from_shape가 만드는 자동 폴더명 패턴
+AUTO_NAME_PATTERNS = [
+    (re.compile(r'^sphere_eq(?P<eq_rad>[0-9.eE+-]+)$'), 'sphere'),
+    (re.compile(r'^sphere_(?P<size>[0-9.eE+-]+)$'), 'sphere'),
+    (re.compile(r'^ellipsoid_(?P<size>[0-9.eE+-]+)_ratio(?P<arg0>[0-9.]+)x(?P<arg1>[0-9.]+)$'), 'ellipsoid'),
+    (re.compile(r'^cylinder_(?P<size>[0-9.eE+-]+)_aspect(?P<arg0>[0-9.]+)$'), 'cylinder'),
+    (re.compile(r'^box_(?P<size>[0-9.eE+-]+)_ratio(?P<arg0>[0-9.]+)x(?P<arg1>[0-9.]+)$'), 'box'),
+    (re.compile(r'^coated_(?P<size>[0-9.eE+-]+)_ratio(?P<arg0>[0-9.]+)$'), 'coated'),
+]
+
+def model_params_from_config(config) -> Dict:
+    """config의 SHAPE_CONFIG/ADDA_PARAMS에서 surrogate용 모델 파라미터 추출"""
+    shape_config = getattr(config, 'SHAPE_CONFIG', {'type': 'sphere', 'args': []})
+    adda_params = getattr(config, 'ADDA_PARAMS', {})
+    params = {
+        'shape_type': shape_config.get('type', 'sphere'),
+        'size': adda_params.get('size'),
+        'eq_rad': shape_config.get('eq_rad'),
+        'refractive_index_sets': adda_params.get('refractive_index_sets'),
+    }
+    for i, value in enumerate(shape_config.get('args', []) or []):
+        params[f'arg{i}'] = value
+    return params
+
+def write_model_params(config, model_dir: Path) -> Path:
+    """모델 디렉토리에 model_params.json 저장"""
+    params_file = Path(model_dir) / PARAMS_FILE_NAME
+    with open(params_file, 'w') as f:
+        json.dump(model_params_from_config(config), f, indent=2, default=str)
+    return params_file
+
+def parse_model_params(name: str) -> Optional[Dict]:
+    """자동 생성된 MAT_TYPE 폴더명에서 파라미터 추출 (model_params.json이 없는 경우)"""
+    for pattern, shape_type in AUTO_NAME_PATTERNS:
+        match = pattern.match(name)
+        if match:
+            params = {'shape_type': shape_type}
+            params.update({key: float(value) for key, value in match.groupdict().items()})
+            return params
+    return None
+
+def load_spectral_library(base_dir: Path, shape_type: str = None,
+                          refractive_index_sets=None) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Dict]]:
+    """base_dir 아래 *_results.csv와 파라미터를 모아 (스펙트럼 dict, 파라미터 dict) 반환"""
+    base_dir = Path(base_dir)
+    # lambda_*nm 내부까지 내려가지 않도록 모델 디렉토리 깊이만 검색
+    result_files = sorted(base_dir.glob("*_results.csv")) + sorted(base_dir.glob("*/*_results.csv")) \
+        + sorted(base_dir.glob("*/*/*_results.csv"))
+
+    frames, params = {}, {}
+    for result_file in result_files:
+        name = result_file.name[:-len("_results.csv")]
+        model_params = None
+        for candidate in (result_file.parent / PARAMS_FILE_NAME, result_file.parent / name / PARAMS_FILE_NAME):
+            if candidate.exists():
+                with open(candidate, 'r') as f:
+                    model_params = json.load(f)
+                break
+        if model_params is None:
+            model_params = parse_model_params(name)
+        if model_params is None:
+            logger.debug(f"Skipping {name}: no model parameters")
+            continue
+        if shape_type and model_params.get('shape_type') != shape_type:
+            continue
+        if (refractive_index_sets is not None and model_params.get('refractive_index_sets') is not None
+                and model_params['refractive_index_sets'] != refractive_index_sets):
+            continue
+        frames[name] = pd.read_csv(result_file)
+        params[name] = model_params
+
+    logger.info(f"Loaded {len(frames)} spectra for surrogate from {base_dir}")
+    return frames, params
+
+def _rbf_kernel(A, B, length_scale):
+    d2 = ((A[:, None, :] - B[None, :, :]) ** 2).sum(axis=-1)
+    return np.exp(-0.5 * d2 / length_scale ** 2)
+
+class SpectralSurrogate:
+    """형상 파라미터 → log 스펙트럼 Gaussian process 대리 모델 (모든 파장/물리량 동시 회귀)"""
+
+    def __init__(self, param_names: List[str], quantities: List[str] = None, nugget: float = 1e-6):
+        self.param_names = list(param_names)
+        self.quantities = quantities or QUANTITIES
+        self.nugget = nugget
+        self.length_scale = None
+        self.loo_rms = None
+
+    def _transform_params(self, X):
+        X = np.array(X, dtype=float, ndmin=2)
+        for j, name in enumerate(self.param_names):
+            if name in LOG_SCALE_PARAMS:
+                X[:, j] = np.log(X[:, j])
+        return X
+
+    def _normalize(self, X):
+        return (self._transform_params(X) - self.x_min) / self.x_span
+
+    def _denormalize(self, Xn):
+        X = Xn * self.x_span + self.x_min
+        for j, name in enumerate(self.param_names):
+            if name in LOG_SCALE_PARAMS:
+                X[:, j] = np.exp(X[:, j])
+        return X
+
+    def fit(self, X, wavelengths, stacked: Dict[str, np.ndarray], length_scales=None):
+        """X: (모델 수, 파라미터 수), stacked: 물리량 → (모델 수, 파장 수) 배열"""
+        X = np.array(X, dtype=float, ndmin=2)
+        if len(X) < 3:
+            raise ValueError(f"Surrogate needs at least 3 simulated models, got {len(X)}")
+
+        # 모든 모델에 값이 있는 파장만 사용
+        complete = np.all([np.isfinite(stacked[q]).all(axis=0) for q in self.quantities], axis=0)
+        if not complete.any():
+            raise ValueError("No wavelength is available in every model")
+        if not complete.all():
+            logger.warning(f"Dropping {int((~complete).sum())} wavelengths missing in some models")
+        self.wavelengths = np.asarray(wavelengths, dtype=float)[complete]
+        n_lambda = len(self.wavelengths)
+
+        # 단면적은 크기에 대해 수 자릿수로 변하므로 log 공간에서 회귀 (std ≈ 상대 오차)
+        Y = np.hstack([np.log(np.maximum(stacked[q][:, complete], 1e-300)) for q in self.quantities])
+
+        Xt = self._transform_params(X)
+        self.x_min = Xt.min(axis=0)
+        self.x_span = np.where(Xt.max(axis=0) > self.x_min, Xt.max(axis=0) - self.x_min, 1.0)
+        self.X_train = (Xt - self.x_min) / self.x_span
+        # 파라미터에 대한 1차 추세를 먼저 제거하고 잔차만 GP로 회귀 (경계 밖 외삽 안정화)
+        self.trend, *_ = np.linalg.lstsq(self._trend_basis(self.X_train), Y, rcond=None)
+        Yc = Y - self._trend_basis(self.X_train) @ self.trend
+
+        # leave-one-out 오차 (닫힌 형태)가 가장 작은 length scale 선택
+        best = None
+        for length_scale in (length_scales if length_scales is not None else np.logspace(-1.5, 0.7, 23)):
+            K = _rbf_kernel(self.X_train, self.X_train, length_scale) + self.nugget * np.eye(len(X))
+            try:
+                K_inv = np.linalg.inv(K)
+            except np.linalg.LinAlgError:
+                continue
+            alpha = K_inv @ Yc
+            loo = alpha / np.diag(K_inv)[:, None]
+            score = np.mean(loo ** 2)
+            if np.isfinite(score) and (best is None or score < best[0]):
+                best = (score, length_scale, K_inv, alpha, loo)
+
+        if best is None:
+            raise ValueError("Surrogate fit failed: kernel matrix is singular for all length scales")
+        _, self.length_scale, self.K_inv, self.alpha, loo = best
+        # 열(파장×물리량)별 신호 분산의 최대우도 추정치
+        self.amplitude2 = np.maximum((Yc * self.alpha).sum(axis=0) / len(X), 1e-12)
+        self.loo_rms = {q: float(np.sqrt(np.mean(loo[:, i * n_lambda:(i + 1) * n_lambda] ** 2)))
+                        for i, q in enumerate(self.quantities)}
+        logger.info(f"Surrogate fitted on {len(X)} models, length scale {self.length_scale:.3f}, "
+                    f"LOO log-RMS {self.loo_rms}")
+        return self
+
+    @staticmethod
+    def _trend_basis(Xn):
+        return np.hstack([np.ones((len(Xn), 1)), Xn])
+
+    def _unit_variance(self, Xn, X_train, K_inv):
+        Kq = _rbf_kernel(Xn, X_train, self.length_scale)
+        return np.maximum(1.0 + self.nugget - np.einsum('ij,jk,ik->i', Kq, K_inv, Kq), self.nugget)
+
+    def predict(self, X, wavelengths=None) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """새 파라미터 점들의 (평균 스펙트럼, 상대 표준편차) 반환, 각 값은 물리량 → (점 수, 파장 수)"""
+        Xn = self._normalize(X)
+        Kq = _rbf_kernel(Xn, self.X_train, self.length_scale)
+        mu = self._trend_basis(Xn) @ self.trend + Kq @ self.alpha
+        sigma = np.sqrt(self._unit_variance(Xn, self.X_train, self.K_inv)[:, None] * self.amplitude2[None, :])
+
+        n_lambda = len(self.wavelengths)
+        target = self.wavelengths if wavelengths is None else np.asarray(wavelengths, dtype=float)
+        means, rel_stds = {}, {}
+        for i, q in enumerate(self.quantities):
+            block = slice(i * n_lambda, (i + 1) * n_lambda)
+            log_mean, log_std = mu[:, block], sigma[:, block]
+            if wavelengths is not None:
+                log_mean = np.vstack([np.interp(target, self.wavelengths, row) for row in log_mean])
+                log_std = np.vstack([np.interp(target, self.wavelengths, row) for row in log_std])
+            means[q] = np.exp(log_mean)
+            rel_stds[q] = log_std
+        return means, rel_stds
+
+    def suggest(self, n_points: int = 3, n_candidates: int = 4000, expand: float = 0.0,
+                seed: int = 0) -> pd.DataFrame:
+        """예측 분산이 가장 큰 지점부터 순차적으로 (가상 관측 추가하며) 다음 시뮬레이션 후보 선택"""
+        rng = np.random.default_rng(seed)
+        d = len(self.param_names)
+        candidates = rng.uniform(-expand, 1.0 + expand, size=(n_candidates, d))
+
+        X_train = self.X_train.copy()
+        K_inv = self.K_inv
+        mean_amplitude = float(np.sqrt(self.amplitude2.mean()))
+        chosen = []
+        for _ in range(n_points):
+            variance = self._unit_variance(candidates, X_train, K_inv)
+            best = int(np.argmax(variance))
+            chosen.append((candidates[best], float(np.sqrt(variance[best])) * mean_amplitude))
+            # 분산은 관측값과 무관하므로 위치만 추가하여 갱신
+            X_train = np.vstack([X_train, candidates[best]])
+            K = _rbf_kernel(X_train, X_train, self.length_scale) + self.nugget * np.eye(len(X_train))
+            K_inv = np.linalg.inv(K)
+            candidates = np.delete(candidates, best, axis=0)
+
+        points = self._denormalize(np.array([c[0] for c in chosen]))
+        df = pd.DataFrame(points, columns=self.param_names)
+        df['expected_rel_std'] = [c[1] for c in chosen]
+        return df
+
+def build_surrogate(base_dir: Path, shape_type: str = None, param_names: List[str] = None,
+                    refractive_index_sets=None) -> SpectralSurrogate:
+    """저장된 결과로부터 surrogate 구성 (param_names 미지정 시 모델 간에 변하는 파라미터 자동 선택)"""
+    frames, params = load_spectral_library(base_dir, shape_type, refractive_index_sets)
+    if not frames:
+        raise ValueError(f"No simulated spectra with known parameters under {base_dir}")
+    # 형상이나 물질이 다른 스펙트럼을 같은 파라미터 공간에서 보간하지 않음
+    for key in ('shape_type', 'refractive_index_sets'):
+        values = {json.dumps(p.get(key), sort_keys=True) for p in params.values() if p.get(key) is not None}
+        if len(values) > 1:
+            raise ValueError(f"Library under {base_dir} mixes {len(values)} different {key} values; "
+                             f"restrict it with shape_type / refractive_index_sets")
+
+    names = list(frames.keys())
+    if param_names is None:
+        candidates = sorted({key for p in params.values() for key in p
+                             if key == 'size' or key == 'eq_rad' or key.startswith('arg')})
+        param_names = []
+        for key in candidates:
+            values = [params[name].get(key) for name in names]
+            if all(isinstance(v, (int, float)) for v in values) and len(set(values)) > 1:
+                param_names.append(key)
+        if not param_names:
+            raise ValueError("Library parameters do not vary; nothing to interpolate over")
+
+    X = [[float(params[name][key]) for key in param_names] for name in names]
+    grid, stacked, _ = stack_spectra(frames)
+    return SpectralSurrogate(param_names).fit(X, grid, stacked)
+
+def surrogate_query_frame(surrogate: SpectralSurrogate, point: Dict[str, float], wavelengths=None) -> pd.DataFrame:
+    """단일 파라미터 점의 예측 스펙트럼을 DataFrame (wavelength, Cext, Cext_rel_std, ...)으로 반환"""
+    missing = [name for name in surrogate.param_names if name not in point]
+    if missing:
+        raise ValueError(f"Query is missing parameters: {missing} (surrogate uses {surrogate.param_names})")
+    X = [[point[name] for name in surrogate.param_names]]
+    means, rel_stds = surrogate.predict(X, wavelengths)
+    target = surrogate.wavelengths if wavelengths is None else np.asarray(wavelengths, dtype=float)
+    data = {'wavelength': target}
+    for q in surrogate.quantities:
+        data[q] = means[q][0]
+        data[f'{q}_rel_std'] = rel_stds[q][0]
+    return pd.DataFrame(data)
@@ -5,15 +5,33 @@ postprocess/postprocess.py
 config.py에서 지정한 MAT_TYPE을 사용하거나 자동 생성하여 분석
 refractive test 모드에서는 굴절률이름/형상_크기 구조 지원
 """
+import io
 import logging
 import pandas as pd
 import re
+import signal
 import sys
 import os
+import time
 from pathlib import Path
 from typing import Dict, List, Optional
 
 from .post_util import CrossSecData, WavelengthData, ADDAPlotter
+from .post_util.spectral_analysis import (
+    stack_spectra, analyze_spectra, analyze_dataframe, PEAKS_FILE_SUFFIX
+)
+from .post_util.surrogate import build_surrogate, write_model_params, surrogate_query_frame
+from .post_util.ensemble import ensemble_spectrum, get_ensemble_config
+from .post_util.result_cache import ResultCache, crosssec_signature, archived_crosssec_signature
+from .post_util.domain_absorption import (
+    DomainGrid, get_absorption_config, material_names, find_shape_file, wavelength_absorption,
+    absorption_columns, field_signature, ABSORPTION_CACHE_FILE_NAME, FIELD_FILE_NAMES
+)
+from adda_utils.stage_tracer import trace_span, TRACE_FILE_NAME
+from adda_utils.run_ledger import RunLedger
+from adda_utils.config_loader import sweep_wavelengths
+from adda_utils.model_archive import ModelArchive, archive_path
+from adda_utils.shape_coarsen import apply_coarse_variant
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +66,8 @@ def load_config(config_file: str = None):
         
         config = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(config)
+        # 거친 형상 미리보기 스윕 (ADDA_COARSE_FACTOR)이면 형상/MAT_TYPE을 스윕과 같게 교체
+        config = apply_coarse_variant(config)
         
         logger.info(f"Config loaded from: {config_path}")
         return config
@@ -187,46 +207,171 @@ def generate_refractive_test_mat_type(config):
 class ADDAModelAnalyzer:
     """ADDA 모델 분석 클래스 - config 기반"""
     
-    def __init__(self, model_dir: Path, mat_type: str = None):
+    def __init__(self, model_dir: Path, mat_type: str = None, use_cache: bool = True,
+                 skip_running: bool = False):
         self.model_dir = Path(model_dir)
         self.mat_type = mat_type or self.model_dir.name
         self.model_name = self.model_dir.name
         self.wavelength_data = {}
+        # CrossSec 서명이 같은 파장은 캐시된 평균 행 재사용 (.postprocess_cache.json)
+        self.cache = ResultCache(self.model_dir) if use_cache else None
+        self.cached_rows = {}
+        # 실행 중인 작업(.run/*.pid)의 파장은 CrossSec-X만 있는 중간 상태일 수 있으므로 제외
+        self.skip_running = skip_running
         self.df = None
+        self.spectral_summary = None
+        self.peaks_df = None
+        # 단계별 timing span 기록 파일 (ADDA_TRACE=0이면 기록하지 않음)
+        self.trace_file = self.model_dir / TRACE_FILE_NAME
         
         logger.info(f"Analyzing model: {self.model_name} (MAT_TYPE: {self.mat_type})")
         self._scan_wavelength_directories()
     
     def _scan_wavelength_directories(self):
         """파장 디렉토리들 스캔"""
-        lambda_pattern = re.compile(r'lambda_(\d+)nm')
+        lambda_pattern = re.compile(r'lambda_(\d+)nm$')
+        run_dir = self.model_dir / ".run"
+        found = []
         
         for item in self.model_dir.iterdir():
             if item.is_dir():
                 match = lambda_pattern.match(item.name)
                 if match:
                     wavelength = int(match.group(1))
-                    wave_data = WavelengthData(wavelength, item)
+                    if self.skip_running and (run_dir / f"{item.name}.pid").exists():
+                        continue
+                    found.append(wavelength)
+                    signature = crosssec_signature(item) if self.cache is not None else None
+                    cached_row = self.cache.get(wavelength, signature) if self.cache is not None else None
+                    if cached_row is not None:
+                        self.cached_rows[wavelength] = cached_row
+                        continue
+                    with trace_span('file_parse', wavelength, self.trace_file, profile=False):
+                        wave_data = WavelengthData(wavelength, item)
                     if wave_data.is_valid:
                         self.wavelength_data[wavelength] = wave_data
+                        if self.cache is not None:
+                            self.cache.put(wavelength, signature, wave_data.get_averaged_data())
                         logger.debug(f"Found valid data for {wavelength} nm")
         
-        logger.info(f"Found {len(self.wavelength_data)} valid wavelength datasets")
+        # 모델 archive로 묶인 파장 (디스크에 같은 파장 디렉토리가 있으면 디스크 우선)
+        if archive_path(self.model_dir).exists():
+            with ModelArchive(self.model_dir) as archive:
+                for lambda_name in archive.lambda_names():
+                    wavelength = int(lambda_pattern.match(lambda_name).group(1))
+                    if wavelength in found:
+                        continue
+                    found.append(wavelength)
+                    signature = archived_crosssec_signature(archive, lambda_name) if self.cache is not None else None
+                    cached_row = self.cache.get(wavelength, signature) if self.cache is not None else None
+                    if cached_row is not None:
+                        self.cached_rows[wavelength] = cached_row
+                        continue
+                    with trace_span('file_parse', wavelength, self.trace_file, profile=False):
+                        wave_data = WavelengthData(wavelength, self.model_dir / lambda_name, archive)
+                    if wave_data.is_valid:
+                        self.wavelength_data[wavelength] = wave_data
+                        if self.cache is not None:
+                            self.cache.put(wavelength, signature, wave_data.get_averaged_data())
+        
+        if self.cache is not None and not self.skip_running:
+            self.cache.prune(found)
+        if self.cache is not None:
+            self.cache.save()
+        logger.info(f"Found {len(self.wavelength_data) + len(self.cached_rows)} valid wavelength datasets "
+                    f"({len(self.cached_rows)} from cache)")
     
     def create_dataframe(self) -> pd.DataFrame:
         """데이터를 DataFrame으로 변환"""
         data_list = []
         
-        for wavelength in sorted(self.wavelength_data.keys()):
-            wave_data = self.wavelength_data[wavelength]
-            avg_data = wave_data.get_averaged_data()
-            if avg_data:
-                data_list.append(avg_data)
-        
-        self.df = pd.DataFrame(data_list)
+        with trace_span('dataframe_build', trace_file=self.trace_file) as span:
+            for wavelength in sorted(set(self.wavelength_data) | set(self.cached_rows)):
+                if wavelength in self.cached_rows:
+                    avg_data = dict(self.cached_rows[wavelength])
+                else:
+                    avg_data = self.wavelength_data[wavelength].get_averaged_data()
+                if avg_data:
+                    data_list.append(avg_data)
+            
+            self.df = pd.DataFrame(data_list)
+            span['rows'] = len(self.df)
         logger.info(f"Created DataFrame with {len(self.df)} rows")
         return self.df
     
+    def add_domain_absorption(self, config) -> int:
+        """DipPol/IntField가 있는 파장에 domain/물질별 흡수 열 추가 (필드 파일 서명으로 캐시), 추가한 파장 수 반환"""
+        absorption_config = get_absorption_config(config)
+        if not absorption_config['enabled']:
+            return 0
+        if self.df is None:
+            self.create_dataframe()
+        if len(self.df) == 0:
+            return 0
+        
+        cache = ResultCache(self.model_dir, ABSORPTION_CACHE_FILE_NAME)
+        archive = ModelArchive(self.model_dir) if archive_path(self.model_dir).exists() else None
+        grids = {}
+        rows = []
+        try:
+            for wavelength in self.df['wavelength'].astype(int):
+                lambda_name = f"lambda_{wavelength}nm"
+                lambda_dir = self.model_dir / lambda_name
+                if lambda_dir.is_dir():
+                    open_text = lambda name, d=lambda_dir: open(d / name, 'r', errors='replace')
+                    exists = lambda name, d=lambda_dir: (d / name).exists()
+                    signature = field_signature(lambda_dir)
+                elif archive is not None and lambda_name in archive.members:
+                    open_text = lambda name, n=lambda_name: io.TextIOWrapper(archive.open(n, name), errors='replace')
+                    exists = lambda name, n=lambda_name: archive.exists(n, name)
+                    signature = archive.signature(lambda_name, FIELD_FILE_NAMES)
+                else:
+                    continue
+                shape_file = find_shape_file(config, lambda_dir)
+                if shape_file is None or not any(name.startswith('DipPol') for name, *_ in signature):
+                    continue
+                try:
+                    stat = shape_file.stat()
+                    signature = signature + [[str(shape_file), stat.st_size, stat.st_mtime_ns]]
+                    row = cache.get(wavelength, signature)
+                    if row is None:
+                        if shape_file not in grids:
+                            grids[shape_file] = DomainGrid(shape_file)
+                        grid = grids[shape_file]
+                        # domain이 하나면 분해할 것이 없음
+                        if grid.n_domains < 2:
+                            continue
+                        with trace_span('domain_absorption', wavelength, self.trace_file, profile=False):
+                            values = wavelength_absorption(open_text, exists, wavelength, grid,
+                                                           int(absorption_config['chunk_rows']))
+                        if values is None:
+                            continue
+                        row = absorption_columns(values, material_names(config, grid.n_domains))
+                        cache.put(wavelength, signature, row)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Domain absorption skipped for {wavelength} nm: {e}")
+                    continue
+                rows.append({'wavelength': wavelength, **row})
+        finally:
+            if archive is not None:
+                archive.close()
+            cache.save()
+        
+        if rows:
+            self.df = self.df.merge(pd.DataFrame(rows), on='wavelength', how='left')
+            logger.info(f"Added domain absorption columns for {len(rows)} wavelengths")
+        return len(rows)
+    
+    def analyze_spectrum(self):
+        """서브그리드 피크 위치, FWHM, 다중 피크, 흡수 비율 적분 계산"""
+        if self.df is None:
+            self.create_dataframe()
+        if len(self.df) == 0:
+            return None, None
+        
+        self.spectral_summary, self.peaks_df = analyze_dataframe(self.df, self.mat_type)
+        return self.spectral_summary, self.peaks_df
+    
     def save_results(self, output_dir: Path):
         """결과 저장 (CSV + TXT)"""
         if self.df is None:
@@ -255,6 +400,14 @@ class ADDAModelAnalyzer:
         
         logger.info(f"Spectrum data saved to {txt_file}")
         
+        # 피크 분석 결과 저장 (모델 간 비교는 collect_peak_tables 사용)
+        if self.peaks_df is None and len(self.df) > 0:
+            self.analyze_spectrum()
+        if self.peaks_df is not None:
+            peaks_file = output_dir / f"{safe_mat_type}{PEAKS_FILE_SUFFIX}"
+            self.peaks_df.to_csv(peaks_file, index=False)
+            logger.info(f"Peak analysis saved to {peaks_file}")
+        
         return csv_file, txt_file
     
     def plot_optical_properties(self, output_dir: Path = None, show: bool = True):
@@ -268,7 +421,8 @@ class ADDAModelAnalyzer:
             output_dir = self.model_dir
         
         plotter = ADDAPlotter(self.df, self.mat_type)
-        return plotter.plot_optical_properties(output_dir, show)
+        with trace_span('plot_render', trace_file=self.trace_file):
+            return plotter.plot_optical_properties(output_dir, show)
     
     def print_summary(self):
         """결과 요약 출력"""
@@ -281,6 +435,12 @@ class ADDAModelAnalyzer:
         print(f"{'='*60}")
         print(f"Wavelength range: {self.df['wavelength'].min()}-{self.df['wavelength'].max()} nm")
         print(f"Number of data points: {len(self.df)}")
+        if 'orientation_averaged' in self.df.columns:
+            n_avg = int(self.df['orientation_averaged'].fillna(False).astype(bool).sum())
+            print(f"Orientation-averaged points: {n_avg}/{len(self.df)}")
+        if 'symmetric_solve' in self.df.columns:
+            n_sym = int(self.df['symmetric_solve'].fillna(False).astype(bool).sum())
+            print(f"Single-polarization (symmetric) points: {n_sym}/{len(self.df)}")
         
         # 최대값들
         max_ext_idx = self.df['Cext'].idxmax()
@@ -300,13 +460,40 @@ class ADDAModelAnalyzer:
         avg_abs_fraction = (self.df['Cabs'] / self.df['Cext']).mean()
         print(f"\nAverage Absorption Fraction: {avg_abs_fraction:.4f}")
         
+        # 흡수 최대 파장의 물질별 흡수 비율 (domain 분해 열이 있을 때)
+        material_columns = [c for c in self.df.columns
+                            if c.startswith('Cabs_') and not c.startswith('Cabs_domain')]
+        if material_columns and pd.notna(self.df.loc[max_abs_idx, material_columns[0]]):
+            shares = self.df.loc[max_abs_idx, material_columns]
+            total = shares.sum()
+            if total:
+                parts = ', '.join(f"{c[len('Cabs_'):]} {value / total:.1%}" for c, value in shares.items())
+                print(f"\nAbsorption by material at {self.df.loc[max_abs_idx, 'wavelength']} nm: {parts}")
+                print(f"  (dipole sum / Cabs = {total / self.df.loc[max_abs_idx, 'Cabs']:.3f})")
+        
+        # 서브그리드 피크 분석
+        if self.peaks_df is None:
+            self.analyze_spectrum()
+        if self.peaks_df is not None and len(self.df) > 0:
+            print("\nResonance peaks (quadratic sub-grid fit):")
+            for _, peak in self.peaks_df.iterrows():
+                fwhm = f"{peak['fwhm']:.1f} nm" if pd.notna(peak['fwhm']) else "n/a"
+                print(f"  {peak['quantity']} #{peak['rank']}: {peak['wavelength']:.1f} nm, "
+                      f"value {peak['value']:.6e}, FWHM {fwhm}")
+            # 국소 최대가 없는 물리량은 스펙트럼 끝의 최댓값만 표시 (공명 아님)
+            for column in [c for c in self.spectral_summary.columns if c.endswith('_edge_max_wavelength')]:
+                edge_wavelength = self.spectral_summary[column].iloc[0]
+                if pd.notna(edge_wavelength):
+                    print(f"  {column[:-len('_edge_max_wavelength')]}: no resonance in range, "
+                          f"edge maximum at {edge_wavelength:.1f} nm")
+            integral_fraction = self.spectral_summary['abs_fraction_integral'].iloc[0]
+            print(f"\nIntegrated Absorption Fraction (∫Cabs/∫Cext): {integral_fraction:.4f}")
+        
         print(f"{'='*60}")
 
 # 편의 함수들 - 자동 MAT_TYPE 생성 지원
-def analyze_model_from_config(config_file: str = None, output_dir: Path = None, show_plots: bool = True) -> ADDAModelAnalyzer:
-    """편의 함수: config.py를 사용하여 모델 분석 (자동 MAT_TYPE 지원)"""
-    config = load_config(config_file)
-    
+def resolve_model_from_config(config):
+    """config에서 (MAT_TYPE, 모델 디렉토리) 결정 (refractive test 모드 포함)"""
     # config에서 필요한 값들 가져오기
     research_base_dir = getattr(config, 'RESEARCH_BASE_DIR', Path.home() / "research" / "adda")
     research_base_dir = Path(research_base_dir).expanduser()
@@ -327,22 +514,34 @@ def analyze_model_from_config(config_file: str = None, output_dir: Path = None,
         else:
             logger.info(f"Using config MAT_TYPE = {mat_type}")
     
-    model_dir = research_base_dir / mat_type
+    return mat_type, research_base_dir / mat_type
+
+def analyze_model_from_config(config_file: str = None, output_dir: Path = None, show_plots: bool = True) -> ADDAModelAnalyzer:
+    """편의 함수: config.py를 사용하여 모델 분석 (자동 MAT_TYPE 지원)"""
+    config = load_config(config_file)
+    mat_type, model_dir = resolve_model_from_config(config)
     
     if not model_dir.exists():
         raise FileNotFoundError(f"Model directory not found: {model_dir}")
     
     logger.info(f"Model directory: {model_dir}")
     
-    analyzer = ADDAModelAnalyzer(model_dir, mat_type)
+    # surrogate/ensemble 분석에서 사용할 형상 파라미터 기록
+    write_model_params(config, model_dir)
+    
+    with trace_span('file_scan', trace_file=model_dir / TRACE_FILE_NAME):
+        analyzer = ADDAModelAnalyzer(model_dir, mat_type)
     analyzer.create_dataframe()
+    # 다중 domain 형상의 domain/물질별 흡수 열 (ABSORPTION_CONFIG, 필드 파일이 있는 파장만)
+    analyzer.add_domain_absorption(config)
     
     # output_dir이 None이면 model_dir을 사용
     if output_dir is None:
         output_dir = model_dir
     
     # 결과 저장 (CSV + TXT)
-    csv_file, txt_file = analyzer.save_results(output_dir)
+    with trace_span('save_results', trace_file=analyzer.trace_file):
+        csv_file, txt_file = analyzer.save_results(output_dir)
     
     # 플롯 생성 및 저장
     plot_file = analyzer.plot_optical_properties(output_dir, show=show_plots)
@@ -371,6 +570,92 @@ def analyze_model(model_dir: Path, output_dir: Path = None, show_plots: bool = T
     analyzer.print_summary()
     return analyzer
 
+# 스트리밍 후처리 기본 설정 (config의 STREAM_CONFIG로 변경)
+DEFAULT_STREAM_CONFIG = {
+    'interval': 30,              # 모델 디렉토리 확인 주기 (초)
+    'min_update_interval': 120,  # CSV/요약 갱신 최소 간격 (초)
+    'plot_interval': 900,        # 플롯 갱신 최소 간격 (초)
+}
+
+def _stream_state(model_dir: Path) -> tuple:
+    """실행 중이 아닌 파장 디렉토리의 CrossSec 서명 목록 (변경 감지용)"""
+    run_dir = model_dir / ".run"
+    state = []
+    for item in model_dir.glob("lambda_*nm"):
+        if item.is_dir() and not (run_dir / f"{item.name}.pid").exists():
+            signature = crosssec_signature(item)
+            if signature:
+                state.append((item.name, str(signature)))
+    return tuple(sorted(state))
+
+def _sweep_finished(model_dir: Path, expected: set) -> bool:
+    """모든 파장이 실행 기록에 완료/실패로 남고 실행 중인 작업이 없으면 True"""
+    if not model_dir.is_dir():
+        return False
+    with RunLedger(model_dir) as ledger:
+        done = ledger.wavelengths('completed') | ledger.wavelengths('failed')
+    running = list((model_dir / ".run").glob("*.pid"))
+    return expected.issubset(done) and not running
+
+def stream_model_from_config(config_file: str = None, output_dir: Path = None, interval: float = None,
+                             once: bool = False) -> int:
+    """스윕과 함께 실행: 새로 끝난 파장을 읽어 CSV/요약/플롯을 주기적으로 갱신 (갱신 횟수 반환)"""
+    config = load_config(config_file)
+    stream_config = dict(DEFAULT_STREAM_CONFIG)
+    stream_config.update(getattr(config, 'STREAM_CONFIG', {}) or {})
+    if interval is not None:
+        stream_config['interval'] = interval
+    mat_type, model_dir = resolve_model_from_config(config)
+    output_dir = Path(output_dir) if output_dir else model_dir
+    
+    expected = set(sweep_wavelengths(config))
+    
+    # SIGTERM/SIGINT는 마지막 갱신(플롯 포함) 후 종료
+    stop = {'requested': False}
+    def request_stop(signum, frame):
+        stop['requested'] = True
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    
+    print(f"[STREAM] Watching {model_dir} ({len(expected)} wavelengths, "
+          f"update every >= {stream_config['min_update_interval']}s, plots every >= {stream_config['plot_interval']}s)")
+    last_state = ()
+    last_update = last_plot = 0.0
+    updates = 0
+    known = 0
+    while True:
+        finished = model_dir.exists() and _sweep_finished(model_dir, expected)
+        final = once or stop['requested'] or finished
+        state = _stream_state(model_dir) if model_dir.exists() else ()
+        now = time.time()
+        if state != last_state and (final or now - last_update >= stream_config['min_update_interval']):
+            analyzer = ADDAModelAnalyzer(model_dir, mat_type, skip_running=True)
+            with trace_span('stream_update', trace_file=analyzer.trace_file) as span:
+                df = analyzer.create_dataframe()
+                span['rows'] = len(df)
+                if len(df) > 0:
+                    analyzer.save_results(output_dir)
+                    if final or now - last_plot >= stream_config['plot_interval']:
+                        analyzer.plot_optical_properties(output_dir, show=False)
+                        last_plot = now
+            print(f"[STREAM] {time.strftime('%H:%M:%S')} {len(df)}/{len(expected)} wavelengths "
+                  f"(+{len(df) - known} new, {len(analyzer.wavelength_data)} parsed)", flush=True)
+            known = len(df)
+            last_state = state
+            last_update = now
+            updates += 1
+        if final:
+            break
+        # 신호를 빨리 처리하도록 1초 단위로 대기
+        deadline = time.time() + stream_config['interval']
+        while time.time() < deadline and not stop['requested']:
+            time.sleep(min(1.0, max(deadline - time.time(), 0.0)))
+    
+    reason = 'sweep finished' if finished else ('single pass' if once else 'stop requested')
+    print(f"[STREAM] Stopped ({reason}); "
+          f"{known} wavelengths in {output_dir}")
+    return updates
+
 def analyze_all_models_from_config(config_file: str = None, output_dir: Path = None, show_plots: bool = False):
     """편의 함수: config.py 기반으로 모델 분석 (자동 MAT_TYPE 지원)"""
     config = load_config(config_file)
@@ -437,3 +722,199 @@ def analyze_all_models(base_dir: Path, output_dir: Path = None, show_plots: bool
     
     logger.info(f"Processed {len(results)} models")
     return results
+
+def analyze_models_batch(base_dir: Path, output_dir: Path = None, max_peaks: int = 3):
+    """편의 함수: 저장된 *_results.csv 들을 한 번에 쌓아 피크/흡수 비율 일괄 분석
+
+    각 모델 결과 옆에 <모델>_peaks.csv를 기록하고, output_dir (기본값: base_dir)에
+    전체 모델 요약 all_models_spectral_summary.csv와 all_models_peak_table.csv를 저장
+    """
+    base_dir = Path(base_dir)
+    output_dir = Path(output_dir) if output_dir else base_dir
+    
+    # lambda_*nm 내부까지 내려가지 않도록 모델 디렉토리 깊이만 검색
+    result_files = sorted(base_dir.glob("*_results.csv")) + sorted(base_dir.glob("*/*_results.csv")) \
+        + sorted(base_dir.glob("*/*/*_results.csv"))
+    if not result_files:
+        logger.error(f"No *_results.csv found under {base_dir}")
+        return None, None
+    
+    # refractive 테스트 모드처럼 같은 모델 이름이 여러 디렉토리에 있을 수 있으므로 base_dir 기준 경로로 구분
+    frames, files = {}, {}
+    for result_file in result_files:
+        key = result_file.relative_to(base_dir).as_posix()[:-len("_results.csv")]
+        frames[key] = pd.read_csv(result_file)
+        files[key] = result_file
+    
+    grid, stacked, names = stack_spectra(frames)
+    summary_df, peaks_df = analyze_spectra(grid, stacked, names, max_peaks=max_peaks)
+    logger.info(f"Analyzed {len(names)} spectra on a {len(grid)}-point grid")
+    
+    for key, result_file in files.items():
+        name = result_file.name[:-len("_results.csv")]
+        peaks_df[peaks_df['model'] == key].to_csv(
+            result_file.parent / f"{name}{PEAKS_FILE_SUFFIX}", index=False)
+    
+    output_dir.mkdir(parents=True, exist_ok=True)
+    summary_df.to_csv(output_dir / "all_models_spectral_summary.csv", index=False)
+    peaks_df.to_csv(output_dir / "all_models_peak_table.csv", index=False)
+    logger.info(f"Batch spectral analysis saved to {output_dir}")
+    
+    return summary_df, peaks_df
+
+def query_surrogate(base_dir: Path, point: Dict[str, float], shape_type: str = None, output_dir: Path = None,
+                    tolerance: float = 0.05, n_suggest: int = 0, config_file: str = None):
+    """편의 함수: 저장된 스펙트럼으로 surrogate를 만들어 새 파라미터 점의 스펙트럼 예측
+
+    config_file이 있으면 ensemble_from_config와 같이 SHAPE_CONFIG['type']과 굴절률 세트가 같은 모델만 사용
+    (shape_type 인수가 우선). 최대 상대 표준편차가 tolerance 이하이면 시뮬레이션 대신 사용 가능한 것으로 판단
+    """
+    base_dir = Path(base_dir)
+    refrac_sets = None
+    if config_file is not None:
+        config = load_config(config_file)
+        shape_type = shape_type or getattr(config, 'SHAPE_CONFIG', {}).get('type')
+        refrac_sets = getattr(config, 'ADDA_PARAMS', {}).get('refractive_index_sets')
+    surrogate = build_surrogate(base_dir, shape_type, refractive_index_sets=refrac_sets)
+    df = surrogate_query_frame(surrogate, point)
+    
+    max_rel_std = max(df[f"{q}_rel_std"].max() for q in surrogate.quantities)
+    reliable = max_rel_std <= tolerance
+    
+    output_dir = Path(output_dir) if output_dir else base_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    slug = '_'.join(f"{key}{point[key]}" for key in surrogate.param_names)
+    output_file = output_dir / f"surrogate_{shape_type or 'all'}_{slug}.csv"
+    df.to_csv(output_file, index=False)
+    
+    print(f"\n{'='*60}")
+    print(f"SURROGATE PREDICTION: {point}")
+    print(f"{'='*60}")
+    print(f"Parameters: {surrogate.param_names} (length scale {surrogate.length_scale:.3f})")
+    print("Library LOO log-RMS: " + ', '.join(f"{q}={v:.3f}" for q, v in surrogate.loo_rms.items()))
+    peak_idx = df['Cext'].idxmax()
+    print(f"Predicted Cext peak: {df.loc[peak_idx, 'Cext']:.6e} at {df.loc[peak_idx, 'wavelength']:.0f} nm")
+    print(f"Max relative std: {max_rel_std:.3f} (tolerance {tolerance})")
+    if reliable:
+        print("[OK] Surrogate accuracy is within tolerance; a full sweep is not required")
+    else:
+        print("[WARN] Surrogate uncertainty exceeds tolerance; run the full simulation")
+    print(f"Saved to: {output_file}")
+    
+    suggestions = None
+    if n_suggest > 0:
+        suggestions = surrogate.suggest(n_suggest)
+        print("\nSuggested next simulations (largest uncertainty reduction first):")
+        print(suggestions.to_string(index=False))
+    print(f"{'='*60}")
+    
+    return df, reliable, suggestions
+
+def ensemble_from_config(config_file: str = None, base_dir: Path = None, output_dir: Path = None):
+    """편의 함수: ENSEMBLE_CONFIG의 크기 (와 종횡비) 분포로 이미 계산된 모델들의 다분산 앙상블 스펙트럼 계산
+
+    라이브러리는 base_dir (기본값: RESEARCH_BASE_DIR) 아래에서 SHAPE_CONFIG['type']과 굴절률 세트가 같은 모델들
+    """
+    config = load_config(config_file)
+    ensemble_config = get_ensemble_config(config)
+    if base_dir is None:
+        base_dir = getattr(config, 'RESEARCH_BASE_DIR', Path.home() / "research" / "adda")
+    base_dir = Path(base_dir).expanduser()
+    shape_type = getattr(config, 'SHAPE_CONFIG', {}).get('type')
+    refrac_sets = getattr(config, 'ADDA_PARAMS', {}).get('refractive_index_sets')
+    
+    df, report, library = ensemble_spectrum(base_dir, ensemble_config, shape_type, refrac_sets)
+    
+    output_dir = Path(output_dir) if output_dir else base_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    size_spec = ensemble_config['size']
+    slug = '_'.join([size_spec.get('distribution', 'lognormal')] +
+                    [f"{key}{value}" for key, value in size_spec.items()
+                     if key not in ('distribution', 'param', 'values', 'weights')])
+    output_file = output_dir / f"ensemble_{shape_type or 'all'}_{slug}.csv"
+    df.to_csv(output_file, index=False)
+    suggestions_file = output_file.with_name(f"{output_file.stem}_suggestions.csv")
+    report['suggestions'].to_csv(suggestions_file, index=False)
+    
+    print(f"\n{'='*60}")
+    print(f"POLYDISPERSE ENSEMBLE: {shape_type or 'all'}")
+    print(f"{'='*60}")
+    for axis, spec in zip(report['axes'], [size_spec, ensemble_config['aspect']]):
+        values = report['library'][axis]
+        print(f"{axis}: {spec.get('distribution', 'lognormal')} " +
+              ', '.join(f"{key}={value}" for key, value in spec.items() if key not in ('distribution', 'param')))
+        print(f"  library ({len(values)}): " + ', '.join(f"{v:g}" for v in values))
+    print(f"Library models: {report['models']}, quadrature nodes: {report['nodes']}, "
+          f"{len(df)} wavelengths")
+    peak_idx = df['Cext'].idxmax()
+    print(f"Ensemble Cext peak: {df.loc[peak_idx, 'Cext']:.6e} at {df.loc[peak_idx, 'wavelength']:.0f} nm")
+    if pd.isna(report['quadrature_error']):
+        print("Quadrature error (vs half the nodes): n/a (table distribution)")
+    else:
+        print(f"Quadrature error (vs half the nodes): {report['quadrature_error']:.2e}")
+    print(f"Interpolation error estimate (max relative): {report['interpolation_error']:.2e}")
+    if report['outside_mass'] > 0:
+        print(f"[WARN] {report['outside_mass']:.1%} of the distribution lies outside the library "
+              f"(clamped to the nearest model)")
+    print(f"Saved to: {output_file}")
+    if len(report['suggestions']):
+        print("\nSuggested additional simulations (largest ensemble error reduction first):")
+        print(report['suggestions'].to_string(index=False))
+    print(f"{'='*60}")
+    
+    return df, report
+
+def preview_model_from_config(config_file: str = None, output_dir: Path = None, show_plots: bool = True) -> pd.DataFrame:
+    """편의 함수: 준정적(Gans/MLWA) 미리보기 스펙트럼을 ADDA 결과와 같은 형식으로 저장/플롯
+
+    파일명은 *_results.csv, *_peaks.csv와 겹치지 않게 하여 batch/surrogate 분석에 섞이지 않도록 함
+    """
+    from adda_utils.quasistatic_preview import QuasiStaticPreview, AXES
+    
+    config = load_config(config_file)
+    mat_type, model_dir = resolve_model_from_config(config)
+    preview = QuasiStaticPreview(config_file)
+    result = preview.compute()
+    features = preview.features(result)
+    
+    df = pd.DataFrame({'wavelength': result['wavelength'], **result['averaged']})
+    for axis in result['axes']:
+        for key in ('Cext', 'Cabs', 'Csca'):
+            df[f"{key}_{axis}"] = result['per_axis'][key][AXES.index(axis)]
+    df['preview_method'] = 'mlwa' if preview.preview_config['mlwa'] else 'quasistatic'
+    
+    preview_name = f"{mat_type}_preview"
+    _, peaks_df = analyze_dataframe(df, preview_name)
+    
+    output_dir = Path(output_dir) if output_dir else model_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    safe_name = preview_name.replace('/', '_')
+    csv_file = output_dir / f"{safe_name}.csv"
+    df.to_csv(csv_file, index=False)
+    features_file = output_dir / f"{safe_name}_features.csv"
+    pd.DataFrame(features, columns=['axis', 'wavelength', 'value', 'fwhm', 'at_edge']).to_csv(features_file, index=False)
+    plot_file = ADDAPlotter(df, preview_name).plot_optical_properties(output_dir, show_plots)
+    
+    geometry = preview.geometry
+    print(f"\n{'='*60}")
+    print(f"QUASI-STATIC PREVIEW: {mat_type}")
+    print(f"{'='*60}")
+    print(f"Shape: {geometry['shape']} (ellipsoid semi-axes " +
+          ' x '.join(f"{a * 1000.0:.1f}" for a in geometry['semi_axes_um']) + " nm)")
+    print("Depolarization factors: " + ', '.join(f"L{axis}={value:.4f}" for axis, value
+                                                 in zip(AXES, geometry['depolarization'])))
+    print(f"Method: {df['preview_method'].iloc[0]}, {len(df)} wavelengths, "
+          f"polarizations {'/'.join(result['axes'])}")
+    for feature in features:
+        print(f"  {feature['axis']}-polarized resonance: {feature['wavelength']:.0f} nm, FWHM {feature['fwhm']:.0f} nm")
+    cext_peaks = peaks_df[peaks_df['quantity'] == 'Cext'] if len(peaks_df) > 0 else peaks_df
+    if len(cext_peaks) > 0:
+        print(f"Averaged Cext peak: {cext_peaks.iloc[0]['wavelength']:.1f} nm (sub-grid fit)")
+    print("\n[FILES] Generated files:")
+    print(f"  [CSV] Preview spectrum: {csv_file}")
+    print(f"  [CSV] Resonances: {features_file}")
+    if plot_file:
+        print(f"  [PLOT] Plot: {output_dir / f'{safe_name}_optical_properties.png'}")
+    print(f"{'='*60}")
+    
+    return df
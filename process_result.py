@@ -10,8 +10,15 @@ config.py의 MAT_TYPE을 사용하여 특정 모델만 분석
     python process_result.py --config custom_config.py   # 사용자 정의 config 사용
     python process_result.py --model MODEL               # 특정 모델만 분석 (기존 방식)
     python process_result.py --all-models               # 모든 model_* 분석 (기존 방식)
+    python process_result.py --batch-peaks --base-dir D # 저장된 모든 스펙트럼 피크 일괄 분석
+    python process_result.py --surrogate size=0.035,arg0=2.3 --shape-type ellipsoid --base-dir D
+                                                        # 저장된 스펙트럼으로 새 파라미터 예측
+    python process_result.py --ensemble                 # ENSEMBLE_CONFIG 크기 분포의 다분산 앙상블 스펙트럼
+    python process_result.py --stream                   # 스윕과 함께 실행, 끝난 파장부터 결과 갱신
+    python process_result.py --preview                  # ADDA 없이 준정적(Gans/MLWA) 미리보기 스펙트럼
     python process_result.py --show-plots               # 플롯 화면에 표시
     python process_result.py --verbose                  # 상세 로그
+    python process_result.py --profile                  # cProfile 결과를 <모델>/profiles/에 저장
 """
 import argparse
 import sys
@@ -25,7 +32,12 @@ try:
         analyze_model_from_config,
         analyze_all_models_from_config,
         analyze_model,
-        analyze_all_models
+        analyze_all_models,
+        analyze_models_batch,
+        query_surrogate,
+        ensemble_from_config,
+        stream_model_from_config,
+        preview_model_from_config
     )
 except ImportError as e:
     print(f"Import error: {e}")
@@ -78,6 +90,29 @@ Examples:
                        help='분석할 특정 모델명 (기존 방식용)')
     parser.add_argument('--all-models', action='store_true',
                        help='모든 model_* 디렉토리 분석 (기존 방식)')
+    parser.add_argument('--batch-peaks', action='store_true',
+                       help='base-dir 아래 저장된 *_results.csv 전체의 피크/흡수 비율 일괄 분석')
+    parser.add_argument('--surrogate', type=str, metavar='PARAMS',
+                       help='surrogate 예측할 파라미터 (예: size=0.035,arg0=2.3)')
+    parser.add_argument('--shape-type', type=str,
+                       help='surrogate 라이브러리로 사용할 형상 종류 (예: ellipsoid, 기본값: config의 SHAPE_CONFIG type)')
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                       help='surrogate 결과를 신뢰할 최대 상대 표준편차 (기본값: 0.05)')
+    parser.add_argument('--suggest', type=int, default=0,
+                       help='surrogate 오차를 가장 줄일 다음 시뮬레이션 지점 N개 추천')
+    
+    parser.add_argument('--ensemble', action='store_true',
+                       help='ENSEMBLE_CONFIG 크기(/종횡비) 분포로 계산된 모델들의 다분산 앙상블 스펙트럼과 추가 계산 추천')
+    
+    parser.add_argument('--stream', action='store_true',
+                       help='스윕 진행 중 새로 끝난 파장을 읽어 결과/플롯을 주기적으로 갱신 (스윕 종료 또는 SIGTERM 시 종료)')
+    parser.add_argument('--interval', type=float,
+                       help='--stream 모델 디렉토리 확인 주기 (초, 기본값: STREAM_CONFIG)')
+    parser.add_argument('--once', action='store_true',
+                       help='--stream 한 번만 갱신하고 종료')
+    
+    parser.add_argument('--preview', action='store_true',
+                       help='ellipsoid/cylinder/box 준정적(Gans/MLWA) 미리보기 스펙트럼과 공명 구간 (ADDA 결과 불필요)')
     
     # 공통 옵션들
     parser.add_argument('--output-dir', type=str,
@@ -86,9 +121,19 @@ Examples:
                        help='플롯을 화면에 표시 (저장도 함께)')
     parser.add_argument('--verbose', action='store_true',
                        help='상세 로그 출력')
+    parser.add_argument('--profile', action='store_true',
+                       help='후처리 단계에 cProfile 적용 (<모델>/profiles/*.prof)')
+    parser.add_argument('--no-trace', action='store_true',
+                       help='단계별 timing trace (trace.jsonl) 기록 끄기')
     
     args = parser.parse_args()
     
+    # 단계별 trace/profile 설정 (adda_utils/stage_tracer.py)
+    if args.profile:
+        os.environ['ADDA_PROFILE'] = '1'
+    if args.no_trace:
+        os.environ['ADDA_TRACE'] = '0'
+    
     # 로깅 설정
     setup_logging(args.verbose)
     logger = logging.getLogger(__name__)
@@ -106,7 +151,49 @@ Examples:
     
     try:
         # 모드 결정: 기존 방식 vs config 기반
-        if args.all_models:
+        if args.stream:
+            output_dir = Path(args.output_dir).expanduser() if args.output_dir else None
+            stream_model_from_config(args.config, output_dir, args.interval, args.once)
+            
+        elif args.preview:
+            output_dir = Path(args.output_dir).expanduser() if args.output_dir else None
+            preview_model_from_config(args.config, output_dir, args.show_plots)
+            
+        elif args.surrogate:
+            if not args.base_dir:
+                logger.error("--base-dir required when using --surrogate")
+                sys.exit(1)
+            
+            point = {}
+            for item in args.surrogate.split(','):
+                key, value = item.split('=', 1)
+                point[key.strip()] = float(value)
+            
+            base_dir = Path(args.base_dir).expanduser()
+            output_dir = Path(args.output_dir).expanduser() if args.output_dir else None
+            query_surrogate(base_dir, point, args.shape_type, output_dir, args.tolerance, args.suggest,
+                            args.config)
+            
+        elif args.ensemble:
+            base_dir = Path(args.base_dir).expanduser() if args.base_dir else None
+            output_dir = Path(args.output_dir).expanduser() if args.output_dir else None
+            ensemble_from_config(args.config, base_dir, output_dir)
+            
+        elif args.batch_peaks:
+            if not args.base_dir:
+                logger.error("--base-dir required when using --batch-peaks")
+                sys.exit(1)
+            
+            base_dir = Path(args.base_dir).expanduser()
+            output_dir = Path(args.output_dir).expanduser() if args.output_dir else base_dir
+            summary_df, peaks_df = analyze_models_batch(base_dir, output_dir)
+            if summary_df is None:
+                sys.exit(1)
+            
+            print(f"\n🎉 Batch spectral analysis complete: {len(summary_df)} spectra, {len(peaks_df)} peaks")
+            print(f"📊 Results saved to: {output_dir}")
+            
+        elif args.all_models:
             # 기존 방식: 모든 model_* 분석
             if not args.base_dir:
                 logger.error("--base-dir required when using --all-models")
@@ -33,6 +33,17 @@ fi
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 CONFIG_LOADER="$SCRIPT_DIR/adda_utils/config_loader.py"
 REFRAC_INTERPOLATOR="$SCRIPT_DIR/adda_utils/refrac_interpolator.py"
+SWEEP_MONITOR="$SCRIPT_DIR/adda_utils/sweep_monitor.py"
+ORIENTATION_AVG="$SCRIPT_DIR/adda_utils/orientation_avg.py"
+RETRY_POLICY="$SCRIPT_DIR/adda_utils/retry_policy.py"
+MEMORY_PLANNER="$SCRIPT_DIR/adda_utils/memory_planner.py"
+SCRATCH_STAGE="$SCRIPT_DIR/adda_utils/scratch_stage.py"
+RUN_LEDGER="$SCRIPT_DIR/adda_utils/run_ledger.py"
+MIE_SOLVER="$SCRIPT_DIR/adda_utils/mie_solver.py"
+QUASISTATIC_PREVIEW="$SCRIPT_DIR/adda_utils/quasistatic_preview.py"
+SHAPE_SYMMETRY="$SCRIPT_DIR/adda_utils/shape_symmetry.py"
+MODEL_ARCHIVE="$SCRIPT_DIR/adda_utils/model_archive.py"
+RESOURCE_SAMPLER="$SCRIPT_DIR/adda_utils/resource_sampler.py"
 
 if [ ! -f "$CONFIG_LOADER" ]; then
     echo "[ERROR] Config loader script not found: $CONFIG_LOADER"
@@ -44,6 +55,9 @@ if [ ! -f "$REFRAC_INTERPOLATOR" ]; then
     exit 1
 fi
 
+# 단계별 timing trace에서 같은 실행의 span을 묶는 ID (master.sh에서 지정하지 않은 경우)
+export ADDA_TRACE_RUN_ID="${ADDA_TRACE_RUN_ID:-$(date +%Y%m%d-%H%M%S)-$$}"
+
 # config 파일에서 기본 설정값들 로드
 echo "[CONFIG] Loading configuration from $CONFIG_FILE..."
 CONFIG_VALUES=$(python "$CONFIG_LOADER" "$CONFIG_FILE")
@@ -82,8 +96,50 @@ fi
 if [ -n "$BOOL_FLAGS" ]; then
     echo "   Boolean flags: $BOOL_FLAGS"
 fi
+if [ -n "$TRACE_FILE" ]; then
+    echo "   Stage trace: $TRACE_FILE"
+fi
+if [ "$SCRATCH_ENABLED" = "1" ]; then
+    echo "   Node-local scratch: $SCRATCH_BASE"
+fi
+if [ "$MIE_FAST_PATH" = "1" ]; then
+    echo "   Mie fast path: enabled (sphere/coated)"
+fi
+if [ "$ORIENT_MODE" = "adda" ]; then
+    echo "   Orientation averaging: ADDA built-in ($ORIENT_ARGS)"
+elif [ "$ORIENT_MODE" = "split" ]; then
+    echo "   Orientation averaging: $ORIENT_COUNT orientations, $ORIENT_JOBS parallel jobs x $ORIENT_PROCS processes"
+fi
 echo ""
 
+# 단계별 timing trace 설정 (refrac_interpolator.py 등 Python 단계에 전달)
+if [ -n "$TRACE_FILE" ]; then
+    export ADDA_TRACE_FILE="$TRACE_FILE"
+else
+    export ADDA_TRACE=0
+fi
+if [ "$PROFILE_ENABLED" = "1" ]; then
+    export ADDA_PROFILE=1
+fi
+
+# 현재 시각 (소수점 초)
+now_epoch() {
+    date +%s.%N
+}
+
+# bash 단계의 span을 trace 파일에 기록 (stage wavelength start end status [attrs JSON 내용])
+trace_emit() {
+    local stage=$1 wavelength=$2 start=$3 end=$4 status=$5 attrs=$6
+    if [ -z "$ADDA_TRACE_FILE" ]; then
+        return
+    fi
+    local duration
+    duration=$(awk -v s="$start" -v e="$end" 'BEGIN { printf "%.6f", e - s }')
+    printf '{"run_id": "%s", "stage": "%s", "wavelength": %s, "start": %s, "end": %s, "duration_s": %s, "status": "%s", "pid": %d, "host": "%s", "attrs": {%s}}\n' \
+        "$ADDA_TRACE_RUN_ID" "$stage" "${wavelength:-null}" "$start" "$end" "$duration" "$status" "$$" "$(hostname)" "$attrs" \
+        >> "$ADDA_TRACE_FILE"
+}
+
 # Shape 인수 구성 함수
 build_shape_command() {
     case "$SHAPE_TYPE" in
@@ -170,29 +226,192 @@ fi
 echo "[OK] All required files found!"
 echo ""
 
+# 완전 대칭인 read 형상은 -sym enf로 한 편광만 계산 (SYMMETRY_CONFIG, 후처리는 CrossSec을 X/Y 양쪽에 반영)
+SYM_ARGS=""
+if [ "$SYMMETRY_ENABLED" = "1" ]; then
+    eval "$(python "$SHAPE_SYMMETRY" plan "$CONFIG_FILE" --shell)"
+    if [ "$SYM_STATUS" = "enforce" ]; then
+        echo "[SYMMETRY] $SYM_FOUND: solving a single polarization ($SYM_ARGS)"
+        echo ""
+    elif [ "$SHAPE_TYPE" = "read" ]; then
+        echo "[SYMMETRY] Both polarizations solved: $SYM_REASON"
+        echo ""
+    fi
+fi
+
+# 구/동심 coated는 결과가 없는 파장을 정확한 Mie 해로 먼저 기록 (MIE_CONFIG['fast_path'], ledger에 completed)
+if [ "$MIE_FAST_PATH" = "1" ]; then
+    echo "[MIE] Computing exact Mie solution for the wavelength grid..."
+    eval "$(python "$MIE_SOLVER" sweep "$CONFIG_FILE" --shell)"
+    if [ "$MIE_STATUS" = "ok" ]; then
+        echo "   $MIE_SHAPE: $MIE_WRITTEN wavelength(s) written, $MIE_REMAINING left for ADDA"
+    else
+        echo "   [WARN] Mie fast path not applied: $MIE_REASON"
+    fi
+    echo ""
+fi
+
+# 준정적 미리보기로 예측한 공명 구간 파장을 먼저 계산 (PREVIEW_CONFIG['focus_sweep'], 파장 격자는 그대로)
+SWEEP_LAMBDAS=$(seq $LAMBDA_START $LAMBDA_STEP $LAMBDA_END)
+if [ "$PREVIEW_FOCUS" = "1" ]; then
+    echo "[PREVIEW] Ordering the sweep around quasi-static resonances..."
+    PREVIEW_REASON=""
+    eval "$(python "$QUASISTATIC_PREVIEW" order "$CONFIG_FILE")"
+    if [ -z "$PREVIEW_REASON" ]; then
+        echo "   Resonances: $PREVIEW_FEATURES; $PREVIEW_FIRST wavelength(s) in the first pass"
+    else
+        echo "   [WARN] Preview not applied, sweeping in wavelength order: $PREVIEW_REASON"
+    fi
+    echo ""
+fi
+
+# 메모리 예측: 노드 메모리에 맞는 rank 구성 또는 -opt mem 결정 (MEMORY_CONFIG)
+if [ "$MEMORY_PLAN_ENABLED" = "1" ] && [ "$MIE_REMAINING" != "0" ]; then
+    echo "[MEMORY] Planning per-rank memory..."
+    eval "$(python "$MEMORY_PLANNER" "$CONFIG_FILE" --shell)"
+    case "$MEM_STATUS" in
+        ok)
+            echo "   Configured layout fits (~${MEM_NODE_MB} MB per node, ${MEM_RANK_MB} MB per rank)"
+            ;;
+        opt_mem|reduced)
+            echo "   [WARN] Configured layout would exceed node memory: $MEM_REASON (~${MEM_NODE_MB} MB per node)"
+            if [ "$MEMORY_PLAN_APPLY" != "1" ]; then
+                echo "   [WARN] MEMORY_CONFIG['apply'] is off; running the configured layout anyway"
+                MEM_STATUS="ok"
+            fi
+            ;;
+        unsafe)
+            echo "   [ERROR] $MEM_REASON (~${MEM_NODE_MB} MB per node at minimum)"
+            if [ "$MEMORY_PLAN_ABORT" = "1" ]; then
+                echo "[ERROR] Aborting before the sweep; see python $MEMORY_PLANNER $CONFIG_FILE"
+                exit 1
+            fi
+            ;;
+        *)
+            echo "   [WARN] Memory plan unavailable: $MEM_REASON"
+            ;;
+    esac
+    if [ "$ORIENT_MODE" = "split" ] && [ "$MEM_STATUS" = "reduced" ]; then
+        ORIENT_JOBS=$MEM_JOBS
+    fi
+    echo ""
+fi
+
 # 기본 결과 디렉토리 생성
 mkdir -p "$RESULT_BASE_DIR1"
 
-# 시뮬레이션 상태 추적 파일
-COMPLETED_FILE="$RESULT_BASE_DIR1/completed_simulations.txt"
-FAILED_FILE="$RESULT_BASE_DIR1/failed_simulations.txt"
+# 시뮬레이션 상태 기록 (SQLite, 기존 completed/failed_simulations.txt는 처음 열 때 가져옴)
+LEDGER_FILE="$RESULT_BASE_DIR1/run_ledger.sqlite"
+declare -A COMPLETED_LAMBDAS=()
+for lambda in $(python "$RUN_LEDGER" completed "$RESULT_BASE_DIR1"); do
+    COMPLETED_LAMBDAS[$lambda]=1
+done
+
+# model_archive.py로 묶인 파장 (lambda_archive.zip에 CrossSec이 있으면 결과가 있는 것으로 취급)
+declare -A ARCHIVED_LAMBDAS=()
+if [ -f "$RESULT_BASE_DIR1/lambda_archive.zip" ]; then
+    for lambda in $(python "$MODEL_ARCHIVE" wavelengths "$CONFIG_FILE" --model-dir "$RESULT_BASE_DIR1"); do
+        ARCHIVED_LAMBDAS[$lambda]=1
+    done
+fi
+
+# 실행 중인 작업의 PID/stdout 기록 디렉토리 (sweep_monitor.py가 감시)
+RUN_DIR="$RESULT_BASE_DIR1/.run"
+mkdir -p "$RUN_DIR"
 
-# 완료된 시뮬레이션 확인 함수
+# 노드 로컬 scratch (끝난 파장 디렉토리만 공유 저장소로 이동)
+if [ "$SCRATCH_ENABLED" = "1" ]; then
+    SCRATCH_MODEL_DIR="$SCRATCH_BASE/$MAT_TYPE"
+    if ! mkdir -p "$SCRATCH_MODEL_DIR"; then
+        echo "[ERROR] Cannot create scratch directory: $SCRATCH_MODEL_DIR"
+        exit 1
+    fi
+fi
+
+# 결과 CrossSec 파일 존재 확인 함수 (배향 평균 결과는 편광 구분 없는 CrossSec, 디렉토리가 없으면 archive 확인)
+has_crosssec_files() {
+    local path=$1
+    if [ ! -d "$path" ]; then
+        local name=${path##*/lambda_}
+        [ -n "${ARCHIVED_LAMBDAS[${name%nm}]}" ]
+        return
+    fi
+    [ -f "$path/CrossSec-X" ] || [ -f "$path/CrossSec-Y" ] || [ -f "$path/CrossSec" ]
+}
+
+# 배향 구적점별 ADDA 작업을 ATTEMPT_ORIENT_JOBS개씩 병렬 실행 후 가중 평균 (split 모드)
+run_orientation_jobs() {
+    local lambda_path=$1
+    local failed=0
+    local running=0
+    local orient_dir beta gamma plan_line
+    local plan_lines
+    
+    # 실패한 작업의 exit code (OOM으로 종료된 작업이 있으면 retry_policy가 out_of_memory로 분류하도록 137 유지)
+    record_orient_failure() {
+        if [ "$1" -eq 137 ] || [ $failed -eq 0 ]; then
+            failed=$1
+        fi
+    }
+    
+    # 프로세스 치환을 wait -n이 기다리지 않도록 배향 목록을 먼저 읽어 둠
+    mapfile -t plan_lines < <(python "$ORIENTATION_AVG" plan "$CONFIG_FILE" "$lambda_path")
+    
+    for plan_line in "${plan_lines[@]}"; do
+        read -r orient_dir beta gamma <<< "$plan_line"
+        # 이전 실행에서 끝난 배향은 재사용
+        if has_crosssec_files "$lambda_path/$orient_dir"; then
+            continue
+        fi
+        if [ $running -ge $ATTEMPT_ORIENT_JOBS ]; then
+            wait -n || record_orient_failure $?
+            running=$((running - 1))
+        fi
+        (
+            local start
+            start=$(now_epoch)
+            eval "$MPI_EXEC $ORIENT_PROCS $ADDA_BIN/mpi/adda_mpi $ADDA_ARGS -orient 0 $beta $gamma -dir $lambda_path/$orient_dir" \
+                > "$lambda_path/$orient_dir.out" 2>&1
+            local code=$?
+            if [ $code -eq 0 ]; then status="ok"; else status="error"; fi
+            trace_emit "adda_orient" "$LAMBDA" "$start" "$(now_epoch)" "$status" \
+                "\"beta\": $beta, \"gamma\": $gamma, \"exit_code\": $code, \"nprocs\": $ORIENT_PROCS"
+            exit $code
+        ) &
+        running=$((running + 1))
+    done
+    
+    while [ $running -gt 0 ]; do
+        wait -n || record_orient_failure $?
+        running=$((running - 1))
+    done
+    
+    if [ $failed -ne 0 ]; then
+        echo "[ERROR] Some orientation jobs failed (see $lambda_path/orient_*.out)"
+        return $failed
+    fi
+    python "$ORIENTATION_AVG" reduce "$lambda_path"
+}
+
+# 완료된 시뮬레이션 확인 함수 (스윕 시작 시 ledger에서 읽은 목록)
 is_simulation_completed() {
     local lambda=$1
-    grep -q "^$lambda$" "$COMPLETED_FILE" 2>/dev/null
+    [ -n "${COMPLETED_LAMBDAS[$lambda]}" ]
 }
 
-# 시뮬레이션 완료 기록 함수
-mark_simulation_completed() {
+# ADDA 실행 없이 완료/실패 기록 (기존 결과 발견, 굴절률 없음)
+record_simulation() {
     local lambda=$1
-    echo "$lambda" >> "$COMPLETED_FILE"
+    local status=$2
+    local reason=$3
+    python "$RUN_LEDGER" record "$RESULT_BASE_DIR1" "$lambda" "$status" ${reason:+"$reason"}
 }
 
-# 시뮬레이션 실패 기록 함수
-mark_simulation_failed() {
-    local lambda=$1
-    echo "$lambda" >> "$FAILED_FILE"
+# 시도 종료 기록 (모니터가 남긴 중단 사유는 ledger에서 유지됨)
+finish_attempt() {
+    local status=$1
+    local reason=$2
+    python "$RUN_LEDGER" finish "$RESULT_BASE_DIR1" "$LEDGER_ATTEMPT_ID" "$ADDA_EXIT" "$status" ${reason:+"$reason"}
 }
 
 # config.py에서 특정 파장의 모든 굴절률 세트 가져오는 함수
@@ -209,8 +428,19 @@ echo "[INFO] Extra ADDA parameters: $EXTRA_ADDA_PARAMS"
 echo "[INFO] Boolean flags: $BOOL_FLAGS"
 echo ""
 
+# 스윕 모니터 백그라운드 실행 (MONITOR_CONFIG['auto_start'])
+MONITOR_PID=""
+if [ "$MONITOR_AUTO_START" = "1" ] && [ -f "$SWEEP_MONITOR" ]; then
+    python "$SWEEP_MONITOR" "$CONFIG_FILE" --model-dir "$RESULT_BASE_DIR1" > "$RUN_DIR/monitor.log" 2>&1 &
+    MONITOR_PID=$!
+    echo "[MONITOR] Sweep monitor started (pid $MONITOR_PID, log: $RUN_DIR/monitor.log)"
+    echo ""
+fi
+
+SWEEP_START=$(now_epoch)
+
 # 파장별 시뮬레이션 루프
-for LAMBDA in $(seq $LAMBDA_START $LAMBDA_STEP $LAMBDA_END); do
+for LAMBDA in $SWEEP_LAMBDAS; do
     echo "[LAMBDA] Processing lambda = $LAMBDA nm..."
     
     # 이미 완료된 시뮬레이션인지 확인
@@ -224,9 +454,9 @@ for LAMBDA in $(seq $LAMBDA_START $LAMBDA_STEP $LAMBDA_END); do
     LAMBDA_PATH="$RESULT_BASE_DIR1/$LAMBDA_DIR"
     
     # 이미 결과가 있는지 확인
-    if [ -f "$LAMBDA_PATH/CrossSec-X" ] || [ -f "$LAMBDA_PATH/CrossSec-Y" ]; then
+    if has_crosssec_files "$LAMBDA_PATH"; then
         echo "  [SKIP] Results already exist, skipping simulation..."
-        mark_simulation_completed $LAMBDA
+        record_simulation $LAMBDA completed
         continue
     fi
     
@@ -240,78 +470,197 @@ for LAMBDA in $(seq $LAMBDA_START $LAMBDA_STEP $LAMBDA_END); do
     if [ "$SUCCESS" = "1" ]; then
         echo "     [VALUES] Refractive indices: $REFRAC_VALUES"
         
-        # ADDA 시뮬레이션 실행 명령 구성
-        echo "  [RUN] Running ADDA simulation..."
-        ADDA_COMMAND="$MPI_EXEC $MPI_PROCESSES $ADDA_BIN/mpi/adda_mpi \
-            $SHAPE_COMMAND \
-            -pol $ADDA_POL \
-            -lambda $(echo "scale=3; $LAMBDA/1000" | bc) \
-            -m $REFRAC_VALUES \
-            -maxiter $ADDA_MAXITER \
-            -dir $LAMBDA_PATH \
-            -eps $ADDA_EPS \
-            $BOOL_FLAGS"
-        
-        # 추가 파라미터들 추가
-        if [ -n "$EXTRA_ADDA_PARAMS" ]; then
-            ADDA_COMMAND="$ADDA_COMMAND $EXTRA_ADDA_PARAMS"
+        # ADDA 출력 위치 (scratch 사용 시 끝난 뒤 LAMBDA_PATH로 이동, split 모드는 끝난 배향 재사용)
+        if [ "$SCRATCH_ENABLED" = "1" ]; then
+            RUN_LAMBDA_PATH="$SCRATCH_MODEL_DIR/$LAMBDA_DIR"
+            if [ "$ORIENT_MODE" != "split" ]; then
+                rm -rf "$RUN_LAMBDA_PATH"
+            fi
+        else
+            RUN_LAMBDA_PATH="$LAMBDA_PATH"
         fi
         
-        echo "     [COMMAND] $ADDA_COMMAND"
-        
-        # 시뮬레이션 실행
-        eval $ADDA_COMMAND
+        # 재시도 정책: 이전 시도 이력에 따라 이번 시도의 solver 설정 결정
+        eval "$(python "$RETRY_POLICY" plan "$CONFIG_FILE" "$RESULT_BASE_DIR1" $LAMBDA)"
+        if [ "$RETRY_ALLOWED" != "1" ]; then
+            echo "  [SKIP] Retry ladder exhausted ($RETRY_REASON); see $RETRY_POLICY status"
+            echo ""
+            continue
+        fi
         
-        # 시뮬레이션 성공 여부 확인
-        if [ $? -eq 0 ]; then
-            # CrossSec 파일이 실제로 생성되었는지 확인
-            if [ -f "$LAMBDA_PATH/CrossSec-X" ] || [ -f "$LAMBDA_PATH/CrossSec-Y" ]; then
+        while [ "$RETRY_ALLOWED" = "1" ]; do
+            CURRENT_ATTEMPT=$RETRY_ATTEMPT
+            
+            # 메모리 예측 결과 적용 (rank 수 상한, 필요 시 -opt mem)
+            if [ "$MEM_STATUS" = "opt_mem" ] || [ "$MEM_STATUS" = "reduced" ]; then
+                if [ "$ORIENT_MODE" != "split" ] && [ "$RETRY_PROCS" -gt "$MEM_PROCS" ]; then
+                    RETRY_PROCS=$MEM_PROCS
+                fi
+                if [ "$MEM_OPT_MEM" = "1" ] && [[ "$RETRY_EXTRA" != *"-opt "* ]]; then
+                    RETRY_EXTRA="$RETRY_EXTRA -opt mem"
+                fi
+            fi
+            
+            # split 모드: 재시도 단계의 procs_factor (out_of_memory)는 동시 배향 작업 수에 적용
+            ATTEMPT_ORIENT_JOBS=$ORIENT_JOBS
+            if [ "$ORIENT_MODE" = "split" ] && [ "$RETRY_PROCS" -lt "$MPI_PROCESSES" ]; then
+                ATTEMPT_ORIENT_JOBS=$(( ORIENT_JOBS * RETRY_PROCS / MPI_PROCESSES ))
+                if [ "$ATTEMPT_ORIENT_JOBS" -lt 1 ]; then
+                    ATTEMPT_ORIENT_JOBS=1
+                fi
+                echo "     [RETRY] $ATTEMPT_ORIENT_JOBS parallel orientation jobs (of $ORIENT_JOBS)"
+            fi
+            
+            # ADDA 시뮬레이션 실행 명령 구성
+            echo "  [RUN] Running ADDA simulation (attempt $CURRENT_ATTEMPT: $RETRY_LABEL)..."
+            ADDA_ARGS="$SHAPE_COMMAND \
+                -pol $RETRY_POL \
+                -lambda $(echo "scale=3; $LAMBDA/1000" | bc) \
+                -m $REFRAC_VALUES \
+                -maxiter $ADDA_MAXITER \
+                -eps $RETRY_EPS \
+                $BOOL_FLAGS"
+            if [ -n "$SYM_ARGS" ]; then
+                ADDA_ARGS="$ADDA_ARGS $SYM_ARGS"
+            fi
+            
+            # 추가 파라미터들 추가 (재시도 단계의 -iter/-opt 포함)
+            if [ -n "$RETRY_EXTRA" ]; then
+                ADDA_ARGS="$ADDA_ARGS $RETRY_EXTRA"
+            fi
+            
+            if [ "$ORIENT_MODE" = "split" ]; then
+                # 배향별 작업은 run_orientation_jobs가 -orient/-dir을 붙여 실행
+                ADDA_COMMAND="run_orientation_jobs $RUN_LAMBDA_PATH"
+            else
+                ADDA_COMMAND="$MPI_EXEC $RETRY_PROCS $ADDA_BIN/mpi/adda_mpi $ADDA_ARGS -dir $RUN_LAMBDA_PATH"
+                if [ -n "$ORIENT_ARGS" ]; then
+                    ADDA_COMMAND="$ADDA_COMMAND $ORIENT_ARGS"
+                fi
+            fi
+            
+            echo "     [COMMAND] $ADDA_COMMAND"
+            
+            # 시뮬레이션 실행 (PID와 stdout을 모니터용으로 기록)
+            PID_FILE="$RUN_DIR/lambda_${LAMBDA}nm.pid"
+            STDOUT_FILE="$RUN_DIR/lambda_${LAMBDA}nm.out"
+            rm -f "$RUN_DIR/lambda_${LAMBDA}nm.aborted"
+            eval "$(python "$RUN_LEDGER" start "$RESULT_BASE_DIR1" $LAMBDA $CURRENT_ATTEMPT $RETRY_PROCS "$ADDA_ARGS $ORIENT_ARGS")"
+            ADDA_START=$(now_epoch)
+            ( eval $ADDA_COMMAND ) > >(tee "$STDOUT_FILE") 2>&1 &
+            ADDA_PID=$!
+            echo "$ADDA_PID" > "$PID_FILE"
+            # rank별 CPU/RSS/쓰기량 sample (작업이 끝나면 ledger의 resources 테이블에 기록)
+            RESOURCE_PID=""
+            if [ "$RESOURCE_SAMPLING" = "1" ] && [ -n "$LEDGER_ATTEMPT_ID" ]; then
+                python "$RESOURCE_SAMPLER" sample "$CONFIG_FILE" "$RESULT_BASE_DIR1" $LAMBDA "$LEDGER_ATTEMPT_ID" $ADDA_PID \
+                    2>> "$RUN_DIR/resource_sampler.log" &
+                RESOURCE_PID=$!
+            fi
+            wait $ADDA_PID
+            ADDA_EXIT=$?
+            if [ -n "$RESOURCE_PID" ]; then
+                wait $RESOURCE_PID
+            fi
+            rm -f "$PID_FILE"
+            if [ $ADDA_EXIT -eq 0 ]; then ADDA_STATUS="ok"; else ADDA_STATUS="error"; fi
+            trace_emit "adda_run" "$LAMBDA" "$ADDA_START" "$(now_epoch)" "$ADDA_STATUS" \
+                "\"exit_code\": $ADDA_EXIT, \"nprocs\": $RETRY_PROCS, \"attempt\": $CURRENT_ATTEMPT"
+            
+            # 결과 분류 및 시도 이력 기록 (FAILURE_CLASS와 다음 시도 설정을 받음)
+            eval "$(python "$RETRY_POLICY" record "$CONFIG_FILE" "$RESULT_BASE_DIR1" $LAMBDA $ADDA_EXIT "$STDOUT_FILE" "$RUN_LAMBDA_PATH" "$LEDGER_ATTEMPT_ID")"
+            
+            # scratch 결과를 공유 저장소로 이동 (실패하면 scratch에 남겨두고 실패로 기록)
+            if [ "$FAILURE_CLASS" = "none" ] && [ "$RUN_LAMBDA_PATH" != "$LAMBDA_PATH" ]; then
+                if ! python "$SCRATCH_STAGE" publish "$RUN_LAMBDA_PATH" "$LAMBDA_PATH"; then
+                    echo "  [ERROR] Stage-out failed; results kept in $RUN_LAMBDA_PATH"
+                    finish_attempt failed "stage-out failed (results in $RUN_LAMBDA_PATH)"
+                    break
+                fi
+            fi
+            
+            if [ "$FAILURE_CLASS" = "none" ]; then
                 echo "  [OK] Simulation completed successfully"
-                mark_simulation_completed $LAMBDA
+                finish_attempt completed
+                break
+            fi
+            
+            echo "  [ERROR] Attempt $CURRENT_ATTEMPT failed: $FAILURE_CLASS (exit code $ADDA_EXIT)"
+            if [ "$RETRY_ALLOWED" = "1" ]; then
+                finish_attempt failed "$FAILURE_CLASS (attempt $CURRENT_ATTEMPT, retrying)"
             else
-                echo "  [ERROR] Simulation completed but no CrossSec files found"
-                mark_simulation_failed $LAMBDA
+                finish_attempt failed "$FAILURE_CLASS after $ATTEMPTS_USED attempt(s)"
             fi
-        else
-            echo "  [ERROR] Simulation failed with exit code $?"
-            mark_simulation_failed $LAMBDA
-        fi
+            if [ "$RETRY_ALLOWED" = "1" ] || [ "$RUN_LAMBDA_PATH" != "$LAMBDA_PATH" ]; then
+                # 실패한 시도의 log는 남기고 부분 결과는 정리 (split 모드는 완료된 배향 재사용)
+                if [ -f "$RUN_LAMBDA_PATH/log" ]; then
+                    cp "$RUN_LAMBDA_PATH/log" "$RUN_DIR/lambda_${LAMBDA}nm.attempt${CURRENT_ATTEMPT}.log"
+                fi
+                if [ "$ORIENT_MODE" != "split" ]; then
+                    rm -rf "$RUN_LAMBDA_PATH"
+                fi
+            fi
+            if [ "$RETRY_ALLOWED" = "1" ]; then
+                echo "  [RETRY] Retrying with: $RETRY_LABEL"
+            else
+                echo "  [FAIL] Giving up: $RETRY_REASON"
+            fi
+        done
         
     else
         echo "  [ERROR] Refractive index data not found for lambda = $LAMBDA nm in config files"
-        mark_simulation_failed $LAMBDA
+        record_simulation $LAMBDA failed "refractive index data not found"
     fi
     
     echo ""
 done
 
+# 비어 있는 scratch 디렉토리 정리 (이동하지 못한 결과는 남김)
+if [ "$SCRATCH_ENABLED" = "1" ]; then
+    python "$SCRATCH_STAGE" clean "$SCRATCH_MODEL_DIR"
+fi
+
+trace_emit "sweep" "" "$SWEEP_START" "$(now_epoch)" "ok" "\"mat_type\": \"$MAT_TYPE\""
+
 echo "[DONE] All simulations completed!"
 echo ""
 
-# 결과 요약 출력
-TOTAL_SIMS=$(seq $LAMBDA_START $LAMBDA_STEP $LAMBDA_END | wc -l)
-COMPLETED_SIMS=0
-FAILED_SIMS=0
-
-if [ -f "$COMPLETED_FILE" ]; then
-    COMPLETED_SIMS=$(cat "$COMPLETED_FILE" | wc -l)
+# 스윕 모니터 종료
+if [ -n "$MONITOR_PID" ]; then
+    kill "$MONITOR_PID" 2>/dev/null
 fi
 
-if [ -f "$FAILED_FILE" ]; then
-    FAILED_SIMS=$(cat "$FAILED_FILE" | wc -l)
-fi
+# 결과 요약 출력 (설정된 파장별 최종 상태 기준)
+eval "$(python "$RUN_LEDGER" summary "$RESULT_BASE_DIR1" $LAMBDA_START $LAMBDA_END $LAMBDA_STEP)"
 
 echo "[SUMMARY] Simulation Summary:"
-echo "  Total simulations: $TOTAL_SIMS"
-echo "  [OK] Completed: $COMPLETED_SIMS"
-echo "  [FAIL] Failed: $FAILED_SIMS"
-echo "  [RATE] Success rate: $(( COMPLETED_SIMS * 100 / TOTAL_SIMS ))%"
+echo "  Total simulations: $LEDGER_TOTAL"
+echo "  [OK] Completed: $LEDGER_COMPLETED"
+echo "  [FAIL] Failed: $LEDGER_FAILED"
+if [ "$LEDGER_PENDING" -gt 0 ] || [ "$LEDGER_RUNNING" -gt 0 ]; then
+    echo "  [PENDING] Not finished: $(( LEDGER_PENDING + LEDGER_RUNNING ))"
+fi
+echo "  [RATE] Success rate: $(( LEDGER_COMPLETED * 100 / LEDGER_TOTAL ))%"
+echo "  [ATTEMPTS] ADDA runs recorded: $LEDGER_ATTEMPTS"
 echo ""
+
+# ADDA 결과와 정확한 Mie 해 비교 (MIE_CONFIG['validate'], 구/동심 coated만)
+if [ "$MIE_VALIDATE" = "1" ]; then
+    python "$MIE_SOLVER" validate "$CONFIG_FILE"
+    echo ""
+fi
+
 echo "[FILES] Files created:"
 echo "  • Simulation results: $RESULT_BASE_DIR1/lambda_*nm/"
-echo "  • Completed simulations log: $COMPLETED_FILE"
-if [ -f "$FAILED_FILE" ]; then
-    echo "  • Failed simulations log: $FAILED_FILE"
+echo "  • Run ledger: $LEDGER_FILE (python adda_utils/run_ledger.py status $RESULT_BASE_DIR1)"
+if [ -f "$RESULT_BASE_DIR1/mie_validation.json" ]; then
+    echo "  • Mie validation: $RESULT_BASE_DIR1/mie_validation.json"
+fi
+if [ -n "$ADDA_TRACE_FILE" ]; then
+    echo "  • Stage timing trace: $ADDA_TRACE_FILE (python adda_utils/stage_tracer.py report $RESULT_BASE_DIR1)"
+fi
+if [ "$RESOURCE_SAMPLING" = "1" ]; then
+    echo "  • Resource usage per wavelength: python adda_utils/resource_sampler.py report $CONFIG_FILE"
 fi
 echo ""
 echo "[NEXT] Next step: Run 'python process_result.py' for post-processing"